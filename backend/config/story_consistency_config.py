@@ -13,5 +13,12 @@ CONSISTENCY_AUTO_CORRECT = True
 # Hard block DM output when critical issues are detected (False = warnings only)
 CONSISTENCY_HARD_BLOCK = False
 
+# Risk score (0..1) at which the deterministic triage escalates a draft to
+# the LLM validator; lower-risk drafts skip the LLM call
+CONSISTENCY_RISK_THRESHOLD = 0.3
+
+# Fraction of low-risk drafts validated by the LLM anyway, to audit the triage
+CONSISTENCY_AUDIT_SAMPLE_RATE = 0.05
+
 # Log level for consistency layer (INFO, WARNING, ERROR)
 CONSISTENCY_LOG_LEVEL = "INFO"
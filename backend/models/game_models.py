@@ -16,6 +16,8 @@ class Campaign(BaseModel):
     campaign_id: str
     world_name: str
     world_blueprint: Dict[str, Any]
+    # Intro pre-generated with a pooled world, consumed by the first intro generation
+    pooled_intro: Optional[Dict[str, Any]] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -226,3 +228,4 @@ class ActionRequest(BaseModel):
     choice_source: Optional[str] = None
     check_result: Optional[int] = None
     client_target_id: Optional[str] = None  # Phase 1: Explicit target selection from frontend
+    action_id: Optional[str] = None  # Client-chosen id, reused on retries so the action's jobs are queued once
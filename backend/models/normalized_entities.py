@@ -136,7 +136,8 @@ def normalize_enemy_list(enemies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     Returns list of dicts (not Pydantic models) for compatibility.
     """
     normalized = []
-    for enemy_data in enemies:
-        enemy_model = normalize_enemy(enemy_data)
+    for i, enemy_data in enumerate(enemies, 1):
+        # Position keeps default ids unique when a template repeats
+        enemy_model = normalize_enemy({"id": f"enemy-{enemy_data.get('name', 'unknown')}-{i}", **enemy_data})
         normalized.append(enemy_model.model_dump(by_alias=True))
     return normalized
@@ -2,8 +2,8 @@
 Campaign Log API Router
 Endpoints for accessing and managing the player's campaign log.
 """
-from fastapi import APIRouter, Query, HTTPException
-from typing import Optional
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from typing import Optional, Any
 from datetime import datetime
 
 from models.log_models import (
@@ -12,7 +12,11 @@ from models.log_models import (
     GetEntityDetailRequest,
     CampaignLog
 )
-from services.campaign_log_service import CampaignLogService
+from services.campaign_log_service import (
+    CampaignLogService,
+    MAX_PAGE_SIZE,
+    open_lead_statuses
+)
 
 router = APIRouter(prefix="/api/campaign/log", tags=["campaign_log"])
 
@@ -31,6 +35,83 @@ def get_db():
     return _db
 
 
+class LogListParams:
+    """Query parameters shared by every category listing endpoint"""
+
+    def __init__(
+        self,
+        campaign_id: str = Query(..., description="Campaign ID"),
+        character_id: Optional[str] = Query(None, description="Optional character ID"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+        updated_since: Optional[datetime] = Query(None, description="Only entries updated at or after this time"),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size (omit for all)")
+    ):
+        self.campaign_id = campaign_id
+        self.character_id = character_id
+        self.fields = fields
+        self.updated_since = updated_since
+        self.cursor = cursor
+        self.limit = limit
+
+
+async def list_category(
+    request: Request,
+    response: Response,
+    entity_type: str,
+    key: str,
+    params: LogListParams,
+    status: Optional[Any] = None
+):
+    """
+    Shared listing for category endpoints.
+    
+    - limit/cursor: cursor pagination; without limit the whole category is
+      returned (in MAX_PAGE_SIZE chunks server-side)
+    - fields: comma-separated projection, e.g. "name,role"
+    - updated_since: only entries written at or after this time; pass back the
+      response's last_updated for incremental sync
+    - ETag / If-None-Match: 304 when nothing in the log changed
+    """
+    db = get_db()
+    service = CampaignLogService(db)
+    campaign_id, character_id = params.campaign_id, params.character_id
+    updated_since, cursor, limit = params.updated_since, params.cursor, params.limit
+    fields = params.fields
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    
+    etag = await service.get_log_etag(
+        campaign_id, character_id,
+        entity_type, status, field_list, updated_since, cursor, limit
+    )
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    
+    try:
+        items = []
+        last_updated = updated_since
+        while True:
+            page = await service.list_entities_page(
+                campaign_id, entity_type, character_id,
+                status=status,
+                fields=field_list,
+                updated_since=updated_since,
+                cursor=cursor,
+                limit=limit or MAX_PAGE_SIZE
+            )
+            items.extend(page["items"])
+            last_updated = page["last_updated"] or last_updated
+            cursor = page["next_cursor"]
+            if limit or not cursor:
+                break
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {key: items, "next_cursor": cursor, "last_updated": last_updated}
+
+
 @router.get("/summary")
 async def get_log_summary(
     campaign_id: str = Query(..., description="Campaign ID"),
@@ -83,18 +164,12 @@ async def get_full_log(
 
 @router.get("/locations")
 async def get_all_locations(
-    campaign_id: str = Query(..., description="Campaign ID"),
-    character_id: Optional[str] = Query(None, description="Optional character ID")
+    request: Request,
+    response: Response,
+    params: LogListParams = Depends()
 ):
-    """Get all known locations"""
-    db = get_db()
-    service = CampaignLogService(db)
-    
-    log = await service.get_log(campaign_id, character_id)
-    if not log:
-        return {"locations": []}
-    
-    return {"locations": list(log.locations.values())}
+    """Get known locations"""
+    return await list_category(request, response, "location", "locations", params)
 
 
 @router.get("/locations/{location_id}")
@@ -116,18 +191,12 @@ async def get_location_detail(
 
 @router.get("/npcs")
 async def get_all_npcs(
-    campaign_id: str = Query(..., description="Campaign ID"),
-    character_id: Optional[str] = Query(None, description="Optional character ID")
+    request: Request,
+    response: Response,
+    params: LogListParams = Depends()
 ):
-    """Get all known NPCs"""
-    db = get_db()
-    service = CampaignLogService(db)
-    
-    log = await service.get_log(campaign_id, character_id)
-    if not log:
-        return {"npcs": []}
-    
-    return {"npcs": list(log.npcs.values())}
+    """Get known NPCs"""
+    return await list_category(request, response, "npc", "npcs", params)
 
 
 @router.get("/npcs/{npc_id}")
@@ -149,18 +218,12 @@ async def get_npc_detail(
 
 @router.get("/factions")
 async def get_all_factions(
-    campaign_id: str = Query(..., description="Campaign ID"),
-    character_id: Optional[str] = Query(None, description="Optional character ID")
+    request: Request,
+    response: Response,
+    params: LogListParams = Depends()
 ):
-    """Get all known factions"""
-    db = get_db()
-    service = CampaignLogService(db)
-    
-    log = await service.get_log(campaign_id, character_id)
-    if not log:
-        return {"factions": []}
-    
-    return {"factions": list(log.factions.values())}
+    """Get known factions"""
+    return await list_category(request, response, "faction", "factions", params)
 
 
 @router.get("/factions/{faction_id}")
@@ -182,18 +245,12 @@ async def get_faction_detail(
 
 @router.get("/quests")
 async def get_all_quests(
-    campaign_id: str = Query(..., description="Campaign ID"),
-    character_id: Optional[str] = Query(None, description="Optional character ID")
+    request: Request,
+    response: Response,
+    params: LogListParams = Depends()
 ):
-    """Get all known quests"""
-    db = get_db()
-    service = CampaignLogService(db)
-    
-    log = await service.get_log(campaign_id, character_id)
-    if not log:
-        return {"quests": []}
-    
-    return {"quests": list(log.quests.values())}
+    """Get known quests"""
+    return await list_category(request, response, "quest", "quests", params)
 
 
 @router.get("/quests/{quest_id}")
@@ -215,99 +272,71 @@ async def get_quest_detail(
 
 @router.get("/rumors")
 async def get_all_rumors(
-    campaign_id: str = Query(..., description="Campaign ID"),
-    character_id: Optional[str] = Query(None, description="Optional character ID")
+    request: Request,
+    response: Response,
+    params: LogListParams = Depends()
 ):
-    """Get all known rumors"""
-    db = get_db()
-    service = CampaignLogService(db)
-    
-    log = await service.get_log(campaign_id, character_id)
-    if not log:
-        return {"rumors": []}
-    
-    return {"rumors": list(log.rumors.values())}
+    """Get known rumors"""
+    return await list_category(request, response, "rumor", "rumors", params)
 
 
 @router.get("/items")
 async def get_all_items(
-    campaign_id: str = Query(..., description="Campaign ID"),
-    character_id: Optional[str] = Query(None, description="Optional character ID")
+    request: Request,
+    response: Response,
+    params: LogListParams = Depends()
 ):
-    """Get all known items"""
-    db = get_db()
-    service = CampaignLogService(db)
-    
-    log = await service.get_log(campaign_id, character_id)
-    if not log:
-        return {"items": []}
-    
-    return {"items": list(log.items.values())}
+    """Get known items"""
+    return await list_category(request, response, "item", "items", params)
 
 
 @router.get("/decisions")
 async def get_all_decisions(
-    campaign_id: str = Query(..., description="Campaign ID"),
-    character_id: Optional[str] = Query(None, description="Optional character ID")
+    request: Request,
+    response: Response,
+    params: LogListParams = Depends()
 ):
-    """Get all recorded decisions"""
-    db = get_db()
-    service = CampaignLogService(db)
-    
-    log = await service.get_log(campaign_id, character_id)
-    if not log:
-        return {"decisions": []}
-    
-    return {"decisions": list(log.decisions.values())}
+    """Get recorded decisions"""
+    return await list_category(request, response, "decision", "decisions", params)
 
 
 @router.get("/leads")
 async def get_all_leads(
-    campaign_id: str = Query(..., description="Campaign ID"),
-    character_id: Optional[str] = Query(None, description="Optional character ID"),
-    status: Optional[str] = Query(None, description="Filter by status (unexplored, active, resolved, abandoned)")
+    request: Request,
+    response: Response,
+    status: Optional[str] = Query(None, description="Filter by status (unexplored, active, resolved, abandoned)"),
+    params: LogListParams = Depends()
 ):
     """
     Get all leads (quest hooks).
     Optionally filter by status.
     
-    Returns: { "leads": [...] }
+    Returns: { "leads": [...], "next_cursor": ..., "last_updated": ... }
     """
-    db = get_db()
-    service = CampaignLogService(db)
-    
-    log = await service.get_log(campaign_id, character_id)
-    if not log:
-        return {"leads": []}
-    
-    # Get all leads
-    leads = list(log.leads.values())
-    
-    # Filter by status if provided
-    if status:
-        leads = [lead for lead in leads if lead.status == status]
-    
-    return {"leads": leads}
+    return await list_category(request, response, "lead", "leads", params, status=status)
 
 
 @router.get("/leads/open")
 async def get_open_leads(
-    campaign_id: str = Query(..., description="Campaign ID"),
-    character_id: Optional[str] = Query(None, description="Optional character ID"),
-    include_abandoned: bool = Query(False, description="Include abandoned leads")
+    request: Request,
+    response: Response,
+    include_abandoned: bool = Query(False, description="Include abandoned leads"),
+    params: LogListParams = Depends()
 ):
     """
     Get all open leads (not resolved).
     By default excludes abandoned leads unless include_abandoned=true.
+    Unpaginated full listings keep the newest-first order.
     
-    Returns: { "leads": [...] }
+    Returns: { "leads": [...], "next_cursor": ..., "last_updated": ... }
     """
-    db = get_db()
-    service = CampaignLogService(db)
-    
-    leads = await service.list_open_leads(campaign_id, character_id, include_abandoned)
-    
-    return {"leads": leads}
+    result = await list_category(
+        request, response, "lead", "leads", params,
+        status=open_lead_statuses(include_abandoned)
+    )
+    if isinstance(result, dict) and not params.limit and not params.fields:
+        result["leads"].sort(key=lambda lead: lead.created_at, reverse=True)
+    return result
 
 
 @router.get("/leads/{lead_id}")
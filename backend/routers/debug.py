@@ -72,3 +72,251 @@ async def debug_database():
                 "details": {}
             }
         }
+
+@router.get("/work_queue")
+async def debug_work_queue():
+    """
+    Post-response work queue status
+    Returns job counts by status, buffer depth and recent failures
+    """
+    try:
+        from services.work_queue import get_work_queue
+        
+        queue = get_work_queue()
+        if queue is None:
+            raise RuntimeError("Work queue not initialized")
+        
+        stats = await queue.stats()
+        recent_failures = await queue.collection.find(
+            {"status": "failed"},
+            {"_id": 0, "kind": 1, "idempotency_key": 1, "attempts": 1, "last_error": 1, "updated_at": 1}
+        ).sort("updated_at", -1).limit(10).to_list(10)
+        
+        return {
+            "success": True,
+            "data": {**stats, "recent_failures": recent_failures},
+            "error": None
+        }
+    except Exception as e:
+        logger.error(f"Debug endpoint error: {e}")
+        return {
+            "success": False,
+            "data": None,
+            "error": {
+                "type": "internal_error",
+                "message": str(e),
+                "details": {}
+            }
+        }
+
+@router.get("/llm")
+async def debug_llm():
+    """
+    LLM prompt cache metrics
+    Returns cached vs uncached prompt tokens per model, static DM prompt cache
+    size, intent tagger cache hit rates and fast-path agreement
+    """
+    from services.llm_client import get_prompt_token_stats
+    from services.intent_cache import get_intent_cache
+    from services.intent_classifier import get_agreement_stats
+    from routers.dungeon_forge import _static_dm_prompt_cache
+    
+    return {
+        "success": True,
+        "data": {
+            "prompt_tokens": get_prompt_token_stats(),
+            "static_dm_prompts_cached": len(_static_dm_prompt_cache),
+            "intent_cache": get_intent_cache().stats(),
+            "intent_fast_path": get_agreement_stats()
+        },
+        "error": None
+    }
+
+@router.get("/indexes")
+async def debug_indexes(collection: str = None):
+    """
+    Index audit
+    Returns declared vs existing indexes and explain() summaries for the
+    known hot query shapes (flags collection scans and in-memory sorts)
+    """
+    try:
+        from services.db_indexes import index_report, explain_query_shapes
+        
+        db = get_db()
+        query_plans = await explain_query_shapes(db, collection)
+        
+        return {
+            "success": True,
+            "data": {
+                "indexes": await index_report(db),
+                "query_plans": query_plans,
+                "collection_scans": [
+                    f"{plan['collection']}({', '.join(plan['filter'])})"
+                    for plan in query_plans if plan.get("collection_scan")
+                ]
+            },
+            "error": None
+        }
+    except Exception as e:
+        logger.error(f"Debug endpoint error: {e}")
+        return {
+            "success": False,
+            "data": None,
+            "error": {
+                "type": "internal_error",
+                "message": str(e),
+                "details": {}
+            }
+        }
+
+@router.get("/campaign_cache")
+async def debug_campaign_cache():
+    """
+    Campaign state cache metrics
+    Returns hit rate, entries, versioned DB writes vs logical updates and conflicts
+    """
+    from services.campaign_cache import get_campaign_cache
+    
+    return {
+        "success": True,
+        "data": get_campaign_cache().stats(),
+        "error": None
+    }
+
+@router.get("/writes")
+async def debug_writes():
+    """
+    Write amplification metrics
+    Returns BSON bytes sent as field-level diffs vs whole-document rewrites
+    for world states, characters and campaign logs
+    """
+    from services.state_diff import get_write_stats
+    
+    return {
+        "success": True,
+        "data": get_write_stats(),
+        "error": None
+    }
+
+@router.get("/consistency_context")
+async def debug_consistency_context():
+    """
+    Story Consistency Agent context metrics
+    Returns tokens sent vs the old full-dump baseline, the budget, items
+    dropped to fit it and a breakdown of the last call
+    """
+    from services.consistency_context import get_consistency_context_stats
+    
+    return {
+        "success": True,
+        "data": get_consistency_context_stats(),
+        "error": None
+    }
+
+@router.get("/consistency_triage")
+async def debug_consistency_triage():
+    """
+    Story consistency triage metrics
+    Returns the escalation rate to the LLM validator, risk signal counts,
+    LLM latency, the latency saved by skipped calls and the audit miss rate
+    """
+    from services.consistency_triage import get_triage_stats
+    
+    return {
+        "success": True,
+        "data": get_triage_stats(),
+        "error": None
+    }
+
+@router.get("/blueprint_index")
+async def debug_blueprint_index():
+    """
+    Shared BlueprintIndex cache metrics
+    Returns cached indexes, hit rate, index builds, blueprint hashes computed
+    and LRU evictions
+    """
+    from services.blueprint_index import get_blueprint_index_stats
+    
+    return {
+        "success": True,
+        "data": get_blueprint_index_stats(),
+        "error": None
+    }
+
+@router.get("/world_pool")
+async def debug_world_pool():
+    """
+    Pre-generated world pool status
+    Returns ready worlds per bucket, in-flight generations, refill rate,
+    claim hit rate and pooled intro usage
+    """
+    try:
+        from services.world_pool import get_world_pool_stats
+        
+        return {
+            "success": True,
+            "data": await get_world_pool_stats(),
+            "error": None
+        }
+    except Exception as e:
+        logger.error(f"Debug endpoint error: {e}")
+        return {
+            "success": False,
+            "data": None,
+            "error": {
+                "type": "internal_error",
+                "message": str(e),
+                "details": {}
+            }
+        }
+
+@router.get("/traces")
+async def debug_traces(limit: int = 10, name: str = None, order: str = "slowest", trace_id: str = None):
+    """
+    Request traces
+    Returns the slowest (or newest, order=recent) buffered requests broken
+    down by stage, with LLM tokens and Mongo op counts; `name` filters by
+    endpoint (e.g. "POST /api/rpg_dm/action"), `trace_id` returns one trace
+    as OTLP/JSON
+    """
+    from services.tracing import get_recent_traces, get_trace, get_tracing_stats
+    
+    if trace_id:
+        trace = get_trace(trace_id)
+        return {
+            "success": trace is not None,
+            "data": trace,
+            "error": None if trace else {"type": "not_found", "message": f"Trace not in buffer: {trace_id}", "details": {}}
+        }
+    
+    return {
+        "success": True,
+        "data": {
+            **get_tracing_stats(),
+            "traces": get_recent_traces(limit=limit, name=name, slowest=order != "recent")
+        },
+        "error": None
+    }
+
+@router.get("/dice")
+async def debug_dice(session_id: str = None):
+    """
+    Dice subsystem
+    Returns formula cache hit rate and live RNG sessions; `session_id`
+    returns that session's roll count (and seed, only if the client chose it)
+    """
+    from services.dice import get_dice_stats, get_dice_session_info
+    
+    if session_id:
+        session = get_dice_session_info(session_id)
+        return {
+            "success": session is not None,
+            "data": session,
+            "error": None if session else {"type": "not_found", "message": f"No dice session: {session_id}", "details": {}}
+        }
+    
+    return {
+        "success": True,
+        "data": get_dice_stats(),
+        "error": None
+    }
@@ -4,13 +4,17 @@ Handles world generation, character creation, intro generation, and action resol
 """
 import os
 import json
+import hashlib
 import logging
 import uuid
+import random
 import asyncio
+import time
 from typing import Dict, Any, Optional, List
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from datetime import datetime, timezone
+from collections import OrderedDict
 import sys
 from pathlib import Path
 
@@ -18,7 +22,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from utils.api_response import api_success, api_error, validation_error, not_found_error
 from utils.entity_mentions import (
-    build_entity_index_from_world_blueprint,
+    get_entity_matcher,
     extract_entity_mentions
 )
 
@@ -29,6 +33,15 @@ from services.scene_hook_integration import (
     generate_scene_with_advanced_hooks,
     convert_hooks_to_lead_deltas
 )
+from services.action_pipeline import Stage, StageGraph, run_in_background
+from services.work_queue import register_handler, enqueue_job, get_work_queue
+from services.narration_stream import current_narration_stream, open_narration_stream, to_ndjson
+from services.campaign_cache import (
+    campaign_session, get_campaign_cache, invalidate_campaign, load_state, save_state
+)
+from services.knowledge_facts import upsert_introduction_facts
+from services.blueprint_index import get_blueprint_hash
+from services.tracing import span, traced, traced_endpoint
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +86,8 @@ class WorldBlueprintRequest(BaseModel):
     tone: str
     starting_region_hint: str
     campaign_id: Optional[str] = None
+    # Optional {race, class, background} of the character; picks the world pool bucket
+    archetype: Optional[Dict[str, Any]] = None
 
 class IntroGenerationRequest(BaseModel):
     """Request for generating cinematic intro"""
@@ -89,7 +104,12 @@ class CharacterCreateRequest(BaseModel):
 # MONGODB CRUD HELPERS
 # ═══════════════════════════════════════════════════════════════════════
 
-async def create_campaign(campaign_id: str, world_name: str, world_blueprint: Dict[str, Any]) -> Dict[str, Any]:
+async def create_campaign(
+    campaign_id: str,
+    world_name: str,
+    world_blueprint: Dict[str, Any],
+    pooled_intro: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
     """Create a new campaign document in MongoDB with verification"""
     from models.game_models import Campaign
     
@@ -98,6 +118,7 @@ async def create_campaign(campaign_id: str, world_name: str, world_blueprint: Di
         campaign_id=campaign_id,
         world_name=world_name,
         world_blueprint=world_blueprint,
+        pooled_intro=pooled_intro,
         created_at=datetime.now(timezone.utc),
         updated_at=datetime.now(timezone.utc)
     )
@@ -124,10 +145,8 @@ async def create_campaign(campaign_id: str, world_name: str, world_blueprint: Di
         raise
 
 async def get_campaign(campaign_id: str) -> Optional[Dict[str, Any]]:
-    """Retrieve campaign by ID"""
-    db = get_db()
-    campaign = await db.campaigns.find_one({"campaign_id": campaign_id})
-    return campaign
+    """Retrieve campaign by ID (cached; world_blueprint is shared, treat it as read-only)"""
+    return await load_state(get_db(), "campaigns", {"campaign_id": campaign_id})
 
 async def create_world_state(campaign_id: str, initial_state: Dict[str, Any]) -> Dict[str, Any]:
     """Create initial world state for a campaign"""
@@ -146,32 +165,22 @@ async def create_world_state(campaign_id: str, initial_state: Dict[str, Any]) ->
     world_state_dict['updated_at'] = world_state_dict['updated_at'].isoformat()
     
     await db.world_states.insert_one(world_state_dict)
+    get_campaign_cache().prime("world_states", {"campaign_id": campaign_id}, world_state_dict)
     logger.info(f"✅ World state created for campaign: {campaign_id}")
     return world_state_dict
 
 async def get_world_state(campaign_id: str) -> Optional[Dict[str, Any]]:
     """Retrieve world state by campaign ID"""
-    db = get_db()
-    world_state = await db.world_states.find_one({"campaign_id": campaign_id})
-    return world_state
+    return await load_state(get_db(), "world_states", {"campaign_id": campaign_id})
 
 async def update_world_state(campaign_id: str, state_update: Dict[str, Any]) -> Dict[str, Any]:
-    """Update world state with new changes"""
-    db = get_db()
-    result = await db.world_states.update_one(
-        {"campaign_id": campaign_id},
-        {
-            "$set": {
-                "world_state": state_update,
-                "updated_at": datetime.now(timezone.utc).isoformat()
-            }
-        }
-    )
+    """Update world state with new changes (written at the end of the request inside a campaign session)"""
+    world_state = await save_state(get_db(), "world_states", {"campaign_id": campaign_id}, {"world_state": state_update})
     
-    if result.matched_count == 0:
+    if world_state is None:
         raise ValueError(f"World state not found for campaign: {campaign_id}")
     
-    return await get_world_state(campaign_id)
+    return world_state
 
 async def create_character_doc(campaign_id: str, character_id: str, character_state: Dict[str, Any], player_id: Optional[str] = None) -> Dict[str, Any]:
     """Create character document"""
@@ -193,45 +202,40 @@ async def create_character_doc(campaign_id: str, character_id: str, character_st
     char_dict['updated_at'] = char_dict['updated_at'].isoformat()
     
     await db.characters.insert_one(char_dict)
+    get_campaign_cache().prime("characters", {"campaign_id": campaign_id, "character_id": character_id}, char_dict)
     logger.info(f"✅ Character created: {character_id}")
     return char_dict
 
 async def get_character_doc(campaign_id: str, character_id: str) -> Optional[Dict[str, Any]]:
     """Retrieve character by campaign and character ID"""
-    db = get_db()
-    char_doc = await db.characters.find_one({"campaign_id": campaign_id, "character_id": character_id})
-    return char_doc
+    return await load_state(get_db(), "characters", {"campaign_id": campaign_id, "character_id": character_id})
 
 async def update_character_state(campaign_id: str, character_id: str, character_state: Dict[str, Any]) -> Dict[str, Any]:
-    """Update character state"""
-    db = get_db()
-    result = await db.characters.update_one(
+    """Update character state (written at the end of the request inside a campaign session)"""
+    char_doc = await save_state(
+        get_db(), "characters",
         {"campaign_id": campaign_id, "character_id": character_id},
-        {
-            "$set": {
-                "character_state": character_state,
-                "updated_at": datetime.now(timezone.utc).isoformat()
-            }
-        }
+        {"character_state": character_state}
     )
     
-    if result.matched_count == 0:
+    if char_doc is None:
         raise ValueError(f"Character not found: {character_id} in campaign {campaign_id}")
     
-    return await get_character_doc(campaign_id, character_id)
+    return char_doc
 
 
 # ═══════════════════════════════════════════════════════════════════════
 # AGENT HELPERS
 # ═══════════════════════════════════════════════════════════════════════
 
-async def run_intent_tagger(player_action: str, character_state: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    INTENT TAGGER: Classify player action into structured intent.
+async def _llm_intent_tagger(player_action: str, character_state: Dict[str, Any]) -> Dict[str, Any]:
     """
-    from services.llm_client import get_openai_client
+    INTENT TAGGER (LLM): Classify player action into structured intent.
     
-    client = get_openai_client()
+    Raises:
+        Any provider or JSON parsing error
+    """
+    from services.llm_client import chat_completion
     
     prompt = f"""You are an INTENT TAGGER for a D&D 5e RPG.
 
@@ -250,27 +254,69 @@ Character proficiencies: {character_state.get("proficiencies", [])}
 
 Output ONLY valid JSON."""
     
+    completion = await chat_completion(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": "You are a precise JSON classifier."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.1
+    )
+    
+    content = completion.choices[0].message.content.strip()
+    
+    if content.startswith("```"):
+        content = content.split("```")[1]
+        if content.startswith("json"):
+            content = content[4:]
+        content = content.strip()
+    
+    return json.loads(content)
+
+
+async def _shadow_intent_check(player_action: str, character_state: Dict[str, Any], local: Dict[str, Any]) -> None:
+    """Ask the LLM anyway for a sample of fast-path turns to measure agreement"""
+    from services.intent_classifier import record_agreement
+    
+    record_agreement(local, await _llm_intent_tagger(player_action, character_state))
+
+
+async def run_intent_tagger(
+    player_action: str,
+    character_state: Dict[str, Any],
+    campaign_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    INTENT TAGGER: Classify player action into structured intent.
+    
+    1. Intent cache (exact / near-duplicate actions)
+    2. Rules fast path when the keyword classifier is confident
+    3. LLM tagger otherwise
+    """
+    from services.intent_cache import get_intent_cache
+    from services.intent_classifier import (
+        classify_intent, record_agreement,
+        INTENT_FAST_PATH_THRESHOLD, INTENT_FAST_PATH_SHADOW_RATE
+    )
+    
+    intent_cache = get_intent_cache()
+    proficiencies = character_state.get("proficiencies", [])
+    cached = intent_cache.get(player_action, proficiencies, campaign_id=campaign_id)
+    if cached is not None:
+        return cached
+    
+    local = classify_intent(player_action)
+    if local["intent"] is not None and local["confidence"] >= INTENT_FAST_PATH_THRESHOLD:
+        logger.info(f"🏷️ Intent fast path (confidence={local['confidence']}, rules={local['matched']})")
+        if random.random() < INTENT_FAST_PATH_SHADOW_RATE:
+            run_in_background(
+                _shadow_intent_check(player_action, character_state, local),
+                name="intent_shadow_check"
+            )
+        return local["intent"]
+    
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a precise JSON classifier."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1
-        )
-        
-        content = completion.choices[0].message.content.strip()
-        
-        if content.startswith("```"):
-            content = content.split("```")[1]
-            if content.startswith("json"):
-                content = content[4:]
-            content = content.strip()
-        
-        intent = json.loads(content)
-        return intent
-        
+        intent = await _llm_intent_tagger(player_action, character_state)
     except Exception as e:
         logger.error(f"❌ Intent tagger failed: {e}")
         return {
@@ -280,8 +326,60 @@ Output ONLY valid JSON."""
             "action_type": "exploration",
             "risk_level": 1
         }
+    
+    if local["intent"] is not None:
+        record_agreement(local, intent)
+    intent_cache.put(player_action, proficiencies, intent, campaign_id=campaign_id)
+    return intent
+
+
+async def _stream_dm_json(
+    messages: List[Dict[str, str]],
+    narration_stream,
+    world_blueprint: Dict[str, Any],
+    world_state: Dict[str, Any],
+    scene_context: str
+) -> str:
+    """
+    Stream the DUNGEON FORGE completion, pushing narration sentences to the
+    client as soon as they pass the Human DM Filter and lore checker.
+    
+    Returns:
+        The complete raw JSON text, for normal parsing
+    """
+    from services.llm_client import stream_chat_completion
+    from services.narration_stream import NarrationJSONExtractor
+    from services.narration_filter import IncrementalNarrationFilter
+    from services.lore_checker_service import IncrementalLoreChecker
+    
+    extractor = NarrationJSONExtractor("narration")
+    sentence_filter = IncrementalNarrationFilter(context=scene_context)
+    lore_checker = IncrementalLoreChecker(world_blueprint, world_state, auto_correct=False)
+    raw_chunks = []
+    flushed = False
+    
+    async for delta in stream_chat_completion(model="gpt-4o", messages=messages, temperature=0.7):
+        raw_chunks.append(delta)
+        released = sentence_filter.feed(extractor.feed(delta))
+        # Narration string closed: flush the last sentence without waiting for the rest of the JSON
+        if extractor.done and not flushed:
+            released += sentence_filter.finish()
+            flushed = True
+        for sentence in released:
+            narration_stream.emit_sentence(lore_checker.check_sentence(sentence))
+    
+    if not flushed:
+        for sentence in sentence_filter.finish():
+            narration_stream.emit_sentence(lore_checker.check_sentence(sentence))
+    
+    lore_result = lore_checker.result()
+    if lore_result["issues"]:
+        logger.warning(f"⚠️ LORE CHECKER (streaming): {len(lore_result['issues'])} potential issues (soft mode - not blocking)")
+    
+    return "".join(raw_chunks)
 
 
+@traced("dungeon_forge")
 async def run_dungeon_forge(
     player_action: str,
     character_state: Dict[str, Any],
@@ -302,10 +400,7 @@ async def run_dungeon_forge(
     PHASE 1: DMG-based pacing, information, and consequence guidance.
     PHASE 2: NPC personality, improvisation, session flow.
     """
-    from services.llm_client import get_openai_client
-    from services.consequence_service import ConsequenceEscalation
-    
-    client = get_openai_client()
+    from services.llm_client import chat_completion
     from services.context_memory_service import ContextMemory
     
     # Set defaults for Phase 1 systems
@@ -370,17 +465,22 @@ Check result: {check_result if check_result else "None (needs check if intent_fl
 
 Generate the JSON response."""
     
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_content}
+    ]
+    
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_content}
-            ],
-            temperature=0.7
-        )
+        narration_stream = current_narration_stream()
+        if narration_stream is not None:
+            # Streaming request: release filtered sentences while the JSON arrives
+            scene_context = session_mode.get("mode", "exploration") if session_mode else "exploration"
+            content = await _stream_dm_json(messages, narration_stream, world_blueprint, world_state, scene_context)
+        else:
+            completion = await chat_completion(model="gpt-4o", messages=messages, temperature=0.7)
+            content = completion.choices[0].message.content
         
-        content = completion.choices[0].message.content.strip()
+        content = content.strip()
         
         if content.startswith("```"):
             content = content.split("```")[1]
@@ -426,27 +526,40 @@ Generate the JSON response."""
 # ═══════════════════════════════════════════════════════════════════════
 
 @router.post("/world-blueprint/generate")
+@traced_endpoint("POST /api/world-blueprint/generate")
 async def generate_world_blueprint_endpoint(request: WorldBlueprintRequest):
     """
     Generate a persistent world blueprint using WORLD-FORGE.
+    Claims a pre-generated world from the world pool when one matches.
     Stores in MongoDB under campaigns collection.
     """
     try:
         from services.world_forge_service import generate_world_blueprint
+        from services.world_pool import claim_pooled_world
         
-        logger.info(f"🌍 Generating world blueprint: {request.world_name}")
-        
-        blueprint = generate_world_blueprint(
-            world_name=request.world_name,
-            tone=request.tone,
-            starting_region_hint=request.starting_region_hint
+        campaign_id = request.campaign_id or str(uuid.uuid4())
+        pooled = await claim_pooled_world(
+            request.world_name, request.tone, request.archetype, campaign_id, request.starting_region_hint
         )
         
-        campaign_id = request.campaign_id or str(uuid.uuid4())
+        if pooled:
+            logger.info(f"🌍 Using pooled world blueprint: {request.world_name}")
+            blueprint = pooled["world_blueprint"]
+            pooled_intro = pooled["pooled_intro"]
+        else:
+            logger.info(f"🌍 Generating world blueprint: {request.world_name}")
+            blueprint = await generate_world_blueprint(
+                world_name=request.world_name,
+                tone=request.tone,
+                starting_region_hint=request.starting_region_hint
+            )
+            pooled_intro = None
+        
         campaign_dict = await create_campaign(
             campaign_id=campaign_id,
             world_name=request.world_name,
-            world_blueprint=blueprint
+            world_blueprint=blueprint,
+            pooled_intro=pooled_intro
         )
         
         starting_location = blueprint.get("starting_town", {}).get("name", "Unknown")
@@ -486,27 +599,25 @@ async def get_latest_campaign():
     try:
         db = get_db()
         
-        # Get all campaigns sorted by newest first
-        campaigns = await db.campaigns.find({}, sort=[("_id", -1)]).limit(10).to_list(10)
+        # Get the 10 newest campaign ids (projection keeps blueprints off the wire)
+        recent = await db.campaigns.find({}, {"campaign_id": 1}, sort=[("_id", -1)]).limit(10).to_list(10)
         
-        if not campaigns:
+        if not recent:
             return not_found_error("No campaigns found")
         
-        # Find the first campaign that has a character
-        campaign = None
-        character = None
-        for camp in campaigns:
-            campaign_id = camp["campaign_id"]
-            char = await db.characters.find_one({"campaign_id": campaign_id})
-            if char:
-                campaign = camp
-                character = char
-                break
-        
-        if not campaign or not character:
+        # Find the newest campaign that has a character (one query instead of one per campaign)
+        recent_ids = [camp["campaign_id"] for camp in recent]
+        chars = await db.characters.find({"campaign_id": {"$in": recent_ids}}).to_list(None)
+        char_by_campaign = {}
+        for char in chars:
+            char_by_campaign.setdefault(char["campaign_id"], char)
+        
+        campaign_id = next((cid for cid in recent_ids if cid in char_by_campaign), None)
+        if not campaign_id:
             return not_found_error("No campaigns with characters found")
         
-        campaign_id = campaign["campaign_id"]
+        character = char_by_campaign[campaign_id]
+        campaign = await db.campaigns.find_one({"campaign_id": campaign_id})
         
         # Get world state
         world_state = await db.world_states.find_one({"campaign_id": campaign_id})
@@ -523,7 +634,7 @@ async def get_latest_campaign():
         entity_mentions = []
         if intro_text:
             try:
-                entity_index = build_entity_index_from_world_blueprint(
+                entity_index = get_entity_matcher(
                     campaign.get("world_blueprint", {})
                 )
                 entity_mentions = extract_entity_mentions(intro_text, entity_index)
@@ -616,6 +727,7 @@ async def get_latest_campaign():
 
 
 @router.post("/intro/generate")
+@traced_endpoint("POST /api/intro/generate")
 async def generate_intro_endpoint(request: IntroGenerationRequest):
     """
     Generate a 5-section cinematic intro using INTRO-NARRATOR.
@@ -623,6 +735,7 @@ async def generate_intro_endpoint(request: IntroGenerationRequest):
     """
     try:
         from services.intro_service import generate_intro_markdown
+        from services.world_pool import personalize_pooled_intro
         
         logger.info(f"📖 Generating intro for campaign: {request.campaign_id}, character: {request.character_id}")
         
@@ -650,11 +763,14 @@ async def generate_intro_endpoint(request: IntroGenerationRequest):
             "description": world_blueprint.get("starting_region", {}).get("description", "")
         }
         
-        intro_md = generate_intro_markdown(
-            character=character,
-            region=region,
-            world_blueprint=world_blueprint
-        )
+        # World pool: adapt the intro pre-generated for this archetype, if any
+        intro_md = await personalize_pooled_intro(campaign.get("pooled_intro"), character)
+        if intro_md is None:
+            intro_md = await generate_intro_markdown(
+                character=character,
+                region=region,
+                world_blueprint=world_blueprint
+            )
         
         # P0 FIX: Apply narration filter to intro (allow 16 for geography + world-building)
         from services.narration_filter import NarrationFilter
@@ -665,33 +781,23 @@ async def generate_intro_endpoint(request: IntroGenerationRequest):
         db = get_db()
         await db.campaigns.update_one(
             {"campaign_id": request.campaign_id},
-            {"$set": {"intro": intro_md}}
+            {"$set": {"intro": intro_md}, "$unset": {"pooled_intro": ""}}
         )
+        invalidate_campaign(request.campaign_id)
         logger.info(f"✅ Intro generated ({len(intro_md)} chars) and saved to campaign")
         
         # Extract entity mentions from intro
-        entity_index = build_entity_index_from_world_blueprint(world_blueprint)
+        entity_index = get_entity_matcher(world_blueprint)
         entity_mentions = extract_entity_mentions(intro_md, entity_index)
         logger.info(f"🔗 Extracted {len(entity_mentions)} entity mentions from intro")
         
         # Auto-create KnowledgeFacts for entities mentioned in intro
         if entity_mentions:
             from routers import knowledge as knowledge_router
-            for mention in entity_mentions:
-                # For intro, all mentions are new
-                await knowledge_router.get_db().knowledge_facts.insert_one({
-                    "campaign_id": request.campaign_id,
-                    "character_id": request.character_id,
-                    "entity_type": mention["entity_type"],
-                    "entity_id": mention["entity_id"],
-                    "entity_name": mention["display_text"],
-                    "fact_type": "introduction",
-                    "fact_text": f"Introduced in campaign intro: '{mention['display_text']}'",
-                    "revealed_at": datetime.now(timezone.utc),
-                    "source": "narration",
-                    "metadata": {}
-                })
-                logger.info(f"📚 Created intro knowledge fact for {mention['entity_type']}: {mention['display_text']}")
+            await upsert_introduction_facts(
+                knowledge_router.get_db(), request.campaign_id, request.character_id, entity_mentions,
+                fact_text=lambda mention: f"Introduced in campaign intro: '{mention['display_text']}'"
+            )
         
         # Generate dynamic scene description (where and why)
         starting_town = world_blueprint.get("starting_town", {})
@@ -808,6 +914,78 @@ def generate_combat_options(combat_state: Dict[str, Any]) -> List[str]:
     return options
 
 
+# ═══════════════════════════════════════════════════════════════════════
+# DM PROMPT: STATIC PREFIX (memoized per world blueprint)
+# ═══════════════════════════════════════════════════════════════════════
+
+STATIC_DM_PROMPT_CACHE_SIZE = 128
+_static_dm_prompt_cache: "OrderedDict[str, str]" = OrderedDict()
+
+
+def format_world_canon(world_blueprint: Dict[str, Any]) -> str:
+    """
+    Public canon from the world blueprint for the DM prompt.
+    Secrets (NPC secrets, hidden POI functions, secret faction goals) are left out.
+    """
+    world_core = world_blueprint.get("world_core", {})
+    region = world_blueprint.get("starting_region", {})
+    town = world_blueprint.get("starting_town", {})
+    realm = world_blueprint.get("local_realm", {})
+    
+    lines = [
+        "WORLD CANON (world_blueprint)",
+        "",
+        f"World: {world_core.get('name', 'Unknown')} | Tone: {world_core.get('tone', 'Unknown')} | Magic: {world_core.get('magic_level', 'Unknown')}",
+        f"Region: {region.get('name', 'Unknown')} - {region.get('description', '')}",
+        f"Town: {town.get('name', 'Unknown')} ({town.get('role', '')}) - {town.get('summary', '')}",
+    ]
+    if realm.get("lord_name"):
+        lines.append(f"Realm: ruled by {realm['lord_name']} from {realm.get('lord_holding_name', 'Unknown')}; capital {realm.get('capital_name', 'Unknown')}")
+    
+    pois = world_blueprint.get("points_of_interest", [])
+    if pois:
+        lines += ["", "Points of interest:"]
+        lines += [f"- {poi.get('name')} ({poi.get('type', 'location')}): {poi.get('description', '')}" for poi in pois if poi.get("name")]
+    
+    npcs = world_blueprint.get("key_npcs", [])
+    if npcs:
+        lines += ["", "Key NPCs:"]
+        lines += [
+            f"- {npc.get('name')} - {npc.get('role', '')} [{', '.join(npc.get('personality_tags', []))}]"
+            for npc in npcs if npc.get("name")
+        ]
+    
+    factions = world_blueprint.get("factions", [])
+    if factions:
+        lines += ["", "Factions:"]
+        lines += [f"- {f.get('name')} ({f.get('type', '')}): {f.get('public_goal', '')}" for f in factions if f.get("name")]
+    
+    return "\n".join(lines)
+
+
+def get_static_dm_prompt(world_blueprint: Dict[str, Any]) -> str:
+    """
+    Byte-identical prompt prefix for every turn in a world: DM rules, output
+    format and world canon. Memoized per blueprint hash (LRU); the hash itself
+    is computed once per blueprint object, which the campaign cache shares
+    across turns.
+    """
+    key = get_blueprint_hash(world_blueprint)
+    cached = _static_dm_prompt_cache.get(key)
+    if cached is not None:
+        _static_dm_prompt_cache.move_to_end(key)
+        return cached
+    
+    from services.prompts import DM_AGENT_STATIC_RULES
+    
+    static_prompt = f"{DM_AGENT_STATIC_RULES}\n---\n\n{format_world_canon(world_blueprint or {})}\n\n---\n\n"
+    _static_dm_prompt_cache[key] = static_prompt
+    if len(_static_dm_prompt_cache) > STATIC_DM_PROMPT_CACHE_SIZE:
+        _static_dm_prompt_cache.popitem(last=False)
+    logger.info(f"🧱 Built static DM prompt for blueprint {key[:16]} ({len(static_prompt)} chars)")
+    return static_prompt
+
+
 def build_a_version_dm_prompt(
     character_state: Dict[str, Any],
     world_state: Dict[str, Any],
@@ -834,12 +1012,12 @@ def build_a_version_dm_prompt(
     
     PHASE 1: Pacing, Information, Consequences, Context Memory
     PHASE 2: NPC Personality, Improvisation, Session Flow
+    
+    Everything per turn (pacing, NPC personalities, improvisation, tailing
+    quest) goes in the dynamic suffix; the blueprint prefix stays cacheable.
     """
-    from services.consequence_service import ConsequenceEscalation
     from services.npc_personality_service import format_for_dm_prompt as format_personality_prompt
-    from services.session_flow_service import format_for_dm_prompt as format_session_prompt
     from services.improvisation_service import format_for_dm_prompt as format_improvisation_prompt
-    from services.matt_mercer_narration import get_narration_guidelines_for_mode as get_mercer_guidelines_for_mode
     
     character_name = character_state.get("name", "Adventurer")
     character_class = character_state.get("class", character_state.get("class_", "Unknown"))
@@ -876,6 +1054,9 @@ Skill: {intent_flags.get('suggested_skill', 'None')}
 Reasoning: {intent_flags.get('dc_reasoning', '')}
 **YOU MUST USE THIS DC - DO NOT INVENT YOUR OWN**
 """
+        if intent_flags.get("check_odds"):
+            from services.probability_tables import format_success_chance
+            dc_info += f"Odds: {format_success_chance(intent_flags['check_odds'])}\n"
     
     # Build check result info
     check_result_info = ""
@@ -884,188 +1065,30 @@ Reasoning: {intent_flags.get('dc_reasoning', '')}
     else:
         check_result_info = "No check result yet - await player roll if check required."
     
-    prompt = f"""DUNGEON MASTER AGENT — SYSTEM PROMPT (v6.1 Unified Edition)
-
-SYSTEM
-
-You are the Dungeon Master (DM) Engine for a D&D sandbox application.
-Your purpose is to generate immersive second-person narration describing only what the player perceives.
-You do not determine mechanics, resolve checks, modify world state, invent DCs, or infer unseen information.
-
-Your narration must strictly follow:
-
-world_blueprint
-
-world_state
-
-quest_state
-
-npc_registry
-
-story_threads
-
-mechanical_context
-
-You are not a co-author of the story.
-You are the camera that describes perceptible outcomes of validated mechanics.
-
-BEHAVIOR RULES
-
-1. Perspective & Voice
-
-Strict second-person POV ("You step… You see…").
-
-No first-person ("I") or third-person ("the hero").
-
-No omniscience: only reveal what the player knows, sees, senses, or learns through checks.
-
-2. Sentence Limits
-
-Based on scene_mode:
-
-intro → 12–16 sentences
-
-exploration → 6–10 sentences
-
-social → 6–10 sentences
-
-combat → 4–8 sentences
-
-travel → 6–8 sentences
-
-rest → 3–6 sentences
-
-NEVER exceed the max; never fall below the minimum.
-
-3. Information Boundaries
-
-You may not:
-
-Reveal NPC thoughts, secrets, motivations unless discovered.
-
-Reveal hidden traps, illusions, or enemies prematurely.
-
-Retcon or contradict existing world canon.
-
-Describe the outcome of ability checks unless mechanical_context provides results.
-
-4. Canon & Consistency
-
-You must respect ALL injected canonical data:
-
-world_blueprint — immutable geography, factions, cultures, history
-
-world_state — active events, known facts, current conditions
-
-quest_state — active quests, stages, goals
-
-npc_registry — NPC personalities, relationships, knowledge, location
-
-story_threads — long-running narrative arcs
-
-scene_history — previous narration context
-
-You may add small sensory details, but NEVER contradict canon.
-
-5. Mechanics Compliance
-
-You must accept mechanical data as authoritative:
-
-HP values
-
-Conditions
-
-Check results
-
-Success/Fail outcomes
-
-Damage dealt
-
-Turn order (combat)
-
-You cannot invent or change mechanics.
-
-6. Tone & Style
-
-Vivid but concise description
-
-Balanced sensory detail (sound, sight, touch, smell)
-
-No verbosity
-
-No meta-commentary
-
-No rules explanations
-
-No dialogue unless necessary
-
-Avoid clichés ("Suddenly…", "Out of nowhere…")
-
-7. Always End with Player Agency
-
-Every narration ends with:
-
-"What do you do?"
-
-Never create option lists or numbered choices.
-
-TASK RULES — DM NARRATION LOOP
-
-When generating narration, follow these steps:
-
-1. Validate Inputs
-
-Check that required context exists.
-If something major is missing (rare), still generate narration but avoid referencing unknown details.
-
-2. Interpret Player Action
-
-Understand what the player attempted and what the engine resolved.
-
-3. Integrate Mechanical Outcomes
-
-If mechanical_context includes check results, HP changes, or conditions → narrate them faithfully.
-
-4. Pull Relevant Canon
-
-Use world_blueprint, quest_state, npc_registry, and story_threads to maintain consistency.
-
-5. Construct Scene-Mode-appropriate Narration
-
-Apply sentence limits and tone rules for the active scene_mode.
-
-6. Maintain Story Continuity
-
-Do not drop active quests, NPC arcs, or story threads unless resolved.
-
-7. Add Sensory Detail
-
-Provide environmental immersion without over-writing.
-
-8. Finish With Agency
-
-End with: "What do you do?"
-
-CONTEXT
-
-The runtime system injects:
-
-scene_mode
-player_action
-mechanical_context
-world_blueprint
-world_state
-quest_state
-npc_registry
-story_threads
-scene_history
-entity_visibility
-
-These MUST guide your narration.
-
----
-
-INJECTED CONTEXT FOR THIS REQUEST
+    # Pacing from the tension score (DMG p.24)
+    pacing_info = "No pacing guidance."
+    if pacing_instructions:
+        pacing_info = f"""Tension: {pacing_instructions.get("tension_score", "?")}/100 - {pacing_instructions.get("phase", "unknown")}
+Guidance: {pacing_instructions.get("dm_guidance", "")}
+Narration style: {pacing_instructions.get("narration_style", "")}"""
+    
+    # Optional sections are left out entirely when there is nothing to say
+    extra_sections = ""
+    if npc_personalities:
+        extra_sections += "\nNPC Personalities\n" + "".join(format_personality_prompt(p) for p in npc_personalities) + "\n"
+    if improvisation_result:
+        extra_sections += "\nImprovisation\n" + format_improvisation_prompt(improvisation_result) + "\n"
+    if active_tailing_quest:
+        open_objectives = [o["description"] for o in active_tailing_quest.get("objectives", []) if not o.get("completed")]
+        extra_sections += f"""
+Active Tailing Quest
+```
+{active_tailing_quest.get("title", "Tailing")}: {active_tailing_quest.get("description", "")}
+Open objectives: {"; ".join(open_objectives) if open_objectives else "None"}
+```
+"""
+    
+    dynamic_context = f"""INJECTED CONTEXT FOR THIS REQUEST
 
 Player Character
 ```
@@ -1138,6 +1161,11 @@ Current Scene Mode
 {session_mode.get("mode", "exploration") if session_mode else "exploration"}
 ```
 
+Pacing
+```
+{pacing_info}
+```
+{extra_sections}
 Player Action
 ```
 {player_action}
@@ -1145,134 +1173,10 @@ Player Action
 
 ---
 
-OUTPUT FORMAT
-
-Return ONLY this JSON:
-
-{{
-  "narration": "string",
-  "requested_check": null | {{
-      "ability": "STR | DEX | CON | INT | WIS | CHA",
-      "reason": "string"
-  }},
-  "entities": [],
-  "scene_mode": "intro | exploration | combat | social | travel | rest",
-  "world_state_update": {{}},
-  "player_updates": {{}}
-}}
-
-Restrictions:
-
-requested_check ONLY when absolutely necessary.
-
-NEVER add fields not defined above.
-
-NEVER invent entities unless visible.
-
----
-
-PRIORITY HIERARCHY
-
-If conflicts arise:
-
-SYSTEM
-
-BEHAVIOR RULES
-
-TASK RULES
-
-CONTEXT
-
-Style guidance (e.g., Matt Mercer inspiration)
-
-Scene history
-
-SYSTEM overrides everything.
-
----
-
-INJECTED CONTEXT FOR THIS REQUEST
-
-Player Character
-```
-Name: {character_name}
-Class: {character_class}
-Level: {character_state.get("level", 1)}
-HP: {character_state.get("hp", "?")} / {character_state.get("max_hp", "?")}
-AC: {character_state.get("ac", "?")}
-
-Stats:
-  STR {character_state.get("stats", {}).get("strength", 10)} ({(character_state.get("stats", {}).get("strength", 10) - 10) // 2:+d})
-  DEX {character_state.get("stats", {}).get("dexterity", 10)} ({(character_state.get("stats", {}).get("dexterity", 10) - 10) // 2:+d})
-  CON {character_state.get("stats", {}).get("constitution", 10)} ({(character_state.get("stats", {}).get("constitution", 10) - 10) // 2:+d})
-  INT {character_state.get("stats", {}).get("intelligence", 10)} ({(character_state.get("stats", {}).get("intelligence", 10) - 10) // 2:+d})
-  WIS {character_state.get("stats", {}).get("wisdom", 10)} ({(character_state.get("stats", {}).get("wisdom", 10) - 10) // 2:+d})
-  CHA {character_state.get("stats", {}).get("charisma", 10)} ({(character_state.get("stats", {}).get("charisma", 10) - 10) // 2:+d})
+Generate your response now.
+"""
 
-Passive Perception: {10 + (character_state.get("stats", {}).get("wisdom", 10) - 10) // 2}
-Skills: {", ".join(character_state.get("skills", [])) if character_state.get("skills") else "None"}
-Conditions: {", ".join(character_state.get("conditions", [])) if character_state.get("conditions") else "None"}
-Inventory: {", ".join(character_state.get("inventory", [])) if character_state.get("inventory") else "Empty"}
-```
-
-Environment
-```
-Location: {current_location}
-Time: {time_of_day}
-Weather: {weather}
-
-{location_constraints if location_constraints else ""}
-```
-
-Visible Entities
-```
-{npc_constraints if npc_constraints else "No visible NPCs or creatures."}
-```
-
-Ongoing Situations
-```
-{ongoing_situations if ongoing_situations else "None"}
-```
-
-Auto-Revealed Information (Passive Perception)
-```
-{", ".join(auto_revealed_info) if auto_revealed_info else "Nothing automatically noticed."}
-```
-
-Active Conditions
-```
-{"; ".join(condition_explanations) if condition_explanations else "None"}
-```
-
-Combat State (if applicable)
-```
-{mechanical_display if mechanical_display else ""}
-```
-
-System-Calculated DC (if provided)
-```
-{dc_info if dc_info else "No DC provided - determine if check is needed based on action context."}
-```
-
-Check Result (if resolved)
-```
-{check_result_info}
-```
-
-Current Scene Mode
-```
-{session_mode.get("mode", "exploration") if session_mode else "exploration"}
-```
-
-Player Action
-```
-{player_action}
-```
-
----
-
-Generate your response now.
-"""
+    return get_static_dm_prompt(world_blueprint) + dynamic_context
 
 
 def generate_combat_narration_from_mechanical(
@@ -1355,6 +1259,7 @@ def generate_combat_narration_from_mechanical(
     return "".join(narration_parts)
 
 
+@traced("select_homeland")
 async def select_homeland_for_character(
     character: dict,
     world_blueprint: dict
@@ -1394,8 +1299,7 @@ async def select_homeland_for_character(
         return "Unknown Land"
     
     # Use AI to select best fit
-    from services.llm_client import get_openai_client
-    client = get_openai_client()
+    from services.llm_client import chat_completion
     
     prompt = f"""Given this character and available locations, select the MOST appropriate homeland.
 
@@ -1415,7 +1319,7 @@ Select the single best-fitting location name. Consider:
 Respond with ONLY the location name, nothing else."""
 
     try:
-        response = client.chat.completions.create(
+        response = await chat_completion(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a D&D world-building assistant."},
@@ -1443,6 +1347,7 @@ Respond with ONLY the location name, nothing else."""
 
 
 @router.post("/characters/create")
+@traced_endpoint("POST /api/characters/create")
 async def create_character_endpoint(request: CharacterCreateRequest):
     """
     Create a character and store in MongoDB.
@@ -1538,11 +1443,15 @@ async def create_character_endpoint(request: CharacterCreateRequest):
                 "tone": world_blueprint.get("world_core", {}).get("tone", "balanced")
             }
             
-            intro_md = generate_intro_markdown(
-                character=character_state_dict,
-                region=region,
-                world_blueprint=world_blueprint
-            )
+            # World pool: adapt the intro pre-generated for this archetype, if any
+            from services.world_pool import personalize_pooled_intro
+            intro_md = await personalize_pooled_intro(campaign_doc.get("pooled_intro"), character_state_dict)
+            if intro_md is None:
+                intro_md = await generate_intro_markdown(
+                    character=character_state_dict,
+                    region=region,
+                    world_blueprint=world_blueprint
+                )
             
             # FILTER INTRO NARRATION (allow 16 sentences for geography + world-building)
             from services.narration_filter import NarrationFilter
@@ -1552,31 +1461,22 @@ async def create_character_endpoint(request: CharacterCreateRequest):
             # Save intro to campaign
             await db.campaigns.update_one(
                 {"campaign_id": request.campaign_id},
-                {"$set": {"intro": intro_md}}
+                {"$set": {"intro": intro_md}, "$unset": {"pooled_intro": ""}}
             )
+            invalidate_campaign(request.campaign_id)
             
             # Extract entity mentions from intro for display
-            entity_index = build_entity_index_from_world_blueprint(world_blueprint)
+            entity_index = get_entity_matcher(world_blueprint)
             entity_mentions = extract_entity_mentions(intro_md, entity_index)
             logger.info(f"🔗 Extracted {len(entity_mentions)} entity mentions from intro")
             
             # Auto-create KnowledgeFacts for entities mentioned in intro
             if entity_mentions:
                 from routers import knowledge as knowledge_router
-                for mention in entity_mentions:
-                    await knowledge_router.get_db().knowledge_facts.insert_one({
-                        "campaign_id": request.campaign_id,
-                        "character_id": character_id,
-                        "entity_type": mention["entity_type"],
-                        "entity_id": mention["entity_id"],
-                        "entity_name": mention["display_text"],
-                        "fact_type": "introduction",
-                        "fact_text": f"Introduced in campaign intro: '{mention['display_text']}'",
-                        "revealed_at": datetime.now(timezone.utc),
-                        "source": "narration",
-                        "metadata": {}
-                    })
-                    logger.info(f"📚 Created intro knowledge fact for {mention['entity_type']}: {mention['display_text']}")
+                await upsert_introduction_facts(
+                    knowledge_router.get_db(), request.campaign_id, character_id, entity_mentions,
+                    fact_text=lambda mention: f"Introduced in campaign intro: '{mention['display_text']}'"
+                )
             
             # CAMPAIGN LOG: Extract structured knowledge from intro
             try:
@@ -1697,6 +1597,7 @@ async def create_character_endpoint(request: CharacterCreateRequest):
 
 
 @router.post("/rpg_dm/resolve_check")
+@traced_endpoint("POST /api/rpg_dm/resolve_check")
 async def resolve_check(request: dict):
     """
     Resolve an ability check after player rolls dice.
@@ -1804,7 +1705,7 @@ YOU MUST:
             logger.info(f"✂️ Narration filtered: {len(narration_text)} chars")
             
             # Extract entity mentions
-            entity_index = build_entity_index_from_world_blueprint(
+            entity_index = get_entity_matcher(
                 campaign["world_blueprint"],
                 world_state["world_state"]
             )
@@ -1819,6 +1720,7 @@ YOU MUST:
                     {"campaign_id": campaign_id, "character_id": character_id},
                     {"$set": {"world_state": current_world}}
                 )
+                invalidate_campaign(campaign_id)
             
             # Apply player updates
             player_updates = dm_response.get("player_updates", {})
@@ -1862,24 +1764,709 @@ YOU MUST:
         return api_error("internal_error", f"Check resolution failed: {str(e)}", status_code=500)
 
 
+@router.post("/encounter/simulate")
+@traced_endpoint("POST /api/encounter/simulate")
+async def simulate_encounter_endpoint(request: dict):
+    """
+    Monte Carlo difficulty estimate for an encounter (balancing tool).
+
+    Body:
+        character: character_state dict, or campaign_id + character_id to load one
+        enemies: enemy dicts (hp, ac, attack_bonus, damage_die, abilities)
+        trials / seed / weapon / max_rounds: simulation options
+        target_difficulty: if set, `enemies` is a candidate pool and the group
+                           closest to this band is returned (max_enemies, default 3)
+    """
+    try:
+        from services.encounter_simulator import (
+            simulate_encounter, select_encounter_for_band, DIFFICULTY_ORDER
+        )
+
+        enemies = request.get("enemies")
+        if not enemies or not isinstance(enemies, list):
+            return validation_error("Missing required field: enemies")
+
+        character_state = request.get("character")
+        if not character_state:
+            campaign_id = request.get("campaign_id")
+            character_id = request.get("character_id")
+            if not (campaign_id and character_id):
+                return validation_error("Provide character, or campaign_id and character_id")
+            char_doc = await get_character_doc(campaign_id, character_id)
+            if not char_doc:
+                return not_found_error(f"Character not found: {character_id}")
+            character_state = char_doc["character_state"]
+
+        target_difficulty = request.get("target_difficulty")
+        if target_difficulty:
+            if target_difficulty not in DIFFICULTY_ORDER:
+                return validation_error(f"target_difficulty must be one of {DIFFICULTY_ORDER}")
+            selection = await asyncio.to_thread(
+                select_encounter_for_band,
+                character_state,
+                enemies,
+                target_difficulty=target_difficulty,
+                max_enemies=min(int(request.get("max_enemies", 3)), 4),
+                trials=request.get("trials"),
+                seed=request.get("seed")
+            )
+            return api_success(selection)
+
+        simulation = await asyncio.to_thread(
+            simulate_encounter,
+            character_state,
+            enemies,
+            trials=request.get("trials"),
+            seed=request.get("seed"),
+            weapon=request.get("weapon"),
+            max_rounds=request.get("max_rounds")
+        )
+        return api_success(simulation)
+
+    except Exception as e:
+        logger.error(f"❌ Encounter simulation failed: {e}", exc_info=True)
+        return api_error("internal_error", f"Encounter simulation failed: {str(e)}", status_code=500)
+
+
+@router.get("/probability/tables")
+async def get_probability_tables_endpoint():
+    """
+    Precomputed odds tables: check success by (mode, modifier, DC), attack hit
+    by (mode, to-hit, AC), crit chance per mode and expected damage per die
+    """
+    from services.probability_tables import get_probability_tables
+
+    return api_success(get_probability_tables())
+
+
+@router.get("/probability/odds")
+async def get_odds_endpoint(
+    dc: Optional[int] = None,
+    modifier: Optional[int] = None,
+    ac: Optional[int] = None,
+    to_hit: Optional[int] = None,
+    damage_dice: Optional[str] = None,
+    damage_modifier: int = 0,
+    advantage: str = "normal"
+):
+    """
+    Odds for one roll
+    Check: dc + modifier. Attack: ac + to_hit, with damage_dice (and
+    damage_modifier) for expected damage.
+    """
+    from services.probability_tables import (
+        check_success_chance, attack_hit_chance, attack_crit_chance,
+        expected_damage, expected_attack_damage
+    )
+
+    try:
+        if dc is not None and modifier is not None:
+            return api_success({
+                "dc": dc,
+                "modifier": modifier,
+                "advantage": advantage,
+                "success_chance": round(check_success_chance(modifier, dc, advantage), 4)
+            })
+
+        if ac is not None and to_hit is not None:
+            odds = {
+                "ac": ac,
+                "to_hit": to_hit,
+                "advantage": advantage,
+                "hit_chance": round(attack_hit_chance(to_hit, ac, advantage), 4),
+                "crit_chance": round(attack_crit_chance(advantage), 4)
+            }
+            if damage_dice:
+                odds["damage_dice"] = damage_dice
+                odds["expected_damage_on_hit"] = round(expected_damage(damage_dice, damage_modifier), 3)
+                odds["expected_damage_on_crit"] = round(expected_damage(damage_dice, damage_modifier, crit=True), 3)
+                odds["expected_damage_per_attack"] = round(
+                    expected_attack_damage(to_hit, ac, damage_dice, damage_modifier, advantage), 3
+                )
+            return api_success(odds)
+
+        return validation_error("Provide dc and modifier (check) or ac and to_hit (attack)")
+
+    except ValueError as e:
+        return validation_error(str(e))
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# ACTION MODE STAGE GRAPH
+# ═══════════════════════════════════════════════════════════════════════
+# Each stage reads/writes keys of a shared context. The lore checker only needs
+# the DM draft; story consistency runs after it because its triage reads the
+# lore check result.
+
+async def _stage_intent_tagger(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Use the prefetched tagger task when process_action started one early"""
+    prefetch = ctx["intent_prefetch"]
+    if prefetch is not None:
+        intent_flags = await prefetch
+    else:
+        intent_flags = await run_intent_tagger(ctx["player_action"], ctx["character_state"], ctx["campaign_id"])
+    logger.info(f"   Intent: {intent_flags}")
+    return {"intent_flags": intent_flags}
+
+
+def _check_odds_for(
+    character_state: Dict[str, Any],
+    dc: int,
+    ability: Optional[str],
+    skill: Optional[str] = None,
+    advantage: str = "normal"
+) -> Optional[Dict[str, Any]]:
+    """Table lookup of the character's odds on a check (None if unavailable)"""
+    try:
+        from services.probability_tables import check_odds
+        return check_odds(character_state, dc, ability, skill, advantage)
+    except Exception as e:
+        logger.warning(f"⚠️ Check odds unavailable: {e}")
+        return None
+
+
+def _stage_dc_calculation(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """DC CALCULATION: Use new DC taxonomy system"""
+    intent_flags = dict(ctx["intent_flags"])
+    suggested_dc = None
+    
+    if intent_flags.get("needs_check"):
+        from services.dc_rules import DCHelper
+        try:
+            # Determine action type from player action
+            action_type = DCHelper.get_action_type_from_intent(ctx["player_action"], intent_flags)
+            
+            # Get environmental conditions
+            world = ctx["world_state"]
+            environment = []
+            if world.get("weather") in ["rain", "heavy_rain", "fog"]:
+                environment.append(world.get("weather"))
+            if world.get("time_of_day") == "night":
+                environment.append("darkness")
+            
+            # Determine risk level
+            risk_level = "normal_risk"
+            if world.get("guards_hostile") or world.get("combat_active"):
+                risk_level = "high_risk"
+            
+            # Calculate DC using taxonomy
+            suggested_dc, dc_reasoning, dc_band = DCHelper.calculate_dc(
+                action_type=action_type,
+                risk_level=risk_level,
+                environment=environment,
+                character_level=ctx["character_state"].get("level", 1)
+            )
+            
+            # Get suggested ability and skill
+            suggested_ability, suggested_skill = DCHelper.get_suggested_ability_and_skill(action_type)
+            
+            logger.info(f"📊 DC Calculation: {dc_reasoning}")
+            
+            # Add to intent_flags for DM prompt
+            intent_flags["suggested_dc"] = suggested_dc
+            intent_flags["dc_band"] = dc_band.value
+            intent_flags["dc_reasoning"] = dc_reasoning
+            intent_flags["suggested_ability"] = suggested_ability
+            intent_flags["suggested_skill"] = suggested_skill
+            intent_flags["action_type"] = action_type
+            intent_flags["check_odds"] = _check_odds_for(
+                ctx["character_state"], suggested_dc, suggested_ability, suggested_skill
+            )
+            
+        except Exception as e:
+            logger.error(f"❌ DC calculation failed: {e}", exc_info=True)
+            suggested_dc = 15  # Fallback to medium difficulty
+            intent_flags["suggested_dc"] = suggested_dc
+            intent_flags["dc_band"] = "moderate"
+    
+    return {"dc_intent_flags": intent_flags, "suggested_dc": suggested_dc}
+
+
+async def _stage_dungeon_forge(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    logger.info("🎲 Running DUNGEON FORGE...")
+    dm_response = await run_dungeon_forge(
+        player_action=ctx["player_action"],
+        character_state=ctx["character_state"],
+        world_blueprint=ctx["world_blueprint"],
+        world_state=ctx["world_state"],
+        intent_flags=ctx["dc_intent_flags"],
+        check_result=ctx["check_result"],
+        pacing_instructions=ctx["pacing_instructions"],
+        auto_revealed_info=ctx["auto_revealed_info"],
+        condition_explanations=ctx["condition_explanations"],
+        session_mode=ctx["session_mode"],
+        improvisation_result=ctx["improvisation_result"],
+        npc_personalities=ctx["npc_personalities"],
+        active_tailing_quest=ctx["active_tailing_quest"]
+    )
+    logger.info(f"   DM Response: narration length={len(dm_response.get('narration', ''))}")
+    return {"dm_response": dm_response}
+
+
+async def _stage_story_consistency(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """STORY CONSISTENCY LAYER v6.0 (triage, then LLM validation of risky drafts; decisions applied in finalize)"""
+    from config.story_consistency_config import USE_STORY_CONSISTENCY_LAYER
+    
+    if not USE_STORY_CONSISTENCY_LAYER:
+        return {"consistency_validation": None}
+    
+    from services.story_consistency_agent import validate_dm_output
+    from services.consistency_triage import triage_dm_output, record_llm_validation
+    
+    dm_response = ctx["dm_response"]
+    session_mode = ctx["session_mode"]
+    world_state = ctx["world_state"]
+    
+    # Build dm_draft from DM output
+    dm_draft = {
+        "narration": dm_response.get("narration", ""),
+        "scene_mode": dm_response.get("scene_mode", session_mode.get("mode", "exploration") if session_mode else "exploration"),
+        "requested_check": dm_response.get("requested_check"),
+        "world_state_update": dm_response.get("world_state_update", {}),
+        "player_updates": dm_response.get("player_updates", {}),
+        "notes": dm_response.get("scene_status", {})
+    }
+    
+    # Cheap deterministic checks decide whether the LLM validator is needed
+    triage = triage_dm_output(
+        dm_draft=dm_draft,
+        world_blueprint=ctx["world_blueprint"],
+        world_state=world_state,
+        check_result=ctx["check_result"],
+        lore_check_result=ctx["lore_check_result"]
+    )
+    if not triage["escalate"]:
+        return {"consistency_validation": None}
+    
+    logger.info("🔍 Running STORY CONSISTENCY LAYER v6.0...")
+    mechanical_context = {
+        "player_state": ctx["character_state"],
+        "check_result": ctx["check_result"],
+        "combat_state": world_state.get("combat_state")
+    }
+    
+    started = time.perf_counter()
+    validation = await validate_dm_output(
+        dm_draft=dm_draft,
+        world_blueprint=ctx["world_blueprint"],
+        world_state=world_state,
+        quest_state=world_state.get("quests", {}),
+        npc_registry=world_state.get("npcs", {}),
+        story_threads=world_state.get("story_threads", []),
+        scene_history=world_state.get("recent_scenes", []),
+        mechanical_context=mechanical_context
+    )
+    record_llm_validation(triage, validation, (time.perf_counter() - started) * 1000)
+    return {"consistency_validation": validation}
+
+
+def _stage_lore_check(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """LORE CHECKER (P2.5: soft mode by default)"""
+    logger.info("🔍 Running LORE CHECKER...")
+    from services.lore_checker_service import check_lore_consistency
+    
+    lore_check_result = check_lore_consistency(
+        narration=ctx["dm_response"].get("narration", ""),
+        world_blueprint=ctx["world_blueprint"],
+        world_state=ctx["world_state"],
+        auto_correct=False  # P2.5: soft mode - warnings only, no auto-corrections
+    )
+    
+    # Log issues as warnings (soft mode doesn't block responses)
+    if lore_check_result["issues"]:
+        logger.warning(f"⚠️ LORE CHECKER: Found {len(lore_check_result['issues'])} potential issues (soft mode - not blocking)")
+    else:
+        logger.info("✅ LORE CHECKER: No issues detected")
+    
+    return {"lore_check_result": lore_check_result}
+
+
+def _stage_finalize_narration(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply consistency decision and lore corrections, then the Human DM Filter"""
+    from config.story_consistency_config import CONSISTENCY_AUTO_CORRECT, CONSISTENCY_HARD_BLOCK
+    from services.narration_filter import NarrationFilter
+    
+    dm_response = ctx["dm_response"]
+    validation = ctx["consistency_validation"]
+    consistency_changed = False
+    
+    if validation is not None:
+        decision = validation.get("decision", "approve")
+        logger.info(f"   Story Consistency Decision: {decision}")
+        
+        if decision == "approve":
+            corrected = validation.get("corrected_narration")
+            if corrected and CONSISTENCY_AUTO_CORRECT:
+                dm_response["narration"] = corrected
+                consistency_changed = True
+                logger.info("   Applied minimal consistency corrections")
+            elif corrected:
+                logger.info("   Consistency corrections available but auto-correct disabled")
+        
+        elif decision == "revise_required":
+            corrected = validation.get("corrected_narration")
+            if corrected and CONSISTENCY_AUTO_CORRECT:
+                dm_response["narration"] = corrected
+                consistency_changed = True
+                changes = validation.get("narration_changes_summary", [])
+                logger.warning(f"⚠️ Story consistency revisions applied: {changes}")
+            else:
+                logger.warning(f"⚠️ Story consistency issues detected but auto-correct disabled")
+        
+        elif decision == "hard_block":
+            issues = validation.get("issues", [])
+            logger.error(f"❌ STORY CONSISTENCY HARD BLOCK: {len(issues)} critical issues")
+            for issue in issues:
+                logger.error(f"   [{issue['severity']}] {issue['type']}: {issue['message']}")
+            
+            if CONSISTENCY_HARD_BLOCK:
+                # Replace narration with safe fallback
+                dm_response["narration"] = "The scene becomes unclear for a moment. What do you do?"
+                consistency_changed = True
+                logger.error("   DM output replaced with safe fallback")
+            else:
+                logger.warning("   Hard block disabled - using original DM output with warnings")
+        
+        # Log all issues for debugging
+        for issue in validation.get("issues") or []:
+            if issue["severity"] == "error":
+                logger.error(f"   Consistency Issue: [{issue['type']}] {issue['message']}")
+            elif issue["severity"] == "warning":
+                logger.warning(f"   Consistency Warning: [{issue['type']}] {issue['message']}")
+    
+    # Lore corrections were computed on the draft; they only apply if the
+    # consistency layer left the draft untouched
+    lore_check_result = ctx["lore_check_result"]
+    if lore_check_result["corrections_made"] > 0 and not consistency_changed:
+        dm_response["narration"] = lore_check_result["corrected_narration"]
+        logger.info(f"✅ LORE CHECKER: Applied {lore_check_result['corrections_made']} corrections")
+    
+    # APPLY HUMAN DM FILTER v4.1 - Enforce context-based sentence limits and remove AI phrases
+    logger.info("🎭 Applying Human DM Filter v4.1...")
+    original_narration = dm_response.get("narration", "")
+    original_sentence_count = NarrationFilter.count_sentences(original_narration)
+    logger.info(f"📏 Original narration: {original_sentence_count} sentences, {len(original_narration)} chars")
+    
+    # Get the scene mode from DM response to apply correct sentence limit
+    scene_mode = dm_response.get("scene_mode", "exploration")
+    filtered_narration = NarrationFilter.apply_filter(original_narration, context=scene_mode)
+    final_sentence_count = NarrationFilter.count_sentences(filtered_narration)
+    
+    dm_response["narration"] = filtered_narration
+    logger.info(f"✅ Narration filtered: {final_sentence_count} sentences, {len(filtered_narration)} chars")
+    
+    # Get expected limit for this context
+    expected_limit = NarrationFilter.SENTENCE_LIMITS.get(scene_mode, 10)
+    if original_sentence_count > expected_limit:
+        logger.warning(f"⚠️ LLM VIOLATED {expected_limit}-SENTENCE LIMIT for {scene_mode}: Generated {original_sentence_count}, truncated to {final_sentence_count}")
+    
+    return {"final_dm_response": dm_response}
+
+
+ACTION_MODE_GRAPH = StageGraph("action_mode", [
+    Stage("intent_tagger", _stage_intent_tagger,
+          inputs=("player_action", "character_state", "campaign_id", "intent_prefetch"),
+          outputs=("intent_flags",)),
+    Stage("dc_calculation", _stage_dc_calculation,
+          inputs=("intent_flags", "player_action", "world_state", "character_state"),
+          outputs=("dc_intent_flags", "suggested_dc")),
+    Stage("dungeon_forge", _stage_dungeon_forge,
+          inputs=("dc_intent_flags", "player_action", "character_state", "world_blueprint", "world_state",
+                  "check_result", "pacing_instructions", "auto_revealed_info", "condition_explanations",
+                  "session_mode", "improvisation_result", "npc_personalities", "active_tailing_quest"),
+          outputs=("dm_response",)),
+    Stage("story_consistency", _stage_story_consistency,
+          inputs=("dm_response", "character_state", "world_blueprint", "world_state", "check_result", "session_mode",
+                  "lore_check_result"),
+          outputs=("consistency_validation",)),
+    Stage("lore_check", _stage_lore_check,
+          inputs=("dm_response", "world_blueprint", "world_state"),
+          outputs=("lore_check_result",)),
+    Stage("finalize_narration", _stage_finalize_narration,
+          inputs=("dm_response", "consistency_validation", "lore_check_result"),
+          outputs=("final_dm_response",)),
+])
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# POST-RESPONSE JOBS (durable work queue)
+# ═══════════════════════════════════════════════════════════════════════
+# Knowledge facts and the Campaign Log only feed the journal UI, so
+# process_action enqueues them keyed by (campaign_id, action_id) and returns.
+
+async def _job_knowledge_facts(payload: Dict[str, Any]) -> None:
+    """Auto-create KnowledgeFacts for first-time mentions"""
+    entity_mentions = payload["entity_mentions"]
+    if not entity_mentions:
+        return
+    
+    from routers import knowledge as knowledge_router
+    narration_excerpt = payload["narration_text"][:100]
+    await upsert_introduction_facts(
+        knowledge_router.get_db(), payload["campaign_id"], payload["character_id"], entity_mentions,
+        fact_text=lambda mention: f"First encountered in narration: '{narration_excerpt}...'"
+    )
+
+
+async def _job_campaign_log(payload: Dict[str, Any]) -> None:
+    """
+    CAMPAIGN LOG: Extract structured knowledge from narration and merge it.
+    
+    NOTE: This is for ongoing gameplay narration, not arrival scenes.
+    Hooks are only generated for arrival/scene descriptions, not action responses.
+    Exceptions propagate so the work queue can retry.
+    """
+    from services.campaign_log_extractor import extract_campaign_log_from_scene
+    from services.campaign_log_service import CampaignLogService
+    
+    log_service = CampaignLogService(get_db())
+    
+    # Extract structured delta using LLM (no hooks for action narration)
+    campaign_log_delta = await extract_campaign_log_from_scene(
+        narration=payload["narration_text"],
+        entity_mentions=payload["entity_mentions"],
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        current_location=payload["current_location"],
+        quest_hooks=None,  # No hooks for action responses
+        scene_id=None
+    )
+    
+    # Apply delta to campaign log
+    if campaign_log_delta:
+        await log_service.apply_delta(payload["campaign_id"], campaign_log_delta, payload["character_id"])
+        logger.info(f"📖 Campaign log updated with {len(campaign_log_delta.locations)} locations, {len(campaign_log_delta.npcs)} NPCs")
+
+
+register_handler("knowledge_facts", _job_knowledge_facts)
+register_handler("campaign_log", _job_campaign_log)
+
+
+def derive_action_id(
+    campaign_id: str,
+    character_id: str,
+    turn: int,
+    player_action: str,
+    check_result: Optional[int]
+) -> str:
+    """
+    Action id for clients that don't send one, built from the request itself
+    so a retry of the same action at the same turn maps to the same jobs.
+    Once the first attempt has advanced the turn a retry no longer matches;
+    the client-chosen action_id covers that case.
+    """
+    key = json.dumps([campaign_id, character_id, turn, player_action, check_result])
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+async def enqueue_narration_jobs(campaign_id: str, action_id: str, payload: Dict[str, Any]) -> None:
+    """
+    Queue knowledge-fact and campaign-log jobs for one action and advance the
+    campaign's turn counter. Falls back to a fire-and-forget task when the
+    work queue isn't running (e.g. scripts that import the router directly).
+
+    Jobs are keyed by the action, not the turn: the turn read at the start of
+    a request can be stale when actions overlap, and two actions sharing a
+    key would drop the second one's jobs.
+    """
+    db = get_db()
+    
+    if get_work_queue() is None:
+        async def _inline():
+            await _job_knowledge_facts(payload)
+            await _job_campaign_log(payload)
+        run_in_background(_inline(), name=f"narration_jobs:{campaign_id}:{action_id}")
+    else:
+        await asyncio.gather(
+            enqueue_job("knowledge_facts", payload, idempotency_key=f"knowledge_facts:{campaign_id}:{action_id}"),
+            enqueue_job("campaign_log", payload, idempotency_key=f"campaign_log:{campaign_id}:{action_id}")
+        )
+    
+    await save_state(db, "world_states", {"campaign_id": campaign_id}, inc_fields={"turn": 1})
+
+
+async def _run_combat_turn(
+    campaign_id: str,
+    character_id: str,
+    action_req,
+    char_doc: Dict[str, Any],
+    combat_doc: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    COMBAT FAST LANE: resolve one turn of an active combat mechanically.
+
+    Needs only the combat doc and character state - no location, scene, NPC,
+    pacing or session-mode work and no LLM calls; narration comes from
+    generate_combat_narration_from_mechanical. The combat doc is written
+    once, the character state once when the campaign session flushes.
+    """
+    from services.combat_engine_service import process_player_attack, process_enemy_turns
+    from services.target_resolver import resolve_target
+    from models.normalized_entities import normalize_enemy_list
+
+    combat_state = combat_doc["combat_state"]
+    if combat_state.get("enemies"):
+        combat_state["enemies"] = normalize_enemy_list(combat_state["enemies"])
+
+    # Mid-combat targets are combatants, so no world state or blueprint lookup
+    target_resolution = resolve_target(
+        player_action=action_req.player_action,
+        client_target_id=action_req.client_target_id,
+        combat_state=combat_state,
+        world_state={},
+        world_blueprint={}
+    )
+
+    if target_resolution['status'] == 'needs_clarification':
+        from services.narration_filter import NarrationFilter
+        clarification = NarrationFilter.apply_filter(target_resolution['clarification_reason'], max_sentences=3, context="target_clarification")
+
+        # v4.1 UNIFIED SPEC: No options field - narration ends with open prompts
+        return api_success({
+            "narration": clarification + "\n\nWhat do you do?",
+            "entity_mentions": [],
+            "combat_active": True,
+            "world_state_update": {},
+            "player_updates": {}
+        })
+
+    character_state = dict(char_doc["character_state"])
+    attack_result = process_player_attack(
+        target_id=target_resolution['target_id'],
+        character_state=character_state,
+        combat_state=combat_state
+    )
+
+    if not attack_result['success']:
+        return {
+            "narration": attack_result['mechanical_summary'].get('error', 'Unable to process attack') + "\n\nWhat do you do?",
+            "combat_active": True,
+            "world_state_update": {},
+            "player_updates": {}
+        }
+
+    combat_state.update(attack_result['combat_state_update'])
+
+    # Enemies act if the player's attack didn't end the fight
+    enemy_result = {"enemy_actions": [], "total_damage_to_player": 0}
+    if not attack_result['combat_over']:
+        enemy_result = process_enemy_turns(character_state=character_state, combat_state=combat_state)
+        character_state.update(enemy_result.get('character_state_update', {}))
+        if enemy_result.get('combat_over'):
+            combat_state['combat_over'] = True
+            combat_state['outcome'] = enemy_result.get('outcome')
+
+    mechanical_summary = {
+        "player_attack": attack_result['mechanical_summary'],
+        "enemy_turns": enemy_result.get('enemy_actions', []),
+        "total_damage_to_player": enemy_result.get('total_damage_to_player', 0),
+        "combat_over": attack_result['combat_over'] or enemy_result.get('combat_over', False),
+        "outcome": combat_state.get('outcome')
+    }
+    # Narrate with post-damage HP
+    narration = generate_combat_narration_from_mechanical(mechanical_summary, character_state)
+
+    player_updates = {}
+    world_state_update = {}
+    if mechanical_summary['combat_over']:
+        logger.info(f"⚔️ Combat ended: {mechanical_summary['outcome']}")
+        combat_state['combat_over'] = True
+
+        if mechanical_summary['outcome'] == "victory":
+            # Clear enemies from active NPCs (world state only loaded when a fight ends)
+            world_state = await get_world_state(campaign_id)
+            active_npcs = (world_state or {}).get("world_state", {}).get("active_npcs", [])
+            enemy_names = [e["name"] for e in combat_state.get("enemies", [])]
+            world_state_update["active_npcs"] = [n for n in active_npcs if n not in enemy_names]
+
+            # P3: Apply XP gain and level-ups
+            xp_gained = attack_result.get('xp_gained', 0)
+            if xp_gained > 0:
+                from services.progression_service import apply_xp_gain
+                character_state, level_up_events = apply_xp_gain(character_state, xp_gained)
+                player_updates["xp_gained"] = xp_gained
+                player_updates["level_up_events"] = level_up_events
+                logger.info(f"💰 Awarded {xp_gained} XP, level-ups: {level_up_events}")
+
+        elif mechanical_summary['outcome'] == "player_defeated":
+            logger.warning("☠️ Player defeated in combat")
+            character_state["injury_count"] = character_state.get("injury_count", 0) + 1
+            # Restore HP to 50% of max
+            character_state["hp"] = max(1, int(character_state.get("max_hp", 10) * 0.5))
+
+            # P3.5: XP penalty on defeat (15% of current level progress, min 5 XP)
+            level_xp = character_state.get("current_xp", 0)
+            xp_penalty = max(5, int(level_xp * 0.15))
+            character_state["current_xp"] = max(0, level_xp - xp_penalty)
+            logger.warning(f"💀 XP penalty on defeat: {level_xp} -> {character_state['current_xp']} (-{xp_penalty})")
+
+            player_updates["defeat_handled"] = True
+            player_updates["injury_count"] = character_state["injury_count"]
+            player_updates["hp_restored"] = character_state["hp"]
+            player_updates["xp_penalty"] = xp_penalty  # P3.5: Show in UI
+
+    # One write per document: the combat doc now, the character state when
+    # the campaign session flushes
+    await get_db().combats.update_one(
+        {"campaign_id": campaign_id, "character_id": character_id},
+        {"$set": {
+            "combat_state": combat_state,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }}
+    )
+    if character_state != char_doc["character_state"]:
+        await update_character_state(campaign_id, character_id, character_state)
+
+    # v4.1 UNIFIED SPEC: No options field - narration ends with open prompts
+    if mechanical_summary['combat_over']:
+        return {
+            "narration": narration,
+            "combat_over": True,
+            "outcome": mechanical_summary['outcome'],
+            "world_state_update": world_state_update,
+            "player_updates": player_updates  # P3
+        }
+    return {
+        "narration": narration,
+        "combat_active": True,
+        "world_state_update": {},
+        "player_updates": {}  # P3: No updates mid-combat
+    }
+
+
 @router.post("/rpg_dm/action")
+@traced_endpoint("POST /api/rpg_dm/action")
 async def process_action(request: dict):
     """
     Main gameplay action endpoint for DUNGEON FORGE.
     
     Orchestration flow:
-    1. Fetch campaign, character, world_state, combat_state from MongoDB (parallelized)
+    1. Fetch character and combat doc from MongoDB (parallelized)
     2. Route to appropriate handler:
-       - If combat active: COMBAT ENGINE with target resolution
+       - If combat active: combat fast lane (mechanical turn, no campaign/world state, no LLM)
+       - Otherwise fetch campaign and world_state, then:
        - If hostile action detected: Target resolution → Combat initiation or Plot Armor
-       - Else: ACTION MODE (INTENT TAGGER → DUNGEON FORGE → LORE CHECKER → WORLD MUTATOR)
+       - Else: ACTION MODE stage graph (INTENT TAGGER → DUNGEON FORGE → LORE CHECKER → CONSISTENCY TRIAGE/LLM → FILTER) → WORLD MUTATOR
     
     Phase 1 Changes:
     - Added target resolution using target_resolver service
     - Added NPC-to-enemy conversion for hostile actions
     - Added plot armor checking for essential NPCs
     - Mechanical combat resolution BEFORE DM narration
+    
+    All campaign/character/world-state updates made while handling the action
+    are collected in a campaign session and written once when it finishes.
     """
+    try:
+        async with campaign_session(get_db()):
+            return await _run_action(request)
+    except Exception as e:
+        logger.error(f"❌ Action state flush failed: {e}", exc_info=True)
+        return api_error("internal_error", f"Action processing failed: {str(e)}", status_code=500)
+
+
+async def _run_action(request: dict):
+    """Body of process_action, run inside its campaign session"""
+    intent_prefetch = None
     try:
         from models.game_models import ActionRequest
         
@@ -1889,30 +2476,47 @@ async def process_action(request: dict):
         player_action = action_req.player_action
         check_result = action_req.check_result
         client_target_id = action_req.client_target_id  # Phase 1: Explicit target from frontend
+        action_id = action_req.action_id
         
         logger.info(f"🎮 Processing action for campaign: {campaign_id}, character: {character_id}")
         logger.info(f"   Action: {player_action[:100]}")
         if client_target_id:
             logger.info(f"   Explicit target: {client_target_id}")
         
-        # Fetch state from DB (parallelized for performance)
+        # Character + combat doc first: an active combat takes the fast lane
+        # and never needs the campaign or world state
         db = get_db()
-        campaign, char_doc, world_state, combat_doc = await asyncio.gather(
-            get_campaign(campaign_id),
-            get_character_doc(campaign_id, character_id),
-            get_world_state(campaign_id),
-            db.combats.find_one({"campaign_id": campaign_id, "character_id": character_id})
-        )
+        with span("action.load_state"):
+            char_doc, combat_doc = await asyncio.gather(
+                get_character_doc(campaign_id, character_id),
+                db.combats.find_one({"campaign_id": campaign_id, "character_id": character_id})
+            )
+        if not char_doc:
+            raise HTTPException(status_code=404, detail=f"Character not found: {character_id}")
+        
+        if combat_doc and not combat_doc.get("combat_state", {}).get("combat_over", True):
+            with span("action.combat_turn"):
+                return await _run_combat_turn(campaign_id, character_id, action_req, char_doc, combat_doc)
+        
+        with span("action.load_state"):
+            campaign, world_state = await asyncio.gather(
+                get_campaign(campaign_id),
+                get_world_state(campaign_id)
+            )
         
         # Validate all required data exists
         if not campaign:
             raise HTTPException(status_code=404, detail=f"Campaign not found: {campaign_id}")
-        if not char_doc:
-            raise HTTPException(status_code=404, detail=f"Character not found: {character_id}")
         if not world_state:
             raise HTTPException(status_code=404, detail=f"World state not found for campaign: {campaign_id}")
         
-        is_combat_active = combat_doc and not combat_doc.get("combat_state", {}).get("combat_over", True)
+        # Start the intent tagger early for ACTION MODE so it overlaps location,
+        # scene and NPC work below; the pipeline awaits it as its first stage
+        from services.target_resolver import is_hostile_action
+        if not is_hostile_action(player_action):
+            intent_prefetch = asyncio.create_task(
+                run_intent_tagger(player_action, char_doc["character_state"], campaign_id)
+            )
         
         # Ensure NPCs are activated for current location
         from services.npc_activation_service import populate_active_npcs_for_location, ensure_npcs_have_ids
@@ -2027,13 +2631,12 @@ async def process_action(request: dict):
         # PHASE 1: DMG SYSTEMS INTEGRATION (p.24, p.26-27, p.32)
         from services.pacing_service import TensionManager
         from services.information_service import InformationDispenser
-        from services.consequence_service import ConsequenceEscalation
         
         # Calculate current tension (DMG p.24)
         tension_score = TensionManager.calculate_tension(
             world_state=world_state["world_state"],
             character_state=char_doc["character_state"],
-            combat_active=is_combat_active,
+            combat_active=False,
             recent_actions=[player_action]
         )
         
@@ -2045,16 +2648,15 @@ async def process_action(request: dict):
         world_state["world_state"]["tension_state"] = tension_state
         
         # PHASE 2: SESSION FLOW & IMPROVISATION (DMG p.20-24, p.28-29)
-        from services.session_flow_service import detect_mode, format_for_dm_prompt as format_mode_prompt
-        from services.improvisation_service import classify_action, format_for_dm_prompt as format_improv_prompt
-        from services.npc_personality_service import format_for_dm_prompt as format_personality_prompt
+        from services.session_flow_service import detect_mode
+        from services.improvisation_service import classify_action
         
         # Detect session mode (DMG p.20-21)
         session_mode = detect_mode(
             player_action=player_action,
             intent_flags={},  # Will be populated by intent_tagger
             world_state=world_state["world_state"],
-            combat_active=is_combat_active
+            combat_active=False
         )
         logger.info(f"🎮 Session Mode: {session_mode['mode']}")
         
@@ -2090,7 +2692,7 @@ async def process_action(request: dict):
         # Phase 1: Check for hostile action and resolve target BEFORE combat or DM
         from services.target_resolver import resolve_target, is_hostile_action
         
-        if is_hostile_action(player_action) and not is_combat_active:
+        if is_hostile_action(player_action):
             logger.info("🎯 Hostile action detected outside combat - resolving target...")
             
             target_resolution = resolve_target(
@@ -2343,410 +2945,37 @@ async def process_action(request: dict):
                     "player_updates": player_updates
                 }
         
-        if is_combat_active:
-            # Route to COMBAT ENGINE with Phase 1 mechanical resolution
-            logger.info("⚔️ Combat active - routing to COMBAT ENGINE")
-            from services.combat_engine_service import process_player_attack, process_enemy_turns
-            from services.target_resolver import resolve_target
-            from models.normalized_entities import normalize_enemy_list
-            
-            combat_state = combat_doc["combat_state"]
-            
-            # Normalize enemies to ensure combat stats are always present
-            if "enemies" in combat_state and combat_state["enemies"]:
-                combat_state["enemies"] = normalize_enemy_list(combat_state["enemies"])
-                logger.info(f"✅ Normalized {len(combat_state['enemies'])} enemies for combat")
-            
-            # Phase 1: Resolve target in combat
-            target_resolution = resolve_target(
-                player_action=player_action,
-                client_target_id=client_target_id,
-                combat_state=combat_state,
-                world_state=world_state["world_state"],
-                world_blueprint=campaign["world_blueprint"]
-            )
-            
-            # Check if clarification needed
-            if target_resolution['status'] == 'needs_clarification':
-                # FILTER TARGET CLARIFICATION
-                from services.narration_filter import NarrationFilter
-                clarification = NarrationFilter.apply_filter(target_resolution['clarification_reason'], max_sentences=3, context="target_clarification")
-                
-                # v4.1 UNIFIED SPEC: No options field - narration ends with open prompts
-                return api_success({
-                    "narration": clarification + "\n\nWhat do you do?",
-                    "entity_mentions": [],
-                    "combat_active": True,
-                    "world_state_update": {},
-                    "player_updates": {}
-                })
-            
-            # Process player attack mechanically
-            attack_result = process_player_attack(
-                target_id=target_resolution['target_id'],
-                character_state=char_doc["character_state"],
-                combat_state=combat_state
-            )
-            
-            if not attack_result['success']:
-                # v4.1 UNIFIED SPEC: No options field - narration ends with open prompts
-                return {
-                    "narration": attack_result['mechanical_summary'].get('error', 'Unable to process attack') + "\n\nWhat do you do?",
-                    "combat_active": True,
-                    "world_state_update": {},
-                    "player_updates": {}
-                }
-            
-            # Update combat state
-            combat_state.update(attack_result['combat_state_update'])
-            
-            # Process enemy turns if combat continues
-            enemy_result = {"enemy_actions": [], "total_damage_to_player": 0}
-            if not attack_result['combat_over']:
-                enemy_result = process_enemy_turns(
-                    character_state=char_doc["character_state"],
-                    combat_state=combat_state
-                )
-                
-                # Update character HP
-                if enemy_result['character_state_update']:
-                    updated_char = {**char_doc["character_state"], **enemy_result['character_state_update']}
-                    await update_character_state(campaign_id, character_id, updated_char)
-                
-                # Check if player defeated
-                if enemy_result.get('combat_over'):
-                    combat_state['combat_over'] = True
-                    combat_state['outcome'] = enemy_result.get('outcome')
-            
-            # Generate mechanical summary
-            mechanical_summary = {
-                "player_attack": attack_result['mechanical_summary'],
-                "enemy_turns": enemy_result.get('enemy_actions', []),
-                "total_damage_to_player": enemy_result.get('total_damage_to_player', 0),
-                "combat_over": attack_result['combat_over'] or enemy_result.get('combat_over', False),
-                "outcome": combat_state.get('outcome')
-            }
-            
-            # Generate narration
-            narration = generate_combat_narration_from_mechanical(mechanical_summary, char_doc["character_state"])
-            
-            combat_result = {
-                "narration": narration,
-                "combat_state_update": combat_state,
-                "character_state_update": enemy_result.get('character_state_update', {}),
-                "combat_over": mechanical_summary['combat_over'],
-                "outcome": mechanical_summary.get('outcome'),
-                "xp_gained": attack_result.get('xp_gained', 0)
-            }
-            
-            # Update combat state in DB
-            db = get_db()
-            await db.combats.update_one(
-                {"campaign_id": campaign_id, "character_id": character_id},
-                {
-                    "$set": {
-                        "combat_state": combat_result["combat_state_update"],
-                        "updated_at": datetime.now(timezone.utc).isoformat()
-                    }
-                }
-            )
-            
-            # Generate options
-            options = generate_combat_options(combat_result["combat_state_update"])
-            
-            # Check if combat ended
-            if combat_result["combat_over"]:
-                logger.info(f"⚔️ Combat ended: {combat_result['outcome']}")
-                
-                # Mark combat as over in DB
-                await db.combats.update_one(
-                    {"campaign_id": campaign_id, "character_id": character_id},
-                    {"$set": {"combat_state.combat_over": True}}
-                )
-                
-                # P3: Handle different outcomes
-                player_updates = {}
-                level_up_events = []
-                world_state_update = {}
-                
-                if combat_result["outcome"] == "victory":
-                    # Clear enemies from active NPCs
-                    active_npcs = world_state["world_state"].get("active_npcs", [])
-                    enemy_names = [e["name"] for e in combat_result["combat_state_update"]["enemies"]]
-                    world_state_update["active_npcs"] = [n for n in active_npcs if n not in enemy_names]
-                    
-                    # P3: Apply XP gain and level-ups
-                    xp_gained = combat_result.get("xp_gained", 0)
-                    if xp_gained > 0:
-                        from services.progression_service import apply_xp_gain
-                        updated_char_with_xp, level_up_events = apply_xp_gain(
-                            char_doc["character_state"],
-                            xp_gained
-                        )
-                        # Update character in DB
-                        await update_character_state(campaign_id, character_id, updated_char_with_xp)
-                        player_updates["xp_gained"] = xp_gained
-                        player_updates["level_up_events"] = level_up_events
-                        logger.info(f"💰 Awarded {xp_gained} XP, level-ups: {level_up_events}")
-                
-                elif combat_result["outcome"] == "player_defeated":
-                    # P3: Handle player defeat
-                    logger.warning("☠️ Player defeated in combat")
-                    
-                    # Apply defeat consequences
-                    current_char = char_doc["character_state"]
-                    current_char["injury_count"] = current_char.get("injury_count", 0) + 1
-                    
-                    # Restore HP to 50% of max
-                    max_hp = current_char.get("max_hp", 10)
-                    current_char["hp"] = max(1, int(max_hp * 0.5))
-                    
-                    # P3.5: XP penalty on defeat (15% of current level progress, min 5 XP)
-                    level_xp = current_char.get("current_xp", 0)
-                    xp_penalty = int(level_xp * 0.15)
-                    xp_penalty = max(5, xp_penalty)  # Minimum sting
-                    old_xp = level_xp
-                    current_char["current_xp"] = max(0, level_xp - xp_penalty)
-                    logger.warning(f"💀 XP penalty on defeat: {old_xp} -> {current_char['current_xp']} (-{xp_penalty})")
-                    
-                    # Update character in DB
-                    await update_character_state(campaign_id, character_id, current_char)
-                    
-                    player_updates["defeat_handled"] = True
-                    player_updates["injury_count"] = current_char["injury_count"]
-                    player_updates["hp_restored"] = current_char["hp"]
-                    player_updates["xp_penalty"] = xp_penalty  # P3.5: Show in UI
-                
-                # v4.1 UNIFIED SPEC: No options field - narration ends with open prompts
-                return {
-                    "narration": combat_result["narration"],
-                    "combat_over": True,
-                    "outcome": combat_result["outcome"],
-                    "world_state_update": world_state_update,
-                    "player_updates": player_updates  # P3
-                }
-            
-            # v4.1 UNIFIED SPEC: No options field - narration ends with open prompts
-            return {
-                "narration": combat_result["narration"],
-                "combat_active": True,
-                "world_state_update": {},
-                "player_updates": {}  # P3: No updates mid-combat
-            }
-        
-        # ACTION MODE pipeline
-        logger.info("🏷️ Running INTENT TAGGER...")
-        intent_flags = await run_intent_tagger(player_action, char_doc["character_state"])
-        logger.info(f"   Intent: {intent_flags}")
-        
-        # DC CALCULATION: Use new DC taxonomy system
-        suggested_dc = None
-        dc_band = None
-        dc_reasoning = None
-        suggested_ability = None
-        suggested_skill = None
-        
-        if intent_flags.get("needs_check"):
-            from services.dc_rules import DCHelper
-            try:
-                # Determine action type from player action
-                action_type = DCHelper.get_action_type_from_intent(player_action, intent_flags)
-                
-                # Get environmental conditions
-                world = world_state.get("world_state", {})
-                environment = []
-                if world.get("weather") in ["rain", "heavy_rain", "fog"]:
-                    environment.append(world.get("weather"))
-                if world.get("time_of_day") == "night":
-                    environment.append("darkness")
-                
-                # Determine risk level
-                risk_level = "normal_risk"
-                if world.get("guards_hostile") or world.get("combat_active"):
-                    risk_level = "high_risk"
-                
-                # Calculate DC using taxonomy
-                suggested_dc, dc_reasoning, dc_band = DCHelper.calculate_dc(
-                    action_type=action_type,
-                    risk_level=risk_level,
-                    environment=environment,
-                    character_level=char_doc["character_state"].get("level", 1)
-                )
-                
-                # Get suggested ability and skill
-                suggested_ability, suggested_skill = DCHelper.get_suggested_ability_and_skill(action_type)
-                
-                logger.info(f"📊 DC Calculation: {dc_reasoning}")
-                
-                # Add to intent_flags for DM prompt
-                intent_flags["suggested_dc"] = suggested_dc
-                intent_flags["dc_band"] = dc_band.value
-                intent_flags["dc_reasoning"] = dc_reasoning
-                intent_flags["suggested_ability"] = suggested_ability
-                intent_flags["suggested_skill"] = suggested_skill
-                intent_flags["action_type"] = action_type
-                
-            except Exception as e:
-                logger.error(f"❌ DC calculation failed: {e}", exc_info=True)
-                suggested_dc = 15  # Fallback to medium difficulty
-                dc_band = "moderate"
-                intent_flags["suggested_dc"] = suggested_dc
-                intent_flags["dc_band"] = "moderate"
-        
-        logger.info("🎲 Running DUNGEON FORGE...")
-        dm_response = await run_dungeon_forge(
-            player_action=player_action,
-            character_state=char_doc["character_state"],
-            world_blueprint=campaign["world_blueprint"],
-            world_state=world_state["world_state"],
-            intent_flags=intent_flags,
-            check_result=check_result,
-            pacing_instructions=pacing_instructions,
-            auto_revealed_info=auto_revealed_info,
-            condition_explanations=condition_explanations,
-            session_mode=session_mode,
-            improvisation_result=improvisation_result,
-            npc_personalities=npc_personalities_data,
-            active_tailing_quest=active_tailing_quest
-        )
-        logger.info(f"   DM Response: narration length={len(dm_response.get('narration', ''))}")
-        
-        # STORY CONSISTENCY LAYER v6.0 (validate and correct DM output)
-        from config.story_consistency_config import (
-            USE_STORY_CONSISTENCY_LAYER,
-            CONSISTENCY_AUTO_CORRECT,
-            CONSISTENCY_HARD_BLOCK
-        )
-        
-        if USE_STORY_CONSISTENCY_LAYER:
-            logger.info("🔍 Running STORY CONSISTENCY LAYER v6.0...")
-            from services.story_consistency_agent import validate_dm_output
-            
-            # Build dm_draft from DM output
-            dm_draft = {
-                "narration": dm_response.get("narration", ""),
-                "scene_mode": dm_response.get("scene_mode", session_mode.get("mode", "exploration") if session_mode else "exploration"),
-                "requested_check": dm_response.get("requested_check"),
-                "world_state_update": dm_response.get("world_state_update", {}),
-                "player_updates": dm_response.get("player_updates", {}),
-                "notes": dm_response.get("scene_status", {})
-            }
-            
-            # Prepare canonical data structures
-            quest_state = world_state["world_state"].get("quests", {})
-            npc_registry = world_state["world_state"].get("npcs", {})
-            story_threads = world_state["world_state"].get("story_threads", [])
-            scene_history = world_state["world_state"].get("recent_scenes", [])
-            
-            mechanical_context = {
-                "player_state": char_doc["character_state"],
-                "check_result": check_result,
-                "combat_state": world_state["world_state"].get("combat_state")
-            }
-            
-            # Validate DM output
-            validation = await validate_dm_output(
-                dm_draft=dm_draft,
-                world_blueprint=campaign["world_blueprint"],
-                world_state=world_state["world_state"],
-                quest_state=quest_state,
-                npc_registry=npc_registry,
-                story_threads=story_threads,
-                scene_history=scene_history,
-                mechanical_context=mechanical_context
-            )
-            
-            decision = validation.get("decision", "approve")
-            logger.info(f"   Story Consistency Decision: {decision}")
-            
-            if decision == "approve":
-                corrected = validation.get("corrected_narration")
-                if corrected and CONSISTENCY_AUTO_CORRECT:
-                    dm_response["narration"] = corrected
-                    logger.info("   Applied minimal consistency corrections")
-                elif corrected:
-                    logger.info("   Consistency corrections available but auto-correct disabled")
-            
-            elif decision == "revise_required":
-                corrected = validation.get("corrected_narration")
-                if corrected and CONSISTENCY_AUTO_CORRECT:
-                    dm_response["narration"] = corrected
-                    changes = validation.get("narration_changes_summary", [])
-                    logger.warning(f"⚠️ Story consistency revisions applied: {changes}")
-                else:
-                    logger.warning(f"⚠️ Story consistency issues detected but auto-correct disabled")
-            
-            elif decision == "hard_block":
-                issues = validation.get("issues", [])
-                logger.error(f"❌ STORY CONSISTENCY HARD BLOCK: {len(issues)} critical issues")
-                for issue in issues:
-                    logger.error(f"   [{issue['severity']}] {issue['type']}: {issue['message']}")
-                
-                if CONSISTENCY_HARD_BLOCK:
-                    # Replace narration with safe fallback
-                    dm_response["narration"] = "The scene becomes unclear for a moment. What do you do?"
-                    logger.error("   DM output replaced with safe fallback")
-                else:
-                    logger.warning("   Hard block disabled - using original DM output with warnings")
-            
-            # Log all issues for debugging
-            if validation.get("issues"):
-                for issue in validation["issues"]:
-                    if issue["severity"] == "error":
-                        logger.error(f"   Consistency Issue: [{issue['type']}] {issue['message']}")
-                    elif issue["severity"] == "warning":
-                        logger.warning(f"   Consistency Warning: [{issue['type']}] {issue['message']}")
-        
-        # LORE CHECKER (P2.5: soft mode by default)
-        logger.info("🔍 Running LORE CHECKER...")
-        from services.lore_checker_service import check_lore_consistency
-        
-        lore_check_result = check_lore_consistency(
-            narration=dm_response.get("narration", ""),
-            world_blueprint=campaign["world_blueprint"],
-            world_state=world_state["world_state"],
-            auto_correct=False  # P2.5: soft mode - warnings only, no auto-corrections
-        )
-        
-        # In soft mode, corrected_narration == original (no changes made)
-        # We still use it for consistency with the API
-        if lore_check_result["corrections_made"] > 0:
-            dm_response["narration"] = lore_check_result["corrected_narration"]
-            logger.info(f"✅ LORE CHECKER: Applied {lore_check_result['corrections_made']} corrections")
-        
-        # Log issues as warnings (soft mode doesn't block responses)
-        if lore_check_result["issues"]:
-            logger.warning(f"⚠️ LORE CHECKER: Found {len(lore_check_result['issues'])} potential issues (soft mode - not blocking)")
-        else:
-            logger.info("✅ LORE CHECKER: No issues detected")
-        
-        # APPLY HUMAN DM FILTER v4.1 - Enforce context-based sentence limits and remove AI phrases
-        logger.info("🎭 Applying Human DM Filter v4.1...")
+        # ACTION MODE pipeline (stage graph: tagger -> DC -> forge -> lore -> consistency -> filter)
+        logger.info("🏷️ Running ACTION MODE pipeline...")
+        pipeline_run = await ACTION_MODE_GRAPH.run({
+            "campaign_id": campaign_id,
+            "player_action": player_action,
+            "character_state": char_doc["character_state"],
+            "world_blueprint": campaign["world_blueprint"],
+            "world_state": world_state["world_state"],
+            "check_result": check_result,
+            "pacing_instructions": pacing_instructions,
+            "auto_revealed_info": auto_revealed_info,
+            "condition_explanations": condition_explanations,
+            "session_mode": session_mode,
+            "improvisation_result": improvisation_result,
+            "npc_personalities": npc_personalities_data,
+            "active_tailing_quest": active_tailing_quest,
+            "intent_prefetch": intent_prefetch
+        })
+        intent_prefetch = None
+        dm_response = pipeline_run.context["final_dm_response"]
+        suggested_dc = pipeline_run.context["suggested_dc"]
         from services.narration_filter import NarrationFilter
-        original_narration = dm_response.get("narration", "")
-        original_sentence_count = NarrationFilter.count_sentences(original_narration)
-        logger.info(f"📏 Original narration: {original_sentence_count} sentences, {len(original_narration)} chars")
-        
-        # Get the scene mode from DM response to apply correct sentence limit
-        scene_mode = dm_response.get("scene_mode", "exploration")
-        filtered_narration = NarrationFilter.apply_filter(original_narration, context=scene_mode)
-        final_sentence_count = NarrationFilter.count_sentences(filtered_narration)
-        
-        dm_response["narration"] = filtered_narration
-        logger.info(f"✅ Narration filtered: {final_sentence_count} sentences, {len(filtered_narration)} chars")
-        
-        # Get expected limit for this context
-        expected_limit = NarrationFilter.SENTENCE_LIMITS.get(scene_mode, 10)
-        if original_sentence_count > expected_limit:
-            logger.warning(f"⚠️ LLM VIOLATED {expected_limit}-SENTENCE LIMIT for {scene_mode}: Generated {original_sentence_count}, truncated to {final_sentence_count}")
         
         # WORLD MUTATOR (apply state changes)
         logger.info("🌍 Running WORLD MUTATOR...")
         world_state_update = dm_response.get("world_state_update", {})
         
         if world_state_update:
-            updated_state = {**world_state["world_state"], **world_state_update}
-            await update_world_state(campaign_id, updated_state)
+            with span("action.world_mutator"):
+                updated_state = {**world_state["world_state"], **world_state_update}
+                await update_world_state(campaign_id, updated_state)
             logger.info(f"   World state updated: {list(world_state_update.keys())}")
         
         # TAILING QUEST: Process information and detection
@@ -2904,12 +3133,15 @@ async def process_action(request: dict):
             from services.enemy_sourcing_service import select_enemies_for_location
             from models.normalized_entities import normalize_character, normalize_enemy_list
             
-            # Build enemy templates from world context (P2.5: world-aware enemy sourcing)
+            # Build enemy templates from world context (P2.5: world-aware enemy sourcing).
+            # The difficulty search simulates fights with NumPy: keep it off the event loop
             character_level = char_doc["character_state"].get("level", 1)
-            enemy_templates = select_enemies_for_location(
+            enemy_templates = await asyncio.to_thread(
+                select_enemies_for_location,
                 world_blueprint=campaign["world_blueprint"],
                 world_state=world_state["world_state"],
-                character_level=character_level
+                character_level=character_level,
+                character_state=char_doc["character_state"]
             )
             
             # Normalize enemies before combat starts
@@ -2953,7 +3185,7 @@ async def process_action(request: dict):
             combat_limits = MODE_LIMITS.get("combat", {"min": 4, "max": 8})
             combat_narration = NarrationFilter.apply_filter(combat_narration, max_sentences=combat_limits["max"], context="combat_start")
             
-            entity_index = build_entity_index_from_world_blueprint(
+            entity_index = get_entity_matcher(
                 campaign["world_blueprint"],
                 world_state["world_state"]
             )
@@ -2972,7 +3204,7 @@ async def process_action(request: dict):
         # NOTE: Narration was already filtered at line 2715 with scene_mode context
         narration_text = dm_response.get("narration", "")
         
-        entity_index = build_entity_index_from_world_blueprint(
+        entity_index = get_entity_matcher(
             campaign["world_blueprint"],
             world_state["world_state"]
         )
@@ -2980,64 +3212,20 @@ async def process_action(request: dict):
         
         logger.info(f"🔗 Extracted {len(entity_mentions)} entity mentions from narration")
         
-        # Auto-create KnowledgeFacts for first-time mentions
-        if entity_mentions:
-            from routers import knowledge as knowledge_router
-            existing_facts = await knowledge_router.get_db().knowledge_facts.find({
-                "campaign_id": campaign_id
-            }, {"entity_id": 1, "entity_type": 1}).to_list(1000)
-            
-            for mention in entity_mentions:
-                # Check if this is the first time player sees this entity
-                is_new = not any(
-                    f.get("entity_type") == mention["entity_type"] and 
-                    f.get("entity_id") == mention["entity_id"]
-                    for f in existing_facts
-                )
-                
-                if is_new:
-                    # Create introduction fact
-                    await knowledge_router.get_db().knowledge_facts.insert_one({
-                        "campaign_id": campaign_id,
-                        "character_id": character_id,
-                        "entity_type": mention["entity_type"],
-                        "entity_id": mention["entity_id"],
-                        "entity_name": mention["display_text"],
-                        "fact_type": "introduction",
-                        "fact_text": f"First encountered in narration: '{narration_text[:100]}...'",
-                        "revealed_at": datetime.now(timezone.utc),
-                        "source": "narration",
-                        "metadata": {}
-                    })
-                    logger.info(f"📚 Created knowledge fact for {mention['entity_type']}: {mention['display_text']}")
-        
-        # CAMPAIGN LOG: Extract structured knowledge from narration
-        # NOTE: This is for ongoing gameplay narration, not arrival scenes
-        # Hooks are only generated for arrival/scene descriptions, not action responses
-        try:
-            from services.campaign_log_extractor import extract_campaign_log_from_scene
-            from services.campaign_log_service import CampaignLogService
-            
-            log_service = CampaignLogService(db)
-            current_location = world_state.get("world_state", {}).get("current_location", "unknown")
-            
-            # Extract structured delta using LLM (no hooks for action narration)
-            campaign_log_delta = await extract_campaign_log_from_scene(
-                narration=narration_text,
-                entity_mentions=entity_mentions,
-                openai_api_key=os.getenv("OPENAI_API_KEY"),
-                current_location=current_location,
-                quest_hooks=None,  # No hooks for action responses
-                scene_id=None
-            )
-            
-            # Apply delta to campaign log
-            if campaign_log_delta:
-                await log_service.apply_delta(campaign_id, campaign_log_delta, character_id)
-                logger.info(f"📖 Campaign log updated with {len(campaign_log_delta.locations)} locations, {len(campaign_log_delta.npcs)} NPCs")
-        except Exception as e:
-            logger.error(f"❌ Campaign log extraction failed: {e}")
-            # Don't fail the whole request if log extraction fails
+        # Knowledge facts + campaign log don't affect this response; queue them
+        await enqueue_narration_jobs(
+            campaign_id=campaign_id,
+            action_id=action_id or derive_action_id(
+                campaign_id, character_id, world_state.get("turn", 0), player_action, check_result
+            ),
+            payload={
+                "campaign_id": campaign_id,
+                "character_id": character_id,
+                "narration_text": narration_text,
+                "entity_mentions": entity_mentions,
+                "current_location": world_state.get("world_state", {}).get("current_location", "unknown")
+            }
+        )
         
         # DC VALIDATION: Ensure check_request has valid DC
         # v3.1 compatibility: DM prompt outputs "requested_check", map to "check_request"
@@ -3063,6 +3251,17 @@ async def process_action(request: dict):
                 check_request["dc"] = 30
             
             logger.info(f"✅ Final DC for check: {check_request['dc']}")
+            
+            # Odds for the UI, against the final DC
+            odds = _check_odds_for(
+                char_doc["character_state"],
+                check_request["dc"],
+                check_request.get("ability"),
+                check_request.get("skill"),
+                check_request.get("advantage_state") or "normal"
+            )
+            if odds:
+                check_request["success_chance"] = odds["success_chance"]
         
         # INJECT GENERATED SCENE: If location changed, prepend the scene description
         if world_state.get("_generated_scene"):
@@ -3093,3 +3292,65 @@ async def process_action(request: dict):
     except Exception as e:
         logger.error(f"❌ Action processing failed: {e}", exc_info=True)
         return api_error("internal_error", f"Action processing failed: {str(e)}", status_code=500)
+    finally:
+        # Early returns (e.g. plot armor) never reach the pipeline
+        if intent_prefetch is not None and not intent_prefetch.done():
+            intent_prefetch.cancel()
+
+
+@router.post("/rpg_dm/action/stream")
+async def process_action_stream(request: dict):
+    """
+    Streaming variant of /rpg_dm/action (chunked NDJSON, one event per line).
+    
+    Events:
+    - {"type": "narration", "text": ...}  one filtered sentence of DUNGEON FORGE narration
+    - {"type": "done", "success": ..., "data": ..., "error": ...}  the same
+      payload /rpg_dm/action returns (narration, check_request, entity_mentions,
+      world_state_update, player_updates) plus `narration_revised`, which is
+      true when the final narration differs from the streamed sentences
+      (story consistency revision, scene injection)
+    
+    Combat turns don't stream narration; they only send the final event.
+    """
+    from fastapi.responses import StreamingResponse, JSONResponse
+    
+    async def run_action(stream_ready: asyncio.Future):
+        narration_stream = open_narration_stream()
+        stream_ready.set_result(narration_stream)
+        body = {"success": False, "data": None, "error": {"type": "cancelled", "message": "Action cancelled", "details": {}}}
+        try:
+            response = await process_action(request)
+            if isinstance(response, JSONResponse):
+                body = json.loads(response.body)
+            else:
+                body = {"success": True, "data": response, "error": None}
+        except Exception as e:
+            logger.error(f"❌ Streaming action failed: {e}", exc_info=True)
+            body = {"success": False, "data": None, "error": {"type": "internal_error", "message": str(e), "details": {}}}
+        finally:
+            # Always terminate the stream, cancellation included, so events() never waits forever
+            data = body.get("data") or {}
+            if isinstance(data, dict) and "narration" in data:
+                data["narration_revised"] = data["narration"] != narration_stream.streamed_text
+            narration_stream.emit({"type": "done", **body})
+    
+    stream_ready = asyncio.get_running_loop().create_future()
+    action_task = run_in_background(run_action(stream_ready), name=f"action_stream:{request.get('campaign_id')}")
+    narration_stream = await stream_ready
+    
+    async def events():
+        finished = False
+        try:
+            while True:
+                event = await narration_stream.queue.get()
+                yield to_ndjson(event)
+                if event["type"] == "done":
+                    finished = True
+                    break
+        finally:
+            # Client disconnected mid-turn: stop the action instead of leaking it
+            if not finished:
+                action_task.cancel()
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
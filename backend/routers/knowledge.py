@@ -15,6 +15,7 @@ from models.knowledge_models import (
     UpdateNoteRequest,
     NoteResponse
 )
+from services.knowledge_facts import upsert_introduction_facts
 
 router = APIRouter(prefix="/api/knowledge", tags=["knowledge"])
 
@@ -251,10 +252,21 @@ async def create_knowledge_fact(fact: KnowledgeFact):
     """
     db = get_db()
     
+    if fact.fact_type == "introduction":
+        # One introduction per entity (unique index): a repeat is a no-op, not a duplicate key error
+        mention = {"entity_type": fact.entity_type, "entity_id": fact.entity_id, "display_text": fact.entity_name}
+        created = await upsert_introduction_facts(
+            db, fact.campaign_id, fact.character_id, [mention],
+            fact_text=lambda _: fact.fact_text, source=fact.source
+        )
+        if not created:
+            return {"success": True, "created": False, "message": "Introduction fact already recorded"}
+        return {"success": True, "created": True, "message": "Knowledge fact recorded"}
+    
     fact_doc = fact.model_dump()
     await db.knowledge_facts.insert_one(fact_doc)
     
-    return {"success": True, "message": "Knowledge fact recorded"}
+    return {"success": True, "created": True, "message": "Knowledge fact recorded"}
 
 
 @router.get("/facts")
@@ -13,6 +13,7 @@ from models.quest_models import (
     quest_to_dict, dict_to_quest
 )
 from services import quest_generator, quest_manager
+from services.campaign_cache import invalidate_campaign
 
 logger = logging.getLogger(__name__)
 
@@ -435,6 +436,7 @@ async def complete_quest(request: QuestCompleteRequest):
                 "updated_at": datetime.now(timezone.utc).isoformat()
             }}
         )
+        invalidate_campaign(character_doc.get("campaign_id"))
         
         logger.info(f"🎊 Quest completed: {quest.name}, rewards applied")
         
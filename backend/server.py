@@ -96,7 +96,9 @@ mongo_url = os.getenv('MONGO_URL')
 mongo_client = AsyncIOMotorClient(mongo_url) if mongo_url else None
 db_name = os.getenv("DB_NAME")
 if mongo_client and db_name:
-    db = mongo_client[db_name]
+    from services.tracing import traced_database
+    # Every collection op records a span inside request traces (/api/debug/traces)
+    db = traced_database(mongo_client[db_name])
 else:
     db = None
     logging.getLogger(__name__).warning(
@@ -116,6 +118,7 @@ from routers import quests as quests_router
 from routers import debug as debug_router
 from routers import knowledge as knowledge_router
 from routers import campaign_log as campaign_log_router
+from services.dice import roll_batch as roll_dice_batch
 
 # Create the main app without a prefix
 app = FastAPI(title="Sentient RPG Engine", description="AI-Powered Text RPG Framework")
@@ -1242,7 +1245,9 @@ class StartAdventureResponse(BaseModel):
     state: Dict[str, Any]
 
 class DiceRollRequest(BaseModel):
-    formula: str  # e.g., "2d20kl1+7", "1d20+3", "2d20kh1+5"
+    formula: str  # e.g., "2d20kl1+7", "1d20+3", "2d20kh1+5", "4d6dl1", "1d6!"
+    session_id: Optional[str] = None  # Roll from this session's seeded RNG (replayable)
+    seed: Optional[int] = None  # (Re)seed the session, or a one-off seed without one
 
 class DiceRollResponse(BaseModel):
     formula: str
@@ -1251,6 +1256,15 @@ class DiceRollResponse(BaseModel):
     sum_kept: int
     modifier: int
     total: int
+    terms: List[Dict[str, Any]] = []
+    session_id: Optional[str] = None
+    seed: Optional[int] = None
+    sequence: int = 0
+
+class DiceBatchRequest(BaseModel):
+    formulas: List[str] = Field(..., min_length=1, max_length=100)
+    session_id: Optional[str] = None
+    seed: Optional[int] = None
 
 class TTSRequest(BaseModel):
     text: str = Field(..., min_length=1, max_length=4096, description="Text to convert to speech")
@@ -3899,75 +3913,47 @@ async def start_adventure(request: StartAdventureRequest):
         logger.error(f"Adventure start failed: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to start adventure: {str(e)}")
 
-# Dice Rolling Endpoint
+# Dice Rolling Endpoints
 @api_router.post("/dice", response_model=DiceRollResponse)
 async def roll_dice(request: DiceRollRequest):
     """
-    Roll dice with D&D-style formulas
-    Supports: 1d20+5, 2d20kh1+7 (advantage), 2d20kl1+3 (disadvantage)
+    Roll dice with D&D-style formulas (see services/dice.py)
+    Supports: 1d20+5, 2d20kh1+7 (advantage), 2d20kl1+3 (disadvantage),
+    4d6dl1, 8d6r1, 1d6!, 1d8+1d6-1
     """
-    import re
-    import secrets
-    
-    formula = request.formula.strip()
-    logger.info(f"🎲 Rolling: {formula}")
+    logger.info(f"🎲 Rolling: {request.formula}")
     
     try:
-        # Parse formula: NdXkhY+Z or NdXklY+Z or NdX+Z
-        pattern = r'(\d+)d(\d+)(?:k([hl])(\d+))?([+-]\d+)?'
-        match = re.match(pattern, formula, re.IGNORECASE)
-        
-        if not match:
-            raise ValueError(f"Invalid formula: {formula}")
-        
-        num_dice = int(match.group(1))
-        die_size = int(match.group(2))
-        keep_mode = match.group(3)  # 'h' for highest, 'l' for lowest
-        keep_count = int(match.group(4)) if match.group(4) else num_dice
-        modifier_str = match.group(5) or "+0"
-        modifier = int(modifier_str)
-        
-        # Validate
-        if num_dice < 1 or num_dice > 10:
-            raise ValueError("Number of dice must be 1-10")
-        if die_size not in [4, 6, 8, 10, 12, 20, 100]:
-            raise ValueError("Die size must be d4, d6, d8, d10, d12, d20, or d100")
-        
-        # Roll dice using cryptographically secure random
-        rolls = [secrets.randbelow(die_size) + 1 for _ in range(num_dice)]
-        
-        # Determine which dice to keep
-        if keep_mode == 'h':
-            # Keep highest N
-            sorted_rolls = sorted(rolls, reverse=True)
-            kept = sorted_rolls[:keep_count]
-        elif keep_mode == 'l':
-            # Keep lowest N
-            sorted_rolls = sorted(rolls)
-            kept = sorted_rolls[:keep_count]
-        else:
-            # Keep all
-            kept = rolls
-        
-        sum_kept = sum(kept)
-        total = sum_kept + modifier
-        
+        batch = roll_dice_batch([request.formula], session_id=request.session_id, seed=request.seed)
         result = DiceRollResponse(
-            formula=formula,
-            rolls=rolls,
-            kept=kept,
-            sum_kept=sum_kept,
-            modifier=modifier,
-            total=total
+            **batch["results"][0],
+            session_id=batch["session_id"],
+            seed=batch["seed"],
+            sequence=batch["sequence"]
         )
         
-        logger.info(f"✅ Result: {rolls} → kept {kept} → {sum_kept} + {modifier} = {total}")
+        logger.info(f"✅ Result: {result.rolls} → kept {result.kept} → {result.sum_kept} + {result.modifier} = {result.total}")
         return api_success(result.dict())
         
     except Exception as e:
         logger.error(f"❌ Dice roll error: {e}")
         return api_error("validation_error", str(e), status_code=400)
 
+@api_router.post("/dice/batch")
+async def roll_dice_batch_endpoint(request: DiceBatchRequest):
+    """
+    Roll many formulas in one request, in order
+    Formulas are all validated first; one invalid formula fails the batch
+    """
+    try:
+        batch = roll_dice_batch(request.formulas, session_id=request.session_id, seed=request.seed)
+        logger.info(f"🎲 Rolled batch of {len(request.formulas)}: {[r['total'] for r in batch['results']]}")
+        return api_success(batch)
+        
+    except Exception as e:
+        logger.error(f"❌ Dice batch error: {e}")
+        return api_error("validation_error", str(e), status_code=400)
+
 @api_router.post("/tts/generate")
 async def generate_tts(request: TTSRequest):
     """
@@ -4219,7 +4205,64 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def bootstrap_indexes():
+    """Build declared MongoDB indexes in the background (idempotent)"""
+    if db is not None:
+        from services.db_indexes import ensure_indexes
+        from services.knowledge_facts import dedupe_introduction_facts
+        from services.campaign_log_service import migrate_campaign_logs
+        from services.action_pipeline import run_in_background
+        
+        async def _build():
+            # Duplicates from before the unique index would block building it
+            await dedupe_introduction_facts(db)
+            await ensure_indexes(db)
+            # Single-document campaign logs -> per-entity entries (idempotent)
+            await migrate_campaign_logs(db)
+        
+        run_in_background(_build(), name="ensure_indexes")
+
+@app.on_event("startup")
+async def preload_token_encoding():
+    """Load tiktoken's encoding off the event loop (falls back to estimates on failure)"""
+    from services.consistency_context import preload_encoding
+    await preload_encoding()
+
+@app.on_event("startup")
+async def start_work_queue():
+    """Start post-response workers (campaign log extraction, knowledge facts)"""
+    if db is not None:
+        from services.work_queue import init_work_queue
+        await init_work_queue(db).start()
+
+@app.on_event("shutdown")
+async def stop_work_queue():
+    from services.work_queue import get_work_queue
+    queue = get_work_queue()
+    if queue:
+        await queue.stop()
+
+@app.on_event("startup")
+async def start_world_pool():
+    """Start pre-generating worlds and intros (WORLD_POOL_ENABLED=true)"""
+    from services.world_pool import WORLD_POOL_ENABLED, init_world_pool
+    if db is not None and WORLD_POOL_ENABLED:
+        await init_world_pool(db).start()
+
+@app.on_event("shutdown")
+async def stop_world_pool():
+    from services.world_pool import get_world_pool
+    pool = get_world_pool()
+    if pool:
+        await pool.stop()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     if mongo_client:
         mongo_client.close()
+
+@app.on_event("shutdown")
+async def shutdown_llm_client():
+    from services.llm_client import close_llm_client
+    await close_llm_client()
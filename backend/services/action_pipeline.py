@@ -0,0 +1,184 @@
+"""
+Action Pipeline - Stage graph executor for the DUNGEON FORGE ACTION MODE.
+
+Each stage declares the context keys it reads (inputs) and writes (outputs).
+The executor starts every stage as soon as its inputs exist, so stages that
+don't depend on each other run concurrently. Per-stage wall-clock timings are
+recorded for every run, and each run and stage is a tracing span.
+
+Work that only matters after the player has their narration goes to the
+durable work queue (services/work_queue.py); `run_in_background` is the
+fire-and-forget fallback when that queue isn't running.
+"""
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+StageFunc = Callable[[Dict[str, Any]], Any]
+
+
+class Stage:
+    """A unit of pipeline work with declared inputs and outputs"""
+
+    def __init__(self, name: str, func: StageFunc, inputs: Iterable[str] = (), outputs: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.inputs: Tuple[str, ...] = tuple(inputs)
+        self.outputs: Tuple[str, ...] = tuple(outputs)
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, inputs={self.inputs}, outputs={self.outputs})"
+
+
+class PipelineRun:
+    """Result of executing a StageGraph"""
+
+    def __init__(self, context: Dict[str, Any]):
+        self.context = context
+        self.timings_ms: Dict[str, float] = {}
+        self.total_ms = 0.0
+
+    def summary(self) -> str:
+        parts = [f"{name}={ms:.0f}ms" for name, ms in self.timings_ms.items()]
+        return f"total={self.total_ms:.0f}ms | " + ", ".join(parts)
+
+
+class StageGraph:
+    """
+    Dependency graph of Stages.
+
+    Stages are validated when added: every output may be produced by only one
+    stage. `run()` checks that every input is either seeded in the initial
+    context or produced by some stage, so a typo fails fast instead of hanging.
+    """
+
+    def __init__(self, name: str, stages: Optional[Iterable[Stage]] = None):
+        self.name = name
+        self._stages: List[Stage] = []
+        self._producers: Dict[str, str] = {}
+        for stage in stages or []:
+            self.add(stage)
+
+    def add(self, stage: Stage) -> "StageGraph":
+        for key in stage.outputs:
+            if key in self._producers:
+                raise ValueError(
+                    f"Output '{key}' of stage '{stage.name}' is already produced by '{self._producers[key]}'"
+                )
+            self._producers[key] = stage.name
+        self._stages.append(stage)
+        return self
+
+    @property
+    def stages(self) -> List[Stage]:
+        return list(self._stages)
+
+    def _validate(self, seeded: Set[str]) -> None:
+        available = set(seeded) | set(self._producers)
+        for stage in self._stages:
+            missing = [key for key in stage.inputs if key not in available]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' has unsatisfiable inputs: {missing}")
+
+    async def run(self, context: Dict[str, Any]) -> PipelineRun:
+        """
+        Execute all stages, running independent ones concurrently.
+
+        Args:
+            context: Seed values; stage outputs are merged into it
+
+        Returns:
+            PipelineRun with the final context and per-stage timings
+
+        Raises:
+            The first stage exception (remaining stages are cancelled)
+            ValueError: If a stage returns a key it did not declare
+        """
+        self._validate(set(context))
+        with span(f"pipeline.{self.name}"):
+            return await self._run(context)
+
+    async def _run(self, context: Dict[str, Any]) -> PipelineRun:
+        run = PipelineRun(context=context)
+        pending = list(self._stages)
+        running: Dict[asyncio.Task, Tuple[Stage, float]] = {}
+        started_at = time.perf_counter()
+
+        try:
+            while pending or running:
+                ready = [s for s in pending if all(key in context for key in s.inputs)]
+                for stage in ready:
+                    pending.remove(stage)
+                    task = asyncio.create_task(self._call(stage, context), name=f"{self.name}.{stage.name}")
+                    running[task] = (stage, time.perf_counter())
+
+                if not running:
+                    # Nothing can progress: remaining inputs were never produced
+                    names = [s.name for s in pending]
+                    raise RuntimeError(f"Pipeline '{self.name}' stalled; unsatisfied stages: {names}")
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage, stage_start = running.pop(task)
+                    run.timings_ms[stage.name] = (time.perf_counter() - stage_start) * 1000
+                    outputs = task.result() or {}
+                    unexpected = set(outputs) - set(stage.outputs)
+                    if unexpected:
+                        raise ValueError(f"Stage '{stage.name}' returned undeclared outputs: {sorted(unexpected)}")
+                    context.update(outputs)
+        finally:
+            for task in running:
+                task.cancel()
+
+        run.total_ms = (time.perf_counter() - started_at) * 1000
+        logger.info(f"⏱️ Pipeline [{self.name}] {run.summary()}")
+        return run
+
+    @staticmethod
+    async def _call(stage: Stage, context: Dict[str, Any]) -> Dict[str, Any]:
+        with span(f"stage.{stage.name}"):
+            result = stage.func(context)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# POST-RESPONSE BACKGROUND WORK
+# ═══════════════════════════════════════════════════════════════════════
+
+# Strong references so the event loop doesn't garbage-collect running tasks
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def run_in_background(coro: Awaitable[Any], name: str) -> asyncio.Task:
+    """
+    Run bookkeeping work after the response has been returned.
+
+    Failures are logged and swallowed; they must never affect the player.
+    """
+    async def _runner():
+        start = time.perf_counter()
+        try:
+            await coro
+            logger.info(f"✅ Background [{name}] finished in {(time.perf_counter() - start) * 1000:.0f}ms")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Background [{name}] failed: {e}", exc_info=True)
+
+    task = asyncio.create_task(_runner(), name=f"background.{name}")
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+def pending_background_tasks() -> int:
+    """Number of post-response tasks still running"""
+    return len(_background_tasks)
@@ -8,7 +8,7 @@ multi-stage reasoning process that produces specific, visible, actionable hooks.
 import logging
 import json
 from typing import Dict, Any, List, Optional
-from .llm_client import get_openai_client
+from .llm_client import chat_completion
 
 logger = logging.getLogger(__name__)
 
@@ -103,7 +103,7 @@ Each hook object MUST match this schema:
 IMPORTANT: Return ONLY the JSON array. No additional text, explanations, or markdown formatting."""
 
 
-def generate_advanced_hooks(
+async def generate_advanced_hooks(
     scene_description: str,
     location_name: str,
     world_blueprint: Dict[str, Any],
@@ -155,9 +155,7 @@ Generate {max_hooks} diverse, actionable quest hooks.
 Return only the JSON array of hooks."""
 
     try:
-        client = get_openai_client()
-        
-        completion = client.chat.completions.create(
+        completion = await chat_completion(
             model="gpt-4o",  # Use full model for sophisticated reasoning
             messages=[
                 {"role": "system", "content": ADVANCED_HOOK_GENERATOR_SYSTEM_PROMPT},
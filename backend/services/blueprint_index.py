@@ -0,0 +1,237 @@
+"""
+Blueprint Index - Immutable lookup tables over a world blueprint.
+
+The lore checker, target resolver, NPC activation and location detector all
+need "which NPC has this id", "which NPCs are at this POI", "is this a known
+place". Each used to walk key_npcs / points_of_interest on every call (the
+target resolver once per active NPC). A BlueprintIndex answers those from
+dicts built once:
+
+- npcs by id (explicit id or the derived name_with_underscores), by lowercase
+  name and by alias (`aliases` field, plus first names that are unique)
+- places by name (starting town, starting region, POIs, towns, POIs nested
+  under the starting town) and POIs by id
+- NPC buckets per location_poi_id, plus the starting-town bucket (no POI or
+  a town role)
+- the {"npcs", "places", "factions"} name tables of the lore checker
+
+Indexes are cached by blueprint content hash with LRU eviction, so identical
+blueprints (e.g. campaigns started from the same pooled world) share one.
+The hash is computed once per blueprint object: blueprints are treated as
+immutable after generation (ensure_npcs_have_ids only adds the ids the index
+already derives, so an index built before it ran stays valid).
+"""
+import os
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BLUEPRINT_INDEX_CACHE_SIZE = int(os.getenv("BLUEPRINT_INDEX_CACHE_SIZE", "64"))
+
+
+def npc_id_for(npc: Dict[str, Any]) -> str:
+    """The NPC's id, or the id derived from its name"""
+    return npc.get("id") or npc.get("name", "").lower().replace(" ", "_")
+
+
+def _freeze(mapping: Dict[str, Any]) -> Mapping[str, Any]:
+    return MappingProxyType(mapping)
+
+
+class BlueprintIndex:
+    """
+    Read-only lookups over one world blueprint.
+
+    Map values are the dicts of the blueprint the index was built from, which
+    may be a content-identical copy of the caller's. Lookups that hand NPCs
+    back for mutation (id assignment, activation) go through the key_npcs
+    positions instead: npc_for() / npcs_for() return the caller's own objects.
+    """
+
+    def __init__(self, world_blueprint: Dict[str, Any]):
+        raw_npcs = world_blueprint.get("key_npcs") or []
+        key_npcs = [npc for npc in raw_npcs if isinstance(npc, dict)]
+        # Positions index key_npcs directly unless it holds non-dict entries
+        self._dense = len(key_npcs) == len(raw_npcs)
+        starting_town = world_blueprint.get("starting_town") or {}
+        starting_region = world_blueprint.get("starting_region") or {}
+        pois = [poi for poi in world_blueprint.get("points_of_interest") or [] if isinstance(poi, dict)]
+
+        self.key_npcs: Tuple[Dict[str, Any], ...] = tuple(key_npcs)
+        self.points_of_interest: Tuple[Dict[str, Any], ...] = tuple(pois)
+        self.starting_town = starting_town
+
+        # NPCs
+        positions: Dict[str, int] = {}
+        by_name: Dict[str, Dict[str, Any]] = {}
+        aliases: Dict[str, Dict[str, Any]] = {}
+        for position, npc in enumerate(key_npcs):
+            # First match wins, as with the linear scans
+            positions.setdefault(npc_id_for(npc), position)
+            derived = npc.get("name", "").lower().replace(" ", "_")
+            if derived:
+                positions.setdefault(derived, position)
+            if npc.get("name"):
+                by_name.setdefault(npc["name"].lower(), npc)
+            for alias in npc.get("aliases") or []:
+                if isinstance(alias, str) and alias:
+                    aliases.setdefault(alias.lower(), npc)
+        first_names: Dict[str, List[Dict[str, Any]]] = {}
+        for npc in key_npcs:
+            parts = npc.get("name", "").split()
+            if len(parts) > 1:
+                first_names.setdefault(parts[0].lower(), []).append(npc)
+        for first, npcs in first_names.items():
+            if len(npcs) == 1 and first not in by_name:
+                aliases.setdefault(first, npcs[0])
+        self.npc_positions = _freeze(positions)
+        self.npcs_by_id = _freeze({npc_id: key_npcs[position] for npc_id, position in positions.items()})
+        self.npcs_by_name = _freeze(by_name)
+        self.npc_aliases = _freeze(aliases)
+
+        # Places
+        places_by_name: Dict[str, Dict[str, Any]] = {}
+        known_locations: List[str] = []
+        if starting_town.get("name"):
+            known_locations.append(starting_town["name"])
+        for town in world_blueprint.get("towns") or []:
+            if isinstance(town, dict) and town.get("name"):
+                known_locations.append(town["name"])
+        for poi in starting_town.get("points_of_interest") or []:
+            if isinstance(poi, dict) and poi.get("name"):
+                known_locations.append(poi["name"])
+        # Destinations the location detector recognizes, in its match order
+        self.known_locations: Tuple[str, ...] = tuple(known_locations)
+
+        for place in [starting_town, starting_region, *pois, *(world_blueprint.get("towns") or [])]:
+            if isinstance(place, dict) and place.get("name"):
+                places_by_name.setdefault(place["name"].lower(), place)
+        self.places_by_name = _freeze(places_by_name)
+        self.pois_by_id = _freeze({poi["id"]: poi for poi in reversed(pois) if poi.get("id")})
+
+        # NPC buckets per location (key_npcs positions, in key_npcs order)
+        by_location: Dict[str, List[int]] = {}
+        town_npcs: List[int] = []
+        for position, npc in enumerate(key_npcs):
+            poi_id = npc.get("location_poi_id", "")
+            if poi_id:
+                by_location.setdefault(poi_id, []).append(position)
+            if not poi_id or "town" in npc.get("role", "").lower():
+                town_npcs.append(position)
+        self.npcs_by_location = _freeze({poi_id: tuple(bucket) for poi_id, bucket in by_location.items()})
+        self.starting_town_npcs: Tuple[int, ...] = tuple(town_npcs)
+
+        # Exact-name tables used by the lore checker
+        lore_npcs = {npc["name"]: npc for npc in key_npcs if npc.get("name")}
+        lore_places: Dict[str, Dict[str, Any]] = {}
+        if starting_town.get("name"):
+            lore_places[starting_town["name"]] = starting_town
+        for poi in pois:
+            if poi.get("name"):
+                lore_places[poi["name"]] = poi
+        if starting_region.get("name"):
+            lore_places[starting_region["name"]] = starting_region
+        lore_factions = {
+            faction["name"]: faction
+            for faction in world_blueprint.get("factions") or []
+            if isinstance(faction, dict) and faction.get("name")
+        }
+        self.lore_lookup = _freeze({
+            "npcs": _freeze(lore_npcs),
+            "places": _freeze(lore_places),
+            "factions": _freeze(lore_factions),
+        })
+
+    def npc_for(self, world_blueprint: Dict[str, Any], npc_id: str) -> Optional[Dict[str, Any]]:
+        """The caller's own key_npcs entry for an id or derived id"""
+        position = self.npc_positions.get(npc_id)
+        return None if position is None else self.npcs_for(world_blueprint, (position,))[0]
+
+    def npcs_for(self, world_blueprint: Dict[str, Any], positions: Tuple[int, ...]) -> List[Dict[str, Any]]:
+        """The caller's own key_npcs entries at the given positions"""
+        key_npcs = world_blueprint.get("key_npcs") or []
+        if not self._dense:
+            key_npcs = [npc for npc in key_npcs if isinstance(npc, dict)]
+        return [key_npcs[position] for position in positions]
+
+    def find_npc(self, reference: str) -> Optional[Dict[str, Any]]:
+        """NPC by id, derived id, name or alias"""
+        if not reference:
+            return None
+        return (
+            self.npcs_by_id.get(reference)
+            or self.npcs_by_name.get(reference.lower())
+            or self.npc_aliases.get(reference.lower())
+        )
+
+    def find_place(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.places_by_name.get(name.lower()) if name else None
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# CACHE
+# ═══════════════════════════════════════════════════════════════════════
+
+# content hash -> index (LRU)
+_indexes: "OrderedDict[str, BlueprintIndex]" = OrderedDict()
+# id(blueprint) -> (blueprint, content hash); the reference keeps the id from
+# being reused while the entry exists
+_hashes: "OrderedDict[int, Tuple[Dict[str, Any], str]]" = OrderedDict()
+_stats = {"hits": 0, "builds": 0, "hashes": 0, "evictions": 0}
+
+
+def blueprint_hash(world_blueprint: Dict[str, Any]) -> str:
+    """Content hash of a blueprint (always recomputed; see get_blueprint_hash)"""
+    raw = json.dumps(world_blueprint or {}, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def get_blueprint_hash(world_blueprint: Dict[str, Any]) -> str:
+    """Content hash of a blueprint, computed once per blueprint object"""
+    world_blueprint = world_blueprint or {}
+    memo = _hashes.get(id(world_blueprint))
+    if memo is not None and memo[0] is world_blueprint:
+        _hashes.move_to_end(id(world_blueprint))
+        return memo[1]
+
+    key = blueprint_hash(world_blueprint)
+    _stats["hashes"] += 1
+    _hashes[id(world_blueprint)] = (world_blueprint, key)
+    while len(_hashes) > BLUEPRINT_INDEX_CACHE_SIZE * 4:
+        _hashes.popitem(last=False)
+    return key
+
+
+def get_blueprint_index(world_blueprint: Dict[str, Any]) -> BlueprintIndex:
+    """Shared BlueprintIndex for a blueprint, built on first use"""
+    world_blueprint = world_blueprint or {}
+    key = get_blueprint_hash(world_blueprint)
+
+    index = _indexes.get(key)
+    if index is None:
+        index = BlueprintIndex(world_blueprint)
+        _stats["builds"] += 1
+        _indexes[key] = index
+        while len(_indexes) > BLUEPRINT_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+            _stats["evictions"] += 1
+    else:
+        _stats["hits"] += 1
+    _indexes.move_to_end(key)
+    return index
+
+
+def get_blueprint_index_stats() -> Dict[str, Any]:
+    """Cache size, hit rate, index builds and blueprint hashes computed"""
+    lookups = _stats["hits"] + _stats["builds"]
+    return {
+        **_stats,
+        "entries": len(_indexes),
+        "max_entries": BLUEPRINT_INDEX_CACHE_SIZE,
+        "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+    }
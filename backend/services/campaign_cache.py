@@ -0,0 +1,378 @@
+"""
+Campaign Cache - In-process, write-through cache for per-campaign state.
+
+Caches the `campaigns`, `world_states` and `characters` documents that every
+action reads. Writes are optimistic: each document carries a `version` that
+the update filter must match and the update increments, so a stale cache
+entry (another worker wrote in between) is detected, reloaded and the write
+re-applied instead of silently clobbering the newer document.
+
+Within a request, a CampaignSession (bound through a context variable, like
+the narration stream) collects update_world_state / update_character_state
+calls on working copies and writes each dirty document once when the request
+ends. Outside a session, updates write through immediately. Either way the
+updated document is returned from memory, without a read-after-write, and
+only the fields that differ from the cached version are sent (state_diff).
+
+A session also keeps the version of each document it started from, so its
+flush is a 3-way merge: only the paths the request itself changed (snapshot ->
+working copy) are applied on top of the latest document, and updates other
+writers made in the meantime survive. Where both changed the same path the
+later flush wins and the overlap is counted in `merge_conflicts`.
+
+The cache keeps private copies: documents are deep-copied in and out, except
+the campaign's world_blueprint, which is immutable after generation and is
+shared so it is deserialized once per process instead of once per turn.
+Entries expire after CAMPAIGN_CACHE_TTL_SECONDS, which bounds how stale a read
+can be when several workers serve the same campaign.
+"""
+import os
+import copy
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+from services.state_diff import apply_update, diff_update, record_write, value_at
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGN_CACHE_MAX_ENTRIES = int(os.getenv("CAMPAIGN_CACHE_MAX_ENTRIES", "1024"))
+CAMPAIGN_CACHE_TTL_SECONDS = float(os.getenv("CAMPAIGN_CACHE_TTL_SECONDS", "300"))
+# Reload-and-retry rounds before a versioned write gives up
+CAMPAIGN_CACHE_MAX_CONFLICT_RETRIES = 3
+
+# Fields that are never mutated after creation and can be shared between copies
+_SHARED_FIELDS: Dict[str, Set[str]] = {
+    "campaigns": {"world_blueprint"},
+}
+
+_Key = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+
+class StateConflictError(RuntimeError):
+    """A versioned write kept losing to concurrent writers"""
+
+
+def _key(collection: str, filter: Dict[str, Any]) -> _Key:
+    return collection, tuple(sorted(filter.items()))
+
+
+def _copy_doc(collection: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    shared = _SHARED_FIELDS.get(collection, ())
+    return {k: (v if k in shared else copy.deepcopy(v)) for k, v in doc.items()}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class _Entry:
+    __slots__ = ("doc", "expires_at")
+
+    def __init__(self, doc: Dict[str, Any], expires_at: float):
+        self.doc = doc
+        self.expires_at = expires_at
+
+
+class CampaignStateCache:
+    """LRU + TTL cache of campaign documents with versioned write-through"""
+
+    def __init__(
+        self,
+        max_entries: int = CAMPAIGN_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = CAMPAIGN_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[_Key, _Entry]" = OrderedDict()
+        self.counters = {
+            "hits": 0, "misses": 0, "expirations": 0, "evictions": 0,
+            "updates": 0, "db_writes": 0, "conflicts": 0, "merge_conflicts": 0, "invalidations": 0
+        }
+
+    def _lookup(self, key: _Key) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            self.counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry.doc
+
+    def _store(self, key: _Key, doc: Dict[str, Any]) -> None:
+        self._entries[key] = _Entry(_copy_doc(key[0], doc), time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    async def get(self, db, collection: str, filter: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Read a document through the cache.
+
+        Returns:
+            A private copy of the document, or None if it doesn't exist
+        """
+        key = _key(collection, filter)
+        doc = self._lookup(key)
+        if doc is not None:
+            self.counters["hits"] += 1
+            return _copy_doc(collection, doc)
+
+        self.counters["misses"] += 1
+        doc = await db[collection].find_one(filter)
+        if doc is None:
+            return None
+        self._store(key, doc)
+        return doc
+
+    def prime(self, collection: str, filter: Dict[str, Any], doc: Dict[str, Any]) -> None:
+        """Seed the cache with a freshly inserted document"""
+        self._store(_key(collection, filter), doc)
+
+    async def write(
+        self,
+        db,
+        collection: str,
+        filter: Dict[str, Any],
+        set_fields: Optional[Dict[str, Any]] = None,
+        inc_fields: Optional[Dict[str, int]] = None,
+        base: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Versioned update. On a version mismatch the document is reloaded and
+        the same $set/$inc re-applied on top of it.
+
+        Args:
+            base: Values of the set_fields as the writer first read them. When
+                  given, only the paths changed since then are written (3-way
+                  merge); without it set_fields replace what is stored
+
+        Returns:
+            The updated document (a private copy), or None if it doesn't exist
+        """
+        key = _key(collection, filter)
+        set_fields = {**(set_fields or {}), "updated_at": _now()}
+        inc_fields = inc_fields or {}
+        # updated_at alone doesn't count as a change
+        changes = {field: value for field, value in set_fields.items() if field != "updated_at"}
+        if base is not None:
+            own = diff_update({f: base[f] for f in changes if f in base}, changes)
+
+        for _ in range(CAMPAIGN_CACHE_MAX_CONFLICT_RETRIES + 1):
+            current = self._lookup(key)
+            if current is None:
+                current = await db[collection].find_one(filter)
+                if current is None:
+                    return None
+
+            # Field-level diff instead of rewriting whole sub-documents
+            if base is None:
+                update = diff_update({f: current[f] for f in changes if f in current}, changes)
+            else:
+                update = {op: dict(fields) for op, fields in own.items()}
+                overlaps = [
+                    path for op in ("$set", "$unset") for path in update.get(op, {})
+                    if value_at(current, path) != value_at(base, path)
+                ]
+                if overlaps:
+                    self.counters["merge_conflicts"] += len(overlaps)
+                    logger.warning(f"⚠️ {collection} {filter}: concurrent writes to {overlaps}, keeping the latest")
+            if not update and not inc_fields:
+                record_write(collection, {"$set": set_fields}, {})
+                return _copy_doc(collection, current)
+
+            version = current.get("version")
+            update.setdefault("$set", {})["updated_at"] = set_fields["updated_at"]
+            update["$inc"] = {**inc_fields, "version": 1}
+            result = await db[collection].update_one({**filter, "version": version}, update)
+            self.counters["db_writes"] += 1
+            if result.matched_count:
+                record_write(collection, {"$set": set_fields, "$inc": update["$inc"]}, update)
+                updated = apply_update(_copy_doc(collection, current), update)
+                for field, amount in inc_fields.items():
+                    updated[field] = (updated.get(field) or 0) + amount
+                updated["version"] = (version or 0) + 1
+                self._store(key, updated)
+                return updated
+
+            self.counters["conflicts"] += 1
+            self._entries.pop(key, None)
+            logger.warning(f"🔁 Version conflict on {collection} {filter} (v{version}), reloading")
+
+        raise StateConflictError(f"Gave up writing {collection} {filter} after {CAMPAIGN_CACHE_MAX_CONFLICT_RETRIES} conflicts")
+
+    def invalidate_campaign(self, campaign_id: str) -> None:
+        """Drop every cached document of one campaign (after a direct DB write)"""
+        for key in [k for k in self._entries if ("campaign_id", campaign_id) in k[1]]:
+            del self._entries[key]
+            self.counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+            # Logical updates absorbed by session coalescing
+            "coalesced_writes": max(0, self.counters["updates"] - self.counters["db_writes"])
+        }
+
+
+_cache: Optional[CampaignStateCache] = None
+
+
+def get_campaign_cache() -> CampaignStateCache:
+    """Process-wide campaign state cache"""
+    global _cache
+    if _cache is None:
+        _cache = CampaignStateCache()
+    return _cache
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# REQUEST SESSION
+# ═══════════════════════════════════════════════════════════════════════
+
+class CampaignSession:
+    """
+    Per-request working set. Reads hand out one working copy per document;
+    updates mutate it and mark fields dirty; flush() writes each dirty
+    document once.
+    """
+
+    def __init__(self, db, cache: CampaignStateCache):
+        self.db = db
+        self.cache = cache
+        self.closed = False
+        self._docs: Dict[_Key, Optional[Dict[str, Any]]] = {}
+        self._bases: Dict[_Key, Dict[str, Any]] = {}  # documents as first read
+        self._filters: Dict[_Key, Dict[str, Any]] = {}
+        self._dirty: Dict[_Key, Set[str]] = {}
+        self._incs: Dict[_Key, Dict[str, int]] = {}
+
+    async def get(self, collection: str, filter: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        key = _key(collection, filter)
+        if key not in self._docs:
+            self._docs[key] = await self.cache.get(self.db, collection, filter)
+            self._filters[key] = filter
+            if self._docs[key] is not None:
+                self._bases[key] = _copy_doc(collection, self._docs[key])
+        return self._docs[key]
+
+    async def update(
+        self,
+        collection: str,
+        filter: Dict[str, Any],
+        set_fields: Optional[Dict[str, Any]] = None,
+        inc_fields: Optional[Dict[str, int]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        doc = await self.get(collection, filter)
+        if doc is None:
+            return None
+        key = _key(collection, filter)
+        self.cache.counters["updates"] += 1
+
+        for field, value in (set_fields or {}).items():
+            doc[field] = value
+            self._dirty.setdefault(key, set()).add(field)
+        for field, amount in (inc_fields or {}).items():
+            doc[field] = (doc.get(field) or 0) + amount
+            incs = self._incs.setdefault(key, {})
+            incs[field] = incs.get(field, 0) + amount
+        doc["updated_at"] = _now()
+        return doc
+
+    async def flush(self) -> None:
+        """Write every dirty document once; the session is closed afterwards"""
+        self.closed = True
+        keys = set(self._dirty) | set(self._incs)
+        if not keys:
+            return
+
+        async def _flush_one(key: _Key):
+            doc = self._docs[key]
+            set_fields = {field: doc[field] for field in self._dirty.get(key, ())}
+            written = await self.cache.write(
+                self.db, key[0], self._filters[key], set_fields, self._incs.get(key), base=self._bases[key]
+            )
+            if written is None:
+                logger.error(f"❌ Flush target vanished: {key[0]} {self._filters[key]}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(_flush_one(key) for key in keys))
+        logger.info(f"💾 Flushed {len(keys)} campaign docs in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+
+_active_session: ContextVar[Optional[CampaignSession]] = ContextVar("campaign_session", default=None)
+
+
+def current_campaign_session() -> Optional[CampaignSession]:
+    """The open session bound to this request, if any"""
+    session = _active_session.get()
+    return session if session is not None and not session.closed else None
+
+
+@asynccontextmanager
+async def campaign_session(db) -> AsyncIterator[CampaignSession]:
+    """
+    Bind a CampaignSession for the duration of a request and flush it on exit
+    (also when the request failed, so partial progress is kept as before).
+    Tasks that outlive the session fall back to write-through.
+    """
+    session = CampaignSession(db, get_campaign_cache())
+    token = _active_session.set(session)
+    try:
+        yield session
+    finally:
+        _active_session.reset(token)
+        await session.flush()
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# READ / WRITE ENTRY POINTS
+# ═══════════════════════════════════════════════════════════════════════
+
+async def load_state(db, collection: str, filter: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Read through the active session, or straight through the cache"""
+    session = current_campaign_session()
+    if session is not None:
+        return await session.get(collection, filter)
+    return await get_campaign_cache().get(db, collection, filter)
+
+
+async def save_state(
+    db,
+    collection: str,
+    filter: Dict[str, Any],
+    set_fields: Optional[Dict[str, Any]] = None,
+    inc_fields: Optional[Dict[str, int]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Update a document: deferred to the session flush when one is open,
+    otherwise a versioned write-through.
+
+    Returns:
+        The updated document, or None if it doesn't exist
+    """
+    session = current_campaign_session()
+    if session is not None:
+        return await session.update(collection, filter, set_fields, inc_fields)
+    cache = get_campaign_cache()
+    cache.counters["updates"] += 1
+    return await cache.write(db, collection, filter, set_fields, inc_fields)
+
+
+def invalidate_campaign(campaign_id: str) -> None:
+    """Call after writing campaign documents without going through save_state"""
+    get_campaign_cache().invalidate_campaign(campaign_id)
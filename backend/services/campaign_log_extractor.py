@@ -6,9 +6,10 @@ import logging
 import json
 import re
 from typing import Dict, Any, List, Optional
-from litellm import acompletion
 
 from models.log_models import CampaignLogDelta, LeadDelta
+from services.llm_client import chat_completion
+from services.tracing import traced
 from utils.entity_mentions import EntityMention
 
 logger = logging.getLogger(__name__)
@@ -69,7 +70,7 @@ class CampaignLogExtractor:
         )
         
         try:
-            response = await acompletion(
+            response = await chat_completion(
                 model="gpt-4o-mini",  # Fast and cost-effective for extraction
                 messages=[
                     {
@@ -81,7 +82,6 @@ class CampaignLogExtractor:
                         "content": prompt
                     }
                 ],
-                api_key=self.api_key,
                 temperature=0.1  # Low temp for consistent extraction
             )
             
@@ -328,6 +328,7 @@ Output ONLY valid JSON, no explanation."""
 
 
 # Convenience function for integration
+@traced("campaign_log_extraction")
 async def extract_campaign_log_from_scene(
     narration: str,
     entity_mentions: List[EntityMention],
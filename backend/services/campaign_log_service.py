@@ -1,11 +1,34 @@
 """
 Campaign Log Service - Storage and Delta Merging
 Handles persistence and intelligent merging of campaign log updates.
+
+Storage is normalized so no single document grows with the campaign:
+- campaign_logs: one small header per (campaign_id, character_id) with
+  per-category counters, created_at, last_updated and a `revision` counter
+  that every write increments (the log's ETag)
+- campaign_log_entries: one document per known entity, keyed by
+  (campaign_id, character_id, entity_type, entity_id), the entity itself
+  under `data` and a per-entity `last_updated`
+
+Category listings page through entries ordered by (last_updated, entity_id)
+with an opaque cursor, so `updated_since` incremental sync and pagination use
+the same index. last_updated is stamped by the server ($currentDate), so
+timestamps from different API processes share one clock.
+
+Deltas load only the entities they touch and write them back as targeted
+upserts (field-level diffs for existing entries). Logs stored in the old
+single-document format are migrated the first time they are accessed, or in
+bulk by migrate_campaign_logs().
 """
+import base64
+import hashlib
+import json
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Type
 from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import BaseModel
+from pymongo import UpdateOne
 
 from models.log_models import (
     CampaignLog,
@@ -27,9 +50,51 @@ from models.log_models import (
     DecisionDelta,
     LeadDelta
 )
+from services.state_diff import diff_update, record_write
 
 logger = logging.getLogger(__name__)
 
+STORAGE_VERSION = 2
+
+# entity_type -> (CampaignLog field, model)
+ENTITY_TYPES: Dict[str, Tuple[str, Type[BaseModel]]] = {
+    "location": ("locations", LocationKnowledge),
+    "npc": ("npcs", NpcKnowledge),
+    "faction": ("factions", FactionKnowledge),
+    "quest": ("quests", QuestKnowledge),
+    "rumor": ("rumors", RumorKnowledge),
+    "item": ("items", ItemKnowledge),
+    "decision": ("decisions", DecisionKnowledge),
+    "lead": ("leads", LeadEntry),
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+_EntityKey = Tuple[str, str]
+
+
+def encode_cursor(last_updated: datetime, entity_id: str) -> str:
+    """Opaque page cursor for the (last_updated, entity_id) sort key"""
+    raw = json.dumps([last_updated.isoformat(), entity_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, entity_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), str(entity_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def open_lead_statuses(include_abandoned: bool = False) -> Dict[str, Any]:
+    """Status condition for open leads: never resolved, abandoned unless asked"""
+    closed = ["resolved"] if include_abandoned else ["resolved", "abandoned"]
+    return {"$nin": closed}
+
 
 class CampaignLogService:
     """Service for managing campaign logs"""
@@ -37,65 +102,263 @@ class CampaignLogService:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
         self.collection = db.campaign_logs
+        self.entries = db.campaign_log_entries
     
-    async def get_or_create_log(
-        self, 
-        campaign_id: str, 
+    # ───────────────────────────────────────────────────────────────────
+    # Storage
+    # ───────────────────────────────────────────────────────────────────
+    
+    async def _get_header(
+        self,
+        campaign_id: str,
         character_id: Optional[str] = None
-    ) -> CampaignLog:
+    ) -> Dict[str, Any]:
         """
-        Get existing campaign log or create a new one.
+        Header for the log, created if missing and migrated if it is still
+        a single-document log. Without character_id, any log of the campaign
+        matches (as the single-document queries did).
         """
         query = {"campaign_id": campaign_id}
         if character_id:
             query["character_id"] = character_id
         
-        log_doc = await self.collection.find_one(query, {"_id": 0})
-        
-        if log_doc:
-            logger.info(f"📖 Found existing campaign log for {campaign_id}")
-            return CampaignLog(**log_doc)
-        else:
+        header = await self.collection.find_one(query, {
+            "_id": 1, "campaign_id": 1, "character_id": 1, "storage_version": 1,
+            "counts": 1, "created_at": 1, "last_updated": 1, "revision": 1
+        })
+        if header is None:
             logger.info(f"📖 Creating new campaign log for {campaign_id}")
-            new_log = CampaignLog(
-                campaign_id=campaign_id,
-                character_id=character_id
+            now = datetime.now(timezone.utc)
+            header = {
+                "campaign_id": campaign_id,
+                "character_id": character_id,
+                "storage_version": STORAGE_VERSION,
+                "counts": {field: 0 for field, _ in ENTITY_TYPES.values()},
+                "created_at": now,
+                "last_updated": now,
+                "revision": 0
+            }
+            await self.collection.update_one(
+                query,
+                {"$setOnInsert": {k: v for k, v in header.items() if k not in query}},
+                upsert=True
             )
-            await self.save_log(new_log)
-            return new_log
+            return header
+        
+        if header.get("storage_version") != STORAGE_VERSION:
+            legacy = await self.collection.find_one({"_id": header["_id"]})
+            header = await self._migrate_legacy(legacy)
+        return header
     
-    async def save_log(self, log: CampaignLog) -> None:
-        """Save the entire log to MongoDB"""
-        log.last_updated = datetime.now(timezone.utc)
+    def _entry_filter(self, header: Dict[str, Any], entity_type: str, entity_id: Optional[str] = None) -> Dict[str, Any]:
+        query = {
+            "campaign_id": header["campaign_id"],
+            "character_id": header.get("character_id"),
+            "entity_type": entity_type
+        }
+        if entity_id is not None:
+            query["entity_id"] = entity_id
+        return query
+    
+    def _parse(self, entry: Dict[str, Any]) -> BaseModel:
+        _, model = ENTITY_TYPES[entry["entity_type"]]
+        return model(**entry["data"])
+    
+    async def _load_entities(
+        self,
+        header: Dict[str, Any],
+        keys: List[_EntityKey]
+    ) -> Dict[_EntityKey, Dict[str, Any]]:
+        """Stored `data` of the given entities (missing ones are absent)"""
+        if not keys:
+            return {}
+        ids_by_type: Dict[str, List[str]] = {}
+        for entity_type, entity_id in keys:
+            ids_by_type.setdefault(entity_type, []).append(entity_id)
+        
+        cursor = self.entries.find(
+            {
+                "campaign_id": header["campaign_id"],
+                "character_id": header.get("character_id"),
+                "$or": [
+                    {"entity_type": entity_type, "entity_id": {"$in": ids}}
+                    for entity_type, ids in ids_by_type.items()
+                ]
+            },
+            {"_id": 0, "entity_type": 1, "entity_id": 1, "data": 1}
+        )
+        return {
+            (entry["entity_type"], entry["entity_id"]): entry["data"]
+            async for entry in cursor
+        }
+    
+    async def _write_entities(
+        self,
+        header: Dict[str, Any],
+        changed: Dict[_EntityKey, BaseModel],
+        stored: Dict[_EntityKey, Dict[str, Any]]
+    ) -> Dict[str, int]:
+        """
+        Upsert changed entities (diffs for existing ones) and bump the
+        header's revision. Timestamps come from the server ($currentDate).
         
-        query = {"campaign_id": log.campaign_id}
-        if log.character_id:
-            query["character_id"] = log.character_id
+        Returns:
+            {"created": n, "updated": n}
+        """
+        stamp = {"$currentDate": {"last_updated": True}}
+        operations = []
+        op_types = []
+        for (entity_type, entity_id), entity in changed.items():
+            data = entity.model_dump()
+            query = self._entry_filter(header, entity_type, entity_id)
+            old = stored.get((entity_type, entity_id))
+            if old is None:
+                update = {"$set": {"data": data}, **stamp}
+                record_write("campaign_log_entries", update, update)
+            else:
+                update = diff_update({"data": old}, {"data": data})
+                record_write("campaign_log_entries", {"$set": {"data": data}}, update)
+                if not update:
+                    continue
+                update.update(stamp)
+            operations.append(UpdateOne(query, update, upsert=True))
+            op_types.append(entity_type)
+        
+        if not operations:
+            return {"created": 0, "updated": 0}
+        
+        created: Dict[str, int] = {}
+        result = await self.entries.bulk_write(operations, ordered=False)
+        for index in result.upserted_ids:
+            field, _ = ENTITY_TYPES[op_types[index]]
+            created[field] = created.get(field, 0) + 1
+        
+        header_update: Dict[str, Any] = {
+            **stamp,
+            "$inc": {"revision": 1, **{f"counts.{field}": n for field, n in created.items()}}
+        }
+        await self.collection.update_one(
+            {"campaign_id": header["campaign_id"], "character_id": header.get("character_id")},
+            header_update
+        )
         
-        log_dict = log.model_dump()
+        total_created = sum(created.values())
+        return {"created": total_created, "updated": len(operations) - total_created}
+    
+    async def _migrate_legacy(self, legacy: Dict[str, Any]) -> Dict[str, Any]:
+        """Split a single-document log into entries + header (idempotent)"""
+        log = CampaignLog(**{k: v for k, v in legacy.items() if k != "_id"})
+        header = {
+            "campaign_id": log.campaign_id,
+            "character_id": log.character_id,
+            "storage_version": STORAGE_VERSION,
+            "counts": {},
+            "created_at": log.created_at,
+            "last_updated": log.last_updated,
+            "revision": 0
+        }
         
-        await self.collection.replace_one(
-            query,
-            log_dict,
-            upsert=True
+        operations = []
+        for entity_type, (field, _) in ENTITY_TYPES.items():
+            entities = getattr(log, field)
+            header["counts"][field] = len(entities)
+            for entity_id, entity in entities.items():
+                operations.append(UpdateOne(
+                    self._entry_filter(header, entity_type, entity_id),
+                    {"$set": {"data": entity.model_dump(), "last_updated": log.last_updated}},
+                    upsert=True
+                ))
+        if operations:
+            await self.entries.bulk_write(operations, ordered=False)
+        
+        await self.collection.update_one(
+            {"_id": legacy["_id"]},
+            {
+                "$set": header,
+                "$unset": {field: "" for field, _ in ENTITY_TYPES.values()}
+            }
         )
+        logger.info(f"📦 Migrated campaign log {log.campaign_id} to per-entity storage ({len(operations)} entries)")
+        return {"_id": legacy["_id"], **header}
+    
+    # ───────────────────────────────────────────────────────────────────
+    # Whole-log access
+    # ───────────────────────────────────────────────────────────────────
+    
+    async def get_or_create_log(
+        self, 
+        campaign_id: str, 
+        character_id: Optional[str] = None
+    ) -> CampaignLog:
+        """
+        Get the full campaign log (assembled from its entries), creating an
+        empty one if none exists. Prefer the targeted methods below.
+        """
+        header = await self._get_header(campaign_id, character_id)
+        
+        categories: Dict[str, Dict[str, Any]] = {field: {} for field, _ in ENTITY_TYPES.values()}
+        cursor = self.entries.find(
+            {"campaign_id": header["campaign_id"], "character_id": header.get("character_id")},
+            {"_id": 0, "entity_type": 1, "entity_id": 1, "data": 1}
+        )
+        async for entry in cursor:
+            field, _ = ENTITY_TYPES[entry["entity_type"]]
+            categories[field][entry["entity_id"]] = entry["data"]
+        
+        return CampaignLog(
+            campaign_id=header["campaign_id"],
+            character_id=header.get("character_id"),
+            created_at=header["created_at"],
+            last_updated=header["last_updated"],
+            **categories
+        )
+    
+    async def save_log(self, log: CampaignLog) -> None:
+        """Save every entry of a full log (upserts; unchanged entries are skipped)"""
+        header = await self._get_header(log.campaign_id, log.character_id)
+        
+        changed: Dict[_EntityKey, BaseModel] = {}
+        for entity_type, (field, _) in ENTITY_TYPES.items():
+            for entity_id, entity in getattr(log, field).items():
+                changed[(entity_type, entity_id)] = entity
+        stored = await self._load_entities(header, list(changed))
+        await self._write_entities(header, changed, stored)
         
         logger.info(f"💾 Saved campaign log for {log.campaign_id}")
     
+    # ───────────────────────────────────────────────────────────────────
+    # Delta merging
+    # ───────────────────────────────────────────────────────────────────
+    
     async def apply_delta(
         self, 
         campaign_id: str, 
         delta: CampaignLogDelta,
         character_id: Optional[str] = None
-    ) -> CampaignLog:
+    ) -> Dict[str, int]:
         """
         Apply a delta update to the campaign log.
-        Intelligently merges new information with existing data.
+        Intelligently merges new information with existing data; only the
+        entities named in the delta are read and written.
+        
+        Returns:
+            {"created": n, "updated": n}
         """
         logger.info(f"🔄 Applying delta to campaign log {campaign_id}")
         
-        # Get existing log
-        log = await self.get_or_create_log(campaign_id, character_id)
+        # Load only the entities this delta touches into a partial log;
+        # the merge below works on it exactly as on a full one
+        header = await self._get_header(campaign_id, character_id)
+        touched_keys = [
+            (entity_type, entry.id)
+            for entity_type, (field, _) in ENTITY_TYPES.items()
+            for entry in getattr(delta, field)
+        ]
+        stored = await self._load_entities(header, touched_keys)
+        categories: Dict[str, Dict[str, Any]] = {field: {} for field, _ in ENTITY_TYPES.values()}
+        for (entity_type, entity_id), data in stored.items():
+            categories[ENTITY_TYPES[entity_type][0]][entity_id] = data
+        log = CampaignLog(campaign_id=campaign_id, character_id=header.get("character_id"), **categories)
         
         # Merge locations
         for loc_delta in delta.locations:
@@ -228,11 +491,15 @@ class CampaignLogService:
                     related_faction_ids=lead_delta.related_faction_ids
                 )
         
-        # Save updated log
-        await self.save_log(log)
+        # Write back the touched entities
+        touched = {
+            (entity_type, entity_id): getattr(log, ENTITY_TYPES[entity_type][0])[entity_id]
+            for entity_type, entity_id in touched_keys
+        }
+        result = await self._write_entities(header, touched, stored)
         
-        logger.info(f"✅ Delta applied successfully to campaign log {campaign_id}")
-        return log
+        logger.info(f"✅ Delta applied successfully to campaign log {campaign_id} ({result['created']} new, {result['updated']} updated)")
+        return result
     
     def _merge_location(self, existing: LocationKnowledge, delta: LocationDelta) -> None:
         """Merge location delta into existing location (in-place)"""
@@ -388,6 +655,116 @@ class CampaignLogService:
         """Get the full campaign log"""
         return await self.get_or_create_log(campaign_id, character_id)
     
+    async def list_entities(
+        self,
+        campaign_id: str,
+        entity_type: str,
+        character_id: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> List[BaseModel]:
+        """All entries of one category (optionally filtered by status)"""
+        if entity_type not in ENTITY_TYPES:
+            return []
+        header = await self._get_header(campaign_id, character_id)
+        query = self._entry_filter(header, entity_type)
+        if status:
+            query["data.status"] = status
+        cursor = self.entries.find(query, {"_id": 0, "entity_type": 1, "data": 1})
+        return [self._parse(entry) async for entry in cursor]
+    
+    async def list_entities_page(
+        self,
+        campaign_id: str,
+        entity_type: str,
+        character_id: Optional[str] = None,
+        status: Optional[Any] = None,
+        fields: Optional[List[str]] = None,
+        updated_since: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Dict[str, Any]:
+        """
+        One page of a category, ordered by (last_updated, entity_id).
+        
+        Args:
+            status: Status value, or a Mongo condition such as open_lead_statuses()
+            fields: Entity fields to return (`id` is always included); None for
+                    full entities
+            updated_since: Only entries written at or after this time; entries
+                           stamped in the same millisecond as the previous
+                           sync's last_updated are sent again rather than missed
+            cursor: next_cursor of the previous page
+            limit: Page size, capped at MAX_PAGE_SIZE
+            
+        Returns:
+            {"items": [...], "next_cursor": str|None, "last_updated": datetime|None}
+            where last_updated is the newest entry timestamp in the page (the
+            value to pass as updated_since on the next sync)
+        
+        Raises:
+            ValueError: Unknown entity type or field, or malformed cursor
+        """
+        if entity_type not in ENTITY_TYPES:
+            raise ValueError(f"Unknown entity type '{entity_type}'")
+        _, model = ENTITY_TYPES[entity_type]
+        if fields:
+            unknown = [f for f in fields if f not in model.model_fields]
+            if unknown:
+                raise ValueError(f"Unknown {entity_type} fields: {', '.join(unknown)}")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        
+        header = await self._get_header(campaign_id, character_id)
+        query = self._entry_filter(header, entity_type)
+        if status is not None:
+            query["data.status"] = status
+        if updated_since is not None:
+            query["last_updated"] = {"$gte": updated_since}
+        if cursor:
+            after_time, after_id = decode_cursor(cursor)
+            query["$or"] = [
+                {"last_updated": {"$gt": after_time}},
+                {"last_updated": after_time, "entity_id": {"$gt": after_id}}
+            ]
+        
+        projection: Dict[str, Any] = {"_id": 0, "entity_type": 1, "entity_id": 1, "last_updated": 1}
+        if fields:
+            projection.update({f"data.{f}": 1 for f in {"id", *fields}})
+        else:
+            projection["data"] = 1
+        
+        entries = self.entries.find(query, projection).sort(
+            [("last_updated", 1), ("entity_id", 1)]
+        ).limit(limit + 1)
+        page = [entry async for entry in entries]
+        has_more = len(page) > limit
+        page = page[:limit]
+        
+        if fields:
+            items = [entry.get("data", {}) for entry in page]
+        else:
+            items = [self._parse(entry) for entry in page]
+        last = page[-1] if page else None
+        return {
+            "items": items,
+            "next_cursor": encode_cursor(last["last_updated"], last["entity_id"]) if has_more else None,
+            "last_updated": last["last_updated"] if last else None
+        }
+    
+    async def get_log_etag(
+        self,
+        campaign_id: str,
+        character_id: Optional[str] = None,
+        *parts: Any
+    ) -> str:
+        """
+        Weak ETag for a log view: every entity write increments the header's
+        revision, so the revision plus the request parameters (`parts`)
+        identify the response without reading any entries.
+        """
+        header = await self._get_header(campaign_id, character_id)
+        key = json.dumps([header.get("revision", 0), [str(part) for part in parts]])
+        return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+    
     async def get_entity(
         self,
         campaign_id: str,
@@ -396,47 +773,28 @@ class CampaignLogService:
         character_id: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """Get a specific entity from the log"""
-        log = await self.get_or_create_log(campaign_id, character_id)
-        
-        entity_map = {
-            "location": log.locations,
-            "npc": log.npcs,
-            "faction": log.factions,
-            "quest": log.quests,
-            "rumor": log.rumors,
-            "item": log.items,
-            "decision": log.decisions,
-            "lead": log.leads
-        }
-        
-        collection = entity_map.get(entity_type)
-        if not collection:
+        if entity_type not in ENTITY_TYPES:
             return None
-        
-        entity = collection.get(entity_id)
-        return entity.model_dump() if entity else None
+        header = await self._get_header(campaign_id, character_id)
+        entry = await self.entries.find_one(
+            self._entry_filter(header, entity_type, entity_id),
+            {"_id": 0, "entity_type": 1, "data": 1}
+        )
+        return self._parse(entry).model_dump() if entry else None
     
     async def get_log_summary(
         self,
         campaign_id: str,
         character_id: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Get summary counts for the campaign log"""
-        log = await self.get_or_create_log(campaign_id, character_id)
+        """Get summary counts for the campaign log (header only)"""
+        header = await self._get_header(campaign_id, character_id)
+        counts = header.get("counts", {})
         
         return {
             "campaign_id": campaign_id,
-            "counts": {
-                "locations": len(log.locations),
-                "npcs": len(log.npcs),
-                "factions": len(log.factions),
-                "quests": len(log.quests),
-                "rumors": len(log.rumors),
-                "items": len(log.items),
-                "decisions": len(log.decisions),
-                "leads": len(log.leads)
-            },
-            "last_updated": log.last_updated
+            "counts": {field: counts.get(field, 0) for field, _ in ENTITY_TYPES.values()},
+            "last_updated": header.get("last_updated")
         }
     
     async def list_open_leads(
@@ -456,19 +814,13 @@ class CampaignLogService:
         Returns:
             List of LeadEntry objects that are still open
         """
-        log = await self.get_or_create_log(campaign_id, character_id)
+        header = await self._get_header(campaign_id, character_id)
         
-        open_leads = []
-        for lead in log.leads.values():
-            # Always exclude resolved
-            if lead.status == "resolved":
-                continue
-            
-            # Exclude abandoned unless explicitly requested
-            if lead.status == "abandoned" and not include_abandoned:
-                continue
-            
-            open_leads.append(lead)
+        query = self._entry_filter(header, "lead")
+        query["data.status"] = open_lead_statuses(include_abandoned)
+        
+        cursor = self.entries.find(query, {"_id": 0, "entity_type": 1, "data": 1})
+        open_leads = [self._parse(entry) async for entry in cursor]
         
         # Sort by created_at (newest first)
         open_leads.sort(key=lambda x: x.created_at, reverse=True)
@@ -493,8 +845,12 @@ class CampaignLogService:
         Returns:
             LeadEntry object or None
         """
-        log = await self.get_or_create_log(campaign_id, character_id)
-        return log.leads.get(lead_id)
+        header = await self._get_header(campaign_id, character_id)
+        entry = await self.entries.find_one(
+            self._entry_filter(header, "lead", lead_id),
+            {"_id": 0, "entity_type": 1, "data": 1}
+        )
+        return self._parse(entry) if entry else None
     
     async def update_lead_status(
         self,
@@ -517,12 +873,13 @@ class CampaignLogService:
         Returns:
             Updated LeadEntry or None if lead not found
         """
-        log = await self.get_or_create_log(campaign_id, character_id)
+        header = await self._get_header(campaign_id, character_id)
+        stored = await self._load_entities(header, [("lead", lead_id)])
         
-        lead = log.leads.get(lead_id)
-        if not lead:
+        if not stored:
             logger.warning(f"❌ Lead {lead_id} not found in campaign {campaign_id}")
             return None
+        lead = LeadEntry(**stored[("lead", lead_id)])
         
         # Update status
         old_status = lead.status
@@ -536,8 +893,27 @@ class CampaignLogService:
             else:
                 lead.player_notes = player_notes
         
-        # Save updated log
-        await self.save_log(log)
+        # Save updated lead
+        await self._write_entities(header, {("lead", lead_id): lead}, stored)
         
         logger.info(f"✅ Updated lead {lead_id} status: {old_status} → {new_status}")
         return lead
+
+
+async def migrate_campaign_logs(db: AsyncIOMotorDatabase) -> int:
+    """
+    Convert every single-document campaign log to per-entity storage.
+    Safe to re-run; logs already migrated are skipped.
+    
+    Returns:
+        Number of logs migrated
+    """
+    service = CampaignLogService(db)
+    migrated = 0
+    cursor = db.campaign_logs.find({"storage_version": {"$ne": STORAGE_VERSION}})
+    async for legacy in cursor:
+        await service._migrate_legacy(legacy)
+        migrated += 1
+    if migrated:
+        logger.info(f"📦 Migrated {migrated} campaign logs to per-entity storage")
+    return migrated
@@ -152,6 +152,77 @@ def start_combat_with_target(
     return combat_state
 
 
+def start_combat(
+    character_state: Dict[str, Any],
+    enemy_templates: List[Dict[str, Any]],
+    campaign_id: str,
+    character_id: str
+) -> Dict[str, Any]:
+    """
+    Initialize combat state for enemies sourced from the location.
+
+    Args:
+        character_state: Player character state
+        enemy_templates: Normalized enemies (normalize_enemy_list), ids unique
+        campaign_id: Campaign ID
+        character_id: Character ID
+
+    Returns:
+        CombatState dict
+    """
+    enemies = []
+    for i, template in enumerate(enemy_templates):
+        hp = template.get("hp", 10)
+        enemies.append({
+            "id": template.get("id") or f"enemy_{i + 1}",
+            "name": template.get("name", "Unknown Enemy"),
+            "hp": hp,
+            "max_hp": template.get("max_hp") or hp,
+            "ac": template.get("ac", 12),
+            "abilities": template.get("abilities") or {"str": 10, "dex": 10, "con": 10},
+            "proficiency_bonus": template.get("proficiency_bonus", 2),
+            "attack_bonus": template.get("attack_bonus", 0),
+            "damage_die": template.get("damage_die", "1d6"),
+            "conditions": [],
+        })
+
+    # Simple initiative: player always goes first
+    turn_order = ["player"] + [e["id"] for e in enemies]
+
+    combat_state = {
+        "enemies": enemies,
+        "participants": [],
+        "turn_order": turn_order,
+        "active_turn": "player",
+        "round": 1,
+        "combat_over": False,
+        "outcome": None,
+        "converted_npcs": []
+    }
+
+    logger.info(f"⚔️ Combat started for {campaign_id}/{character_id}: {len(enemies)} enemies, player goes first")
+    return combat_state
+
+
+def generate_combat_options(combat_state: Dict[str, Any]) -> List[str]:
+    """Action options for the player during combat"""
+    alive_enemies = [e for e in combat_state["enemies"] if e["hp"] > 0]
+
+    if not alive_enemies:
+        return ["Continue your adventure"]
+
+    options = [
+        f"Attack the {alive_enemies[0]['name']}",
+        "Take a defensive stance",
+        "Attempt to flee"
+    ]
+
+    if len(alive_enemies) > 1:
+        options.insert(1, f"Attack the {alive_enemies[1]['name']}")
+
+    return options
+
+
 def process_player_attack(
     target_id: str,
     character_state: Dict[str, Any],
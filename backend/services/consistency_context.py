@@ -0,0 +1,347 @@
+"""
+Consistency Context - Relevance-ranked, token-budgeted context for the
+Story Consistency Agent.
+
+The agent used to receive world_blueprint, world_state, quests, the NPC
+registry and scene history as indented JSON on every action. Most of it has
+nothing to do with the narration being checked. Here every piece of canon
+becomes a candidate with a priority:
+
+0. the DM draft, mechanical context, world core and the current location
+1. NPCs, locations, factions and quests mentioned in the narration
+2. NPCs at the current location, active quests, the latest scenes
+3. story threads, the global threat, remaining quest summaries
+4. everything else that was mentioned nowhere (older scenes, other NPCs)
+
+Candidates are serialized compactly and packed in priority order until the
+token budget is spent. Tokens are counted with tiktoken (o200k_base, the
+gpt-4o encoding), which server startup loads off the event loop with
+preload_encoding() because the first load may download the BPE file. Until
+it is loaded, or when it can't be (e.g. offline), a chars/4 estimate is
+used instead. Per-call and cumulative savings against
+the old full dump are kept for /api/debug/consistency_context.
+"""
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.entity_mentions import EntityMatcher
+
+logger = logging.getLogger(__name__)
+
+CONSISTENCY_CONTEXT_TOKEN_BUDGET = int(os.getenv("CONSISTENCY_CONTEXT_TOKEN_BUDGET", "6000"))
+TOKEN_ENCODING_PRELOAD_TIMEOUT_SECONDS = float(os.getenv("TOKEN_ENCODING_PRELOAD_TIMEOUT_SECONDS", "30"))
+# Scenes newer than this are priority 2, older ones priority 4
+RECENT_SCENES = 3
+
+CONTEXT_HEADER = "CONTEXT FOR VALIDATION\n\n"
+CONTEXT_FOOTER = """
+
+---
+
+Analyze the dm_draft above for consistency with the provided canonical data.
+Follow your task loop and return the structured JSON output.
+"""
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# TOKEN COUNTING
+# ═══════════════════════════════════════════════════════════════════════
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _load_encoding():
+    """Load o200k_base once (blocking: reads or downloads the BPE file)"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+            logger.info("🔢 tiktoken o200k_base loaded")
+        except Exception as e:
+            logger.warning(f"⚠️ tiktoken encoding unavailable ({e}); estimating tokens as chars/4")
+    return _encoding
+
+
+async def preload_encoding(timeout: float = TOKEN_ENCODING_PRELOAD_TIMEOUT_SECONDS) -> None:
+    """
+    Load the token encoding in a worker thread (call once at startup).
+    Gives up waiting after `timeout`; a slow download still finishes in the
+    background and counts switch to tiktoken once it has.
+    """
+    try:
+        await asyncio.wait_for(asyncio.to_thread(_load_encoding), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"⚠️ tiktoken still loading after {timeout}s; estimating tokens as chars/4 meanwhile")
+
+
+def count_tokens(text: str) -> int:
+    """gpt-4o token count of `text` (estimated until preload_encoding() has loaded tiktoken)"""
+    encoding = _encoding
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# CANDIDATES
+# ═══════════════════════════════════════════════════════════════════════
+
+def _records(value: Any) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(key, record) pairs from a dict of records or a list of records"""
+    if isinstance(value, dict):
+        for key, record in value.items():
+            if isinstance(record, dict):
+                yield str(key), record
+    elif isinstance(value, list):
+        for index, record in enumerate(value):
+            if isinstance(record, dict):
+                yield str(record.get("id") or record.get("quest_id") or record.get("name") or index), record
+
+
+def _name(record: Dict[str, Any]) -> str:
+    return record.get("name") or record.get("title") or ""
+
+
+class _Candidate:
+    __slots__ = ("section", "key", "value", "priority", "order", "tokens")
+
+    def __init__(self, section: str, key: Optional[str], value: Any, priority: int, order: int):
+        self.section = section
+        self.key = key
+        self.value = value
+        self.priority = priority
+        self.order = order
+        text = _compact(value) if key is None else f"{_compact(key)}:{_compact(value)}"
+        self.tokens = count_tokens(text) + 1  # separator
+
+
+def _collect(
+    dm_draft: Dict[str, Any],
+    world_blueprint: Dict[str, Any],
+    world_state: Dict[str, Any],
+    quest_state: Any,
+    npc_registry: Any,
+    story_threads: List[Any],
+    scene_history: List[Any],
+    mechanical_context: Dict[str, Any],
+) -> List[_Candidate]:
+    candidates: List[_Candidate] = []
+
+    def add(section: str, key: Optional[str], value: Any, priority: int) -> None:
+        if value:
+            candidates.append(_Candidate(section, key, value, priority, len(candidates)))
+
+    # Entities that can be referenced by name: (section, key, record)
+    entities: List[Tuple[str, str, Dict[str, Any]]] = []
+    for key, npc in _records(world_blueprint.get("key_npcs") or world_blueprint.get("npcs")):
+        entities.append(("npcs", key, npc))
+    for key, npc in _records(npc_registry):
+        entities.append(("npc_registry", key, npc))
+    for field in ("points_of_interest", "regions", "exotic_sites", "external_regions"):
+        for key, location in _records(world_blueprint.get(field)):
+            entities.append(("locations", f"{field}:{key}", location))
+    for key, faction in _records(world_blueprint.get("factions")):
+        entities.append(("factions", key, faction))
+    for key, quest in _records(quest_state):
+        entities.append(("quests", key, quest))
+
+    narration = str(dm_draft.get("narration") or "").lower()
+    # Several records can share a name (blueprint NPC + registry entry)
+    by_name: Dict[str, List[int]] = {}
+    for index, (_, _, record) in enumerate(entities):
+        if _name(record):
+            by_name.setdefault(_name(record).lower(), []).append(index)
+    matcher = EntityMatcher([
+        {"entity_type": "npc", "entity_id": name, "name": name} for name in by_name
+    ])
+    mentioned = {
+        index
+        for _, _, entry in matcher.find_all(narration)
+        for index in by_name[entry["entity_id"]]
+    }
+
+    current_location = str(world_state.get("current_location") or "")
+    here = current_location.lower()
+    here_ids = set()
+    for section, key, record in entities:
+        if section == "locations" and here and _name(record).lower() == here:
+            here_ids.add(str(record.get("id") or key))
+
+    # Priority 0: what is being validated and where
+    add("dm_draft", None, dm_draft, 0)
+    add("mechanical_context", None, mechanical_context, 0)
+    world_core = world_blueprint.get("world_core") or {}
+    add("world_core", None, {k: world_core.get(k) for k in ("name", "tone", "magic_level") if world_core.get(k)}, 0)
+    starting_town = world_blueprint.get("starting_town") or {}
+    add("current_location", None, {"name": current_location} if current_location else {}, 0)
+    if here and _name(starting_town).lower() == here:
+        add("locations", "starting_town", starting_town, 0)
+
+    for index, (section, key, record) in enumerate(entities):
+        if index in mentioned:
+            priority = 1
+        elif section == "locations" and str(record.get("id") or key) in here_ids:
+            priority = 0
+        elif section in ("npcs", "npc_registry") and (
+            str(record.get("location_poi_id") or "") in here_ids
+            or (here and str(record.get("location") or record.get("current_location") or "").lower() == here)
+        ):
+            priority = 2
+        elif section == "quests" and str(record.get("status", "active")).lower() in ("active", "in_progress", "accepted"):
+            priority = 2
+        elif section == "quests":
+            add("quests", key, {k: record.get(k) for k in ("name", "title", "status") if record.get(k)}, 3)
+            continue
+        else:
+            priority = 4
+        add(section, key, record, priority)
+
+    scenes = [scene for scene in (scene_history or []) if scene]
+    for position, scene in enumerate(reversed(scenes)):
+        add("scene_history", None, scene, 2 if position < RECENT_SCENES else 4)
+    for thread in story_threads or []:
+        add("story_threads", None, thread, 3)
+    add("global_threat", None, world_blueprint.get("global_threat"), 3)
+    if not here or _name(starting_town).lower() != here:
+        add("locations", "starting_town", {k: starting_town.get(k) for k in ("name", "summary") if starting_town.get(k)}, 3)
+    return candidates
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# ASSEMBLY
+# ═══════════════════════════════════════════════════════════════════════
+
+def _render(chosen: List[_Candidate]) -> Tuple[str, Dict[str, int]]:
+    """Prompt text for the chosen candidates and per-section counts"""
+    context: Dict[str, Any] = {}
+    included: Dict[str, int] = {}
+    for candidate in sorted(chosen, key=lambda c: c.order):
+        included[candidate.section] = included.get(candidate.section, 0) + 1
+        if candidate.key is None and candidate.section not in ("scene_history", "story_threads"):
+            context[candidate.section] = candidate.value
+        elif candidate.key is None:
+            context.setdefault(candidate.section, []).append(candidate.value)
+        else:
+            context.setdefault(candidate.section, {})[candidate.key] = candidate.value
+    if "scene_history" in context:
+        # Collected newest first for priority; present in chronological order
+        context["scene_history"].reverse()
+
+    # Sections in a stable order with the draft last
+    ordered = {section: context[section] for section in sorted(context, key=lambda s: s == "dm_draft")}
+    return CONTEXT_HEADER + _compact(ordered) + CONTEXT_FOOTER, included
+
+
+_stats: Dict[str, int] = {"calls": 0, "tokens": 0, "baseline_tokens": 0, "dropped_items": 0}
+_last_call: Dict[str, Any] = {}
+
+
+def assemble_consistency_context(
+    dm_draft: Dict[str, Any],
+    world_blueprint: Dict[str, Any],
+    world_state: Dict[str, Any],
+    quest_state: Any = None,
+    npc_registry: Any = None,
+    story_threads: Optional[List[Dict[str, Any]]] = None,
+    scene_history: Optional[List[Dict[str, Any]]] = None,
+    mechanical_context: Optional[Dict[str, Any]] = None,
+    token_budget: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Build the Story Consistency Agent context within a token budget.
+
+    Returns:
+        {
+          "text": prompt text,
+          "tokens": tokens in text,
+          "baseline_tokens": estimated tokens of the old full JSON dump,
+          "tokens_saved": baseline_tokens - tokens,
+          "included": {section: count}, "dropped": {section: count}
+        }
+    """
+    world_blueprint = world_blueprint or {}
+    world_state = world_state or {}
+    budget = token_budget or CONSISTENCY_CONTEXT_TOKEN_BUDGET
+    candidates = _collect(
+        dm_draft, world_blueprint, world_state, quest_state or {}, npc_registry or {},
+        story_threads or [], scene_history or [], mechanical_context or {}
+    )
+
+    remaining = budget - count_tokens(CONTEXT_HEADER + CONTEXT_FOOTER)
+    chosen: List[_Candidate] = []
+    dropped: Dict[str, int] = {}
+    for candidate in sorted(candidates, key=lambda c: (c.priority, c.order)):
+        # The draft is always included: there is nothing to validate without it
+        if candidate.tokens <= remaining or candidate.section == "dm_draft":
+            chosen.append(candidate)
+            remaining -= candidate.tokens
+        else:
+            dropped[candidate.section] = dropped.get(candidate.section, 0) + 1
+
+    # Per-item estimates ignore section keys and brackets; trim the lowest
+    # priority items until the exact count fits
+    text, included = _render(chosen)
+    tokens = count_tokens(text)
+    while tokens > budget and len(chosen) > 1:
+        victim = next(c for c in reversed(chosen) if c.section != "dm_draft")
+        chosen.remove(victim)
+        dropped[victim.section] = dropped.get(victim.section, 0) + 1
+        text, included = _render(chosen)
+        tokens = count_tokens(text)
+
+    # The old dump: the same inputs, indent=2. Estimated from its length and
+    # the chars/token ratio just measured, to avoid tokenizing it every call.
+    baseline_chars = len(json.dumps({
+        "world_blueprint": world_blueprint,
+        "world_state": world_state,
+        "quest_state": quest_state or {},
+        "npc_registry": npc_registry or {},
+        "story_threads": story_threads or [],
+        "scene_history": scene_history or [],
+        "mechanical_context": mechanical_context or {},
+        "dm_draft": dm_draft
+    }, indent=2, default=str)) + len(CONTEXT_HEADER) + len(CONTEXT_FOOTER)
+    baseline_tokens = max(tokens, round(baseline_chars * tokens / len(text)))
+
+    result = {
+        "text": text,
+        "tokens": tokens,
+        "baseline_tokens": baseline_tokens,
+        "tokens_saved": baseline_tokens - tokens,
+        "included": included,
+        "dropped": dropped
+    }
+    _stats["calls"] += 1
+    _stats["tokens"] += tokens
+    _stats["baseline_tokens"] += baseline_tokens
+    _stats["dropped_items"] += sum(dropped.values())
+    _last_call.clear()
+    _last_call.update({k: v for k, v in result.items() if k != "text"})
+    logger.info(
+        f"🧮 Consistency context: {tokens} tokens (budget {budget}, ~{result['tokens_saved']} saved vs full dump, "
+        f"{sum(dropped.values())} items dropped)"
+    )
+    return result
+
+
+def get_consistency_context_stats() -> Dict[str, Any]:
+    """Cumulative token usage vs the full-dump baseline, plus the last call"""
+    calls = _stats["calls"]
+    return {
+        **_stats,
+        "tokens_saved": _stats["baseline_tokens"] - _stats["tokens"],
+        "avg_tokens": round(_stats["tokens"] / calls, 1) if calls else 0.0,
+        "budget": CONSISTENCY_CONTEXT_TOKEN_BUDGET,
+        "token_counter": "tiktoken:o200k_base" if _encoding is not None else "estimate:chars/4",
+        "last_call": dict(_last_call)
+    }
@@ -0,0 +1,298 @@
+"""
+Consistency Triage - Deterministic risk scoring in front of the Story
+Consistency Agent.
+
+The gpt-4o consistency check is the slowest call of an action, and most
+drafts are fine. triage_dm_output runs the cheap checks on the draft first:
+
+- unknown names:      capitalized names the lore checker can't find in canon,
+                      minus sentence-initial words, common words and pieces
+                      of known multi-word names (its extraction counts all of
+                      those, which would escalate almost every draft)
+- new NPCs:           "a man named X" style introductions of unknown names,
+                      or NPCs added through world_state_update
+- location drift:     the draft moves the player somewhere other than the
+                      current location, or the location validator flags it
+- mechanical mismatch: the draft asks for a check that was just resolved,
+                      or changes HP/XP/gold without a check behind it
+
+Each signal adds a weighted amount to a 0..1 risk score. Drafts at or above
+CONSISTENCY_RISK_THRESHOLD go to the LLM; a CONSISTENCY_AUDIT_SAMPLE_RATE
+fraction of the others is escalated anyway so the triage itself can be
+audited. Escalation rate, LLM latency and the latency saved by skipped calls
+are kept for /api/debug/consistency_triage.
+"""
+import re
+import random
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Weight per occurrence and the number of occurrences that count
+SIGNAL_WEIGHTS: Dict[str, float] = {
+    "unknown_names": 0.15,
+    "new_npcs": 0.35,
+    "location_drift": 0.5,
+    "location_violations": 0.3,
+    "mechanical_mismatches": 0.35,
+}
+SIGNAL_CAPS: Dict[str, int] = {
+    "unknown_names": 3,
+    "new_npcs": 2,
+    "location_drift": 1,
+    "location_violations": 2,
+    "mechanical_mismatches": 2,
+}
+
+_INTRODUCTION = re.compile(
+    r"\b(?:named|called|introduces\s+(?:himself|herself|themselves|themself)\s+as|name\s+is)\s+"
+    r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)"
+)
+# Capitalized words that are not names, on top of lore_checker's stopwords
+_NOT_NAMES = {
+    "a", "an", "the", "and", "or", "but", "so", "yet", "nor", "for", "then", "now", "still", "just",
+    "you", "your", "yours", "he", "she", "they", "we", "it", "its", "his", "her", "their", "our",
+    "there", "here", "this", "that", "these", "those", "some", "someone", "something", "somewhere",
+    "nothing", "nobody", "no", "none", "everything", "everyone", "all", "every", "each", "few", "many",
+    "outside", "inside", "behind", "beyond", "above", "below", "beneath", "around", "across", "along",
+    "near", "nearby", "ahead", "inward", "overhead", "upstairs", "downstairs", "somewhere", "elsewhere",
+    "suddenly", "slowly", "quietly", "finally", "meanwhile", "perhaps", "maybe", "yes", "welcome",
+    "rain", "wind", "dust", "smoke", "snow", "thunder", "light", "shadows", "darkness", "silence",
+    "sunlight", "moonlight", "candlelight", "lanterns", "footsteps", "voices", "somebody",
+    "with", "without", "from", "into", "onto", "through", "under", "over", "at", "in", "on", "by",
+    "once", "again", "only", "even", "soon", "later", "today", "tonight", "tomorrow",
+}
+_MECHANICAL_FIELDS = ("hp", "current_hp", "max_hp", "xp", "xp_gained", "level", "gold", "gold_gained")
+
+
+def _known_names(world_blueprint: Dict[str, Any], world_state: Dict[str, Any]) -> set:
+    from services.lore_checker_service import build_blueprint_lookup
+
+    lookup = build_blueprint_lookup(world_blueprint)
+    known = {name.lower() for table in lookup.values() for name in table}
+    npcs = world_state.get("npcs")
+    for npc in (npcs.values() if isinstance(npcs, dict) else npcs or []):
+        if isinstance(npc, dict) and npc.get("name"):
+            known.add(npc["name"].lower())
+    for name in world_state.get("active_npcs") or []:
+        if isinstance(name, str):
+            known.add(name.lower())
+    return known
+
+
+def _name_parts(known: set) -> set:
+    """Single words of known multi-word names ("raven", "hollow" for Raven's Hollow)"""
+    parts = set()
+    for name in known:
+        words = re.findall(r"[a-z]+", re.sub(r"'s\b", "", name))
+        if len(words) > 1:
+            parts.update(words)
+    return parts
+
+
+def _at_sentence_start(narration: str, index: int) -> bool:
+    before = narration[:index].rstrip().rstrip("\"“‘'(").rstrip()
+    return not before or before[-1] in ".!?…:"
+
+
+def _plausible_unknown_names(candidates: List[str], narration: str, known: set) -> List[str]:
+    """
+    Drop candidates that are not names: common words, pieces of known names
+    and single words that are only ever capitalized at a sentence start.
+    """
+    parts = _name_parts(known)
+    names = []
+    for candidate in candidates:
+        words = candidate.split()
+        if all(word.lower() in _NOT_NAMES or word.lower() in parts or word.lower() in known for word in words):
+            continue
+        if len(words) == 1 and all(
+            _at_sentence_start(narration, match.start())
+            for match in re.finditer(rf"\b{re.escape(candidate)}\b", narration)
+        ):
+            continue
+        names.append(candidate)
+    return names
+
+
+def _location_signals(
+    dm_draft: Dict[str, Any],
+    world_state: Dict[str, Any]
+) -> Dict[str, List[str]]:
+    from services.dm_response_validator import validate_response
+
+    current_location = str(world_state.get("current_location") or "")
+    drift = []
+    update = dm_draft.get("world_state_update") or {}
+    new_location = update.get("current_location") or update.get("location")
+    if isinstance(new_location, str) and current_location and new_location.strip().lower() != current_location.lower():
+        drift.append(f"{current_location} → {new_location}")
+
+    violations = []
+    if current_location:
+        violations = validate_response(
+            dm_response=dm_draft,
+            current_location=current_location,
+            active_npcs=world_state.get("active_npcs", []),
+            location_constraints=""
+        )["violations"]
+    return {"location_drift": drift, "location_violations": violations}
+
+
+def _mechanical_signals(
+    dm_draft: Dict[str, Any],
+    check_result: Optional[Dict[str, Any]]
+) -> List[str]:
+    mismatches = []
+    if check_result and dm_draft.get("requested_check"):
+        mismatches.append("requested a check that was just resolved")
+    player_updates = dm_draft.get("player_updates") or {}
+    changed = [field for field in _MECHANICAL_FIELDS if field in player_updates]
+    if changed and not check_result:
+        mismatches.append(f"mechanics changed without a check: {', '.join(changed)}")
+    return mismatches
+
+
+def triage_dm_output(
+    dm_draft: Dict[str, Any],
+    world_blueprint: Dict[str, Any],
+    world_state: Dict[str, Any],
+    check_result: Optional[Dict[str, Any]] = None,
+    lore_check_result: Optional[Dict[str, Any]] = None,
+    threshold: Optional[float] = None,
+    sample_rate: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Score a DM draft and decide whether the LLM validator should see it.
+
+    Args:
+        lore_check_result: check_lore_consistency() output for the draft, if
+                           the lore check already ran (recomputed otherwise)
+        threshold, sample_rate: Override the config values
+
+    Returns:
+        {
+          "risk_score": 0..1,
+          "signals": {signal: [details]},
+          "escalate": bool,
+          "reason": "risk" | "audit_sample" | "low_risk"
+        }
+    """
+    from config.story_consistency_config import CONSISTENCY_RISK_THRESHOLD, CONSISTENCY_AUDIT_SAMPLE_RATE
+
+    threshold = CONSISTENCY_RISK_THRESHOLD if threshold is None else threshold
+    sample_rate = CONSISTENCY_AUDIT_SAMPLE_RATE if sample_rate is None else sample_rate
+    world_blueprint = world_blueprint or {}
+    world_state = world_state or {}
+    narration = str(dm_draft.get("narration") or "")
+
+    if lore_check_result is None:
+        from services.lore_checker_service import check_lore_consistency
+        lore_check_result = check_lore_consistency(narration, world_blueprint, world_state)
+
+    known = _known_names(world_blueprint, world_state)
+    unknown = sorted(_plausible_unknown_names([
+        issue.split("'")[1]
+        for issue in lore_check_result.get("issues", [])
+        if issue.startswith("Unknown NPC '") and issue.split("'")[1].lower() not in known
+    ], narration, known))
+    introduced = sorted({
+        name for name in _INTRODUCTION.findall(narration) if name.lower() not in known
+    })
+    update = dm_draft.get("world_state_update") or {}
+    for field in ("new_npcs", "npcs"):
+        for npc in update.get(field) or []:
+            name = npc.get("name") if isinstance(npc, dict) else npc
+            if isinstance(name, str) and name.lower() not in known and name not in introduced:
+                introduced.append(name)
+
+    signals: Dict[str, List[str]] = {
+        "unknown_names": [name for name in unknown if name not in introduced],
+        "new_npcs": introduced,
+        **_location_signals(dm_draft, world_state),
+        "mechanical_mismatches": _mechanical_signals(dm_draft, check_result),
+    }
+    risk_score = min(1.0, sum(
+        SIGNAL_WEIGHTS[name] * min(len(details), SIGNAL_CAPS[name])
+        for name, details in signals.items()
+    ))
+
+    if risk_score >= threshold:
+        escalate, reason = True, "risk"
+    elif sample_rate > 0 and random.random() < sample_rate:
+        escalate, reason = True, "audit_sample"
+    else:
+        escalate, reason = False, "low_risk"
+
+    _triage_stats["triaged"] += 1
+    _triage_stats[reason] += 1
+    for name, details in signals.items():
+        if details:
+            _triage_stats["signals"][name] = _triage_stats["signals"].get(name, 0) + 1
+
+    logger.info(
+        f"🚦 Consistency triage: risk={risk_score:.2f} → {reason}"
+        + "".join(f" | {name}={len(details)}" for name, details in signals.items() if details)
+    )
+    return {
+        "risk_score": round(risk_score, 3),
+        "signals": {name: details for name, details in signals.items() if details},
+        "escalate": escalate,
+        "reason": reason,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# METRICS
+# ═══════════════════════════════════════════════════════════════════════
+
+_triage_stats: Dict[str, Any] = {
+    "triaged": 0, "risk": 0, "audit_sample": 0, "low_risk": 0, "signals": {}
+}
+_llm_stats: Dict[str, Any] = {
+    "calls": 0, "total_ms": 0.0, "decisions": {}, "audit_calls": 0, "audit_flagged": 0
+}
+
+
+def record_llm_validation(triage: Dict[str, Any], validation: Dict[str, Any], elapsed_ms: float) -> None:
+    """
+    Count an escalated LLM validation. Audit samples that come back with
+    anything but a clean approve are triage misses.
+    """
+    decision = validation.get("decision", "unknown")
+    _llm_stats["calls"] += 1
+    _llm_stats["total_ms"] += elapsed_ms
+    _llm_stats["decisions"][decision] = _llm_stats["decisions"].get(decision, 0) + 1
+    if triage.get("reason") == "audit_sample":
+        _llm_stats["audit_calls"] += 1
+        if decision != "approve" or validation.get("corrected_narration"):
+            _llm_stats["audit_flagged"] += 1
+            logger.warning(f"🚦 Triage audit: low-risk draft (risk={triage.get('risk_score')}) got '{decision}'")
+
+
+def get_triage_stats() -> Dict[str, Any]:
+    """Escalation rate, LLM latency and the latency saved by skipped calls"""
+    from config.story_consistency_config import CONSISTENCY_RISK_THRESHOLD, CONSISTENCY_AUDIT_SAMPLE_RATE
+
+    triaged = _triage_stats["triaged"]
+    escalated = _triage_stats["risk"] + _triage_stats["audit_sample"]
+    avg_llm_ms = _llm_stats["total_ms"] / _llm_stats["calls"] if _llm_stats["calls"] else 0.0
+    audit_calls = _llm_stats["audit_calls"]
+    return {
+        "threshold": CONSISTENCY_RISK_THRESHOLD,
+        "audit_sample_rate": CONSISTENCY_AUDIT_SAMPLE_RATE,
+        "triaged": triaged,
+        "escalated": escalated,
+        "escalated_on_risk": _triage_stats["risk"],
+        "audit_samples": _triage_stats["audit_sample"],
+        "skipped": _triage_stats["low_risk"],
+        "escalation_rate": round(escalated / triaged, 3) if triaged else 0.0,
+        "signal_counts": dict(_triage_stats["signals"]),
+        "llm_calls": _llm_stats["calls"],
+        "llm_decisions": dict(_llm_stats["decisions"]),
+        "avg_llm_ms": round(avg_llm_ms, 1),
+        # Skipped calls at the observed average LLM latency
+        "latency_saved_ms": round(_triage_stats["low_risk"] * avg_llm_ms, 1),
+        "audit_miss_rate": round(_llm_stats["audit_flagged"] / audit_calls, 3) if audit_calls else 0.0,
+    }
@@ -0,0 +1,193 @@
+"""
+DB Indexes - Declared MongoDB indexes and query-plan audit.
+
+INDEX_SPECS is the single list of indexes the game collections need, one entry
+per hot query shape. `ensure_indexes` builds them idempotently at startup
+(create_index is a no-op when an identical index exists), one collection at a
+time in a background task so startup is never blocked.
+
+QUERY_SHAPES lists the known hot queries; `explain_query_shapes` runs
+explain() on each and summarizes the winning plan for /api/debug/indexes.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# ═══════════════════════════════════════════════════════════════════════
+# DECLARED INDEXES
+# ═══════════════════════════════════════════════════════════════════════
+
+INDEX_SPECS: Dict[str, List[IndexModel]] = {
+    "campaigns": [
+        IndexModel([("campaign_id", ASCENDING)], name="campaign_id_unique", unique=True),
+    ],
+    "characters": [
+        IndexModel([("campaign_id", ASCENDING), ("character_id", ASCENDING)], name="campaign_character_unique", unique=True),
+        IndexModel([("character_id", ASCENDING)], name="character_id"),
+    ],
+    "world_states": [
+        IndexModel([("campaign_id", ASCENDING)], name="campaign_id_unique", unique=True),
+    ],
+    "combats": [
+        IndexModel([("campaign_id", ASCENDING), ("character_id", ASCENDING)], name="campaign_character"),
+    ],
+    "knowledge_facts": [
+        IndexModel(
+            [("campaign_id", ASCENDING), ("entity_type", ASCENDING), ("entity_id", ASCENDING), ("character_id", ASCENDING)],
+            name="campaign_entity_character"
+        ),
+        # One introduction fact per entity; upserts in services.knowledge_facts rely on it
+        IndexModel(
+            [("campaign_id", ASCENDING), ("entity_type", ASCENDING), ("entity_id", ASCENDING), ("fact_type", ASCENDING)],
+            name="campaign_entity_introduction_unique",
+            unique=True,
+            partialFilterExpression={"fact_type": "introduction"}
+        ),
+    ],
+    "player_notes": [
+        IndexModel(
+            [("campaign_id", ASCENDING), ("entity_type", ASCENDING), ("entity_id", ASCENDING), ("character_id", ASCENDING)],
+            name="campaign_entity_character"
+        ),
+    ],
+    "campaign_logs": [
+        IndexModel([("campaign_id", ASCENDING), ("character_id", ASCENDING)], name="campaign_character"),
+    ],
+    "campaign_log_entries": [
+        IndexModel(
+            [("campaign_id", ASCENDING), ("character_id", ASCENDING), ("entity_type", ASCENDING), ("entity_id", ASCENDING)],
+            name="campaign_character_entity_unique",
+            unique=True
+        ),
+        IndexModel(
+            [("campaign_id", ASCENDING), ("character_id", ASCENDING), ("entity_type", ASCENDING),
+             ("last_updated", ASCENDING), ("entity_id", ASCENDING)],
+            name="campaign_character_type_updated"
+        ),
+    ],
+    "quests": [
+        IndexModel([("quest_id", ASCENDING)], name="quest_id_unique", unique=True),
+        IndexModel([("campaign_id", ASCENDING), ("status", ASCENDING)], name="campaign_status"),
+        IndexModel([("character_id", ASCENDING)], name="character_id"),
+    ],
+}
+
+# Known hot query shapes: (collection, filter, sort). Values are placeholders;
+# the planner picks plans by shape, not by value.
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {"collection": "campaigns", "filter": {"campaign_id": "?"}},
+    {"collection": "campaigns", "filter": {}, "sort": [("_id", DESCENDING)], "limit": 10},
+    {"collection": "characters", "filter": {"campaign_id": "?", "character_id": "?"}},
+    {"collection": "characters", "filter": {"campaign_id": "?"}},
+    {"collection": "characters", "filter": {"character_id": "?"}},
+    {"collection": "world_states", "filter": {"campaign_id": "?"}},
+    {"collection": "combats", "filter": {"campaign_id": "?", "character_id": "?"}},
+    {"collection": "knowledge_facts", "filter": {"campaign_id": "?"}},
+    {"collection": "knowledge_facts", "filter": {"campaign_id": "?", "entity_type": "?", "entity_id": "?"}},
+    {"collection": "knowledge_facts", "filter": {"campaign_id": "?", "entity_type": "?", "entity_id": "?", "fact_type": "introduction"}},
+    {"collection": "player_notes", "filter": {"campaign_id": "?", "entity_type": "?", "entity_id": "?"}},
+    {"collection": "campaign_logs", "filter": {"campaign_id": "?", "character_id": "?"}},
+    {"collection": "campaign_log_entries", "filter": {"campaign_id": "?", "character_id": "?"}},
+    {"collection": "campaign_log_entries", "filter": {"campaign_id": "?", "character_id": "?", "entity_type": "?"}},
+    {"collection": "campaign_log_entries", "filter": {"campaign_id": "?", "character_id": "?", "entity_type": "?", "entity_id": "?"}},
+    {"collection": "campaign_log_entries", "filter": {"campaign_id": "?", "character_id": "?", "entity_type": "?"},
+     "sort": [("last_updated", ASCENDING), ("entity_id", ASCENDING)], "limit": 100},
+    {"collection": "quests", "filter": {"quest_id": "?"}},
+    {"collection": "quests", "filter": {"campaign_id": "?", "status": "?"}},
+    {"collection": "quests", "filter": {"character_id": "?"}},
+]
+
+
+async def ensure_indexes(db) -> Dict[str, Any]:
+    """
+    Build every declared index. Failures (e.g. duplicates blocking a unique
+    index) are logged per collection and don't stop the others.
+
+    Returns:
+        {collection: [index names] or {"error": message}}
+    """
+    results: Dict[str, Any] = {}
+    for collection, models in INDEX_SPECS.items():
+        try:
+            results[collection] = await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            logger.error(f"❌ Index build failed for {collection}: {e}")
+            results[collection] = {"error": str(e)}
+    built = sum(len(v) for v in results.values() if isinstance(v, list))
+    logger.info(f"🗂️ Ensured {built} indexes across {len(INDEX_SPECS)} collections")
+    return results
+
+
+def _walk_plan(plan: Dict[str, Any], stages: List[str], indexes: List[str]) -> None:
+    stages.append(plan.get("stage", "?"))
+    if plan.get("indexName"):
+        indexes.append(plan["indexName"])
+    if "inputStage" in plan:
+        _walk_plan(plan["inputStage"], stages, indexes)
+    for child in plan.get("inputStages", []):
+        _walk_plan(child, stages, indexes)
+
+
+def summarize_explain(explain: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce an explain() document to the fields worth looking at"""
+    planner = explain.get("queryPlanner", {})
+    winning = planner.get("winningPlan", {})
+    # Newer servers wrap the classic plan in queryPlan
+    winning = winning.get("queryPlan", winning)
+    stages: List[str] = []
+    indexes: List[str] = []
+    _walk_plan(winning, stages, indexes)
+
+    stats = explain.get("executionStats", {})
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "in_memory_sort": "SORT" in stages,
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+async def explain_query_shapes(db, collection: Optional[str] = None) -> List[Dict[str, Any]]:
+    """explain() summaries for the known query shapes"""
+    summaries = []
+    for shape in QUERY_SHAPES:
+        if collection and shape["collection"] != collection:
+            continue
+        cursor = db[shape["collection"]].find(shape["filter"])
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        if shape.get("limit"):
+            cursor = cursor.limit(shape["limit"])
+        entry = {
+            "collection": shape["collection"],
+            "filter": list(shape["filter"].keys()),
+            "sort": [key for key, _ in shape.get("sort", [])],
+        }
+        try:
+            entry.update(summarize_explain(await cursor.explain()))
+        except OperationFailure as e:
+            entry["error"] = str(e)
+        summaries.append(entry)
+    return summaries
+
+
+async def index_report(db) -> Dict[str, Any]:
+    """Declared vs existing indexes per collection"""
+    report = {}
+    for collection, models in INDEX_SPECS.items():
+        existing = await db[collection].index_information()
+        declared = [model.document["name"] for model in models]
+        report[collection] = {
+            "declared": declared,
+            "existing": sorted(existing.keys()),
+            "missing": [name for name in declared if name not in existing],
+        }
+    return report
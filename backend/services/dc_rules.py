@@ -178,6 +178,41 @@ class DCHelper:
         else:
             return DCBand.NEARLY_IMPOSSIBLE
     
+    # Keyword table for get_action_type_from_intent (also compiled by
+    # services/intent_classifier.py for the intent fast path)
+    ACTION_TYPE_KEYWORDS = [
+        # Physical actions
+        ("climb", ["climb", "scale", "ascend"]),
+        ("jump", ["jump", "leap"]),
+        ("swim", ["swim", "dive"]),
+        ("lift", ["lift", "push", "pull"]),
+        ("break_object", ["break", "smash", "destroy"]),
+        
+        # Social actions
+        ("persuade", ["persuade", "convince", "plead"]),
+        ("deceive", ["lie", "deceive", "bluff"]),
+        ("intimidate", ["intimidate", "threaten", "scare"]),
+        ("perform", ["perform", "sing", "dance"]),
+        
+        # Mental actions
+        ("investigate", ["investigate", "search", "examine", "inspect"]),
+        ("perception", ["look", "spot", "notice", "watch"]),
+        ("insight", ["sense", "read", "gauge", "discern"]),
+        ("recall_knowledge", ["recall", "remember", "know"]),
+        
+        # Stealth actions
+        ("hide", ["hide", "conceal"]),
+        ("move_silently", ["sneak", "move quietly", "creep"]),
+        ("pickpocket", ["pickpocket", "steal"]),
+        ("pick_lock", ["pick lock", "unlock"]),
+        ("disable_trap", ["disarm", "disable trap"]),
+        
+        # Survival actions
+        ("track", ["track", "follow trail"]),
+        ("forage", ["forage", "gather", "hunt"]),
+        ("navigate", ["navigate", "find way"]),
+    ]
+    
     @staticmethod
     def get_action_type_from_intent(player_action: str, intent_flags: Dict[str, Any]) -> str:
         """
@@ -192,57 +227,10 @@ class DCHelper:
         """
         action_lower = player_action.lower()
         
-        # Physical actions
-        if any(word in action_lower for word in ["climb", "scale", "ascend"]):
-            return "climb"
-        if any(word in action_lower for word in ["jump", "leap"]):
-            return "jump"
-        if any(word in action_lower for word in ["swim", "dive"]):
-            return "swim"
-        if any(word in action_lower for word in ["lift", "push", "pull"]):
-            return "lift"
-        if any(word in action_lower for word in ["break", "smash", "destroy"]):
-            return "break_object"
-        
-        # Social actions
-        if any(word in action_lower for word in ["persuade", "convince", "plead"]):
-            return "persuade"
-        if any(word in action_lower for word in ["lie", "deceive", "bluff"]):
-            return "deceive"
-        if any(word in action_lower for word in ["intimidate", "threaten", "scare"]):
-            return "intimidate"
-        if any(word in action_lower for word in ["perform", "sing", "dance"]):
-            return "perform"
-        
-        # Mental actions
-        if any(word in action_lower for word in ["investigate", "search", "examine", "inspect"]):
-            return "investigate"
-        if any(word in action_lower for word in ["look", "spot", "notice", "watch"]):
-            return "perception"
-        if any(word in action_lower for word in ["sense", "read", "gauge", "discern"]):
-            return "insight"
-        if any(word in action_lower for word in ["recall", "remember", "know"]):
-            return "recall_knowledge"
-        
-        # Stealth actions
-        if any(word in action_lower for word in ["hide", "conceal"]):
-            return "hide"
-        if any(word in action_lower for word in ["sneak", "move quietly", "creep"]):
-            return "move_silently"
-        if any(word in action_lower for word in ["pickpocket", "steal"]):
-            return "pickpocket"
-        if any(word in action_lower for word in ["pick lock", "unlock"]):
-            return "pick_lock"
-        if any(word in action_lower for word in ["disarm", "disable trap"]):
-            return "disable_trap"
-        
-        # Survival actions
-        if any(word in action_lower for word in ["track", "follow trail"]):
-            return "track"
-        if any(word in action_lower for word in ["forage", "gather", "hunt"]):
-            return "forage"
-        if any(word in action_lower for word in ["navigate", "find way"]):
-            return "navigate"
+        # First matching entry wins, so table order is priority order
+        for action_type, keywords in DCHelper.ACTION_TYPE_KEYWORDS:
+            if any(word in action_lower for word in keywords):
+                return action_type
         
         # Default to moderate investigation
         return "investigate"
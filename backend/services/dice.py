@@ -0,0 +1,446 @@
+"""
+Dice - The one dice subsystem: formula compiler, rollers and RNG sessions.
+
+Formulas are sums of terms, each a constant or a dice group with modifiers:
+
+    1d20+5          2d20kh1+7 (advantage)     2d20kl1+3 (disadvantage)
+    4d6dl1          8d6r1 (reroll 1s)         2d6ro<2 (reroll 1-2 once)
+    1d6!            3d10!>9                   1d8+1d6-1     d%
+
+- kh/kl/k N keep the highest/lowest N dice, dh/dl N drop them
+- rN / r<cmp>N rerolls while the die matches (ro: at most once)
+- ! explodes on the highest face, !N / !<cmp>N on matching faces; extra rolls
+  are added onto the die that exploded, so keep/drop compare whole dice
+
+A formula is parsed once into a CompiledFormula (LRU-cached by text) which can
+roll() one result with a full breakdown or sample() many totals at once with
+NumPy for simulations and probability displays.
+
+Rolls draw from any object with randint(a, b): game rules pass the global
+`random` module, the dice API uses a per-session random.Random seeded from a
+recorded seed so a session's rolls can be replayed.
+"""
+import os
+import re
+import random
+import secrets
+import logging
+import operator
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DICE_FORMULA_CACHE_SIZE = int(os.getenv("DICE_FORMULA_CACHE_SIZE", "512"))
+DICE_SESSION_LIMIT = int(os.getenv("DICE_SESSION_LIMIT", "1000"))
+DICE_MAX_FORMULA_LENGTH = 200
+DICE_MAX_TERMS = 20
+DICE_MAX_COUNT = 100
+DICE_MAX_SIDES = 1000
+# Rerolls and explosions per die stop here so r<N / ! can't loop forever
+DICE_REROLL_LIMIT = 10
+DICE_EXPLODE_LIMIT = 5
+# Budgets on dice (all groups summed) and on worst-case die rolls (every
+# die using all of its rerolls and explosions), per formula and per batch
+DICE_MAX_DICE_PER_FORMULA = int(os.getenv("DICE_MAX_DICE_PER_FORMULA", "100"))
+DICE_MAX_DICE_PER_REQUEST = int(os.getenv("DICE_MAX_DICE_PER_REQUEST", "1000"))
+DICE_MAX_ROLLS_PER_REQUEST = int(os.getenv("DICE_MAX_ROLLS_PER_REQUEST", "5000"))
+
+_COMPARATORS = {
+    "=": operator.eq,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+_TERM_RE = re.compile(r"([+-])?(?:(\d*)d(\d+|%)([a-z!<>=\d]*)|(\d+))")
+_MODIFIER_RE = re.compile(r"(kh|kl|k|dh|dl)(\d+)|(ro|r)(<=|>=|<|>|=)?(\d+)|!(?:(<=|>=|<|>|=)?(\d+))?")
+
+
+class DiceTerm:
+    """One NdS group with its keep/drop, reroll and explode rules"""
+
+    def __init__(
+        self,
+        count: int,
+        sides: int,
+        sign: int = 1,
+        keep: Optional[Tuple[str, int]] = None,
+        reroll: Optional[Tuple[str, int, bool]] = None,
+        explode: Optional[Tuple[str, int]] = None,
+        notation: str = ""
+    ):
+        self.count = count
+        self.sides = sides
+        self.sign = sign
+        self.keep = keep          # ("h" | "l", n) after drops are converted
+        self.reroll = reroll      # (comparator, value, once)
+        self.explode = explode    # (comparator, value)
+        self.notation = notation
+
+    @property
+    def max_rolls(self) -> int:
+        """Die rolls needed in the worst case"""
+        rerolls = (1 if self.reroll[2] else DICE_REROLL_LIMIT) if self.reroll else 0
+        explosions = DICE_EXPLODE_LIMIT if self.explode else 0
+        return self.count * (1 + rerolls + explosions)
+
+    def _matches(self, rule: Tuple, value):
+        return _COMPARATORS[rule[0]](value, rule[1])
+
+    def roll(self, rng) -> Dict[str, Any]:
+        """Roll the group and return the per-die breakdown"""
+        rolls, rerolled = [], []
+        for _ in range(self.count):
+            value = rng.randint(1, self.sides)
+            if self.reroll:
+                attempts = 0
+                limit = 1 if self.reroll[2] else DICE_REROLL_LIMIT
+                while attempts < limit and self._matches(self.reroll, value):
+                    rerolled.append(value)
+                    value = rng.randint(1, self.sides)
+                    attempts += 1
+            if self.explode:
+                last, explosions = value, 0
+                while explosions < DICE_EXPLODE_LIMIT and self._matches(self.explode, last):
+                    last = rng.randint(1, self.sides)
+                    value += last
+                    explosions += 1
+            rolls.append(value)
+
+        if self.keep is None:
+            kept = list(rolls)
+        elif self.keep[0] == "h":
+            kept = sorted(rolls, reverse=True)[:self.keep[1]]
+        else:
+            kept = sorted(rolls)[:self.keep[1]]
+
+        return {
+            "notation": self.notation,
+            "rolls": rolls,
+            "kept": kept,
+            "rerolled": rerolled,
+            "subtotal": self.sign * sum(kept),
+        }
+
+    def sample(self, size: int, generator) -> "np.ndarray":
+        """Signed totals of `size` independent rolls of the group"""
+        shape = (size, self.count)
+        values = generator.integers(1, self.sides + 1, size=shape)
+        if self.reroll:
+            limit = 1 if self.reroll[2] else DICE_REROLL_LIMIT
+            for _ in range(limit):
+                pending = self._matches(self.reroll, values)
+                if not pending.any():
+                    break
+                values = np.where(pending, generator.integers(1, self.sides + 1, size=shape), values)
+        if self.explode:
+            exploding = self._matches(self.explode, values)
+            for _ in range(DICE_EXPLODE_LIMIT):
+                if not exploding.any():
+                    break
+                extra = generator.integers(1, self.sides + 1, size=shape)
+                values = values + np.where(exploding, extra, 0)
+                exploding = exploding & self._matches(self.explode, extra)
+
+        if self.keep is None:
+            totals = values.sum(axis=1)
+        else:
+            ordered = np.sort(values, axis=1)
+            n = self.keep[1]
+            totals = ordered[:, self.count - n:].sum(axis=1) if self.keep[0] == "h" else ordered[:, :n].sum(axis=1)
+        return self.sign * totals
+
+
+class CompiledFormula:
+    """A parsed dice formula: dice terms plus a flat modifier"""
+
+    def __init__(self, formula: str, terms: List[DiceTerm], modifier: int):
+        self.formula = formula
+        self.terms = terms
+        self.modifier = modifier
+        self.dice = sum(term.count for term in terms)
+        self.max_rolls = sum(term.max_rolls for term in terms)
+
+    def roll(self, rng=None) -> Dict[str, Any]:
+        """
+        Roll once.
+
+        Returns:
+            {formula, rolls, kept, sum_kept, modifier, total, terms}; rolls/kept
+            list every dice term's dice in order, sum_kept is signed
+        """
+        rng = rng or random
+        terms = [term.roll(rng) for term in self.terms]
+        sum_kept = sum(term["subtotal"] for term in terms)
+        return {
+            "formula": self.formula,
+            "rolls": [value for term in terms for value in term["rolls"]],
+            "kept": [value for term in terms for value in term["kept"]],
+            "sum_kept": sum_kept,
+            "modifier": self.modifier,
+            "total": sum_kept + self.modifier,
+            "terms": terms,
+        }
+
+    def total(self, rng=None) -> int:
+        """Roll once and return just the total"""
+        rng = rng or random
+        return sum(term.roll(rng)["subtotal"] for term in self.terms) + self.modifier
+
+    def sample(self, size: int, generator=None, seed: Optional[int] = None) -> "np.ndarray":
+        """
+        Vectorized path: totals of `size` independent rolls as an int array.
+
+        Args:
+            size: Number of rolls
+            generator: numpy Generator to draw from (default: new one from seed)
+            seed: Seed for the default generator
+        """
+        if np is None:
+            raise RuntimeError("numpy is required for vectorized dice sampling")
+        generator = generator if generator is not None else np.random.default_rng(seed)
+        totals = np.full(size, self.modifier, dtype=np.int64)
+        for term in self.terms:
+            totals += term.sample(size, generator)
+        return totals
+
+    def __repr__(self) -> str:
+        return f"CompiledFormula({self.formula!r})"
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# PARSER
+# ═══════════════════════════════════════════════════════════════════════
+
+def _faces_matching(sides: int, comparator: str, value: int) -> int:
+    return sum(1 for face in range(1, sides + 1) if _COMPARATORS[comparator](face, value))
+
+
+def _parse_dice_term(sign: int, count_text: str, sides_text: str, modifiers: str, notation: str) -> DiceTerm:
+    count = int(count_text) if count_text else 1
+    sides = 100 if sides_text == "%" else int(sides_text)
+    if not 1 <= count <= DICE_MAX_COUNT:
+        raise ValueError(f"Number of dice must be 1-{DICE_MAX_COUNT}: {notation}")
+    if not 1 <= sides <= DICE_MAX_SIDES:
+        raise ValueError(f"Die size must be 1-{DICE_MAX_SIDES}: {notation}")
+
+    keep = reroll = explode = None
+    pos = 0
+    while pos < len(modifiers):
+        match = _MODIFIER_RE.match(modifiers, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Invalid dice modifier '{modifiers[pos:]}' in {notation}")
+        keep_mode, keep_count, reroll_mode, reroll_cmp, reroll_value, explode_cmp, explode_value = match.groups()
+
+        if keep_mode:
+            if keep:
+                raise ValueError(f"Only one keep/drop per dice group: {notation}")
+            n = min(int(keep_count), count)
+            if keep_mode in ("kh", "k"):
+                keep = ("h", n)
+            elif keep_mode == "kl":
+                keep = ("l", n)
+            elif keep_mode == "dh":
+                keep = ("l", count - n)
+            else:
+                keep = ("h", count - n)
+        elif reroll_mode:
+            if reroll:
+                raise ValueError(f"Only one reroll rule per dice group: {notation}")
+            reroll = (reroll_cmp or "=", int(reroll_value), reroll_mode == "ro")
+            if not reroll[2] and _faces_matching(sides, reroll[0], reroll[1]) == sides:
+                raise ValueError(f"Reroll rule matches every face: {notation}")
+        else:
+            if explode:
+                raise ValueError(f"Only one explode rule per dice group: {notation}")
+            explode = (explode_cmp or "=", int(explode_value)) if explode_value else ("=", sides)
+            if _faces_matching(sides, explode[0], explode[1]) == sides:
+                raise ValueError(f"Explode rule matches every face: {notation}")
+        pos = match.end()
+
+    return DiceTerm(count, sides, sign, keep=keep, reroll=reroll, explode=explode, notation=notation)
+
+
+def parse_formula(formula: str) -> CompiledFormula:
+    """Parse a formula into a CompiledFormula (uncached; see compile_formula)"""
+    text = (formula or "").lower().strip()
+    if re.search(r"[\w%!]\s+[\w%!]", text):
+        raise ValueError(f"Invalid formula: {formula}")
+    text = re.sub(r"\s+", "", text)
+    if not text:
+        raise ValueError("Empty dice formula")
+    if len(text) > DICE_MAX_FORMULA_LENGTH:
+        raise ValueError(f"Dice formula longer than {DICE_MAX_FORMULA_LENGTH} characters")
+
+    terms: List[DiceTerm] = []
+    modifier = 0
+    pos = 0
+    while pos < len(text):
+        match = _TERM_RE.match(text, pos)
+        if not match or match.end() == pos or (pos > 0 and not match.group(1)):
+            raise ValueError(f"Invalid formula: {formula}")
+        sign_text, count_text, sides_text, modifiers, constant = match.groups()
+        sign = -1 if sign_text == "-" else 1
+        if constant is not None:
+            modifier += sign * int(constant)
+        else:
+            notation = match.group(0).lstrip("+-")
+            terms.append(_parse_dice_term(sign, count_text, sides_text, modifiers, notation))
+        pos = match.end()
+        if len(terms) > DICE_MAX_TERMS:
+            raise ValueError(f"Dice formula has more than {DICE_MAX_TERMS} dice groups")
+        if sum(term.count for term in terms) > DICE_MAX_DICE_PER_FORMULA:
+            raise ValueError(f"Dice formula rolls more than {DICE_MAX_DICE_PER_FORMULA} dice: {formula}")
+
+    return CompiledFormula(formula.strip(), terms, modifier)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# CACHE
+# ═══════════════════════════════════════════════════════════════════════
+
+# normalized formula text -> CompiledFormula (LRU)
+_formulas: "OrderedDict[str, CompiledFormula]" = OrderedDict()
+_stats = {"hits": 0, "compiles": 0, "evictions": 0}
+
+
+def compile_formula(formula: str) -> CompiledFormula:
+    """Shared CompiledFormula for a formula, parsed on first use"""
+    key = (formula or "").strip()
+    compiled = _formulas.get(key)
+    if compiled is None:
+        compiled = parse_formula(key)
+        _stats["compiles"] += 1
+        _formulas[key] = compiled
+        while len(_formulas) > DICE_FORMULA_CACHE_SIZE:
+            _formulas.popitem(last=False)
+            _stats["evictions"] += 1
+    else:
+        _stats["hits"] += 1
+    _formulas.move_to_end(key)
+    return compiled
+
+
+def roll_formula(formula: str, rng=None) -> Dict[str, Any]:
+    """Roll a formula once (see CompiledFormula.roll)"""
+    return compile_formula(formula).roll(rng)
+
+
+def roll_total(formula: str, rng=None) -> int:
+    """Roll a formula once and return the total"""
+    return compile_formula(formula).total(rng)
+
+
+def sample_formula(formula: str, size: int, generator=None, seed: Optional[int] = None) -> "np.ndarray":
+    """Vectorized totals for a formula (see CompiledFormula.sample)"""
+    return compile_formula(formula).sample(size, generator=generator, seed=seed)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# SESSIONS
+# ═══════════════════════════════════════════════════════════════════════
+
+# session_id -> {"rng", "seed", "sequence"} (LRU)
+_sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_system_rng = random.SystemRandom()
+
+
+def get_dice_session(session_id: str, seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    RNG state for a session, created on first use.
+
+    Passing a seed (re)starts the session from that seed; replaying the same
+    formulas in the same order then gives the same results.
+    """
+    session = _sessions.get(session_id)
+    if session is None or seed is not None:
+        chosen = seed is not None
+        seed = seed if chosen else secrets.randbits(32)
+        session = {"rng": random.Random(seed), "seed": seed, "sequence": 0, "seed_chosen": chosen}
+        _sessions[session_id] = session
+        logger.info(f"🎲 Dice session {session_id} seeded with {seed}")
+        while len(_sessions) > DICE_SESSION_LIMIT:
+            _sessions.popitem(last=False)
+    _sessions.move_to_end(session_id)
+    return session
+
+
+def roll_batch(
+    formulas: List[str],
+    session_id: Optional[str] = None,
+    seed: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Roll several formulas in order for the dice API.
+
+    Every formula is compiled before anything is rolled, so an invalid one -
+    or a batch over the DICE_MAX_DICE_PER_REQUEST / DICE_MAX_ROLLS_PER_REQUEST
+    budgets - raises ValueError without consuming the session's RNG. Without a session,
+    a seed gives a one-off reproducible batch; with neither, rolls come from
+    the system RNG.
+
+    Returns:
+        {"results": [...], "session_id", "seed", "sequence"} where sequence is
+        the number of formulas the session had rolled before this batch. The
+        seed is only echoed when the caller chose it - server-picked session
+        seeds are only logged, so clients can't predict upcoming rolls
+    """
+    compiled = [compile_formula(formula) for formula in formulas]
+    if sum(formula.dice for formula in compiled) > DICE_MAX_DICE_PER_REQUEST:
+        raise ValueError(f"Dice batch rolls more than {DICE_MAX_DICE_PER_REQUEST} dice")
+    if sum(formula.max_rolls for formula in compiled) > DICE_MAX_ROLLS_PER_REQUEST:
+        raise ValueError(
+            f"Dice batch could need more than {DICE_MAX_ROLLS_PER_REQUEST} rolls with its rerolls/explosions"
+        )
+
+    if session_id:
+        session = get_dice_session(session_id, seed)
+        rng, sequence = session["rng"], session["sequence"]
+        session["sequence"] += len(compiled)
+    elif seed is not None:
+        rng, sequence = random.Random(seed), 0
+    else:
+        rng, sequence = _system_rng, 0
+
+    return {
+        "results": [formula.roll(rng) for formula in compiled],
+        "session_id": session_id,
+        "seed": seed,
+        "sequence": sequence,
+    }
+
+
+def get_dice_session_info(session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Roll count of a session, plus its seed when the caller chose it.
+
+    Server-picked seeds are only in the server log: returning them here would
+    let any client predict the session's upcoming rolls.
+    """
+    session = _sessions.get(session_id)
+    if session is None:
+        return None
+    return {
+        "session_id": session_id,
+        "seed": session["seed"] if session["seed_chosen"] else None,
+        "sequence": session["sequence"],
+    }
+
+
+def get_dice_stats() -> Dict[str, Any]:
+    """Formula cache size and hit rate, and live RNG sessions"""
+    lookups = _stats["hits"] + _stats["compiles"]
+    return {
+        **_stats,
+        "entries": len(_formulas),
+        "max_entries": DICE_FORMULA_CACHE_SIZE,
+        "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+        "sessions": len(_sessions),
+    }
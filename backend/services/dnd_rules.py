@@ -14,6 +14,8 @@ import random
 import logging
 from typing import Dict, Any, Tuple, Optional
 
+from services.dice import roll_total
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,27 +29,12 @@ def roll_dice(dice_notation: str) -> int:
     Roll dice from notation like "1d6", "2d8+2", "1d4".
     
     Args:
-        dice_notation: String like "1d6" or "2d8+2"
+        dice_notation: Any formula services.dice understands (e.g. "1d6", "2d8+2")
     
     Returns:
         Total rolled value
     """
-    notation = dice_notation.lower().replace(" ", "")
-    
-    # Handle bonus
-    parts = notation.split("+")
-    base = parts[0]
-    bonus = int(parts[1]) if len(parts) > 1 else 0
-    
-    # Parse "XdY" format
-    if "d" in base:
-        count, sides = base.split("d")
-        count = int(count) if count else 1
-        sides = int(sides)
-        total = sum(random.randint(1, sides) for _ in range(count))
-        return total + bonus
-    
-    return 0
+    return roll_total(dice_notation, random)
 
 
 def calculate_ability_modifier(ability_score: int) -> int:
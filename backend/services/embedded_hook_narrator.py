@@ -5,7 +5,7 @@ Generates scene narration with advanced quest hooks naturally integrated into th
 import logging
 import re
 from typing import Dict, Any, List
-from .llm_client import get_openai_client
+from .llm_client import chat_completion
 
 logger = logging.getLogger(__name__)
 
@@ -263,7 +263,7 @@ def _remove_tell_violations(text: str) -> str:
     return cleaned.strip()
 
 
-def generate_narration_with_embedded_hooks(
+async def generate_narration_with_embedded_hooks(
     location: Dict[str, Any],
     scene_type: str,
     character_state: Dict[str, Any],
@@ -354,10 +354,8 @@ IMPORTANT INSTRUCTIONS:
 Generate the narration now (text only, no JSON):"""
     
     try:
-        client = get_openai_client()
-        
         # STAGE 1: Generate initial narration
-        completion = client.chat.completions.create(
+        completion = await chat_completion(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": EMBEDDED_HOOK_NARRATOR_SYSTEM_PROMPT},
@@ -399,7 +397,7 @@ REPLACE WITH OBSERVABLE DETAILS ONLY:
 Return ONLY the corrected narration, with all POV violations removed."""
 
         # Call verification
-        verification_completion = client.chat.completions.create(
+        verification_completion = await chat_completion(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a strict editor that removes all 'tell' phrases and keeps only 'show' descriptions. Remove anything that interprets, explains, or reveals hidden meaning."},
@@ -0,0 +1,274 @@
+"""
+Encounter Simulator - Monte Carlo difficulty estimates for combat encounters.
+
+Plays thousands of fights at once with NumPy, using the same rules as the
+combat engine:
+- Player acts first and focus-fires the first living enemy
+  (process_player_attack), then every living enemy attacks (process_enemy_turns)
+- Attack rolls, nat 1 / nat 20 and damage follow dnd_rules.resolve_attack
+- Victory when every enemy is at 0 HP, defeat when the player is at 0 HP
+
+Used by enemy sourcing to pick encounters inside a difficulty band and by the
+balancing endpoint.
+"""
+import os
+import time
+import logging
+from itertools import combinations_with_replacement
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from services.dice import compile_formula
+from services.dnd_rules import get_attack_ability_modifier
+
+logger = logging.getLogger(__name__)
+
+ENCOUNTER_SIM_TRIALS = int(os.getenv("ENCOUNTER_SIM_TRIALS", "2000"))
+ENCOUNTER_SIM_MAX_ROUNDS = int(os.getenv("ENCOUNTER_SIM_MAX_ROUNDS", "50"))
+ENCOUNTER_SIM_MAX_TRIALS = 100000
+# Fewer trials per candidate group when sourcing picks enemies mid-request
+ENCOUNTER_SELECTION_TRIALS = int(os.getenv("ENCOUNTER_SELECTION_TRIALS", "500"))
+
+# Ordered easiest -> hardest. A band applies when the win probability is at
+# least min_win and the player finishes winning fights with at least
+# min_hp_fraction of max HP (the first matching band wins).
+DIFFICULTY_BANDS = [
+    ("trivial", 0.98, 0.85),
+    ("easy", 0.95, 0.6),
+    ("medium", 0.85, 0.35),
+    ("hard", 0.6, 0.0),
+    ("deadly", 0.0, 0.0),
+]
+DIFFICULTY_ORDER = [band for band, _, _ in DIFFICULTY_BANDS]
+
+# Player attack used by the combat engine until weapons are read from inventory
+DEFAULT_PLAYER_WEAPON = {"weapon_type": "melee", "weapon_damage": "1d6", "is_unarmed": True}
+
+D20 = compile_formula("1d20")
+
+
+def _attack_profile(
+    attacker: Dict[str, Any],
+    weapon_type: str = "melee",
+    weapon_damage: str = "1d6",
+    is_unarmed: bool = False
+) -> Dict[str, Any]:
+    """Flatten an attacker into the numbers resolve_attack would use."""
+    _, ability_mod = get_attack_ability_modifier(
+        {"abilities": attacker.get("abilities") or {}}, weapon_type
+    )
+    return {
+        "to_hit": attacker.get("proficiency_bonus", 2) + ability_mod + attacker.get("attack_bonus", 0),
+        "mod": ability_mod,
+        # Like resolve_attack, only the part before "+" is rolled; the ability
+        # modifier replaces any flat bonus
+        "dice": compile_formula((weapon_damage or "1d6").split("+")[0]),
+        "is_unarmed": is_unarmed,
+    }
+
+
+def _roll_attacks(
+    rng: np.random.Generator,
+    profile: Dict[str, Any],
+    target_ac: np.ndarray,
+    size: int
+) -> np.ndarray:
+    """Roll `size` attacks for one attacker and return the damage dealt by each."""
+    d20 = D20.sample(size, rng)
+    crit = d20 == 20
+    hit = crit | ((d20 != 1) & (d20 + profile["to_hit"] >= target_ac))
+
+    if profile["is_unarmed"]:
+        damage = np.where(crit, max(2, 2 + profile["mod"]), max(1, 1 + profile["mod"]))
+    else:
+        # Crits roll the damage dice a second time
+        dice = profile["dice"]
+        rolled = dice.sample(size, rng) + np.where(crit, dice.sample(size, rng), 0)
+        damage = np.maximum(1, rolled + profile["mod"])
+
+    return np.where(hit, damage, 0)
+
+
+def classify_difficulty(win_probability: float, hp_fraction_on_win: float) -> str:
+    """Map simulated outcomes to a difficulty band."""
+    for band, min_win, min_hp_fraction in DIFFICULTY_BANDS:
+        if win_probability >= min_win and hp_fraction_on_win >= min_hp_fraction:
+            return band
+    return "deadly"
+
+
+def simulate_encounter(
+    character_state: Dict[str, Any],
+    enemies: List[Dict[str, Any]],
+    trials: Optional[int] = None,
+    seed: Optional[int] = None,
+    weapon: Optional[Dict[str, Any]] = None,
+    max_rounds: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Simulate an encounter many times and summarize the outcomes.
+
+    Args:
+        character_state: Player character state (hp, max_hp, ac, abilities, ...)
+        enemies: Enemy dicts as stored in combat_state (hp, ac, damage_die, ...)
+        trials: Number of fights to play (default ENCOUNTER_SIM_TRIALS)
+        seed: RNG seed for reproducible results
+        weapon: Player weapon override {weapon_type, weapon_damage, is_unarmed};
+                defaults to the combat engine's unarmed strike
+        max_rounds: Fights still running after this many rounds count as timeouts
+
+    Returns:
+        {
+            "trials": int,
+            "win_probability": float,
+            "loss_probability": float,
+            "timeout_probability": float,
+            "expected_rounds": float,
+            "expected_rounds_on_win": float | None,
+            "player_hp_remaining": float,  # mean over all fights (0 on defeat)
+            "player_hp_remaining_on_win": float | None,
+            "hp_fraction_on_win": float,
+            "difficulty": str,
+            "elapsed_ms": float
+        }
+    """
+    started = time.perf_counter()
+    trials = max(1, min(int(trials or ENCOUNTER_SIM_TRIALS), ENCOUNTER_SIM_MAX_TRIALS))
+    max_rounds = max_rounds or ENCOUNTER_SIM_MAX_ROUNDS
+    rng = np.random.default_rng(seed)
+
+    weapon = {**DEFAULT_PLAYER_WEAPON, **(weapon or {})}
+    player_profile = _attack_profile(
+        {
+            "abilities": character_state.get("abilities"),
+            "proficiency_bonus": character_state.get("proficiency_bonus", 2),
+            "attack_bonus": character_state.get("attack_bonus", 0),
+        },
+        weapon_type=weapon["weapon_type"],
+        weapon_damage=weapon["weapon_damage"],
+        is_unarmed=weapon["is_unarmed"],
+    )
+    enemy_profiles = [
+        _attack_profile(enemy, weapon_type="melee", weapon_damage=enemy.get("damage_die", "1d6"))
+        for enemy in enemies
+    ]
+
+    player_max_hp = max(1, character_state.get("max_hp", character_state.get("hp", 10)))
+    player_ac = character_state.get("ac", 10)
+    enemy_ac = np.array([enemy.get("ac", 10) for enemy in enemies], dtype=np.int64)
+
+    player_hp = np.full(trials, character_state.get("hp", player_max_hp), dtype=np.int64)
+    enemy_hp = np.tile(np.array([enemy.get("hp", 10) for enemy in enemies], dtype=np.int64), (trials, 1))
+    rounds = np.zeros(trials, dtype=np.int64)
+    won = np.zeros(trials, dtype=bool)
+    done = np.zeros(trials, dtype=bool) if enemies else np.ones(trials, dtype=bool)
+    won |= done
+    rows = np.arange(trials)
+
+    for round_number in range(1, max_rounds + 1):
+        active = ~done
+        if not active.any():
+            break
+
+        # Player turn: attack the first enemy still standing
+        alive = enemy_hp > 0
+        target = alive.argmax(axis=1)
+        damage = _roll_attacks(rng, player_profile, enemy_ac[target], trials)
+        enemy_hp[rows, target] = np.maximum(0, enemy_hp[rows, target] - np.where(active, damage, 0))
+
+        victory = active & (enemy_hp <= 0).all(axis=1)
+        won |= victory
+        done |= victory
+        rounds[victory] = round_number
+
+        # Enemy turns: every living enemy attacks, in order
+        fighting = active & ~victory
+        for index, profile in enumerate(enemy_profiles):
+            attacking = fighting & (enemy_hp[:, index] > 0)
+            damage = _roll_attacks(rng, profile, player_ac, trials)
+            player_hp = np.maximum(0, player_hp - np.where(attacking, damage, 0))
+
+        defeat = fighting & (player_hp <= 0)
+        done |= defeat
+        rounds[defeat] = round_number
+
+    timed_out = ~done
+    rounds[timed_out] = max_rounds
+    lost = done & ~won
+
+    win_probability = float(won.mean())
+    hp_on_win = float(player_hp[won].mean()) if won.any() else None
+    hp_fraction_on_win = (hp_on_win / player_max_hp) if hp_on_win is not None else 0.0
+
+    result = {
+        "trials": trials,
+        "win_probability": round(win_probability, 4),
+        "loss_probability": round(float(lost.mean()), 4),
+        "timeout_probability": round(float(timed_out.mean()), 4),
+        "expected_rounds": round(float(rounds.mean()), 2),
+        "expected_rounds_on_win": round(float(rounds[won].mean()), 2) if won.any() else None,
+        "player_hp_remaining": round(float(player_hp.mean()), 2),
+        "player_hp_remaining_on_win": round(hp_on_win, 2) if hp_on_win is not None else None,
+        "hp_fraction_on_win": round(hp_fraction_on_win, 4),
+        "difficulty": classify_difficulty(win_probability, hp_fraction_on_win),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+    logger.debug(
+        f"🎲 Simulated {trials} fights vs {[e.get('name') for e in enemies]}: "
+        f"win={result['win_probability']:.0%}, rounds={result['expected_rounds']}, "
+        f"difficulty={result['difficulty']} ({result['elapsed_ms']}ms)"
+    )
+    return result
+
+
+def select_encounter_for_band(
+    character_state: Dict[str, Any],
+    candidates: List[Dict[str, Any]],
+    target_difficulty: str = "medium",
+    max_enemies: int = 3,
+    trials: Optional[int] = None,
+    seed: Optional[int] = None,
+    preferred: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Pick the enemy group whose simulated difficulty is closest to a band.
+
+    Every multiset of up to `max_enemies` candidates is simulated. Groups that
+    land in the target band win; otherwise the group with the nearest band is
+    used. Ties go to `preferred` (the group sourcing would have picked anyway),
+    then to the order groups are enumerated in.
+
+    Returns:
+        {"enemies": [...], "simulation": {...}, "target_difficulty": str, "matched": bool}
+    """
+    if target_difficulty not in DIFFICULTY_ORDER:
+        raise ValueError(f"Unknown difficulty band: {target_difficulty}")
+    if not candidates:
+        raise ValueError("No candidate enemies to select from")
+
+    target_rank = DIFFICULTY_ORDER.index(target_difficulty)
+    preferred_names = [e.get("name") for e in preferred] if preferred else None
+
+    groups = []
+    for size in range(1, max(1, max_enemies) + 1):
+        groups.extend(combinations_with_replacement(range(len(candidates)), size))
+
+    best = None
+    for order, group in enumerate(groups):
+        enemies = [dict(candidates[index]) for index in group]
+        simulation = simulate_encounter(character_state, enemies, trials=trials, seed=seed)
+        distance = abs(DIFFICULTY_ORDER.index(simulation["difficulty"]) - target_rank)
+        is_preferred = preferred_names is not None and [e.get("name") for e in enemies] == preferred_names
+        key = (distance, not is_preferred, order)
+        if best is None or key < best[0]:
+            best = (key, enemies, simulation)
+
+    _, enemies, simulation = best
+    return {
+        "enemies": enemies,
+        "simulation": simulation,
+        "target_difficulty": target_difficulty,
+        "matched": simulation["difficulty"] == target_difficulty,
+    }
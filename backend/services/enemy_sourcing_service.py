@@ -2,11 +2,17 @@
 Enemy Sourcing Service - Context-aware enemy selection for combat.
 Binds enemies to world_blueprint, world_state, and location context.
 """
+import os
+import re
 import logging
-from typing import Dict, List, Any
+from collections import Counter
+from typing import Dict, List, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# Difficulty band enemy selection aims for (see encounter_simulator); empty disables
+ENCOUNTER_TARGET_DIFFICULTY = os.getenv("ENCOUNTER_TARGET_DIFFICULTY", "medium")
+
 
 # Enemy archetype templates by context
 ENEMY_ARCHETYPES = {
@@ -123,15 +129,22 @@ def scale_enemy_for_level(base_enemy: Dict[str, Any], character_level: int) -> D
 def select_enemies_for_location(
     world_blueprint: Dict[str, Any],
     world_state: Dict[str, Any],
-    character_level: int = 1
+    character_level: int = 1,
+    character_state: Optional[Dict[str, Any]] = None,
+    target_difficulty: Optional[str] = ENCOUNTER_TARGET_DIFFICULTY
 ) -> List[Dict[str, Any]]:
     """
     Select appropriate enemies based on world context and scale them for character level (P3).
     
+    When character_state is given, the archetype's templates are combined into
+    the group whose simulated fight lands closest to target_difficulty.
+    
     Args:
         world_blueprint: The static world definition
         world_state: Current mutable world state
         character_level: Player level (for scaling)
+        character_state: Player state to simulate encounters against (optional)
+        target_difficulty: Difficulty band to aim for ("trivial".."deadly")
     
     Returns:
         List of scaled enemy template dictionaries
@@ -152,6 +165,13 @@ def select_enemies_for_location(
         # P3: Scale enemies based on character level
         scaled_enemies = [scale_enemy_for_level(enemy, character_level) for enemy in selected]
         
+        if character_state and target_difficulty:
+            scaled_enemies = _select_for_difficulty(
+                character_state, templates, character_level, target_difficulty, scaled_enemies
+            )
+            count = len(scaled_enemies)
+        
+        scaled_enemies = label_enemies(scaled_enemies)
         logger.info(f"✅ Selected {count} enemies: {[e['name'] for e in scaled_enemies]}")
         
         return scaled_enemies
@@ -163,7 +183,60 @@ def select_enemies_for_location(
             {"name": "Bandit", "hp": 15, "ac": 13, "attack_bonus": 3, "damage_die": "1d6+1"},
             {"name": "Thug", "hp": 12, "ac": 12, "attack_bonus": 2, "damage_die": "1d4"}
         ]
-        return [scale_enemy_for_level(e, character_level) for e in fallback]
+        return label_enemies([scale_enemy_for_level(e, character_level) for e in fallback])
+
+
+def label_enemies(enemies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Give every enemy a unique id, numbering the names of repeated templates
+    ("Wolf 1", "Wolf 2") so combat targeting and HP tracking tell them apart.
+    """
+    totals = Counter(enemy["name"] for enemy in enemies)
+    seen: Counter = Counter()
+    labeled = []
+    for i, enemy in enumerate(enemies, 1):
+        name = enemy["name"]
+        seen[name] += 1
+        slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+        labeled.append({
+            **enemy,
+            "id": f"enemy-{slug}-{i}",
+            "name": f"{name} {seen[name]}" if totals[name] > 1 else name,
+        })
+    return labeled
+
+
+def _select_for_difficulty(
+    character_state: Dict[str, Any],
+    templates: List[Dict[str, Any]],
+    character_level: int,
+    target_difficulty: str,
+    default_enemies: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Re-pick enemies from the archetype so the simulated fight hits the target band.
+    Falls back to the default selection if the simulator is unavailable.
+    """
+    try:
+        from services.encounter_simulator import select_encounter_for_band, ENCOUNTER_SELECTION_TRIALS
+        
+        candidates = [scale_enemy_for_level(enemy, character_level) for enemy in templates]
+        selection = select_encounter_for_band(
+            character_state,
+            candidates,
+            target_difficulty=target_difficulty,
+            trials=ENCOUNTER_SELECTION_TRIALS,
+            preferred=default_enemies
+        )
+        simulation = selection["simulation"]
+        logger.info(
+            f"🎲 Encounter tuned for '{target_difficulty}': got {simulation['difficulty']} "
+            f"(win {simulation['win_probability']:.0%}, ~{simulation['expected_rounds']} rounds)"
+        )
+        return selection["enemies"]
+    except Exception as e:
+        logger.warning(f"⚠️ Difficulty targeting unavailable ({e}), using default enemies")
+        return default_enemies
 
 
 def get_enemies_for_faction(
@@ -11,6 +11,7 @@ from models.character import Character, CharacterTrait, CharacterMemory
 from models.npc import NPC, NPCMemory, NPCStatus
 from models.world import Location, WorldEvent
 from services.ai_service import ai_service
+from services.dice import compile_formula
 
 class GameEngine:
     def __init__(self):
@@ -22,9 +23,8 @@ class GameEngine:
     
     def roll_dice(self, count: int, sides: int, modifier: int = 0) -> Tuple[int, List[int]]:
         """Roll multiple dice and return total and individual rolls"""
-        rolls = [random.randint(1, sides) for _ in range(count)]
-        total = sum(rolls) + modifier
-        return total, rolls
+        result = compile_formula(f"{count}d{sides}{modifier:+d}").roll(random)
+        return result["total"], result["rolls"]
     
     def get_stat_modifier(self, stat_value: int) -> int:
         """Calculate D&D 5e ability modifier"""
@@ -0,0 +1,190 @@
+"""
+Intent Cache - Two-tier cache for INTENT TAGGER classifications.
+
+Tier 1: exact-match LRU keyed on (scope, normalized action, proficiency hash).
+Tier 2: character-trigram similarity over recent actions in the same scope
+        and proficiency set; a prior classification is reused when the
+        Jaccard similarity clears the confidence threshold.
+
+Lookups try the campaign scope first, then the global scope. Entries expire
+after a TTL and the least recently used entries are evicted beyond
+max_entries. Hit/miss counters are kept for /api/debug/llm.
+"""
+import os
+import re
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INTENT_CACHE_MAX_ENTRIES = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "2048"))
+INTENT_CACHE_TTL_SECONDS = float(os.getenv("INTENT_CACHE_TTL_SECONDS", "3600"))
+INTENT_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("INTENT_CACHE_SIMILARITY_THRESHOLD", "0.8"))
+# Similarity scans only look at the most recent entries of a scope
+INTENT_CACHE_SIMILARITY_WINDOW = int(os.getenv("INTENT_CACHE_SIMILARITY_WINDOW", "256"))
+
+GLOBAL_SCOPE = "global"
+
+# Leading filler that doesn't change what the player is doing
+_FILLER_PREFIX = re.compile(r"^(?:i\s+(?:will|want to|try to|attempt to|am going to)\s+|i'll\s+|i\s+|let me\s+|let's\s+)")
+# Negations flip meaning while barely changing trigrams; they must match exactly
+_NEGATIONS = frozenset({"not", "no", "never", "dont", "don't", "without", "stop"})
+
+
+def normalize_action(player_action: str) -> str:
+    """Lowercase, strip punctuation and filler, collapse whitespace"""
+    text = player_action.lower().strip()
+    text = re.sub(r"[^\w\s']", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return _FILLER_PREFIX.sub("", text)
+
+
+def proficiency_hash(proficiencies: List[Any]) -> str:
+    """Order-insensitive hash of the character's proficiencies"""
+    canonical = "|".join(sorted(str(p).lower() for p in proficiencies or []))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+def _trigrams(text: str) -> FrozenSet[str]:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _negations(text: str) -> FrozenSet[str]:
+    return frozenset(word for word in text.split() if word in _NEGATIONS)
+
+
+class _Entry:
+    __slots__ = ("scope", "action", "prof_hash", "intent", "trigrams", "negations", "expires_at")
+
+    def __init__(self, scope: str, action: str, prof_hash: str, intent: Dict[str, Any], expires_at: float):
+        self.scope = scope
+        self.action = action
+        self.prof_hash = prof_hash
+        self.intent = intent
+        self.trigrams = _trigrams(action)
+        self.negations = _negations(action)
+        self.expires_at = expires_at
+
+
+class IntentCache:
+    """Exact LRU + n-gram similarity cache for intent classifications"""
+
+    def __init__(
+        self,
+        max_entries: int = INTENT_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = INTENT_CACHE_TTL_SECONDS,
+        similarity_threshold: float = INTENT_CACHE_SIMILARITY_THRESHOLD,
+        similarity_window: int = INTENT_CACHE_SIMILARITY_WINDOW,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.similarity_window = similarity_window
+        self._entries: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+        self.counters = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    @staticmethod
+    def scopes_for(campaign_id: Optional[str]) -> List[str]:
+        return [f"campaign:{campaign_id}", GLOBAL_SCOPE] if campaign_id else [GLOBAL_SCOPE]
+
+    def get(self, player_action: str, proficiencies: List[Any], campaign_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached classification.
+
+        Returns:
+            A copy of the cached intent, or None on miss
+        """
+        action = normalize_action(player_action)
+        prof_hash = proficiency_hash(proficiencies)
+        now = time.monotonic()
+
+        # Tier 1: exact match
+        for scope in self.scopes_for(campaign_id):
+            key = (scope, action, prof_hash)
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            if entry.expires_at <= now:
+                del self._entries[key]
+                self.counters["expirations"] += 1
+                continue
+            self._entries.move_to_end(key)
+            self.counters["exact_hits"] += 1
+            return dict(entry.intent)
+
+        # Tier 2: trigram similarity within the same scope and proficiency set
+        trigrams = _trigrams(action)
+        negations = _negations(action)
+        for scope in self.scopes_for(campaign_id):
+            best, best_score = self._most_similar(scope, prof_hash, trigrams, negations, now)
+            if best is not None and best_score >= self.similarity_threshold:
+                self._entries.move_to_end((best.scope, best.action, best.prof_hash))
+                self.counters["similar_hits"] += 1
+                logger.info(f"🏷️ Intent cache similar hit ({best_score:.2f}): '{action}' ≈ '{best.action}'")
+                return dict(best.intent)
+
+        self.counters["misses"] += 1
+        return None
+
+    def _most_similar(self, scope, prof_hash, trigrams, negations, now) -> Tuple[Optional[_Entry], float]:
+        best, best_score, scanned = None, 0.0, 0
+        for entry in reversed(self._entries.values()):
+            if scanned >= self.similarity_window:
+                break
+            if entry.scope != scope or entry.prof_hash != prof_hash:
+                continue
+            scanned += 1
+            if entry.expires_at <= now or entry.negations != negations:
+                continue
+            score = len(trigrams & entry.trigrams) / len(trigrams | entry.trigrams)
+            if score > best_score:
+                best, best_score = entry, score
+        return best, best_score
+
+    def put(self, player_action: str, proficiencies: List[Any], intent: Dict[str, Any], campaign_id: Optional[str] = None) -> None:
+        """Store a classification in the campaign and global scopes"""
+        action = normalize_action(player_action)
+        prof_hash = proficiency_hash(proficiencies)
+        expires_at = time.monotonic() + self.ttl_seconds
+
+        for scope in self.scopes_for(campaign_id):
+            key = (scope, action, prof_hash)
+            self._entries[key] = _Entry(scope, action, prof_hash, dict(intent), expires_at)
+            self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def clear(self, campaign_id: Optional[str] = None) -> None:
+        """Drop one campaign's scope, or everything"""
+        if campaign_id is None:
+            self._entries.clear()
+            return
+        scope = f"campaign:{campaign_id}"
+        for key in [k for k in self._entries if k[0] == scope]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["exact_hits"] + self.counters["similar_hits"] + self.counters["misses"]
+        hits = self.counters["exact_hits"] + self.counters["similar_hits"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+        }
+
+
+_cache: Optional[IntentCache] = None
+
+
+def get_intent_cache() -> IntentCache:
+    """Process-wide intent cache"""
+    global _cache
+    if _cache is None:
+        _cache = IntentCache()
+    return _cache
@@ -0,0 +1,228 @@
+"""
+Intent Classifier - Deterministic fast path for the INTENT TAGGER.
+
+Merges the keyword tables that already classify player actions elsewhere:
+- target_resolver (hostile actions)
+- LocationDetector (movement)
+- TailingQuestService (tailing)
+- DCHelper (DC action types)
+- ImprovisationEngine (creative / risky / impossible modifiers)
+
+They are compiled into one regex with a named group per rule, so a single
+pass over the action finds every match. The result uses the same shape as
+the LLM tagger, plus a confidence score. run_intent_tagger only calls the LLM
+when confidence is below INTENT_FAST_PATH_THRESHOLD. Agreement between the
+two is tracked per confidence bucket so the threshold can be tuned.
+"""
+import os
+import re
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.target_resolver import HOSTILE_KEYWORDS, AGGRESSIVE_VERBS
+from services.location_detector import LocationDetector
+from services.tailing_quest_service import TailingQuestService
+from services.dc_rules import DCHelper
+from services.improvisation_service import ImprovisationEngine
+
+logger = logging.getLogger(__name__)
+
+INTENT_FAST_PATH_THRESHOLD = float(os.getenv("INTENT_FAST_PATH_THRESHOLD", "0.85"))
+# Fraction of confident fast-path turns that are also sent to the LLM to
+# measure agreement (runs after the response, never on the critical path)
+INTENT_FAST_PATH_SHADOW_RATE = float(os.getenv("INTENT_FAST_PATH_SHADOW_RATE", "0.05"))
+
+_ABILITY_CODES = {
+    "strength": "STR", "dexterity": "DEX", "constitution": "CON",
+    "intelligence": "INT", "wisdom": "WIS", "charisma": "CHA"
+}
+
+# DC action type -> (tagger action_type, risk_level, base confidence)
+_DC_ACTION_CATEGORIES = {
+    "climb": ("movement", 2, 0.9),
+    "jump": ("movement", 2, 0.9),
+    "swim": ("movement", 2, 0.9),
+    "lift": ("exploration", 1, 0.85),
+    "break_object": ("exploration", 1, 0.85),
+    "persuade": ("social", 1, 0.9),
+    "deceive": ("social", 1, 0.9),
+    "intimidate": ("social", 2, 0.9),
+    "perform": ("social", 1, 0.85),
+    "investigate": ("investigation", 1, 0.9),
+    "perception": ("exploration", 1, 0.75),  # "look"/"watch" are often flavor
+    "insight": ("social", 1, 0.75),
+    "recall_knowledge": ("investigation", 0, 0.75),
+    "hide": ("stealth", 2, 0.9),
+    "move_silently": ("stealth", 2, 0.9),
+    "pickpocket": ("stealth", 3, 0.9),
+    "pick_lock": ("stealth", 2, 0.9),
+    "disable_trap": ("stealth", 3, 0.9),
+    "track": ("exploration", 1, 0.85),
+    "forage": ("exploration", 0, 0.85),
+    "navigate": ("exploration", 1, 0.85),
+}
+
+# Keywords that often mean something else ("lie down", "go to sleep", "hunt
+# for clues"). On their own they stay below the fast-path threshold; the
+# context phrases keep their unambiguous uses on the fast path.
+_AMBIGUOUS_KEYWORDS = {"lie": 0.6, "go to": 0.6, "hunt": 0.6}
+_CONTEXT_KEYWORDS = {
+    "deceive": ["lie to", "lie about"],
+    "movement": ["go to the"],
+}
+
+_NEGATION = re.compile(r"\b(?:not|don't|dont|never|without|stop|refuse)\b")
+
+
+class _Rule:
+    __slots__ = ("name", "intent", "confidence", "modifier")
+
+    def __init__(self, name: str, intent: Optional[Dict[str, Any]], confidence: float, modifier: float = 0.0):
+        self.name = name
+        self.intent = intent
+        self.confidence = confidence
+        self.modifier = modifier
+
+
+def _split_ambiguous(rules: List[Tuple[_Rule, List[str]]]) -> List[Tuple[_Rule, List[str]]]:
+    """Move ambiguous keywords into a lower-confidence copy of their rule, right after it"""
+    split = []
+    for rule, keywords in rules:
+        keywords = list(keywords) + _CONTEXT_KEYWORDS.get(rule.name, [])
+        split.append((rule, [k for k in keywords if k not in _AMBIGUOUS_KEYWORDS]))
+        ambiguous = [k for k in keywords if k in _AMBIGUOUS_KEYWORDS]
+        if ambiguous and rule.intent is not None:
+            confidence = min(_AMBIGUOUS_KEYWORDS[k] for k in ambiguous)
+            split.append((_Rule(rule.name, rule.intent, confidence, rule.modifier), ambiguous))
+    return split
+
+
+def _build_rules() -> List[Tuple[_Rule, List[str]]]:
+    """Rules in priority order: the first matched rule decides the intent"""
+    rules: List[Tuple[_Rule, List[str]]] = [
+        (_Rule("hostile", {"needs_check": False, "ability": None, "skill": None, "action_type": "combat", "risk_level": 3}, 0.9),
+         HOSTILE_KEYWORDS + AGGRESSIVE_VERBS),
+        (_Rule("tailing", {"needs_check": True, "ability": "DEX", "skill": "Stealth", "action_type": "stealth", "risk_level": 2}, 0.9),
+         TailingQuestService.TAILING_KEYWORDS),
+        (_Rule("movement", {"needs_check": False, "ability": None, "skill": None, "action_type": "movement", "risk_level": 0}, 0.9),
+         LocationDetector.MOVEMENT_KEYWORDS),
+    ]
+
+    for dc_action_type, keywords in DCHelper.ACTION_TYPE_KEYWORDS:
+        category, risk, confidence = _DC_ACTION_CATEGORIES[dc_action_type]
+        ability, skill = DCHelper.get_suggested_ability_and_skill(dc_action_type)
+        rules.append((_Rule(dc_action_type, {
+            "needs_check": True,
+            "ability": _ABILITY_CODES.get(ability),
+            "skill": skill,
+            "action_type": category,
+            "risk_level": risk
+        }, confidence), keywords))
+
+    # Improvisation indicators don't decide intent; they lower confidence
+    # because the LLM is better at judging unusual actions
+    rules += [
+        (_Rule("impossible", None, 0.0, modifier=-0.4), ImprovisationEngine.IMPOSSIBLE_INDICATORS),
+        (_Rule("creative", None, 0.0, modifier=-0.2), ImprovisationEngine.CREATIVE_ACTION_INDICATORS),
+        (_Rule("risky", None, 0.0, modifier=-0.1), ImprovisationEngine.RISKY_ACTION_INDICATORS),
+    ]
+    return _split_ambiguous(rules)
+
+
+def _compile(rules: List[Tuple[_Rule, List[str]]]) -> "re.Pattern":
+    groups = []
+    for index, (_, keywords) in enumerate(rules):
+        # Longest first so multi-word keywords win over their prefixes; whole
+        # words only, so "lie" doesn't match "lied" or "hit" match "hither"
+        alternatives = "|".join(re.escape(k) for k in sorted(set(keywords), key=len, reverse=True))
+        groups.append(f"(?P<r{index}>\\b(?:{alternatives})\\b)")
+    return re.compile("|".join(groups))
+
+
+_RULE_TABLE = _build_rules()
+_RULES = [rule for rule, _ in _RULE_TABLE]
+_MATCHER = _compile(_RULE_TABLE)
+
+
+def classify_intent(player_action: str) -> Dict[str, Any]:
+    """
+    Classify a player action with the merged keyword tables.
+
+    Returns:
+        {"intent": tagger-shaped dict or None, "confidence": 0.0-1.0, "matched": [rule names]}
+    """
+    action_lower = player_action.lower()
+    matched: List[_Rule] = []
+    for match in _MATCHER.finditer(action_lower):
+        rule = _RULES[int(match.lastgroup[1:])]
+        if rule not in matched:
+            matched.append(rule)
+
+    deciding = [rule for rule in matched if rule.intent is not None]
+    if not deciding:
+        return {"intent": None, "confidence": 0.0, "matched": list(dict.fromkeys(r.name for r in matched))}
+
+    primary = min(deciding, key=_RULES.index)
+    confidence = primary.confidence
+
+    # Competing categories make the keyword guess unreliable
+    categories = {rule.intent["action_type"] for rule in deciding}
+    confidence -= 0.25 * (len(categories) - 1)
+
+    # Compound or long actions
+    if len(player_action.split()) > 15 or " and " in action_lower or " while " in action_lower:
+        confidence -= 0.15
+
+    if _NEGATION.search(action_lower):
+        confidence -= 0.4
+
+    confidence += sum(rule.modifier for rule in matched)
+
+    return {
+        "intent": dict(primary.intent),
+        "confidence": round(max(0.0, min(1.0, confidence)), 2),
+        "matched": list(dict.fromkeys(r.name for r in matched))
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# AGREEMENT TRACKING
+# ═══════════════════════════════════════════════════════════════════════
+
+_agreement: Dict[str, Dict[str, int]] = {}
+
+
+def record_agreement(local: Dict[str, Any], llm_intent: Dict[str, Any]) -> bool:
+    """
+    Compare a fast-path classification with the LLM tagger's answer.
+    Agreement means same action_type and same needs_check.
+    """
+    intent = local.get("intent") or {}
+    agrees = (
+        intent.get("action_type") == llm_intent.get("action_type")
+        and bool(intent.get("needs_check")) == bool(llm_intent.get("needs_check"))
+    )
+
+    bucket = f"{min(int(local['confidence'] * 10), 9) / 10:.1f}"
+    stats = _agreement.setdefault(bucket, {"compared": 0, "agreed": 0})
+    stats["compared"] += 1
+    stats["agreed"] += int(agrees)
+
+    if not agrees:
+        logger.info(
+            f"🏷️ Intent fast path disagreed (conf={local['confidence']}): "
+            f"rules={intent.get('action_type')}/{intent.get('needs_check')} "
+            f"llm={llm_intent.get('action_type')}/{llm_intent.get('needs_check')}"
+        )
+    return agrees
+
+
+def get_agreement_stats() -> Dict[str, Any]:
+    """Agreement rate per confidence bucket (lower bound of the bucket)"""
+    return {
+        "threshold": INTENT_FAST_PATH_THRESHOLD,
+        "buckets": {
+            bucket: {**stats, "agreement_rate": round(stats["agreed"] / stats["compared"], 3)}
+            for bucket, stats in sorted(_agreement.items())
+        }
+    }
@@ -3,13 +3,15 @@ Intro narration service using NARRATOR-INTRO prompt.
 """
 import json
 import logging
-from .llm_client import get_openai_client
+from .llm_client import chat_completion
 from .prompts import INTRO_SYSTEM_PROMPT
+from .tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
-def generate_intro_markdown(
+@traced("intro_generation")
+async def generate_intro_markdown(
     character: dict,
     region: dict,
     world_blueprint: dict
@@ -37,8 +39,7 @@ def generate_intro_markdown(
     logger.info(f"Generating intro for character: {character.get('name')}")
     
     try:
-        client = get_openai_client()
-        completion = client.chat.completions.create(
+        completion = await chat_completion(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": INTRO_SYSTEM_PROMPT},
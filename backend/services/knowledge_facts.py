@@ -0,0 +1,115 @@
+"""
+Knowledge Facts - Bulk recording of first-mention "introduction" facts.
+
+The first time the player sees an entity in narration, an introduction
+KnowledgeFact is created. Uniqueness is enforced by the database (unique
+partial index on campaign_id + entity_type + entity_id for fact_type
+"introduction"), so recording is a single unordered bulk_write of
+UpdateOne(..., upsert=True) with $setOnInsert: existing facts are left
+untouched and no read of the campaign's facts is needed.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from services.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+@traced("knowledge_facts")
+async def upsert_introduction_facts(
+    db,
+    campaign_id: str,
+    character_id: Optional[str],
+    entity_mentions: List[Dict[str, Any]],
+    fact_text: Callable[[Dict[str, Any]], str],
+    source: str = "narration",
+) -> int:
+    """
+    Record introduction facts for every mentioned entity that doesn't have one yet.
+
+    Args:
+        entity_mentions: Output of extract_entity_mentions (repeats are fine)
+        fact_text: Builds the fact text for a mention
+
+    Returns:
+        Number of facts created
+    """
+    operations = []
+    seen = set()
+    revealed_at = datetime.now(timezone.utc)
+    for mention in entity_mentions:
+        key = (mention["entity_type"], mention["entity_id"])
+        if key in seen:
+            continue
+        seen.add(key)
+        operations.append(UpdateOne(
+            {
+                "campaign_id": campaign_id,
+                "entity_type": mention["entity_type"],
+                "entity_id": mention["entity_id"],
+                "fact_type": "introduction",
+            },
+            {"$setOnInsert": {
+                "character_id": character_id,
+                "entity_name": mention["display_text"],
+                "fact_text": fact_text(mention),
+                "revealed_at": revealed_at,
+                "source": source,
+                "metadata": {},
+            }},
+            upsert=True
+        ))
+
+    if not operations:
+        return 0
+
+    try:
+        result = await db.knowledge_facts.bulk_write(operations, ordered=False)
+        created = result.upserted_count
+    except BulkWriteError as e:
+        # Concurrent upserts of the same entity race on the unique index;
+        # the loser's fact already exists, which is the outcome we want
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != DUPLICATE_KEY for err in errors):
+            raise
+        created = e.details.get("nUpserted", 0)
+
+    if created:
+        logger.info(f"📚 Created {created} introduction knowledge facts for campaign {campaign_id}")
+    return created
+
+
+async def dedupe_introduction_facts(db) -> int:
+    """
+    Remove duplicate introduction facts (keeping the earliest) so the unique
+    index can be built on data written before it existed.
+
+    Returns:
+        Number of documents deleted
+    """
+    pipeline = [
+        {"$match": {"fact_type": "introduction"}},
+        {"$sort": {"_id": 1}},
+        {"$group": {
+            "_id": {"campaign_id": "$campaign_id", "entity_type": "$entity_type", "entity_id": "$entity_id"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1},
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    duplicate_ids = []
+    async for group in db.knowledge_facts.aggregate(pipeline, allowDiskUse=True):
+        duplicate_ids.extend(group["ids"][1:])
+
+    if not duplicate_ids:
+        return 0
+    result = await db.knowledge_facts.delete_many({"_id": {"$in": duplicate_ids}})
+    logger.info(f"🧹 Removed {result.deleted_count} duplicate introduction knowledge facts")
+    return result.deleted_count
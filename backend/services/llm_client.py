@@ -1,109 +1,370 @@
 """
-Singleton OpenAI client for all LLM calls.
-Prevents repeated client instantiation and improves connection reuse.
+Async LLM client shared by every service that talks to a model.
+
+All calls go through one httpx.AsyncClient connection pool so requests never
+block the event loop. Each model has its own concurrency limit, every call is
+bounded by a timeout, and transient failures are retried with exponential
+backoff plus jitter.
 Uses emergentintegrations for Emergent LLM key support.
 """
 import os
 import logging
 import uuid
+import time
+import random
 import asyncio
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from services.tracing import leaf_span
 
 logger = logging.getLogger(__name__)
 
-_client = None
+# ═══════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════
+
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+# OpenAI-compatible endpoint override, e.g. the load-test fake (loadtest/fake_llm.py)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# Maximum in-flight requests per model (protects rate limits and the pool)
+MODEL_CONCURRENCY = {
+    "gpt-4o": int(os.getenv("LLM_CONCURRENCY_GPT4O", "8")),
+    "gpt-4o-mini": int(os.getenv("LLM_CONCURRENCY_GPT4O_MINI", "16")),
+}
+DEFAULT_MODEL_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY_DEFAULT", "8"))
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# PROMPT CACHE METRICS
+# ═══════════════════════════════════════════════════════════════════════
+
+# Per-model prompt token totals; cached_tokens are served from the provider's
+# prompt-prefix cache (billed cheaper, faster time-to-first-token)
+_prompt_token_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _record_usage(model: str, usage: Any, span: Any = None) -> None:
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+    if span is not None:
+        span.set_attributes({
+            "llm.prompt_tokens": prompt_tokens,
+            "llm.completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "llm.cached_tokens": cached_tokens,
+        })
+
+    stats = _prompt_token_stats.setdefault(model, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+    stats["calls"] += 1
+    stats["prompt_tokens"] += prompt_tokens
+    stats["cached_tokens"] += cached_tokens
+    logger.info(f"🧮 {model} prompt tokens: {cached_tokens} cached / {prompt_tokens - cached_tokens} uncached")
+
+
+def get_prompt_token_stats() -> Dict[str, Dict[str, Any]]:
+    """Cached vs uncached prompt tokens per model since startup"""
+    result = {}
+    for model, stats in _prompt_token_stats.items():
+        prompt_tokens = stats["prompt_tokens"]
+        result[model] = {
+            **stats,
+            "uncached_tokens": prompt_tokens - stats["cached_tokens"],
+            "cache_hit_ratio": round(stats["cached_tokens"] / prompt_tokens, 3) if prompt_tokens else 0.0
+        }
+    return result
+
+
+class _Message:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content: str):
+        self.message = _Message(content)
+
+
+class _Response:
+    """Minimal OpenAI-shaped response for non-OpenAI backends"""
+
+    def __init__(self, content: str):
+        self.choices = [_Choice(content)]
+        self.usage = None
+
 
+class EmergentBackend:
+    """
+    Adapter that makes emergentintegrations' LlmChat look like
+    `AsyncOpenAI.chat.completions.create`.
+    """
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    async def create(self, model: str, messages: List[Dict[str, str]], **kwargs) -> _Response:
+        from emergentintegrations.llm.chat import LlmChat, UserMessage
+
+        # Extract system message and user messages
+        system_msg = next((m["content"] for m in messages if m["role"] == "system"), "You are a helpful assistant")
+        user_messages = [m for m in messages if m["role"] != "system"]
+
+        chat = LlmChat(
+            api_key=self.api_key,
+            session_id=str(uuid.uuid4()),
+            system_message=system_msg
+        )
+        chat.with_model("openai", model)
+
+        # Note: max_tokens not supported by emergentintegrations LlmChat
+        # Combine all user messages into one (emergentintegrations handles one message at a time)
+        combined_text = "\n".join([m["content"] for m in user_messages])
+        response = await chat.send_message(UserMessage(text=combined_text))
+        return _Response(response)
+
+    async def stream(self, model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        # LlmChat has no streaming API; emit the whole reply as one delta
+        response = await self.create(model=model, messages=messages, **kwargs)
+        yield response.choices[0].message.content
+
+
+class OpenAIBackend:
+    """Thin wrapper over AsyncOpenAI bound to the shared connection pool"""
+
+    def __init__(self, api_key: str, http_client: httpx.AsyncClient):
+        from openai import AsyncOpenAI
 
-def get_openai_client():
+        # Retries are handled by AsyncLLMClient so jitter/backoff is uniform
+        self._client = AsyncOpenAI(api_key=api_key, base_url=OPENAI_BASE_URL, http_client=http_client, max_retries=0)
+
+    async def create(self, model: str, messages: List[Dict[str, str]], **kwargs):
+        return await self._client.chat.completions.create(model=model, messages=messages, **kwargs)
+
+    async def stream(self, model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        stream = await self._client.chat.completions.create(
+            model=model, messages=messages, stream=True,
+            stream_options={"include_usage": True}, **kwargs
+        )
+        async for chunk in stream:
+            if chunk.usage is not None:
+                _record_usage(model, chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Transient transport, timeout, rate-limit and 5xx errors are retryable"""
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    try:
+        import openai
+    except ImportError:
+        return False
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return False
+
+
+class AsyncLLMClient:
+    """
+    Async chat-completion client with pooling, per-model limits and retries.
+
+    Usage:
+        client = get_llm_client()
+        completion = await client.chat_completion(model="gpt-4o", messages=[...])
+        content = completion.choices[0].message.content
     """
-    Get or create the singleton OpenAI client.
-    Uses emergentintegrations if Emergent LLM key is detected.
-    
-    Returns:
-        OpenAI-compatible client instance
-        
+
+    def __init__(
+        self,
+        api_key: str,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES,
+        retry_base_delay: float = LLM_RETRY_BASE_DELAY,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        self._http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS
+            )
+        )
+
+        # For Emergent keys, use emergentintegrations
+        if api_key.startswith("sk-emergent-"):
+            logger.info("🔑 Detected Emergent LLM key, using emergentintegrations")
+            self._backend = EmergentBackend(api_key)
+        else:
+            logger.info("🔑 Using standard OpenAI client")
+            self._backend = OpenAIBackend(api_key, self._http_client)
+
+    def _semaphore_for(self, model: str) -> asyncio.Semaphore:
+        if model not in self._semaphores:
+            limit = MODEL_CONCURRENCY.get(model, DEFAULT_MODEL_CONCURRENCY)
+            self._semaphores[model] = asyncio.Semaphore(limit)
+        return self._semaphores[model]
+
+    async def chat_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Run a chat completion with concurrency limit, timeout and retry.
+
+        Args:
+            model: Model name (e.g. "gpt-4o", "gpt-4o-mini")
+            messages: OpenAI-style message list
+            timeout: Per-attempt timeout override in seconds
+            **kwargs: Passed through to the provider (temperature, max_tokens, ...)
+
+        Returns:
+            OpenAI-shaped completion (`.choices[0].message.content`)
+
+        Raises:
+            The last provider error once retries are exhausted
+        """
+        attempt_timeout = timeout or self.timeout
+        attempt = 0
+
+        with leaf_span("llm.chat_completion", **{"llm.model": model}) as span:
+            while True:
+                try:
+                    async with self._semaphore_for(model):
+                        completion = await asyncio.wait_for(
+                            self._backend.create(model=model, messages=messages, **kwargs),
+                            timeout=attempt_timeout
+                        )
+                    span.set_attribute("llm.attempts", attempt + 1)
+                    _record_usage(model, getattr(completion, "usage", None), span)
+                    return completion
+                except Exception as e:
+                    if attempt >= self.max_retries or not _is_retryable(e):
+                        raise
+                    # Full jitter: sleep uniformly in [0, base * 2^attempt]
+                    delay = random.uniform(0, self.retry_base_delay * (2 ** attempt))
+                    attempt += 1
+                    logger.warning(
+                        f"⚠️ LLM call to {model} failed ({type(e).__name__}), "
+                        f"retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                    )
+                    await asyncio.sleep(delay)
+
+    async def stream_chat_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion as text deltas.
+
+        The timeout applies to the wait for each delta, not the whole reply.
+        Retries only happen before the first delta has been yielded; after
+        that the caller has already consumed partial output.
+
+        Yields:
+            Content deltas in arrival order
+        """
+        attempt_timeout = timeout or self.timeout
+        attempt = 0
+
+        with leaf_span("llm.stream_chat_completion", **{"llm.model": model}) as span:
+            while True:
+                started = False
+                try:
+                    async with self._semaphore_for(model):
+                        deltas = self._backend.stream(model=model, messages=messages, **kwargs).__aiter__()
+                        span.set_attribute("llm.attempts", attempt + 1)
+                        chunks = 0
+                        while True:
+                            try:
+                                delta = await asyncio.wait_for(deltas.__anext__(), timeout=attempt_timeout)
+                            except StopAsyncIteration:
+                                span.set_attribute("llm.chunks", chunks)
+                                return
+                            if not started:
+                                span.set_attribute("llm.first_chunk_unix_nano", time.time_ns())
+                            started = True
+                            chunks += 1
+                            yield delta
+                except Exception as e:
+                    if started or attempt >= self.max_retries or not _is_retryable(e):
+                        raise
+                    delay = random.uniform(0, self.retry_base_delay * (2 ** attempt))
+                    attempt += 1
+                    logger.warning(
+                        f"⚠️ LLM stream to {model} failed ({type(e).__name__}), "
+                        f"retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                    )
+                    await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        """Close the shared connection pool"""
+        await self._http_client.aclose()
+
+
+_client: Optional[AsyncLLMClient] = None
+
+
+def get_llm_client() -> AsyncLLMClient:
+    """
+    Get or create the shared async LLM client.
+
     Raises:
         ValueError: If OPENAI_API_KEY is not set
     """
     global _client
-    
+
     if _client is None:
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             logger.error("OPENAI_API_KEY not found in environment")
             raise ValueError("OPENAI_API_KEY not found in environment")
-        
-        # For Emergent keys, use emergentintegrations
-        if api_key.startswith("sk-emergent-"):
-            logger.info("🔑 Detected Emergent LLM key, using emergentintegrations")
-            from emergentintegrations.llm.chat import LlmChat, UserMessage
-            
-            # Create wrapper that makes LlmChat compatible with OpenAI client interface
-            class EmergentClientWrapper:
-                def __init__(self, api_key):
-                    self.api_key = api_key
-                    self.chat = self
-                    self.completions = self
-                
-                def create(self, model, messages, **kwargs):
-                    # Extract system message and user messages
-                    system_msg = next((m['content'] for m in messages if m['role'] == 'system'), "You are a helpful assistant")
-                    user_messages = [m for m in messages if m['role'] != 'system']
-                    
-                    # Create session ID
-                    session_id = str(uuid.uuid4())
-                    
-                    # Initialize LlmChat
-                    chat = LlmChat(
-                        api_key=self.api_key,
-                        session_id=session_id,
-                        system_message=system_msg
-                    )
-                    
-                    # Set model (default gpt-4o)
-                    chat.with_model("openai", model)
-                    
-                    # Note: max_tokens not supported by emergentintegrations LlmChat
-                    # It uses default token limits from the model
-                    
-                    # Combine all user messages into one (emergentintegrations handles one message at a time)
-                    combined_text = "\n".join([m['content'] for m in user_messages])
-                    user_msg = UserMessage(text=combined_text)
-                    
-                    # Send message - handle async properly in FastAPI context
-                    try:
-                        loop = asyncio.get_running_loop()
-                        # We're in an async context, use nest_asyncio or run in thread
-                        import nest_asyncio
-                        nest_asyncio.apply()
-                        response = asyncio.run(chat.send_message(user_msg))
-                    except RuntimeError:
-                        # No running loop, safe to use asyncio.run
-                        response = asyncio.run(chat.send_message(user_msg))
-                    
-                    # Convert response to OpenAI format
-                    class Choice:
-                        def __init__(self, content):
-                            self.message = type('obj', (object,), {'content': content})()
-                    
-                    class Response:
-                        def __init__(self, content):
-                            self.choices = [Choice(content)]
-                    
-                    return Response(response)
-            
-            _client = EmergentClientWrapper(api_key)
-        else:
-            logger.info("🔑 Using standard OpenAI client")
-            from openai import OpenAI
-            _client = OpenAI(api_key=api_key)
-        
-        logger.info("✅ Singleton OpenAI client initialized")
-    
+
+        _client = AsyncLLMClient(api_key)
+        logger.info("✅ Shared async LLM client initialized")
+
     return _client
 
 
+async def chat_completion(model: str, messages: List[Dict[str, str]], **kwargs) -> Any:
+    """Convenience wrapper around `get_llm_client().chat_completion`"""
+    return await get_llm_client().chat_completion(model=model, messages=messages, **kwargs)
+
+
+async def stream_chat_completion(model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+    """Convenience wrapper around `get_llm_client().stream_chat_completion`"""
+    async for delta in get_llm_client().stream_chat_completion(model=model, messages=messages, **kwargs):
+        yield delta
+
+
+async def close_llm_client() -> None:
+    """Close the shared client's connection pool (call on app shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
 def reset_client():
-    """Reset the singleton client (mainly for testing)"""
+    """Reset the shared client (mainly for testing)"""
     global _client
     _client = None
@@ -6,6 +6,9 @@ import logging
 import re
 from typing import Optional, Dict, Any
 
+from services.blueprint_index import get_blueprint_index
+from services.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 
@@ -53,23 +56,8 @@ class LocationDetector:
         """
         action_lower = action.lower()
         
-        # Get list of known locations from world blueprint
-        known_locations = []
-        
-        # Add starting town
-        starting_town = world_blueprint.get("starting_town", {})
-        if starting_town.get("name"):
-            known_locations.append(starting_town["name"])
-        
-        # Add other towns
-        for town in world_blueprint.get("towns", []):
-            if town.get("name"):
-                known_locations.append(town["name"])
-        
-        # Add points of interest from starting town
-        for poi in starting_town.get("points_of_interest", []):
-            if poi.get("name"):
-                known_locations.append(poi["name"])
+        # Known locations (starting town, other towns, starting town POIs)
+        known_locations = get_blueprint_index(world_blueprint).known_locations
         
         # Check if any known location is mentioned in the action
         for location in known_locations:
@@ -93,6 +81,7 @@ class LocationDetector:
         return None
     
     @staticmethod
+    @traced("location_detection")
     async def detect_and_update_location(
         action: str,
         world_blueprint: Dict[str, Any],
@@ -6,6 +6,8 @@ import re
 import logging
 from typing import Dict, List, Any, Set, Tuple
 
+from services.blueprint_index import get_blueprint_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -66,42 +68,8 @@ def build_blueprint_lookup(world_blueprint: Dict[str, Any]) -> Dict[str, Any]:
             "factions": {name: faction_data}
         }
     """
-    npcs = {}
-    places = {}
-    factions = {}
-    
-    # Extract NPCs
-    for npc in world_blueprint.get("key_npcs", []):
-        name = npc.get("name", "")
-        if name:
-            npcs[name] = npc
-    
-    # Extract places (starting_town + points_of_interest)
-    starting_town = world_blueprint.get("starting_town", {})
-    if starting_town.get("name"):
-        places[starting_town["name"]] = starting_town
-    
-    for poi in world_blueprint.get("points_of_interest", []):
-        name = poi.get("name", "")
-        if name:
-            places[name] = poi
-    
-    # Also add starting region
-    starting_region = world_blueprint.get("starting_region", {})
-    if starting_region.get("name"):
-        places[starting_region["name"]] = starting_region
-    
-    # Extract factions
-    for faction in world_blueprint.get("factions", []):
-        name = faction.get("name", "")
-        if name:
-            factions[name] = faction
-    
-    return {
-        "npcs": npcs,
-        "places": places,
-        "factions": factions
-    }
+    # Built once per blueprint and shared (read-only)
+    return get_blueprint_index(world_blueprint).lore_lookup
 
 
 def find_best_substitute(
@@ -270,3 +238,68 @@ def check_lore_consistency(
         "corrected_narration": corrected_narration,
         "corrections_made": corrections_made
     }
+
+
+class IncrementalLoreChecker:
+    """
+    Sentence-at-a-time LORE CHECKER for streamed narration.
+    
+    Builds the blueprint lookup once and checks each sentence as it is
+    released, so streaming never waits for the full narration. Each unknown
+    name is reported once. `result()` returns the same shape as
+    check_lore_consistency().
+    """
+    
+    def __init__(self, world_blueprint: Dict[str, Any], world_state: Dict[str, Any], auto_correct: bool = False):
+        self.world_blueprint = world_blueprint
+        self.world_state = world_state
+        self.auto_correct = auto_correct
+        self._blueprint_lookup = build_blueprint_lookup(world_blueprint)
+        self._seen_names: Set[str] = set()
+        self._sentences: List[str] = []
+        self.issues: List[str] = []
+        self.corrections_made = 0
+    
+    def check_sentence(self, sentence: str) -> str:
+        """
+        Check one sentence; returns it (corrected if auto_correct is on).
+        """
+        lookup = self._blueprint_lookup
+        names = extract_names_from_narration(sentence)["potential_npcs"] - self._seen_names
+        self._seen_names |= names
+        
+        for name in names:
+            if name in lookup["npcs"] or name in lookup["places"] or name in lookup["factions"]:
+                continue
+            
+            if self.auto_correct:
+                substitute, reason = find_best_substitute(name, "npcs", lookup, self.world_state)
+                if reason == "no_safe_substitute":
+                    substitute, reason = find_best_substitute(name, "places", lookup, self.world_state)
+                if reason != "no_safe_substitute":
+                    sentence = sentence.replace(name, substitute)
+                    self.corrections_made += 1
+                    self.issues.append(f"Auto-corrected unknown name '{name}' → '{substitute}'")
+                    continue
+            
+            self.issues.append(f"Unknown name '{name}' not in blueprint")
+        
+        self._sentences.append(sentence)
+        return sentence
+    
+    def result(self) -> Dict[str, Any]:
+        """Aggregate result for everything checked so far"""
+        if self.auto_correct:
+            valid = not [i for i in self.issues if "Auto-corrected" not in i]
+        else:
+            valid = True
+        
+        if self.issues:
+            logger.info(f"🔍 LORE CHECKER (streaming): Found {len(self.issues)} issues, made {self.corrections_made} corrections")
+        
+        return {
+            "valid": valid,
+            "issues": list(self.issues),
+            "corrected_narration": " ".join(self._sentences),
+            "corrections_made": self.corrections_made
+        }
@@ -3,10 +3,17 @@ Narration Filter - Enforces Human DM Filter v2 rules
 Post-processes LLM output to ensure compliance
 
 THIS FILTER IS MANDATORY FOR ALL NARRATION OUTPUT
+
+The rules are compiled once at import into a CompiledNarrationFilter: one
+case-insensitive alternation for every banned phrase and one sentence
+segmenter. A single process() call returns the cleaned text, sentence spans
+and counts; the NarrationFilter static methods delegate to it. Compiled
+filters hold no per-call state and are safe to share.
 """
 import logging
 import re
 from functools import wraps
+from typing import Iterable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +36,176 @@ def filter_narration(func):
     return wrapper
 
 
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """
+    Regex for a set of literal phrases with shared prefixes factored out
+    ("you (?:see|notice|...)"), so re tests each position against a handful
+    of first characters instead of every alternative. Sibling branches start
+    with different characters and a phrase that ends where a longer one
+    continues is a greedy optional group, so the longest phrase wins.
+    """
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def build(node: dict) -> str:
+        end = '' in node
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char != '']
+        if not branches:
+            return ''
+        if len(branches) == 1 and not end:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')' + ('?' if end else '')
+    
+    return build(trie)
+
+
+class FilterResult:
+    """Outcome of CompiledNarrationFilter.process"""
+    
+    __slots__ = ("text", "sentence_spans", "sentence_count", "original_sentence_count",
+                 "removed_phrases", "truncated", "novel_style")
+    
+    def __init__(self, text: str, sentence_spans: List[Tuple[int, int]], original_sentence_count: int,
+                 removed_phrases: List[str], truncated: bool, novel_style: bool):
+        self.text = text
+        # (start, end) of each sentence in `text`, terminator included
+        self.sentence_spans = sentence_spans
+        self.sentence_count = len(sentence_spans)
+        # Sentences before truncation
+        self.original_sentence_count = original_sentence_count
+        self.removed_phrases = removed_phrases
+        self.truncated = truncated
+        self.novel_style = novel_style
+    
+    @property
+    def sentences(self) -> List[str]:
+        return [self.text[start:end] for start, end in self.sentence_spans]
+
+
+class CompiledNarrationFilter:
+    """
+    Banned phrases and sentence rules compiled into a reusable filter.
+    
+    Phrases are matched in one pass over the text; where phrases overlap the
+    longest one is removed whole.
+    """
+    
+    # A run of non-terminators and the terminator run that closes it (or the
+    # end of the text for a trailing sentence)
+    _SEGMENT = re.compile(r'([^.!?]*)([.!?]+|$)')
+    # Runs of non-terminators that contain something besides whitespace
+    _NON_BLANK_SEGMENT = re.compile(r'[^.!?]*[^\s.!?][^.!?]*')
+    _SPACE_BEFORE_PUNCTUATION = re.compile(r'\s+([.,;:!?])')
+    _WHITESPACE = re.compile(r'\s+')
+    
+    NOVEL_SENTENCE_WORDS = 50
+    SENSORY_WORDS = ('scent', 'smell', 'sight', 'sound', 'taste', 'feel', 'touch')
+    
+    def __init__(self, banned_phrases: Iterable[str]):
+        phrases = sorted({phrase.lower() for phrase in banned_phrases if phrase}, key=len, reverse=True)
+        self.banned_phrases = tuple(phrases)
+        self._banned = re.compile(_trie_pattern(phrases)) if phrases else None
+        self._banned_ignorecase = re.compile(_trie_pattern(phrases), re.IGNORECASE) if phrases else None
+    
+    def count_sentences(self, text: str) -> int:
+        return len(self._NON_BLANK_SEGMENT.findall(text))
+    
+    def remove_banned_phrases(self, text: str) -> Tuple[str, List[str]]:
+        """Cleaned text and the distinct phrases removed (in order found)"""
+        removed: List[str] = []
+        if self._banned is not None:
+            # Search the lowercased text without IGNORECASE (much faster in
+            # re); its offsets match the original unless lowercasing changed
+            # the length (rare non-ASCII cases)
+            lower = text.lower()
+            if len(lower) == len(text):
+                matches = [match.span() for match in self._banned.finditer(lower)]
+            else:
+                matches = [match.span() for match in self._banned_ignorecase.finditer(text)]
+            if matches:
+                parts = []
+                position = 0
+                for start, end in matches:
+                    phrase = text[start:end].lower()
+                    if phrase not in removed:
+                        removed.append(phrase)
+                    parts.append(text[position:start])
+                    position = end
+                parts.append(text[position:])
+                text = ''.join(parts)
+        text = self._WHITESPACE.sub(' ', text)
+        text = self._SPACE_BEFORE_PUNCTUATION.sub(r'\1', text)
+        return text.strip(), removed
+    
+    def segment(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Sentences as (start, end, terminator); start/end exclude surrounding
+        whitespace, terminator is "" for a trailing unterminated sentence.
+        Terminator runs with no words before them are skipped.
+        """
+        sentences = []
+        for match in self._SEGMENT.finditer(text):
+            body = match.group(1)
+            stripped = body.strip()
+            if not stripped:
+                continue
+            body_start = match.start(1) + len(body) - len(body.lstrip())
+            body_end = body_start + len(stripped)
+            terminator = match.group(2)
+            sentences.append((body_start, match.end(2) if terminator else body_end, terminator))
+        return sentences
+    
+    def enforce_sentence_limit(self, text: str, max_sentences: int) -> Tuple[str, List[Tuple[int, int]], int]:
+        """
+        Truncate to the first max_sentences sentences.
+        
+        Returns:
+            (text, sentence spans in that text, sentence count before truncation).
+            Text within the limit is returned unchanged.
+        """
+        sentences = self.segment(text)
+        if len(sentences) <= max_sentences:
+            return text, [(start, end) for start, end, _ in sentences], len(sentences)
+        
+        parts: List[str] = []
+        spans: List[Tuple[int, int]] = []
+        position = 0
+        for start, end, terminator in sentences[:max_sentences]:
+            sentence = text[start:end] if terminator else text[start:end] + '.'
+            if parts:
+                position += 1
+            spans.append((position, position + len(sentence)))
+            parts.append(sentence)
+            position += len(sentence)
+        return ' '.join(parts), spans, len(sentences)
+    
+    def is_novel_style(self, text: str, spans: Optional[List[Tuple[int, int]]] = None) -> bool:
+        """Very long sentences (50+ words) or stacked sensory descriptions"""
+        if spans is None:
+            spans = [(start, end) for start, end, _ in self.segment(text)]
+        if any(len(text[start:end].split()) > self.NOVEL_SENTENCE_WORDS for start, end in spans):
+            return True
+        lower = text.lower()
+        return sum(1 for word in self.SENSORY_WORDS if word in lower) > 2
+    
+    def process(self, text: str, max_sentences: int) -> FilterResult:
+        """Remove banned phrases, then enforce the sentence limit"""
+        cleaned, removed = self.remove_banned_phrases(text)
+        cleaned, spans, original_count = self.enforce_sentence_limit(cleaned, max_sentences)
+        return FilterResult(
+            text=cleaned,
+            sentence_spans=spans,
+            original_sentence_count=original_count,
+            removed_phrases=removed,
+            truncated=original_count > max_sentences,
+            novel_style=self.is_novel_style(cleaned, spans)
+        )
+
+
 class NarrationFilter:
     """Enforces narration quality rules"""
     
@@ -51,11 +228,7 @@ class NarrationFilter:
         
         Sentences end with: . ! ?
         """
-        # Split by sentence terminators
-        sentences = re.split(r'[.!?]+', text)
-        # Filter out empty strings
-        sentences = [s.strip() for s in sentences if s.strip()]
-        return len(sentences)
+        return DEFAULT_FILTER.count_sentences(text)
     
     @staticmethod
     def enforce_sentence_limit(text: str, max_sentences: int = 4) -> str:
@@ -64,25 +237,9 @@ class NarrationFilter:
         
         If text exceeds limit, truncate to first N sentences
         """
-        # Split into sentences
-        sentences = re.split(r'([.!?]+)', text)
-        
-        # Rebuild with terminators
-        full_sentences = []
-        for i in range(0, len(sentences) - 1, 2):
-            if sentences[i].strip():
-                full_sentences.append(sentences[i].strip() + sentences[i+1])
-        
-        # Handle last sentence if no terminator
-        if len(sentences) % 2 == 1 and sentences[-1].strip():
-            full_sentences.append(sentences[-1].strip() + '.')
-        
-        if len(full_sentences) <= max_sentences:
-            return text
-        
-        # Truncate to max_sentences
-        truncated = ' '.join(full_sentences[:max_sentences])
-        logger.warning(f"⚠️ Narration truncated from {len(full_sentences)} to {max_sentences} sentences")
+        truncated, _, original_count = DEFAULT_FILTER.enforce_sentence_limit(text, max_sentences)
+        if original_count > max_sentences:
+            logger.warning(f"⚠️ Narration truncated from {original_count} to {max_sentences} sentences")
         return truncated
     
     @staticmethod
@@ -90,24 +247,9 @@ class NarrationFilter:
         """
         Remove or replace banned phrases
         """
-        result = text
-        changes_made = []
-        
-        for phrase in NarrationFilter.BANNED_PHRASES:
-            if phrase.lower() in result.lower():
-                # Remove the phrase
-                pattern = re.compile(re.escape(phrase), re.IGNORECASE)
-                result = pattern.sub('', result)
-                changes_made.append(phrase)
-        
-        # Clean up double spaces and awkward punctuation
-        result = re.sub(r'\s+', ' ', result)
-        result = re.sub(r'\s+([.,;:!?])', r'\1', result)
-        result = result.strip()
-        
+        result, changes_made = DEFAULT_FILTER.remove_banned_phrases(text)
         if changes_made:
             logger.info(f"🚫 Removed banned phrases: {', '.join(changes_made[:3])}")
-        
         return result
     
     @staticmethod
@@ -120,20 +262,7 @@ class NarrationFilter:
         - Stacked metaphors
         - Excessive adjectives
         """
-        sentences = re.split(r'[.!?]+', text)
-        
-        for sentence in sentences:
-            words = sentence.split()
-            if len(words) > 50:
-                return True
-        
-        # Check for stacked sensory descriptions
-        sensory_words = ['scent', 'smell', 'sight', 'sound', 'taste', 'feel', 'touch']
-        sensory_count = sum(1 for word in sensory_words if word in text.lower())
-        if sensory_count > 2:
-            return True
-        
-        return False
+        return DEFAULT_FILTER.is_novel_style(text)
     
     # Context-specific sentence limits from v4.1 spec
     SENTENCE_LIMITS = {
@@ -165,29 +294,108 @@ class NarrationFilter:
             return narration
         
         original_length = len(narration)
-        original_sentences = NarrationFilter.count_sentences(narration)
         
-        # Step 1: Remove banned phrases
-        narration = NarrationFilter.remove_banned_phrases(narration)
-        
-        # Step 2: Determine sentence limit
+        # Determine sentence limit
         if max_sentences is None:
             # Use context-based limit from v4.1 spec
             max_sentences = NarrationFilter.SENTENCE_LIMITS.get(context.lower(), NarrationFilter.SENTENCE_LIMITS["unknown"])
             logger.info(f"📏 Using v4.1 sentence limit for [{context}]: {max_sentences} sentences")
         
-        # Step 3: Enforce sentence limit (CRITICAL)
-        narration = NarrationFilter.enforce_sentence_limit(narration, max_sentences=max_sentences)
+        # One pass: banned phrases, sentence limit (CRITICAL), novel style check
+        result = DEFAULT_FILTER.process(narration, max_sentences=max_sentences)
+        narration = result.text
         
-        # Step 4: Check for novel style (log warning)
-        if NarrationFilter.detect_novel_style(narration):
+        if result.removed_phrases:
+            logger.info(f"🚫 Removed banned phrases: {', '.join(result.removed_phrases[:3])}")
+        if result.truncated:
+            logger.warning(f"⚠️ Narration truncated from {result.original_sentence_count} to {max_sentences} sentences")
+        if result.novel_style:
             logger.warning(f"⚠️ Novel-style narration in [{context}]")
         
         final_length = len(narration)
-        final_sentences = NarrationFilter.count_sentences(narration)
-        
-        if final_length < original_length or final_sentences < original_sentences:
+        if final_length < original_length or result.truncated:
             reduction_pct = int(((original_length - final_length) / original_length) * 100) if original_length > 0 else 0
-            logger.info(f"✂️ [{context}] {original_sentences}→{final_sentences} sentences, {reduction_pct}% reduction")
+            logger.info(f"✂️ [{context}] {result.original_sentence_count}→{result.sentence_count} sentences, {reduction_pct}% reduction")
         
         return narration
+
+
+DEFAULT_FILTER = CompiledNarrationFilter(NarrationFilter.BANNED_PHRASES)
+
+
+class IncrementalNarrationFilter:
+    """
+    Sentence-at-a-time version of NarrationFilter.apply_filter for streamed
+    narration.
+    
+    Text is fed as it arrives; each sentence is released as soon as its
+    terminator is followed by more text, with banned phrases removed. Once the
+    sentence limit is reached, further sentences are dropped, which matches
+    what enforce_sentence_limit would have kept.
+    
+    Usage:
+        stream_filter = IncrementalNarrationFilter(context="exploration")
+        for delta in deltas:
+            for sentence in stream_filter.feed(delta):
+                send(sentence)
+        for sentence in stream_filter.finish():
+            send(sentence)
+    """
+    
+    # A sentence ends at a run of terminators followed by a non-terminator
+    _SENTENCE_END = re.compile(r'[.!?]+(?=[^.!?])')
+    _WORD = re.compile(r'\w')
+    
+    def __init__(self, max_sentences: int = None, context: str = "unknown"):
+        if max_sentences is None:
+            max_sentences = NarrationFilter.SENTENCE_LIMITS.get(context.lower(), NarrationFilter.SENTENCE_LIMITS["unknown"])
+        self.max_sentences = max_sentences
+        self.context = context
+        self.sentences = []
+        self.dropped = 0
+        self._buffer = ""
+    
+    @property
+    def text(self) -> str:
+        """Filtered narration emitted so far"""
+        return ' '.join(self.sentences)
+    
+    def feed(self, delta: str) -> list:
+        """Add streamed text; returns sentences completed by it"""
+        self._buffer += delta
+        released = []
+        
+        while True:
+            match = self._SENTENCE_END.search(self._buffer)
+            if not match:
+                break
+            sentence = self._buffer[:match.end()]
+            self._buffer = self._buffer[match.end():]
+            cleaned = self._accept(sentence)
+            if cleaned:
+                released.append(cleaned)
+        
+        return released
+    
+    def finish(self) -> list:
+        """Flush the trailing sentence (adds a period if it has no terminator)"""
+        tail = self._buffer.strip()
+        self._buffer = ""
+        if not tail:
+            return []
+        if tail[-1] not in ".!?":
+            tail += "."
+        cleaned = self._accept(tail)
+        if self.dropped:
+            logger.warning(f"⚠️ Streamed narration truncated: dropped {self.dropped} sentences over {self.max_sentences} limit [{self.context}]")
+        return [cleaned] if cleaned else []
+    
+    def _accept(self, sentence: str) -> str:
+        cleaned = NarrationFilter.remove_banned_phrases(sentence)
+        if not self._WORD.search(cleaned):
+            return ""
+        if len(self.sentences) >= self.max_sentences:
+            self.dropped += 1
+            return ""
+        self.sentences.append(cleaned)
+        return cleaned
@@ -0,0 +1,118 @@
+"""
+Narration Stream - Incremental delivery of DUNGEON FORGE narration.
+
+DUNGEON FORGE answers with a JSON object whose "narration" field is what the
+player reads. While the model streams that JSON, NarrationJSONExtractor pulls
+the decoded narration text out of it, IncrementalNarrationFilter and
+IncrementalLoreChecker process it sentence by sentence, and every released
+sentence is pushed to the active NarrationStream.
+
+The stream is bound to the request through a context variable, so nothing in
+process_action has to thread it through; tasks created by the request inherit
+it automatically.
+"""
+import asyncio
+import json
+import logging
+import re
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class NarrationJSONExtractor:
+    """
+    Incrementally decodes the string value of one key from a streamed JSON object.
+
+    Feed raw model output chunks; each call returns the newly decoded part of
+    the value. Escapes split across chunks are held until complete.
+    """
+
+    def __init__(self, key: str = "narration"):
+        self._key_pattern = re.compile(r'"' + re.escape(key) + r'"\s*:\s*"')
+        self._raw = ""
+        self._pos = 0
+        self.started = False
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        if self.done:
+            return ""
+        self._raw += chunk
+
+        if not self.started:
+            match = self._key_pattern.search(self._raw)
+            if not match:
+                return ""
+            self.started = True
+            self._pos = match.end()
+
+        out = []
+        raw = self._raw
+        while self._pos < len(raw):
+            char = raw[self._pos]
+            if char == '"':
+                self.done = True
+                break
+            if char != '\\':
+                out.append(char)
+                self._pos += 1
+                continue
+            # Escape sequence: wait until it is complete
+            if self._pos + 1 >= len(raw):
+                break
+            code = raw[self._pos + 1]
+            if code == 'u':
+                if self._pos + 6 > len(raw):
+                    break
+                try:
+                    out.append(chr(int(raw[self._pos + 2:self._pos + 6], 16)))
+                except ValueError:
+                    pass
+                self._pos += 6
+            else:
+                out.append(_ESCAPES.get(code, code))
+                self._pos += 2
+
+        return "".join(out)
+
+
+class NarrationStream:
+    """Per-request event channel between process_action and the HTTP response"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.streamed_sentences: List[str] = []
+
+    @property
+    def streamed_text(self) -> str:
+        return " ".join(self.streamed_sentences)
+
+    def emit_sentence(self, sentence: str) -> None:
+        self.streamed_sentences.append(sentence)
+        self.queue.put_nowait({"type": "narration", "text": sentence})
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        self.queue.put_nowait(event)
+
+
+_active_stream: ContextVar[Optional[NarrationStream]] = ContextVar("narration_stream", default=None)
+
+
+def open_narration_stream() -> NarrationStream:
+    """Bind a new NarrationStream to the current context"""
+    stream = NarrationStream()
+    _active_stream.set(stream)
+    return stream
+
+
+def current_narration_stream() -> Optional[NarrationStream]:
+    """The stream bound to this request, or None for regular JSON requests"""
+    return _active_stream.get()
+
+
+def to_ndjson(event: Dict[str, Any]) -> str:
+    return json.dumps(event, default=str) + "\n"
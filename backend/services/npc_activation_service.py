@@ -9,6 +9,8 @@ PHASE 2: Now generates NPC personalities on activation (DMG p.186)
 import logging
 from typing import Dict, Any, List
 
+from services.blueprint_index import get_blueprint_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -72,7 +74,7 @@ def populate_active_npcs_for_location(
     
     logger.info(f"🎭 Activating NPCs for location: {location_name}")
     
-    # Get all NPCs from blueprint
+    index = get_blueprint_index(world_blueprint)
     key_npcs = world_blueprint.get('key_npcs', [])
     
     if not key_npcs:
@@ -80,46 +82,35 @@ def populate_active_npcs_for_location(
         return []
     
     # Check starting town NPCs
-    starting_town = world_blueprint.get('starting_town', {})
-    starting_town_name = starting_town.get('name', '').lower()
+    starting_town_name = index.starting_town.get('name', '').lower()
     
     if starting_town_name and starting_town_name in location_lower:
-        # Activate all NPCs associated with starting town
-        for npc in key_npcs:
+        # Activate NPCs with no specific location (assume starting town) or a town role
+        for npc in index.npcs_for(world_blueprint, index.starting_town_npcs):
             npc_id = npc.get('id') or npc.get('name', '').lower().replace(' ', '_')
             
             # Ensure NPC has an ID
             if not npc.get('id'):
                 npc['id'] = npc_id
             
-            # Check if NPC is associated with this location
-            npc_location_poi = npc.get('location_poi_id', '')
-            
-            # If NPC has no specific location, assume they're in starting town
-            if not npc_location_poi or 'town' in npc.get('role', '').lower():
-                active_npc_ids.append(npc_id)
-                # PHASE 2: Generate personality on activation
-                generate_npc_personality_on_activation(npc, world_state)
-                logger.info(f"  ✅ Activated NPC: {npc.get('name')} ({npc_id})")
+            active_npc_ids.append(npc_id)
+            # PHASE 2: Generate personality on activation
+            generate_npc_personality_on_activation(npc, world_state)
+            logger.info(f"  ✅ Activated NPC: {npc.get('name')} ({npc_id})")
     
     # Check POI-specific NPCs
-    pois = world_blueprint.get('points_of_interest', [])
-    for poi in pois:
+    for poi in index.points_of_interest:
         poi_name = poi.get('name', '').lower()
-        poi_id = poi.get('id', '')
         
         if poi_name in location_lower or location_lower in poi_name:
             # Activate NPCs at this POI
-            for npc in key_npcs:
+            for npc in index.npcs_for(world_blueprint, index.npcs_by_location.get(poi.get('id', ''), ())):
                 npc_id = npc.get('id') or npc.get('name', '').lower().replace(' ', '_')
-                npc_location_poi = npc.get('location_poi_id', '')
-                
-                if npc_location_poi == poi_id:
-                    if npc_id not in active_npc_ids:
-                        active_npc_ids.append(npc_id)
-                        # PHASE 2: Generate personality on activation
-                        generate_npc_personality_on_activation(npc, world_state)
-                        logger.info(f"  ✅ Activated NPC at POI: {npc.get('name')} ({npc_id})")
+                if npc_id not in active_npc_ids:
+                    active_npc_ids.append(npc_id)
+                    # PHASE 2: Generate personality on activation
+                    generate_npc_personality_on_activation(npc, world_state)
+                    logger.info(f"  ✅ Activated NPC at POI: {npc.get('name')} ({npc_id})")
     
     # If no NPCs found but we're in a known location, activate some default NPCs
     if not active_npc_ids and key_npcs:
@@ -165,13 +156,7 @@ def get_active_npcs_list(
         List of NPC dicts
     """
     active_npc_ids = world_state.get('active_npcs', [])
-    key_npcs = world_blueprint.get('key_npcs', [])
-    
-    active_npcs = []
-    for npc_id in active_npc_ids:
-        for npc in key_npcs:
-            if npc.get('id') == npc_id or npc.get('name', '').lower().replace(' ', '_') == npc_id:
-                active_npcs.append(npc)
-                break
+    index = get_blueprint_index(world_blueprint)
+    positions = [index.npc_positions[npc_id] for npc_id in active_npc_ids if npc_id in index.npc_positions]
     
-    return active_npcs
+    return index.npcs_for(world_blueprint, tuple(positions))
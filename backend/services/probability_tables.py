@@ -0,0 +1,225 @@
+"""
+Probability Tables - Exact odds for checks and attacks, built at import time.
+
+Every probability here is a lookup into small arrays computed once:
+
+- CHECK_TABLE[mode, modifier, dc]     P(d20 + modifier >= DC), no auto-success
+                                      on a 20 / auto-fail on a 1 (CheckResolution)
+- HIT_TABLE[mode, to_hit, ac]         P(attack hits): nat 1 misses, nat 20 hits
+                                      (dnd_rules.resolve_attack)
+- CRIT_TABLE[mode]                    P(natural 20)
+- DAMAGE_TABLE[dice][kind, modifier]  E[damage] on a normal hit / crit, following
+                                      resolve_attack: max(1, dice + mod), crits
+                                      roll the dice twice
+
+Modes are indexed as in ADVANTAGE_MODES (normal, advantage, disadvantage).
+Both success tables depend only on (target - modifier), so lookups outside the
+tabulated ranges use the per-mode d20 tail D20_AT_LEAST and stay exact.
+"""
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from services.dice import DICE_MAX_COUNT, DICE_MAX_SIDES
+
+logger = logging.getLogger(__name__)
+
+ADVANTAGE_MODES = ("normal", "advantage", "disadvantage")
+MODIFIERS = np.arange(-5, 16)          # check modifiers and attack bonuses
+TARGETS = np.arange(1, 31)             # DCs and ACs
+DAMAGE_MODIFIERS = np.arange(-5, 11)
+DAMAGE_DICE = ("1d4", "1d6", "1d8", "1d10", "1d12", "2d4", "2d6", "2d8", "2d10", "3d6", "4d6")
+
+
+def _mode_index(advantage: Optional[str]) -> int:
+    try:
+        return ADVANTAGE_MODES.index(advantage or "normal")
+    except ValueError:
+        raise ValueError(f"advantage must be one of {ADVANTAGE_MODES}, got {advantage!r}")
+
+
+def _build_d20_at_least() -> np.ndarray:
+    """[mode, n] = P(d20 result >= n) for n in 0..21"""
+    n = np.arange(22)
+    normal = np.clip((21 - n) / 20, 0.0, 1.0)
+    below = 1.0 - normal                       # P(one die < n)
+    return np.stack([normal, 1.0 - below ** 2, normal ** 2])
+
+
+def _dice_distribution(count: int, sides: int) -> np.ndarray:
+    """[total] = P(NdS == total), index 0..count*sides (one FFT instead of count convolutions)"""
+    size = count * sides + 1
+    face = np.zeros(size)
+    face[1:sides + 1] = 1.0 / sides
+    distribution = np.fft.irfft(np.fft.rfft(face) ** count, n=size)
+    return np.clip(distribution, 0.0, None)
+
+
+def _expected_min_one(distribution: np.ndarray, modifier: int) -> float:
+    totals = np.arange(len(distribution))
+    return float((distribution * np.maximum(1, totals + modifier)).sum())
+
+
+def _damage_row(count: int, sides: int) -> np.ndarray:
+    """[kind, modifier] with kind 0 = normal hit, 1 = crit"""
+    normal = _dice_distribution(count, sides)
+    crit = _dice_distribution(2 * count, sides)
+    return np.array([
+        [_expected_min_one(normal, int(mod)) for mod in DAMAGE_MODIFIERS],
+        [_expected_min_one(crit, int(mod)) for mod in DAMAGE_MODIFIERS],
+    ], dtype=np.float32)
+
+
+def _parse_plain_dice(damage_dice: str) -> Optional[tuple]:
+    """(count, sides) for a plain "NdS" string, else None; ValueError past the dice engine limits"""
+    text = (damage_dice or "").lower().replace(" ", "")
+    count, _, sides = text.partition("d")
+    if not sides.isdigit() or not (count == "" or count.isdigit()):
+        return None
+    count, sides = (int(count) if count else 1), int(sides)
+    if not 1 <= count <= DICE_MAX_COUNT:
+        raise ValueError(f"Number of dice must be 1-{DICE_MAX_COUNT}: {damage_dice}")
+    if not 1 <= sides <= DICE_MAX_SIDES:
+        raise ValueError(f"Die size must be 1-{DICE_MAX_SIDES}: {damage_dice}")
+    return count, sides
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# TABLES (built once at import)
+# ═══════════════════════════════════════════════════════════════════════
+
+D20_AT_LEAST = _build_d20_at_least()
+
+_check_need = np.clip(TARGETS[None, :] - MODIFIERS[:, None], 0, 21)
+CHECK_TABLE = D20_AT_LEAST[:, _check_need].astype(np.float32)
+
+# A hit needs at least a 2 (nat 1 misses) and never more than a 20 (nat 20 hits)
+_hit_need = np.clip(TARGETS[None, :] - MODIFIERS[:, None], 2, 20)
+HIT_TABLE = D20_AT_LEAST[:, _hit_need].astype(np.float32)
+CRIT_TABLE = D20_AT_LEAST[:, 20].astype(np.float32)
+
+DAMAGE_TABLE = {dice: _damage_row(*_parse_plain_dice(dice)) for dice in DAMAGE_DICE}
+
+for _readonly in (D20_AT_LEAST, CHECK_TABLE, HIT_TABLE, CRIT_TABLE, *DAMAGE_TABLE.values()):
+    _readonly.flags.writeable = False
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# LOOKUPS
+# ═══════════════════════════════════════════════════════════════════════
+
+def check_success_chance(modifier: int, dc: int, advantage: str = "normal") -> float:
+    """P(d20 + modifier >= dc)"""
+    need = min(max(int(dc) - int(modifier), 0), 21)
+    return float(D20_AT_LEAST[_mode_index(advantage), need])
+
+
+def attack_hit_chance(to_hit: int, ac: int, advantage: str = "normal") -> float:
+    """P(attack with total bonus to_hit hits AC), crits included"""
+    need = min(max(int(ac) - int(to_hit), 2), 20)
+    return float(D20_AT_LEAST[_mode_index(advantage), need])
+
+
+def attack_crit_chance(advantage: str = "normal") -> float:
+    """P(natural 20)"""
+    return float(D20_AT_LEAST[_mode_index(advantage), 20])
+
+
+def expected_damage(damage_dice: str, modifier: int = 0, crit: bool = False) -> float:
+    """
+    Expected damage of one hit: max(1, dice + modifier), dice doubled on a crit.
+    Tabulated dice/modifiers are a lookup; other plain NdS dice are computed,
+    in closed form when even the lowest roll deals more than 1 damage.
+    """
+    row = DAMAGE_TABLE.get((damage_dice or "").lower())
+    modifier = int(modifier)
+    if row is not None and DAMAGE_MODIFIERS[0] <= modifier <= DAMAGE_MODIFIERS[-1]:
+        return float(row[int(crit), modifier - DAMAGE_MODIFIERS[0]])
+
+    parsed = _parse_plain_dice(damage_dice)
+    if parsed is None:
+        raise ValueError(f"Expected plain NdS damage dice, got {damage_dice!r}")
+    count, sides = parsed
+    count *= 2 if crit else 1
+    if count + modifier >= 1:
+        return count * (sides + 1) / 2 + modifier
+    return _expected_min_one(_dice_distribution(count, sides), modifier)
+
+
+def expected_attack_damage(
+    to_hit: int,
+    ac: int,
+    damage_dice: str,
+    modifier: int = 0,
+    advantage: str = "normal"
+) -> float:
+    """Expected damage per attack roll, counting misses as 0"""
+    crit = attack_crit_chance(advantage)
+    normal_hit = attack_hit_chance(to_hit, ac, advantage) - crit
+    return normal_hit * expected_damage(damage_dice, modifier) + crit * expected_damage(damage_dice, modifier, crit=True)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# CHARACTER HELPERS
+# ═══════════════════════════════════════════════════════════════════════
+
+_ABILITY_KEYS = {
+    "strength": "str", "dexterity": "dex", "constitution": "con",
+    "intelligence": "int", "wisdom": "wis", "charisma": "cha",
+}
+
+
+def check_modifier_for(character_state: Dict[str, Any], ability: Optional[str], skill: Optional[str] = None) -> int:
+    """Ability modifier plus proficiency bonus when the skill is among the character's proficiencies"""
+    abilities = character_state.get("abilities") or {}
+    key = (ability or "").lower()
+    key = _ABILITY_KEYS.get(key, key[:3])
+    score = abilities.get(key, abilities.get((ability or "").lower(), 10))
+    modifier = (int(score) - 10) // 2
+
+    if skill:
+        proficiencies = {str(p).lower() for p in character_state.get("proficiencies") or []}
+        if skill.lower() in proficiencies:
+            modifier += character_state.get("proficiency_bonus", 2)
+    return modifier
+
+
+def check_odds(
+    character_state: Dict[str, Any],
+    dc: int,
+    ability: Optional[str],
+    skill: Optional[str] = None,
+    advantage: str = "normal"
+) -> Dict[str, Any]:
+    """Odds of a character's check: {"modifier", "dc", "advantage", "success_chance"}"""
+    modifier = check_modifier_for(character_state, ability, skill)
+    return {
+        "modifier": modifier,
+        "dc": dc,
+        "advantage": advantage or "normal",
+        "success_chance": round(check_success_chance(modifier, dc, advantage), 4),
+    }
+
+
+def format_success_chance(odds: Dict[str, Any]) -> str:
+    """Prompt line for a check_odds() result, e.g. "success chance: 35% (d20+3 vs DC 15)" """
+    mode = "" if odds["advantage"] == "normal" else f", {odds['advantage']}"
+    return f"success chance: {odds['success_chance']:.0%} (d20{odds['modifier']:+d} vs DC {odds['dc']}{mode})"
+
+
+def get_probability_tables() -> Dict[str, Any]:
+    """All tables as JSON-friendly lists with their axes"""
+    return {
+        "modes": list(ADVANTAGE_MODES),
+        "modifiers": MODIFIERS.tolist(),
+        "targets": TARGETS.tolist(),
+        "check_success": np.round(CHECK_TABLE, 4).tolist(),
+        "attack_hit": np.round(HIT_TABLE, 4).tolist(),
+        "attack_crit": np.round(CRIT_TABLE, 4).tolist(),
+        "damage_modifiers": DAMAGE_MODIFIERS.tolist(),
+        "expected_damage": {
+            dice: {"hit": np.round(row[0], 3).tolist(), "crit": np.round(row[1], 3).tolist()}
+            for dice, row in DAMAGE_TABLE.items()
+        },
+    }
@@ -5,12 +5,12 @@ Integrates with world_blueprint, world_state, character_state, and quest hooks
 """
 import logging
 from typing import Dict, Any, Optional, List
-from .llm_client import get_openai_client
+from .llm_client import chat_completion
 
 logger = logging.getLogger(__name__)
 
 
-def generate_scene_description(
+async def generate_scene_description(
     scene_type: str,
     location: Dict[str, Any],
     character_state: Dict[str, Any],
@@ -76,8 +76,7 @@ def generate_scene_description(
     )
     
     try:
-        client = get_openai_client()
-        completion = client.chat.completions.create(
+        completion = await chat_completion(
             model="gpt-4o-mini",  # Use mini for faster/cheaper scene generation
             messages=[
                 {"role": "system", "content": prompt},
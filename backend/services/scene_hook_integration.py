@@ -7,10 +7,12 @@ from typing import Dict, Any, List, Optional
 from .scene_generator import generate_scene_description
 from .advanced_hook_generator import generate_advanced_hooks
 from .embedded_hook_narrator import generate_narration_with_embedded_hooks
+from .tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
+@traced("scene_generation")
 async def generate_scene_with_advanced_hooks(
     scene_type: str,
     location: Dict[str, Any],
@@ -45,7 +47,7 @@ async def generate_scene_with_advanced_hooks(
     location_name = location.get("name", "Unknown")
     
     # STEP 1: Generate initial atmospheric scene description
-    scene_data = generate_scene_description(
+    scene_data = await generate_scene_description(
         scene_type=scene_type,
         location=location,
         character_state=character_state,
@@ -60,7 +62,7 @@ async def generate_scene_with_advanced_hooks(
     
     # STEP 2: Generate advanced quest hooks FROM the scene
     try:
-        advanced_hooks = generate_advanced_hooks(
+        advanced_hooks = await generate_advanced_hooks(
             scene_description=initial_scene_description,
             location_name=location_name,
             world_blueprint=world_blueprint,
@@ -82,7 +84,7 @@ async def generate_scene_with_advanced_hooks(
             time_of_day = world_state.get("time_of_day", "midday")
             weather = world_state.get("weather", "clear")
             
-            embedded_narration = generate_narration_with_embedded_hooks(
+            embedded_narration = await generate_narration_with_embedded_hooks(
                 location=location,
                 scene_type=scene_type,
                 character_state=character_state,
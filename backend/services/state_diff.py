@@ -0,0 +1,146 @@
+"""
+State Diff - Minimal MongoDB update operators from old/new documents.
+
+world_state, character_state and campaign logs grow every turn, but a turn
+usually changes a handful of fields. diff_update walks both versions and
+emits field-level operators on dotted paths:
+
+- $set    for changed scalars, new keys and rewritten lists
+- $unset  for removed keys
+- $push   ($each) when a list only had items appended (recent_scenes,
+          transgression history, ...)
+
+Keys that can't be addressed with a dotted path (containing "." or starting
+with "$") make the differ fall back to setting their parent as a whole.
+apply_update replays such an update on an in-memory document.
+
+record_write keeps bytes-written counters per target so the saving is
+visible at /api/debug/writes.
+"""
+import logging
+from typing import Any, Dict
+
+import bson
+
+logger = logging.getLogger(__name__)
+
+
+def _addressable(key: Any) -> bool:
+    return isinstance(key, str) and key != "" and "." not in key and not key.startswith("$")
+
+
+def _join(path: str, key: str) -> str:
+    return f"{path}.{key}" if path else key
+
+
+def _diff(old: Any, new: Any, path: str, ops: Dict[str, Dict[str, Any]]) -> None:
+    if isinstance(old, dict) and isinstance(new, dict) and new and all(_addressable(k) for k in new.keys() | old.keys()):
+        for key in old.keys() - new.keys():
+            ops["$unset"][_join(path, key)] = ""
+        for key, value in new.items():
+            if key not in old:
+                ops["$set"][_join(path, key)] = value
+            elif old[key] != value:
+                _diff(old[key], value, _join(path, key), ops)
+        return
+
+    if isinstance(old, list) and isinstance(new, list) and len(new) > len(old) and new[:len(old)] == old:
+        ops["$push"][path] = {"$each": new[len(old):]}
+        return
+
+    ops["$set"][path] = new
+
+
+def diff_update(old: Dict[str, Any], new: Dict[str, Any], prefix: str = "") -> Dict[str, Dict[str, Any]]:
+    """
+    Minimal update document turning `old` into `new`.
+
+    Args:
+        old: Current stored document (or sub-document at `prefix`)
+        new: Desired document
+        prefix: Dotted path of the sub-document, "" for a top-level document
+
+    Returns:
+        {"$set": {...}, "$unset": {...}, "$push": {...}} with empty operators
+        omitted; {} when nothing changed
+    """
+    ops: Dict[str, Dict[str, Any]] = {"$set": {}, "$unset": {}, "$push": {}}
+    if old != new:
+        if not prefix and not (isinstance(old, dict) and isinstance(new, dict)):
+            raise TypeError("Top-level documents must be dicts")
+        _diff(old, new, prefix, ops)
+    return {op: fields for op, fields in ops.items() if fields}
+
+
+_MISSING = object()
+
+
+def _parent(doc: Dict[str, Any], path: str):
+    *parents, key = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    return doc, key
+
+
+def value_at(doc: Dict[str, Any], path: str) -> Any:
+    """Value at a dotted path, or None when any part of it is missing"""
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part, _MISSING)
+        if doc is _MISSING:
+            return None
+    return doc
+
+
+def apply_update(doc: Dict[str, Any], update: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply a diff_update() result to `doc` in place, the way MongoDB would; returns doc"""
+    for path, value in update.get("$set", {}).items():
+        parent, key = _parent(doc, path)
+        parent[key] = value
+    for path in update.get("$unset", {}):
+        parent, key = _parent(doc, path)
+        parent.pop(key, None)
+    for path, push in update.get("$push", {}).items():
+        parent, key = _parent(doc, path)
+        parent[key] = list(parent.get(key) or []) + list(push["$each"])
+    return doc
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# BYTES-WRITTEN METRICS
+# ═══════════════════════════════════════════════════════════════════════
+
+_write_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _bson_size(update: Dict[str, Any]) -> int:
+    try:
+        return len(bson.encode(update))
+    except Exception:
+        return 0
+
+
+def record_write(target: str, full_update: Dict[str, Any], diff: Dict[str, Any]) -> None:
+    """
+    Count one write: `full_update` is what a whole-document rewrite would
+    have sent, `diff` what was actually sent ({} for a skipped no-op).
+    """
+    stats = _write_stats.setdefault(target, {"writes": 0, "skipped": 0, "bytes_full": 0, "bytes_diff": 0})
+    stats["bytes_full"] += _bson_size(full_update)
+    if diff:
+        stats["writes"] += 1
+        stats["bytes_diff"] += _bson_size(diff)
+    else:
+        stats["skipped"] += 1
+
+
+def get_write_stats() -> Dict[str, Any]:
+    """Bytes written vs whole-document rewrites, per target"""
+    return {
+        target: {
+            **stats,
+            "savings_ratio": round(1 - stats["bytes_diff"] / stats["bytes_full"], 3) if stats["bytes_full"] else 0.0
+        }
+        for target, stats in sorted(_write_stats.items())
+    }
@@ -588,28 +588,21 @@ def build_consistency_context(
         mechanical_context: Player state, check results, combat state
     
     Returns:
-        Formatted context string for LLM
+        Formatted context string for LLM, limited to the canon relevant to
+        the draft and to CONSISTENCY_CONTEXT_TOKEN_BUDGET tokens
     """
-    context = {
-        "world_blueprint": world_blueprint,
-        "world_state": world_state,
-        "quest_state": quest_state or {},
-        "npc_registry": npc_registry or {},
-        "story_threads": story_threads or [],
-        "scene_history": scene_history or [],
-        "mechanical_context": mechanical_context or {},
-        "dm_draft": dm_draft
-    }
+    from services.consistency_context import assemble_consistency_context
     
-    return f"""CONTEXT FOR VALIDATION
-
-{json.dumps(context, indent=2)}
-
----
-
-Analyze the dm_draft above for consistency with the provided canonical data.
-Follow your task loop and return the structured JSON output.
-"""
+    return assemble_consistency_context(
+        dm_draft=dm_draft,
+        world_blueprint=world_blueprint,
+        world_state=world_state,
+        quest_state=quest_state,
+        npc_registry=npc_registry,
+        story_threads=story_threads,
+        scene_history=scene_history,
+        mechanical_context=mechanical_context
+    )["text"]
 
 
 async def validate_dm_output(
@@ -638,9 +631,7 @@ async def validate_dm_output(
     Returns:
         Validation result with decision, issues, and corrections
     """
-    from services.llm_client import get_openai_client
-    
-    client = get_openai_client()
+    from services.llm_client import chat_completion
     
     # Build context
     context_str = build_consistency_context(
@@ -657,7 +648,7 @@ async def validate_dm_output(
     try:
         logger.info("🔍 Story Consistency Agent: Validating DM output...")
         
-        completion = client.chat.completions.create(
+        completion = await chat_completion(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": STORY_CONSISTENCY_PROMPT},
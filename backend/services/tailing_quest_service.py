@@ -7,12 +7,21 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone
 import random
 
+from services.campaign_cache import invalidate_campaign
+
 logger = logging.getLogger(__name__)
 
 
 class TailingQuestService:
     """Service for creating and managing tailing quests"""
     
+    # Tailing keywords
+    TAILING_KEYWORDS = [
+        'follow', 'tail', 'track', 'shadow', 'pursue',
+        'keep an eye on', 'watch where', 'see where',
+        'trail', 'stalk', 'spy on'
+    ]
+    
     @staticmethod
     def detect_tailing_intent(action: str) -> Optional[Dict[str, str]]:
         """
@@ -23,15 +32,8 @@ class TailingQuestService:
         """
         action_lower = action.lower()
         
-        # Tailing keywords
-        tailing_keywords = [
-            'follow', 'tail', 'track', 'shadow', 'pursue',
-            'keep an eye on', 'watch where', 'see where',
-            'trail', 'stalk', 'spy on'
-        ]
-        
         # Check if action contains tailing intent
-        for keyword in tailing_keywords:
+        for keyword in TailingQuestService.TAILING_KEYWORDS:
             if keyword in action_lower:
                 # Extract target (simplified - could be enhanced)
                 target = "the target"  # Default
@@ -270,6 +272,7 @@ class TailingQuestService:
             {"campaign_id": campaign_id},
             {"$set": {"world_state": world_state}}
         )
+        invalidate_campaign(campaign_id)
         
         logger.info(f"📊 Updated tailing quest: {quest_id}, detection: {quest['detection_level']}, events: {quest['events_completed']}")
         
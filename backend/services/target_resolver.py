@@ -10,6 +10,8 @@ Target Resolution Priority:
 import logging
 from typing import Dict, Any, Optional, List
 
+from services.blueprint_index import get_blueprint_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -249,6 +251,32 @@ def extract_named_target_from_text(
     return None
 
 
+# Hostile action keyword tables (shared with services/intent_classifier.py)
+
+# Primary hostile keywords - direct violence
+HOSTILE_KEYWORDS = [
+    'attack', 'strike', 'hit', 'slash', 'stab', 'punch', 'kick',
+    'shoot', 'fire at', 'throw at', 'swing at', 'charge',
+    'grapple', 'shove', 'tackle', 'headbutt', 'smash', 'crush',
+    'beat', 'assault', 'fight', 'kill', 'murder', 'execute'
+]
+
+# Weapon-related actions
+WEAPON_KEYWORDS = [
+    'sword', 'dagger', 'axe', 'mace', 'spear', 'bow', 'arrow',
+    'blade', 'weapon', 'club', 'hammer', 'knife'
+]
+
+# Aggressive action verbs
+AGGRESSIVE_VERBS = [
+    'draw weapon', 'unsheathe', 'aim at', 'point weapon',
+    'threaten', 'menace', 'lunge', 'rush', 'leap at'
+]
+
+# Repeated violence patterns (attacking "again", "once more")
+REPEAT_PATTERNS = ['again', 'once more', 'another', 'keep attacking', 'continue']
+
+
 def is_hostile_action(player_action: str) -> bool:
     """
     Detect if the player action is a hostile action requiring a target.
@@ -261,48 +289,25 @@ def is_hostile_action(player_action: str) -> bool:
     """
     action_lower = player_action.lower()
     
-    # Primary hostile keywords - direct violence
-    hostile_keywords = [
-        'attack', 'strike', 'hit', 'slash', 'stab', 'punch', 'kick',
-        'shoot', 'fire at', 'throw at', 'swing at', 'charge',
-        'grapple', 'shove', 'tackle', 'headbutt', 'smash', 'crush',
-        'beat', 'assault', 'fight', 'kill', 'murder', 'execute'
-    ]
-    
-    # Weapon-related actions
-    weapon_keywords = [
-        'sword', 'dagger', 'axe', 'mace', 'spear', 'bow', 'arrow',
-        'blade', 'weapon', 'club', 'hammer', 'knife'
-    ]
-    
-    # Aggressive action verbs
-    aggressive_verbs = [
-        'draw weapon', 'unsheathe', 'aim at', 'point weapon',
-        'threaten', 'menace', 'lunge', 'rush', 'leap at'
-    ]
-    
-    # Repeated violence patterns (attacking "again", "once more")
-    repeat_patterns = ['again', 'once more', 'another', 'keep attacking', 'continue']
-    
     # Check primary hostile keywords
-    if any(keyword in action_lower for keyword in hostile_keywords):
+    if any(keyword in action_lower for keyword in HOSTILE_KEYWORDS):
         logger.info(f"🎯 Hostile action detected: violence keyword")
         return True
     
     # Check weapon usage combined with aggressive intent
-    has_weapon = any(weapon in action_lower for weapon in weapon_keywords)
+    has_weapon = any(weapon in action_lower for weapon in WEAPON_KEYWORDS)
     has_action = any(verb in ['use', 'swing', 'wield', 'brandish'] for verb in action_lower.split())
     if has_weapon and has_action:
         logger.info(f"🎯 Hostile action detected: weapon usage")
         return True
     
     # Check aggressive verbs
-    if any(verb in action_lower for verb in aggressive_verbs):
+    if any(verb in action_lower for verb in AGGRESSIVE_VERBS):
         logger.info(f"🎯 Hostile action detected: aggressive verb")
         return True
     
     # Check for repeated violence
-    if any(pattern in action_lower for pattern in repeat_patterns):
+    if any(pattern in action_lower for pattern in REPEAT_PATTERNS):
         # If "again" or "once more" is used, assume it's continuing hostile action
         if any(word in action_lower for word in ['hit', 'attack', 'punch', 'strike']):
             logger.info(f"🎯 Hostile action detected: repeated violence")
@@ -355,11 +360,8 @@ def find_npc_by_id(npc_id: str, world_blueprint: Dict[str, Any]) -> Optional[Dic
     """
     Find an NPC in the world_blueprint by ID.
     """
-    key_npcs = world_blueprint.get('key_npcs', [])
-    for npc in key_npcs:
-        if npc.get('id') == npc_id or npc.get('name', '').lower().replace(' ', '_') == npc_id:
-            # Ensure NPC has an ID field
-            if 'id' not in npc:
-                npc['id'] = npc.get('name', '').lower().replace(' ', '_')
-            return npc
-    return None
+    npc = get_blueprint_index(world_blueprint).npc_for(world_blueprint, npc_id)
+    if npc is not None and 'id' not in npc:
+        # Ensure NPC has an ID field
+        npc['id'] = npc.get('name', '').lower().replace(' ', '_')
+    return npc
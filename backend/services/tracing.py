@@ -0,0 +1,467 @@
+"""
+Tracing - Lightweight request spans for the Dungeon Forge pipeline.
+
+A trace is one request (action, check resolution, intro, character
+creation); spans inside it are pipeline stages, LLM calls and Mongo ops:
+
+    @traced_endpoint("POST /api/rpg_dm/action")
+    async def process_action(request): ...
+
+    @traced("dungeon_forge")                        # nested, becomes current
+    async def run_dungeon_forge(...): ...
+
+    with span("action.load_state"):
+        ...
+
+    with leaf_span("llm.chat_completion", kind=SPAN_KIND_CLIENT) as s:
+        s.set_attribute("llm.prompt_tokens", 812)    # leaf, never current
+
+Leaf spans are only recorded inside a trace, so background work (work queue,
+world pool) doesn't produce one trace per Mongo op. Finished traces go to an
+in-memory ring buffer (TRACE_BUFFER_SIZE) for /api/debug/traces and, when
+TRACE_EXPORT_FILE is set, are appended there as OpenTelemetry OTLP/JSON
+(one ExportTraceServiceRequest per line).
+"""
+import os
+import json
+import time
+import asyncio
+import inspect
+import logging
+import functools
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ═══════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "dnd-ai-backend")
+# Spans kept per trace; a runaway loop can't grow a trace without bound
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "1000"))
+
+# OTLP span kinds / status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Trace:
+    """Spans of one request; exported when the root span ends"""
+
+    __slots__ = ("trace_id", "spans", "finished", "dropped_spans")
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List["Span"] = []
+        self.finished = False
+        self.dropped_spans = 0
+
+
+class Span:
+    """One timed operation. Attributes must be str/int/float/bool."""
+
+    __slots__ = (
+        "trace", "span_id", "parent_span_id", "name", "kind",
+        "start_ns", "end_ns", "attributes", "status", "status_message"
+    )
+
+    def __init__(self, trace: Trace, name: str, parent: Optional["Span"], kind: int, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent.span_id if parent else ""
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = {key: value for key, value in attributes.items() if value is not None}
+        self.status = STATUS_UNSET
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def end(self) -> None:
+        if self.end_ns:
+            return
+        self.end_ns = time.time_ns()
+        trace = self.trace
+        if trace.finished:
+            # Outlived its request (e.g. a background task); not exported
+            return
+        if len(trace.spans) < TRACE_MAX_SPANS:
+            trace.spans.append(self)
+        else:
+            trace.dropped_spans += 1
+        if not self.parent_span_id:
+            trace.finished = True
+            _export(trace)
+
+
+class _NoopSpan:
+    """Stand-in outside a trace or with tracing disabled"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class span:
+    """
+    Context manager for a span that becomes the current span, so spans opened
+    inside it (including in tasks created inside it) are its children. With no
+    current span it starts a new trace.
+    """
+
+    __slots__ = ("_name", "_kind", "_attributes", "_span", "_token")
+
+    def __init__(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any):
+        self._name = name
+        self._kind = kind
+        self._attributes = attributes
+        self._span: Optional[Span] = None
+        self._token = None
+
+    def __enter__(self):
+        if not TRACING_ENABLED:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        trace = parent.trace if parent else Trace()
+        self._span = Span(trace, self._name, parent, self._kind, self._attributes)
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._span is None:
+            return False
+        _current_span.reset(self._token)
+        if exc is not None and not isinstance(exc, asyncio.CancelledError):
+            self._span.record_error(exc)
+        elif self._span.status == STATUS_UNSET:
+            self._span.status = STATUS_OK
+        self._span.end()
+        return False
+
+
+class leaf_span:
+    """
+    Context manager for a span that never becomes current (LLM calls, Mongo
+    ops, async generators). No-op outside a trace.
+    """
+
+    __slots__ = ("_name", "_kind", "_attributes", "_span")
+
+    def __init__(self, name: str, kind: int = SPAN_KIND_CLIENT, **attributes: Any):
+        self._name = name
+        self._kind = kind
+        self._attributes = attributes
+        self._span: Optional[Span] = None
+
+    def __enter__(self):
+        parent = _current_span.get() if TRACING_ENABLED else None
+        if parent is None:
+            return NOOP_SPAN
+        self._span = Span(parent.trace, self._name, parent, self._kind, self._attributes)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._span is None:
+            return False
+        if exc is not None and not isinstance(exc, (asyncio.CancelledError, GeneratorExit)):
+            self._span.record_error(exc)
+        elif self._span.status == STATUS_UNSET:
+            self._span.status = STATUS_OK
+        self._span.end()
+        return False
+
+
+def traced(name: str, kind: int = SPAN_KIND_INTERNAL) -> Callable:
+    """Decorator: run a function (sync or async) inside a span named `name`"""
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, kind=kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, kind=kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_endpoint(name: str) -> Callable:
+    """Decorator: run an endpoint inside a root (server) span named `name`"""
+    return traced(name, kind=SPAN_KIND_SERVER)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# EXPORT
+# ═══════════════════════════════════════════════════════════════════════
+
+_traces: Deque[Trace] = deque(maxlen=TRACE_BUFFER_SIZE)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # OTLP/JSON encodes 64-bit ints as strings
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: Trace) -> Dict[str, Any]:
+    """OTLP/JSON ExportTraceServiceRequest for one trace"""
+    spans = []
+    for s in trace.spans:
+        entry = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": s.kind,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in s.attributes.items()],
+            "status": {"code": s.status, **({"message": s.status_message} if s.status_message else {})},
+        }
+        if s.parent_span_id:
+            entry["parentSpanId"] = s.parent_span_id
+        spans.append(entry)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+        }]
+    }
+
+
+def _export(trace: Trace) -> None:
+    _traces.append(trace)
+    if TRACE_EXPORT_FILE:
+        try:
+            with open(TRACE_EXPORT_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(to_otlp(trace)) + "\n")
+        except OSError as e:
+            logger.error(f"❌ Trace export to {TRACE_EXPORT_FILE} failed: {e}")
+
+
+def _root(trace: Trace) -> Optional[Span]:
+    return next((s for s in trace.spans if not s.parent_span_id), None)
+
+
+def summarize_trace(trace: Trace) -> Dict[str, Any]:
+    """Root timing plus time per stage, LLM token totals and Mongo op counts"""
+    root = _root(trace)
+    stages: Dict[str, Dict[str, Any]] = {}
+    llm = {"calls": 0, "ms": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+    mongo = {"ops": 0, "ms": 0.0}
+    for s in trace.spans:
+        if s is root:
+            continue
+        if s.name.startswith("llm."):
+            llm["calls"] += 1
+            llm["ms"] += s.duration_ms
+            for key in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                llm[key] += int(s.attributes.get(f"llm.{key}", 0) or 0)
+        elif s.name.startswith("mongo."):
+            mongo["ops"] += 1
+            mongo["ms"] += s.duration_ms
+        else:
+            stage = stages.setdefault(s.name, {"count": 0, "ms": 0.0})
+            stage["count"] += 1
+            stage["ms"] += s.duration_ms
+    return {
+        "trace_id": trace.trace_id,
+        "name": root.name if root else "?",
+        "start_unix_ms": root.start_ns // 1_000_000 if root else None,
+        "duration_ms": round(root.duration_ms, 1) if root else 0.0,
+        "status": "error" if root and root.status == STATUS_ERROR else "ok",
+        "error": root.status_message if root and root.status_message else None,
+        "span_count": len(trace.spans),
+        "dropped_spans": trace.dropped_spans,
+        "stages": {
+            name: {"count": stage["count"], "ms": round(stage["ms"], 1)}
+            for name, stage in sorted(stages.items(), key=lambda item: -item[1]["ms"])
+        },
+        "llm": {**llm, "ms": round(llm["ms"], 1)},
+        "mongo": {**mongo, "ms": round(mongo["ms"], 1)},
+    }
+
+
+def get_recent_traces(limit: int = 10, name: Optional[str] = None, slowest: bool = True) -> List[Dict[str, Any]]:
+    """Summaries of buffered traces, slowest (or newest) first"""
+    traces = [t for t in _traces if name is None or (_root(t) and _root(t).name == name)]
+    if slowest:
+        traces.sort(key=lambda t: -(_root(t).duration_ms if _root(t) else 0.0))
+    else:
+        traces.reverse()
+    return [summarize_trace(t) for t in traces[:limit]]
+
+
+def get_trace(trace_id: str) -> Optional[Dict[str, Any]]:
+    """A buffered trace as OTLP/JSON"""
+    for trace in _traces:
+        if trace.trace_id == trace_id:
+            return to_otlp(trace)
+    return None
+
+
+def get_tracing_stats() -> Dict[str, Any]:
+    return {
+        "enabled": TRACING_ENABLED,
+        "buffered_traces": len(_traces),
+        "buffer_size": _traces.maxlen,
+        "export_file": TRACE_EXPORT_FILE or None,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# MONGO INSTRUMENTATION
+# ═══════════════════════════════════════════════════════════════════════
+
+_COLLECTION_OPS = frozenset({
+    "find_one", "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "find_one_and_update", "find_one_and_replace",
+    "find_one_and_delete", "count_documents", "bulk_write", "create_index",
+    "create_indexes", "distinct",
+})
+_CURSOR_OPS = frozenset({"find", "aggregate"})
+_CURSOR_CHAIN = frozenset({"sort", "limit", "skip", "batch_size", "hint"})
+
+
+class TracedCursor:
+    """Cursor wrapper: one span per to_list() or full async iteration"""
+
+    def __init__(self, cursor, collection: str, op: str):
+        self._cursor = cursor
+        self._collection = collection
+        self._op = op
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._cursor, name)
+        if name in _CURSOR_CHAIN:
+            @functools.wraps(attr)
+            def chained(*args, **kwargs):
+                return TracedCursor(attr(*args, **kwargs), self._collection, self._op)
+            return chained
+        return attr
+
+    async def to_list(self, *args, **kwargs):
+        with leaf_span(f"mongo.{self._op}", **{"db.system": "mongodb", "db.collection.name": self._collection}) as s:
+            result = await self._cursor.to_list(*args, **kwargs)
+            s.set_attribute("db.returned", len(result))
+            return result
+
+    async def __aiter__(self):
+        with leaf_span(f"mongo.{self._op}", **{"db.system": "mongodb", "db.collection.name": self._collection}) as s:
+            returned = 0
+            async for doc in self._cursor:
+                returned += 1
+                yield doc
+            s.set_attribute("db.returned", returned)
+
+
+class TracedCollection:
+    """Collection wrapper: one leaf span per operation"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._collection, name)
+        if name in _COLLECTION_OPS:
+            @functools.wraps(attr)
+            async def op(*args, **kwargs):
+                with leaf_span(f"mongo.{name}", **{"db.system": "mongodb", "db.collection.name": self._collection.name}):
+                    return await attr(*args, **kwargs)
+            return op
+        if name in _CURSOR_OPS:
+            @functools.wraps(attr)
+            def cursor(*args, **kwargs):
+                return TracedCursor(attr(*args, **kwargs), self._collection.name, name)
+            return cursor
+        return attr
+
+    def __getitem__(self, name: str):
+        return TracedCollection(self._collection[name])
+
+
+class TracedDatabase:
+    """
+    Motor database wrapper whose collections record a span per operation.
+    Everything else passes through unchanged.
+    """
+
+    def __init__(self, db):
+        self._db = db
+        self._collections: Dict[str, TracedCollection] = {}
+
+    def _collection(self, name: str) -> TracedCollection:
+        if name not in self._collections:
+            self._collections[name] = TracedCollection(self._db[name])
+        return self._collections[name]
+
+    def __getitem__(self, name: str) -> TracedCollection:
+        return self._collection(name)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self._db, name)
+        # Collections (Motor's are callable, so duck-type them)
+        if hasattr(attr, "find_one") and hasattr(attr, "insert_one"):
+            return self._collection(name)
+        return attr
+
+
+def traced_database(db):
+    """Wrap a Motor database for tracing (returns db as-is when disabled)"""
+    if db is None or not TRACING_ENABLED:
+        return db
+    return TracedDatabase(db)
@@ -0,0 +1,313 @@
+"""
+Work Queue - Durable post-response job queue backed by MongoDB.
+
+Bookkeeping that the player doesn't wait on (campaign log extraction, delta
+merging, knowledge facts) is persisted as a job document and processed by
+worker tasks inside the API process.
+
+- Durable: jobs live in the `work_jobs` collection, so a restart resumes them
+- Idempotent: each job has a unique idempotency key, e.g. per (campaign_id, action_id)
+- Retries: failed jobs are rescheduled with exponential backoff up to max_attempts
+- Back-pressure: workers pull from a bounded buffer; overflow stays in Mongo
+  and is picked up by the poller once workers catch up
+- Retention: done and failed jobs get a `finished_at` timestamp and a TTL
+  index removes them WORK_QUEUE_RETENTION_SECONDS later
+"""
+import os
+import uuid
+import random
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# ═══════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════
+
+WORK_QUEUE_COLLECTION = "work_jobs"
+WORK_QUEUE_WORKERS = int(os.getenv("WORK_QUEUE_WORKERS", "4"))
+WORK_QUEUE_BUFFER_SIZE = int(os.getenv("WORK_QUEUE_BUFFER_SIZE", "100"))
+WORK_QUEUE_MAX_ATTEMPTS = int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "5"))
+WORK_QUEUE_RETRY_BASE_SECONDS = float(os.getenv("WORK_QUEUE_RETRY_BASE_SECONDS", "2"))
+WORK_QUEUE_POLL_SECONDS = float(os.getenv("WORK_QUEUE_POLL_SECONDS", "5"))
+WORK_QUEUE_LEASE_SECONDS = float(os.getenv("WORK_QUEUE_LEASE_SECONDS", "300"))
+WORK_QUEUE_RETENTION_SECONDS = int(os.getenv("WORK_QUEUE_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+# Handlers are registered by the modules that own the work (see dungeon_forge)
+_handlers: Dict[str, JobHandler] = {}
+
+
+def register_handler(kind: str, handler: JobHandler) -> None:
+    """Register the coroutine that processes jobs of the given kind"""
+    _handlers[kind] = handler
+
+
+class WorkQueue:
+    """
+    Mongo-backed job queue with in-process workers.
+
+    Usage:
+        queue = init_work_queue(db)
+        await queue.start()
+        await queue.enqueue("campaign_log", payload, idempotency_key="campaign_log:abc:<action_id>")
+    """
+
+    def __init__(
+        self,
+        db,
+        workers: int = WORK_QUEUE_WORKERS,
+        buffer_size: int = WORK_QUEUE_BUFFER_SIZE,
+        max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS,
+        retry_base_seconds: float = WORK_QUEUE_RETRY_BASE_SECONDS,
+        poll_seconds: float = WORK_QUEUE_POLL_SECONDS,
+        lease_seconds: float = WORK_QUEUE_LEASE_SECONDS,
+        retention_seconds: int = WORK_QUEUE_RETENTION_SECONDS,
+    ):
+        self.collection = db[WORK_QUEUE_COLLECTION]
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+
+        self._buffer: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self._buffered: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    # ───────────────────────────────────────────────────────────────────
+    # Lifecycle
+    # ───────────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        """Create indexes and start the poller and worker tasks"""
+        if self._tasks:
+            return
+        await self.collection.create_index("idempotency_key", unique=True)
+        await self.collection.create_index([("status", 1), ("run_after", 1)])
+        # Pending and running jobs have no finished_at, so only finished ones expire
+        await self.collection.create_index("finished_at", expireAfterSeconds=self.retention_seconds)
+
+        self._tasks.append(asyncio.create_task(self._poll_loop(), name="work_queue.poller"))
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker_loop(i), name=f"work_queue.worker.{i}"))
+        logger.info(f"📬 Work queue started: {self.workers} workers, buffer={self._buffer.maxsize}")
+
+    async def stop(self) -> None:
+        """Stop workers; in-flight jobs are re-leased on next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        logger.info("📭 Work queue stopped")
+
+    # ───────────────────────────────────────────────────────────────────
+    # Producer
+    # ───────────────────────────────────────────────────────────────────
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any], idempotency_key: str) -> bool:
+        """
+        Persist a job and hand it to a worker.
+
+        Args:
+            kind: Registered handler name
+            payload: BSON-serializable job arguments
+            idempotency_key: Unique key; a second enqueue with the same key is ignored
+
+        Returns:
+            True if a new job was created, False if it was a duplicate
+        """
+        now = datetime.now(timezone.utc)
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "kind": kind,
+            "idempotency_key": idempotency_key,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "max_attempts": self.max_attempts,
+            "run_after": now,
+            "locked_until": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+        try:
+            await self.collection.insert_one(job)
+        except DuplicateKeyError:
+            logger.info(f"📬 Job already queued: {idempotency_key}")
+            return False
+
+        # Back-pressure: never block the response; overflow waits in Mongo
+        if not self._offer(job["job_id"]):
+            logger.warning(f"⚠️ Work queue buffer full, deferring {idempotency_key} to poller")
+        return True
+
+    def _offer(self, job_id: str) -> bool:
+        if job_id in self._buffered:
+            return True
+        try:
+            self._buffer.put_nowait(job_id)
+        except asyncio.QueueFull:
+            return False
+        self._buffered.add(job_id)
+        return True
+
+    async def stats(self) -> Dict[str, Any]:
+        """Job counts by status plus the in-memory buffer depth"""
+        counts = {}
+        async for row in self.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        return {"jobs": counts, "buffered": self._buffer.qsize(), "workers": self.workers}
+
+    # ───────────────────────────────────────────────────────────────────
+    # Poller / workers
+    # ───────────────────────────────────────────────────────────────────
+
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                await self._poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Work queue poll failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _poll_once(self) -> None:
+        """Recover expired leases and buffer due jobs, up to free capacity"""
+        now = datetime.now(timezone.utc)
+        await self.collection.update_many(
+            {"status": "running", "locked_until": {"$lt": now}},
+            {"$set": {"status": "pending", "locked_until": None, "updated_at": now}}
+        )
+
+        free = self._buffer.maxsize - self._buffer.qsize()
+        if free <= 0:
+            return
+
+        cursor = self.collection.find(
+            {"status": "pending", "run_after": {"$lte": now}},
+            {"job_id": 1}
+        ).sort("run_after", 1).limit(free)
+        async for job in cursor:
+            if not self._offer(job["job_id"]):
+                break
+
+    async def _worker_loop(self, worker_index: int) -> None:
+        while True:
+            job_id = await self._buffer.get()
+            self._buffered.discard(job_id)
+            try:
+                await self._process(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Work queue worker {worker_index} error on {job_id}: {e}", exc_info=True)
+            finally:
+                self._buffer.task_done()
+
+    async def _process(self, job_id: str) -> None:
+        now = datetime.now(timezone.utc)
+        job = await self.collection.find_one_and_update(
+            {"job_id": job_id, "status": "pending", "run_after": {"$lte": now}},
+            {
+                "$set": {
+                    "status": "running",
+                    "locked_until": now + timedelta(seconds=self.lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            return_document=ReturnDocument.AFTER
+        )
+        if job is None:
+            # Claimed by another worker, already done, or not due yet
+            return
+
+        handler = _handlers.get(job["kind"])
+        started = asyncio.get_running_loop().time()
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{job['kind']}'")
+            await handler(job["payload"])
+        except Exception as e:
+            await self._fail(job, e)
+            return
+
+        elapsed_ms = (asyncio.get_running_loop().time() - started) * 1000
+        finished = datetime.now(timezone.utc)
+        await self.collection.update_one(
+            {"job_id": job_id},
+            {"$set": {
+                "status": "done",
+                "locked_until": None,
+                "finished_at": finished,
+                "updated_at": finished,
+                "duration_ms": round(elapsed_ms, 1)
+            }}
+        )
+        logger.info(f"✅ Job [{job['kind']}] {job['idempotency_key']} done in {elapsed_ms:.0f}ms")
+
+    async def _fail(self, job: Dict[str, Any], error: Exception) -> None:
+        now = datetime.now(timezone.utc)
+        attempts = job["attempts"]
+
+        if attempts >= job.get("max_attempts", self.max_attempts):
+            update = {"status": "failed", "locked_until": None, "last_error": str(error), "finished_at": now, "updated_at": now}
+            logger.error(f"❌ Job [{job['kind']}] {job['idempotency_key']} failed permanently after {attempts} attempts: {error}")
+        else:
+            # Exponential backoff with jitter
+            delay = self.retry_base_seconds * (2 ** (attempts - 1))
+            delay += random.uniform(0, delay)
+            update = {
+                "status": "pending",
+                "locked_until": None,
+                "last_error": str(error),
+                "run_after": now + timedelta(seconds=delay),
+                "updated_at": now
+            }
+            logger.warning(f"⚠️ Job [{job['kind']}] {job['idempotency_key']} attempt {attempts} failed ({error}), retry in {delay:.1f}s")
+
+        await self.collection.update_one({"job_id": job["job_id"]}, {"$set": update})
+
+
+_queue: Optional[WorkQueue] = None
+
+
+def init_work_queue(db, **kwargs) -> WorkQueue:
+    """Create the process-wide work queue (call once at startup)"""
+    global _queue
+    _queue = WorkQueue(db, **kwargs)
+    return _queue
+
+
+def get_work_queue() -> Optional[WorkQueue]:
+    """The process-wide work queue, or None if it was never initialized"""
+    return _queue
+
+
+async def enqueue_job(kind: str, payload: Dict[str, Any], idempotency_key: str) -> bool:
+    """
+    Enqueue on the process-wide queue.
+
+    Raises:
+        RuntimeError: If init_work_queue() was never called
+    """
+    if _queue is None:
+        raise RuntimeError("Work queue not initialized")
+    return await _queue.enqueue(kind, payload, idempotency_key)
@@ -3,13 +3,15 @@ World generation service using WORLD-FORGE prompt.
 """
 import json
 import logging
-from .llm_client import get_openai_client
+from .llm_client import chat_completion
 from .prompts import WORLD_FORGE_SYSTEM_PROMPT
+from .tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
-def generate_world_blueprint(world_name: str, tone: str, starting_region_hint: str) -> dict:
+@traced("world_generation")
+async def generate_world_blueprint(world_name: str, tone: str, starting_region_hint: str) -> dict:
     """
     Generate a complete world blueprint JSON using WORLD-FORGE.
     
@@ -33,8 +35,7 @@ def generate_world_blueprint(world_name: str, tone: str, starting_region_hint: s
     logger.info(f"Generating world blueprint for: {world_name}")
     
     try:
-        client = get_openai_client()
-        completion = client.chat.completions.create(
+        completion = await chat_completion(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": WORLD_FORGE_SYSTEM_PROMPT},
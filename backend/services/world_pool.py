@@ -0,0 +1,471 @@
+"""
+World Pool - Pre-generated world blueprints and intros.
+
+World generation plus the intro are several sequential gpt-4o calls while the
+player watches a loader. The pool keeps WORLD_POOL_DEPTH ready worlds per
+bucket, where a bucket is a tone plus a character archetype
+(race/class/background). Each pooled world carries an intro written for a
+placeholder hero of that archetype.
+
+- Refill: a background loop tops every bucket up to depth, generating worlds
+  concurrently on a bounded worker pool (WORLD_POOL_WORKERS) and at most
+  WORLD_POOL_MAX_REFILLS_PER_CYCLE per cycle, so refills never crowd out
+  player-facing LLM calls
+- Claim: /world-blueprint/generate atomically takes (and deletes) the oldest
+  ready world for the bucket and renames it to the requested world name. The
+  fallback to another archetype of the same tone still has to match the
+  requested starting region hint; only requests without a hint take any world
+  of the tone. A miss generates as before
+- Personalize: /intro/generate and /characters/create adapt the pooled intro
+  to the real character with one cheap call when the archetype matches
+
+Pooled worlds live in the `world_pool` collection, so restarts keep the pool.
+Depth, refill rate and hit rate are reported at /api/debug/world_pool.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# ═══════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════
+
+WORLD_POOL_COLLECTION = "world_pool"
+WORLD_POOL_ENABLED = os.getenv("WORLD_POOL_ENABLED", "false").lower() == "true"
+WORLD_POOL_DEPTH = int(os.getenv("WORLD_POOL_DEPTH", "2"))
+WORLD_POOL_WORKERS = int(os.getenv("WORLD_POOL_WORKERS", "2"))
+WORLD_POOL_REFILL_SECONDS = float(os.getenv("WORLD_POOL_REFILL_SECONDS", "60"))
+WORLD_POOL_MAX_REFILLS_PER_CYCLE = int(os.getenv("WORLD_POOL_MAX_REFILLS_PER_CYCLE", "4"))
+WORLD_POOL_PERSONALIZE_MODEL = os.getenv("WORLD_POOL_PERSONALIZE_MODEL", "gpt-4o-mini")
+
+# Comma-separated; the default tone is the one the character-creation flow sends
+WORLD_POOL_TONES = [
+    tone.strip() for tone in os.getenv("WORLD_POOL_TONES", "Dark fantasy with rare magic").split(",") if tone.strip()
+]
+# Comma-separated Race/Class/Background triples
+WORLD_POOL_ARCHETYPES = [
+    entry.strip() for entry in os.getenv(
+        "WORLD_POOL_ARCHETYPES",
+        "Human/Fighter/Soldier,Elf/Wizard/Sage,Dwarf/Cleric/Acolyte,Halfling/Rogue/Criminal,Half-Orc/Barbarian/Outlander"
+    ).split(",") if entry.strip()
+]
+
+# Names the pooled content is written with, swapped for the real ones on claim
+PLACEHOLDER_WORLD_NAME = "Aerendal"
+PLACEHOLDER_HERO_NAME = "Arin Vale"
+PLACEHOLDER_GOAL = "Find their place in the world"
+
+PERSONALIZE_SYSTEM_PROMPT = f"""You adapt a finished D&D campaign intro to the player's character.
+The intro was written for a placeholder hero named {PLACEHOLDER_HERO_NAME} with the goal "{PLACEHOLDER_GOAL}".
+Replace the placeholder name with the character's name and, where the goal is mentioned or implied, use the character's goal instead.
+Keep everything else verbatim: second person, the same places, NPCs, factions, sentence count and ending question.
+Return only the intro text."""
+
+
+def archetype_key(race: Optional[str], char_class: Optional[str], background: Optional[str]) -> str:
+    """Normalized race|class|background"""
+    return "|".join((value or "").strip().lower() for value in (race, char_class, background))
+
+
+def character_archetype_key(character: Dict[str, Any]) -> str:
+    """Archetype key of a character dict (CharacterState or frontend shape)"""
+    return archetype_key(
+        character.get("race"),
+        character.get("class") or character.get("class_"),
+        character.get("background"),
+    )
+
+
+def tone_key(tone: Optional[str]) -> str:
+    return (tone or "").strip().lower()
+
+
+def region_hint(race: str, background: str) -> str:
+    """Starting region hint in the form the character-creation flow sends"""
+    return f"A {background} from {race} heritage begins their journey"
+
+
+def region_hint_key(hint: Optional[str]) -> str:
+    """Region hint normalized for matching pooled worlds ("" when there is no hint)"""
+    return " ".join((hint or "").lower().split())
+
+
+def rename_world(world_blueprint: Dict[str, Any], old_name: str, new_name: str) -> Dict[str, Any]:
+    """Copy of the blueprint with every occurrence of the world name replaced"""
+    if not new_name or new_name == old_name:
+        return json.loads(json.dumps(world_blueprint))
+    old, new = json.dumps(old_name)[1:-1], json.dumps(new_name)[1:-1]
+    return json.loads(json.dumps(world_blueprint).replace(old, new))
+
+
+def _parse_archetype(entry: str) -> Optional[Dict[str, str]]:
+    parts = [part.strip() for part in entry.split("/")]
+    if len(parts) != 3 or not all(parts):
+        logger.warning(f"⚠️ Ignoring world pool archetype '{entry}' (expected Race/Class/Background)")
+        return None
+    return {"race": parts[0], "class": parts[1], "background": parts[2]}
+
+
+class WorldPool:
+    """
+    Mongo-backed pool of ready worlds with an in-process refill loop.
+
+    Usage:
+        pool = init_world_pool(db)
+        await pool.start()
+        entry = await pool.claim(tone, archetype)
+    """
+
+    def __init__(
+        self,
+        db,
+        depth: int = WORLD_POOL_DEPTH,
+        workers: int = WORLD_POOL_WORKERS,
+        refill_seconds: float = WORLD_POOL_REFILL_SECONDS,
+        max_refills_per_cycle: int = WORLD_POOL_MAX_REFILLS_PER_CYCLE,
+        tones: Optional[List[str]] = None,
+        archetypes: Optional[List[str]] = None,
+    ):
+        self.collection = db[WORLD_POOL_COLLECTION]
+        self.depth = depth
+        self.workers = workers
+        self.refill_seconds = refill_seconds
+        self.max_refills_per_cycle = max_refills_per_cycle
+        self.tones = tones if tones is not None else WORLD_POOL_TONES
+        self.archetypes = [
+            archetype for archetype in map(_parse_archetype, archetypes if archetypes is not None else WORLD_POOL_ARCHETYPES)
+            if archetype
+        ]
+
+        self._semaphore = asyncio.Semaphore(workers)
+        self._in_flight: Dict[str, int] = {}
+        self._generations: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._started_at = time.monotonic()
+        self._stats: Dict[str, Any] = {
+            "claims": 0, "hits": 0, "archetype_hits": 0, "misses": 0,
+            "generated": 0, "generation_failures": 0, "generation_ms": 0.0,
+            "intro_personalized": 0, "intro_fallbacks": 0, "intro_misses": 0,
+        }
+
+    # ───────────────────────────────────────────────────────────────────
+    # Lifecycle
+    # ───────────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        """Create indexes and start the refill loop"""
+        if self._task:
+            return
+        await self.collection.create_index([("bucket", 1), ("status", 1), ("created_at", 1)])
+        await self.collection.create_index([("tone_key", 1), ("region_hint_key", 1), ("status", 1), ("created_at", 1)])
+        # Claims used to be kept with status "claimed"; they are deleted now
+        await self.collection.delete_many({"status": "claimed"})
+        self._started_at = time.monotonic()
+        self._task = asyncio.create_task(self._refill_loop(), name="world_pool.refill")
+        logger.info(
+            f"🌐 World pool started: {len(self.tones) * len(self.archetypes)} buckets × depth {self.depth}, "
+            f"{self.workers} workers"
+        )
+
+    async def stop(self) -> None:
+        """Stop refilling; in-flight generations are abandoned"""
+        tasks = [self._task, *self._generations] if self._task else list(self._generations)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._generations.clear()
+        logger.info("🌐 World pool stopped")
+
+    # ───────────────────────────────────────────────────────────────────
+    # Refill
+    # ───────────────────────────────────────────────────────────────────
+
+    def buckets(self) -> List[Dict[str, Any]]:
+        return [
+            {"tone": tone, "archetype": archetype, "bucket": f"{tone_key(tone)}::{character_archetype_key(archetype)}"}
+            for tone in self.tones
+            for archetype in self.archetypes
+        ]
+
+    async def refill_once(self) -> int:
+        """Schedule generations for buckets below depth; returns how many"""
+        scheduled = 0
+        for bucket in self.buckets():
+            ready = await self.collection.count_documents({"bucket": bucket["bucket"], "status": "ready"})
+            missing = self.depth - ready - self._in_flight.get(bucket["bucket"], 0)
+            for _ in range(max(0, missing)):
+                if scheduled >= self.max_refills_per_cycle:
+                    return scheduled
+                self._in_flight[bucket["bucket"]] = self._in_flight.get(bucket["bucket"], 0) + 1
+                task = asyncio.create_task(self._generate(bucket), name=f"world_pool.generate.{bucket['bucket']}")
+                self._generations.add(task)
+                task.add_done_callback(self._generations.discard)
+                scheduled += 1
+        return scheduled
+
+    async def _refill_loop(self) -> None:
+        while True:
+            try:
+                scheduled = await self.refill_once()
+                if scheduled:
+                    logger.info(f"🌐 World pool: scheduled {scheduled} generations")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ World pool refill failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refill_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _generate(self, bucket: Dict[str, Any]) -> None:
+        from services.world_forge_service import generate_world_blueprint
+        from services.intro_service import generate_intro_markdown
+
+        archetype = bucket["archetype"]
+        try:
+            async with self._semaphore:
+                started = time.perf_counter()
+                hint = region_hint(archetype["race"], archetype["background"])
+                blueprint = await generate_world_blueprint(
+                    world_name=PLACEHOLDER_WORLD_NAME,
+                    tone=bucket["tone"],
+                    starting_region_hint=hint
+                )
+                starting_town = blueprint.get("starting_town", {})
+                intro = await generate_intro_markdown(
+                    character={
+                        "name": PLACEHOLDER_HERO_NAME,
+                        "race": archetype["race"],
+                        "class": archetype["class"],
+                        "background": archetype["background"],
+                        "goal": PLACEHOLDER_GOAL,
+                    },
+                    region={
+                        "name": starting_town.get("name", "Unknown Region"),
+                        "summary": starting_town.get("summary", ""),
+                        "tone": blueprint.get("world_core", {}).get("tone", "balanced")
+                    },
+                    world_blueprint=blueprint
+                )
+                elapsed_ms = (time.perf_counter() - started) * 1000
+
+            await self.collection.insert_one({
+                "pool_id": str(uuid.uuid4()),
+                "bucket": bucket["bucket"],
+                "tone_key": tone_key(bucket["tone"]),
+                "region_hint_key": region_hint_key(hint),
+                "archetype": character_archetype_key(archetype),
+                "world_name": PLACEHOLDER_WORLD_NAME,
+                "world_blueprint": blueprint,
+                "intro": intro,
+                "status": "ready",
+                "created_at": datetime.now(timezone.utc),
+                "generation_ms": round(elapsed_ms, 1),
+            })
+            self._stats["generated"] += 1
+            self._stats["generation_ms"] += elapsed_ms
+            logger.info(f"🌐 Pooled world ready for {bucket['bucket']} ({elapsed_ms:.0f}ms)")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._stats["generation_failures"] += 1
+            logger.error(f"❌ World pool generation failed for {bucket['bucket']}: {e}")
+        finally:
+            self._in_flight[bucket["bucket"]] -= 1
+
+    # ───────────────────────────────────────────────────────────────────
+    # Claim
+    # ───────────────────────────────────────────────────────────────────
+
+    async def claim(
+        self,
+        tone: str,
+        archetype: Optional[Dict[str, Any]] = None,
+        campaign_id: Optional[str] = None,
+        starting_region_hint: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Claim the oldest ready world for the tone, preferring the archetype.
+        Other archetypes only qualify when they were generated for the same
+        starting region hint (or no hint was given).
+
+        Returns:
+            The pool document, now removed from the pool, or None on a miss
+        """
+        self._stats["claims"] += 1
+        fallback = {"tone_key": tone_key(tone), "status": "ready"}
+        if region_hint_key(starting_region_hint):
+            fallback["region_hint_key"] = region_hint_key(starting_region_hint)
+        filters = []
+        if archetype:
+            filters.append({**fallback, "bucket": f"{tone_key(tone)}::{character_archetype_key(archetype)}"})
+        filters.append(fallback)
+
+        for index, query in enumerate(filters):
+            entry = await self.collection.find_one_and_delete(query, sort=[("created_at", 1)])
+            if entry is not None:
+                logger.info(f"🌐 Claimed pooled world {entry['pool_id']} for campaign {campaign_id}")
+                self._stats["hits"] += 1
+                if archetype and index == 0:
+                    self._stats["archetype_hits"] += 1
+                # Top the bucket back up without waiting for the next cycle
+                self._wakeup.set()
+                return entry
+
+        self._stats["misses"] += 1
+        return None
+
+    def record_intro(self, outcome: str) -> None:
+        """Count a pooled intro use: personalized, fallback or miss"""
+        self._stats[f"intro_{outcome}"] += 1
+
+    # ───────────────────────────────────────────────────────────────────
+    # Metrics
+    # ───────────────────────────────────────────────────────────────────
+
+    async def stats(self) -> Dict[str, Any]:
+        """Depth per bucket, in-flight generations, refill rate and hit rate"""
+        depth = {bucket["bucket"]: 0 for bucket in self.buckets()}
+        async for row in self.collection.aggregate([
+            {"$match": {"status": "ready"}},
+            {"$group": {"_id": "$bucket", "count": {"$sum": 1}}}
+        ]):
+            depth[row["_id"]] = row["count"]
+
+        stats = self._stats
+        uptime_hours = max((time.monotonic() - self._started_at) / 3600, 1e-9)
+        return {
+            "enabled": self._task is not None,
+            "target_depth": self.depth,
+            "depth": depth,
+            "ready": sum(depth.values()),
+            "in_flight": sum(self._in_flight.values()),
+            "workers": self.workers,
+            "generated": stats["generated"],
+            "generation_failures": stats["generation_failures"],
+            "refills_per_hour": round(stats["generated"] / uptime_hours, 2),
+            "avg_generation_ms": round(stats["generation_ms"] / stats["generated"], 1) if stats["generated"] else 0.0,
+            "claims": stats["claims"],
+            "hits": stats["hits"],
+            "archetype_hits": stats["archetype_hits"],
+            "misses": stats["misses"],
+            "hit_rate": round(stats["hits"] / stats["claims"], 3) if stats["claims"] else 0.0,
+            "intros": {
+                "personalized": stats["intro_personalized"],
+                "fallbacks": stats["intro_fallbacks"],
+                "archetype_misses": stats["intro_misses"],
+            },
+        }
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# MODULE API
+# ═══════════════════════════════════════════════════════════════════════
+
+_pool: Optional[WorldPool] = None
+
+
+def init_world_pool(db, **kwargs) -> WorldPool:
+    """Create the process-wide world pool (call once at startup)"""
+    global _pool
+    _pool = WorldPool(db, **kwargs)
+    return _pool
+
+
+def get_world_pool() -> Optional[WorldPool]:
+    """The process-wide world pool, or None if it was never initialized"""
+    return _pool
+
+
+async def claim_pooled_world(
+    world_name: str,
+    tone: str,
+    archetype: Optional[Dict[str, Any]] = None,
+    campaign_id: Optional[str] = None,
+    starting_region_hint: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Claim a pooled world renamed to world_name.
+
+    Returns:
+        {"world_blueprint": {...}, "pooled_intro": {"archetype", "intro"}} or
+        None when the pool is off or has nothing for this tone
+    """
+    if _pool is None:
+        return None
+    try:
+        entry = await _pool.claim(tone, archetype, campaign_id, starting_region_hint)
+    except Exception as e:
+        logger.error(f"❌ World pool claim failed: {e}")
+        return None
+    if entry is None:
+        logger.info(f"🌐 World pool miss for tone '{tone}'")
+        return None
+
+    logger.info(f"🌐 World pool hit: {entry['bucket']} ({entry['pool_id']})")
+    return {
+        "world_blueprint": rename_world(entry["world_blueprint"], entry["world_name"], world_name),
+        "pooled_intro": {
+            "archetype": entry["archetype"],
+            "intro": rename_world({"intro": entry["intro"]}, entry["world_name"], world_name)["intro"],
+        },
+    }
+
+
+async def personalize_pooled_intro(
+    pooled_intro: Optional[Dict[str, Any]],
+    character: Dict[str, Any]
+) -> Optional[str]:
+    """
+    The pooled intro adapted to the character, or None if there is none for
+    this character's archetype (the caller generates one as before).
+    """
+    if not pooled_intro:
+        return None
+    if pooled_intro.get("archetype") != character_archetype_key(character):
+        if _pool:
+            _pool.record_intro("misses")
+        return None
+
+    from services.llm_client import chat_completion
+
+    try:
+        completion = await chat_completion(
+            model=WORLD_POOL_PERSONALIZE_MODEL,
+            messages=[
+                {"role": "system", "content": PERSONALIZE_SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps({
+                    "intro": pooled_intro["intro"],
+                    "character": {"name": character.get("name"), "goal": character.get("goal")},
+                })},
+            ],
+            temperature=0.3,
+        )
+        intro = completion.choices[0].message.content.strip()
+        if _pool:
+            _pool.record_intro("personalized")
+        return intro
+    except Exception as e:
+        # The pooled intro is still canon-consistent; only the name needs swapping
+        logger.warning(f"⚠️ Intro personalization failed, using name swap: {e}")
+        if _pool:
+            _pool.record_intro("fallbacks")
+        return pooled_intro["intro"].replace(PLACEHOLDER_HERO_NAME, character.get("name") or "you")
+
+
+async def get_world_pool_stats() -> Dict[str, Any]:
+    """Pool stats, or a disabled marker when the pool isn't running"""
+    if _pool is None:
+        return {"enabled": False}
+    return await _pool.stats()
@@ -1,9 +1,15 @@
 """
 Entity Mention Extraction Utility
-Simple deterministic substring matching for V1.
+Deterministic, case-insensitive name matching with a compiled trie: one
+linear scan of the narration finds every occurrence of every entity name at
+word boundaries.
+Matchers are cached per world blueprint; inventory and quest reward items live
+in a small second trie that is rebuilt only when those items change.
 Can be upgraded to LLM-based detection later without changing the API shape.
 """
-from typing import List, Dict, Literal, TypedDict
+import re
+from collections import OrderedDict
+from typing import List, Dict, Literal, Optional, Tuple, TypedDict, Union
 
 
 EntityType = Literal["npc", "location", "faction", "item"]
@@ -92,26 +98,7 @@ def build_entity_index_from_world_blueprint(
     
     # Extract quest items from world state (if available)
     if world_state:
-        if "inventory" in world_state:
-            for item in world_state.get("inventory", []):
-                if isinstance(item, dict) and "name" in item:
-                    index.append({
-                        "entity_type": "item",
-                        "entity_id": item.get("id", f"item_{item['name'].lower().replace(' ', '_')}"),
-                        "name": item["name"]
-                    })
-        
-        # Quest items from quests
-        if "quests" in world_state:
-            for quest in world_state.get("quests", []):
-                if "rewards" in quest:
-                    for reward in quest.get("rewards", []):
-                        if isinstance(reward, dict) and "name" in reward:
-                            index.append({
-                                "entity_type": "item",
-                                "entity_id": reward.get("id", f"item_{reward['name'].lower().replace(' ', '_')}"),
-                                "name": reward["name"]
-                            })
+        index.extend(build_item_entries(world_state))
     
     # Sort by descending name length to avoid short-name collisions
     # (e.g., match "Thieves Haven" before "Haven")
@@ -120,47 +107,133 @@ def build_entity_index_from_world_blueprint(
     return index
 
 
-def extract_entity_mentions(
-    narration: str,
-    entity_index: List[EntityIndexEntry],
-) -> List[EntityMention]:
-    """
-    Simple substring-based mention extractor.
-    - Case-insensitive search
-    - Returns non-overlapping mentions (longest names win)
-    - V1: Deterministic, no LLM needed
-    - V2: Can upgrade to LLM-based detection without changing API shape
-    """
-    mentions: List[EntityMention] = []
-    used_ranges: List[range] = []
+def build_item_entries(world_state: Dict) -> List[EntityIndexEntry]:
+    """Inventory and quest reward items from world state"""
+    index: List[EntityIndexEntry] = []
+    if "inventory" in world_state:
+        for item in world_state.get("inventory", []):
+            if isinstance(item, dict) and "name" in item:
+                index.append({
+                    "entity_type": "item",
+                    "entity_id": item.get("id", f"item_{item['name'].lower().replace(' ', '_')}"),
+                    "name": item["name"]
+                })
+    
+    # Quest items from quests
+    if "quests" in world_state:
+        for quest in world_state.get("quests", []):
+            if "rewards" in quest:
+                for reward in quest.get("rewards", []):
+                    if isinstance(reward, dict) and "name" in reward:
+                        index.append({
+                            "entity_type": "item",
+                            "entity_id": reward.get("id", f"item_{reward['name'].lower().replace(' ', '_')}"),
+                            "name": reward["name"]
+                        })
     
-    lower_text = narration.lower()
+    return index
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class EntityMatcher:
+    """
+    Compiled trie over lowercased entity names.
     
-    def overlaps(start: int, end: int) -> bool:
-        """Check if this range overlaps with any already-used range"""
-        for r in used_ranges:
-            if not (end <= r.start or start >= r.stop):
-                return True
-        return False
+    Matches can only start at a word boundary, so a precompiled regex (one
+    C-level pass) yields the candidate start positions whose character can
+    begin a name, and the trie is walked from each of them. Each walk is
+    bounded by the longest name, so cost grows with the text, not with the
+    number of names indexed.
+    """
     
-    for entry in entity_index:
-        name = entry["name"]
-        name_lower = name.lower()
+    def __init__(self, entity_index: List[EntityIndexEntry]):
+        self._goto: List[Dict[str, int]] = [{}]
+        # State -> (entry, length in the lowercased text) for complete names
+        self._terminal: Dict[int, Tuple[EntityIndexEntry, int]] = {}
         
-        # Find first occurrence
-        pos = lower_text.find(name_lower)
-        if pos == -1:
-            continue
+        for entry in entity_index:
+            name_lower = entry["name"].lower()
+            if not name_lower:
+                continue
+            state = 0
+            for char in name_lower:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                state = nxt
+            # Same name twice: the earlier entry wins, as with the index order
+            self._terminal.setdefault(state, (entry, len(name_lower)))
         
-        start = pos
-        end = pos + len(name)
+        self._starts = self._compile_starts()
+    
+    def _compile_starts(self) -> Optional["re.Pattern"]:
+        """
+        Regex for candidate start positions: a character that can begin a
+        name (after a word boundary when it is a word character), followed
+        by one that can continue some name
+        """
+        root = self._goto[0]
+        if not root:
+            return None
+        seconds = set()
+        for state in root.values():
+            seconds.update(self._goto[state])
+        follow = f"(?=[{re.escape(''.join(sorted(seconds)))}]|\\W|$)" if seconds else ""
         
-        if overlaps(start, end):
-            # Already covered by another (longer) mention
+        word_starts = "".join(sorted(c for c in root if _is_word_char(c)))
+        other_starts = "".join(sorted(c for c in root if not _is_word_char(c)))
+        alternatives = []
+        if word_starts:
+            alternatives.append(f"(?<!\\w)[{re.escape(word_starts)}]")
+        if other_starts:
+            alternatives.append(f"[{re.escape(other_starts)}]")
+        return re.compile(f"(?:{'|'.join(alternatives)}){follow}")
+    
+    def __len__(self) -> int:
+        return len(self._terminal)
+    
+    def find_all(self, lower_text: str) -> List[Tuple[int, int, EntityIndexEntry]]:
+        """Every word-bounded occurrence as (start, end, entry)"""
+        if self._starts is None:
+            return []
+        goto, terminal = self._goto, self._terminal
+        text_len = len(lower_text)
+        found = []
+        for match in self._starts.finditer(lower_text):
+            start = match.start()
+            state = 0
+            for pos in range(start, text_len):
+                state = goto[state].get(lower_text[pos])
+                if state is None:
+                    break
+                hit = terminal.get(state)
+                if hit is None:
+                    continue
+                end = pos + 1
+                # Right boundary, only where the name itself ends with a word char
+                if end < text_len and _is_word_char(lower_text[pos]) and _is_word_char(lower_text[end]):
+                    continue
+                found.append((start, end, hit[0]))
+        return found
+
+
+def _resolve_overlaps(
+    narration: str,
+    matches: List[Tuple[int, int, EntityIndexEntry]]
+) -> List[EntityMention]:
+    """Keep non-overlapping matches, longest names first (leftmost on ties)"""
+    matches.sort(key=lambda m: (m[0] - m[1], m[0]))
+    covered = bytearray(len(narration) + 1)
+    mentions: List[EntityMention] = []
+    for start, end, entry in matches:
+        if any(covered[start:end]):
             continue
-        
-        used_ranges.append(range(start, end))
-        
+        covered[start:end] = b"\x01" * (end - start)
         mentions.append({
             "entity_type": entry["entity_type"],
             "entity_id": entry["entity_id"],
@@ -168,12 +241,74 @@ def extract_entity_mentions(
             "start": start,
             "end": end,
         })
-    
     # Sort by start index for frontend convenience
     mentions.sort(key=lambda m: m["start"])
     return mentions
 
 
+class CampaignEntityMatcher:
+    """Blueprint trie plus a small trie for world-state items"""
+    
+    def __init__(self, world_blueprint: Dict):
+        self.world_blueprint = world_blueprint
+        self.static = EntityMatcher(build_entity_index_from_world_blueprint(world_blueprint))
+        self.items = EntityMatcher([])
+        self._items_key: Tuple = ()
+    
+    def refresh_items(self, world_state: Optional[Dict]) -> None:
+        """Rebuild the item trie only if inventory / quest rewards changed"""
+        entries = build_item_entries(world_state) if world_state else []
+        entries.sort(key=lambda e: len(e["name"]), reverse=True)
+        items_key = tuple((e["entity_id"], e["name"]) for e in entries)
+        if items_key != self._items_key:
+            self.items = EntityMatcher(entries)
+            self._items_key = items_key
+    
+    def find_all(self, lower_text: str) -> List[Tuple[int, int, EntityIndexEntry]]:
+        return self.static.find_all(lower_text) + self.items.find_all(lower_text)
+
+
+# Matchers keyed by blueprint identity. Blueprints are immutable after
+# generation and shared by the campaign cache, so the same object comes back
+# every turn; the entry keeps a reference so the id can't be reused.
+ENTITY_MATCHER_CACHE_SIZE = 64
+_matchers: "OrderedDict[int, CampaignEntityMatcher]" = OrderedDict()
+
+
+def get_entity_matcher(world_blueprint: Dict, world_state: Dict = None) -> CampaignEntityMatcher:
+    """
+    Compiled matcher for a world blueprint (+ items from world_state).
+    Drop-in replacement for build_entity_index_from_world_blueprint when
+    the result is only passed to extract_entity_mentions.
+    """
+    key = id(world_blueprint)
+    matcher = _matchers.get(key)
+    if matcher is None or matcher.world_blueprint is not world_blueprint:
+        matcher = CampaignEntityMatcher(world_blueprint)
+        _matchers[key] = matcher
+        while len(_matchers) > ENTITY_MATCHER_CACHE_SIZE:
+            _matchers.popitem(last=False)
+    _matchers.move_to_end(key)
+    matcher.refresh_items(world_state)
+    return matcher
+
+
+def extract_entity_mentions(
+    narration: str,
+    entity_index: Union[List[EntityIndexEntry], EntityMatcher, CampaignEntityMatcher],
+) -> List[EntityMention]:
+    """
+    Deterministic mention extractor.
+    - Case-insensitive, word-bounded matches
+    - Reports every occurrence; overlaps resolve to the longest name
+    - Accepts a compiled matcher (get_entity_matcher) or a plain entity index
+    - V2: Can upgrade to LLM-based detection without changing API shape
+    """
+    if isinstance(entity_index, list):
+        entity_index = EntityMatcher(entity_index)
+    return _resolve_overlaps(narration, entity_index.find_all(narration.lower()))
+
+
 def should_create_knowledge_fact(
     entity_type: str,
     entity_id: str,
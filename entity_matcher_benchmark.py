@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: compiled entity matcher vs the original per-entity find() loop.
+
+Generates worlds of increasing size and times mention extraction on a
+narration-sized text. The legacy implementation is reproduced here verbatim
+(first occurrence per entity, range-list overlap check) as the baseline.
+
+Usage: python entity_matcher_benchmark.py [--runs N]
+"""
+import sys
+import random
+import argparse
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from utils.entity_mentions import (
+    build_entity_index_from_world_blueprint,
+    extract_entity_mentions,
+    get_entity_matcher,
+)
+
+SYLLABLES = ["val", "dra", "th", "mor", "ka", "len", "ris", "gor", "eth", "ul", "vin", "sha", "dor", "ne", "ar"]
+WORDS = "the a old rain over market guard watches you from shadow gate lantern smoke coin whisper road".split()
+
+
+def legacy_extract_entity_mentions(narration, entity_index):
+    mentions = []
+    used_ranges = []
+    lower_text = narration.lower()
+
+    def overlaps(start, end):
+        for r in used_ranges:
+            if not (end <= r.start or start >= r.stop):
+                return True
+        return False
+
+    for entry in entity_index:
+        name = entry["name"]
+        pos = lower_text.find(name.lower())
+        if pos == -1:
+            continue
+        start, end = pos, pos + len(name)
+        if overlaps(start, end):
+            continue
+        used_ranges.append(range(start, end))
+        mentions.append({
+            "entity_type": entry["entity_type"],
+            "entity_id": entry["entity_id"],
+            "display_text": narration[start:end],
+            "start": start,
+            "end": end,
+        })
+    mentions.sort(key=lambda m: m["start"])
+    return mentions
+
+
+def make_name(rng):
+    words = rng.choice([1, 1, 2, 3])
+    return " ".join(
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+        for _ in range(words)
+    )
+
+
+def make_world(rng, size):
+    names = set()
+    while len(names) < size:
+        names.add(make_name(rng))
+    names = list(names)
+    quarter = size // 4
+    return {
+        "npcs": [{"name": n, "id": f"npc_{i}"} for i, n in enumerate(names[:quarter])],
+        "starting_town": {"name": names[quarter]},
+        "regions": [{"name": names[quarter + 1], "locations": names[quarter + 2:2 * quarter]}],
+        "factions": [{"name": n} for n in names[2 * quarter:]],
+    }, names
+
+
+def make_narration(rng, names, words=400, mentions=25):
+    text = [rng.choice(WORDS) for _ in range(words)]
+    for _ in range(mentions):
+        text[rng.randrange(words)] = rng.choice(names)
+    return " ".join(text) + "."
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print("=" * 78)
+    print("Entity mention extraction benchmark (ms per narration)")
+    print("=" * 78)
+    print(f"{'entities':>9} | {'legacy index+scan':>17} | {'matcher build':>13} | {'matcher scan':>12} | {'speedup':>7}")
+    print("-" * 78)
+
+    for size in (50, 200, 1000, 5000):
+        world, names = make_world(rng, size)
+        narration = make_narration(rng, names)
+
+        def legacy():
+            # The old code rebuilt the index every action
+            index = build_entity_index_from_world_blueprint(world)
+            legacy_extract_entity_mentions(narration, index)
+
+        def build():
+            get_entity_matcher(dict(world))
+
+        matcher = get_entity_matcher(world)
+
+        def scan():
+            extract_entity_mentions(narration, matcher)
+
+        legacy_ms = timeit.timeit(legacy, number=args.runs) / args.runs * 1000
+        build_ms = timeit.timeit(build, number=max(1, args.runs // 10)) / max(1, args.runs // 10) * 1000
+        scan_ms = timeit.timeit(scan, number=args.runs) / args.runs * 1000
+
+        found = {m["entity_id"] for m in extract_entity_mentions(narration, matcher)}
+        legacy_found = {m["entity_id"] for m in legacy_extract_entity_mentions(narration, build_entity_index_from_world_blueprint(world))}
+        note = "" if legacy_found <= found else f"  (legacy-only: {len(legacy_found - found)})"
+
+        print(f"{size:>9} | {legacy_ms:>17.3f} | {build_ms:>13.3f} | {scan_ms:>12.3f} | {legacy_ms / scan_ms:>6.1f}x{note}")
+
+    print("-" * 78)
+    print("Matcher build runs once per blueprint; scans run every action.")
+
+
+if __name__ == "__main__":
+    main()
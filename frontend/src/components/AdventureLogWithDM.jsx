@@ -519,11 +519,14 @@ const AdventureLogWithDM = forwardRef(({ onLoadingChange, ...props }, ref) => {
 
   // buildActionPayload is now provided by GameStateContext
 
-  const sendPlayerMessage = async (playerMessage, messageType = null, checkResult = null) => {
+  const sendPlayerMessage = async (playerMessage, messageType = null, checkResult = null, actionId = null) => {
     if (!playerMessage.trim() || !sessionId) return;
 
     const actualType = messageType || intentMode || 'action';
 
+    // DUNGEON FORGE: Use buildActionPayload from context (retries pass the original action_id)
+    const actionPayload = buildActionPayload(playerMessage, checkResult, null, actionId);
+
     // Add player message to log with intent
     const msgId = `msg-${Date.now()}-${Math.random().toString(36).substr(2, 9)}`;
     const playerMsg = {
@@ -531,13 +534,12 @@ const AdventureLogWithDM = forwardRef(({ onLoadingChange, ...props }, ref) => {
       type: 'player',
       text: playerMessage,
       messageType: actualType,
+      checkResult,
+      actionId: actionPayload?.action_id,
       timestamp: Date.now()
     };
     setMessages(prev => [...prev, playerMsg]);
     setCurrentOptions([]);
-
-    // DUNGEON FORGE: Use buildActionPayload from context
-    const actionPayload = buildActionPayload(playerMessage, checkResult);
     
     if (!actionPayload) {
       console.error('❌ Cannot send action: missing campaign_id or character_id');
@@ -620,7 +622,8 @@ const AdventureLogWithDM = forwardRef(({ onLoadingChange, ...props }, ref) => {
     const allMsgs = messages.slice(0, messageIndex);
     const lastPlayerMsg = allMsgs.reverse().find(m => m.type === 'player');
     if (lastPlayerMsg) {
-      sendPlayerMessage(lastPlayerMsg.text);
+      // Same action_id: the backend won't queue the action's jobs a second time
+      sendPlayerMessage(lastPlayerMsg.text, lastPlayerMsg.messageType, lastPlayerMsg.checkResult, lastPlayerMsg.actionId);
     }
   };
 
@@ -433,7 +433,12 @@ const RPGGame = () => {
       const worldPayload = {
         world_name: newCharacter.aspiration?.goal || 'The Realm of Adventure',
         tone: 'Dark fantasy with rare magic',
-        starting_region_hint: `A ${newCharacter.background} from ${newCharacter.race} heritage begins their journey`
+        starting_region_hint: `A ${newCharacter.background} from ${newCharacter.race} heritage begins their journey`,
+        archetype: {
+          race: newCharacter.race,
+          class: newCharacter.class,
+          background: newCharacter.background
+        }
       };
       console.log('🌍 [FLOW] World payload:', worldPayload);
       
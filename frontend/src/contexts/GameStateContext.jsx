@@ -336,8 +336,15 @@ export const GameStateProvider = ({ children }) => {
     };
   };
 
+  // Id for one player action; resend it on retries so the backend queues the action's jobs once
+  const newActionId = () => (
+    window.crypto?.randomUUID
+      ? window.crypto.randomUUID()
+      : `act-${Date.now()}-${Math.random().toString(36).substr(2, 9)}`
+  );
+
   // NEW: Build action payload for DUNGEON FORGE /api/rpg_dm/action
-  const buildActionPayload = (playerAction, checkResult = null, clientTargetId = null) => {
+  const buildActionPayload = (playerAction, checkResult = null, clientTargetId = null, actionId = null) => {
     if (!campaignId) {
       console.error('❌ Cannot build action payload: no campaign_id');
       return null;
@@ -351,7 +358,8 @@ export const GameStateProvider = ({ children }) => {
       campaign_id: campaignId,
       character_id: characterState.id,
       player_action: playerAction,
-      check_result: checkResult
+      check_result: checkResult,
+      action_id: actionId || newActionId()
     };
     
     // Phase 1: Add client_target_id if provided
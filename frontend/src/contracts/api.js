@@ -118,6 +118,7 @@ export interface WorldBlueprintRequest {
   tone: string;
   starting_region_hint: string;
   campaign_id?: string;
+  archetype?: { race: string; class: string; background: string };
 }
 
 export interface CharacterCreateRequest {
@@ -137,6 +138,7 @@ export interface ActionRequest {
   character_id: string;
   action: string;
   check_result?: number;
+  action_id?: string; // generated per action, reused when the action is retried
 }
 
 // ============================================================================
@@ -0,0 +1,11 @@
+"""
+Offline load-testing harness for the DUNGEON FORGE action endpoint.
+
+- fake_llm:       deterministic OpenAI-compatible server with canned agent JSON
+- memory_mongo:   in-memory Motor stand-in
+- sessions/:      recorded player-session scripts
+- load_generator: drives /api/rpg_dm/action with N concurrent players and
+                  reports latency percentiles, throughput and event-loop lag
+
+Usage: python -m loadtest.load_generator --players 20 --think-scale 0.1
+"""
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Deterministic fake of the OpenAI chat completions API for load tests.
+
+Serves POST /v1/chat/completions (plain and SSE streaming) with canned JSON
+for each agent the action path calls, picked by inspecting the prompt:
+
+- INTENT TAGGER       -> intent flags (gpt-4o-mini)
+- DUNGEON FORGE       -> narration JSON with an occasional requested_check
+- CONSISTENCY AGENT   -> approve, no issues
+- CAMPAIGN LOG        -> a location delta for the current location
+- anything else       -> "{}" for JSON prompts, a short paragraph otherwise
+
+Latency is sampled per model from a configurable distribution. Each call's
+sample is seeded by (seed, prompt digest, occurrence), so a replay sees the
+same latencies no matter how concurrent requests interleave.
+
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:8011/v1 and any
+OPENAI_API_KEY that does not start with "sk-emergent-".
+
+Usage:
+    python -m loadtest.fake_llm --port 8011 \
+        --latency gpt-4o=lognormal:1800,0.35 --latency gpt-4o-mini=lognormal:450,0.3
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Model -> latency spec; "*" applies to models not listed
+DEFAULT_LATENCY = {
+    "gpt-4o": "lognormal:1800,0.35",
+    "gpt-4o-mini": "lognormal:450,0.3",
+    "*": "lognormal:900,0.35",
+}
+
+# Share of a streamed completion's latency spent before the first token
+STREAM_TTFT_FRACTION = 0.3
+STREAM_CHUNK_CHARS = 24
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# LATENCY MODEL
+# ═══════════════════════════════════════════════════════════════════════
+
+class LatencyModel:
+    """
+    Latency distribution in milliseconds, parsed from a spec string:
+
+        fixed:800            always 800ms
+        uniform:300,1200     uniform between 300ms and 1200ms
+        lognormal:900,0.4    lognormal with median 900ms and sigma 0.4
+    """
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v]
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(values) != expected[kind]:
+            raise ValueError(f"Bad latency spec '{spec}' (use fixed:MS, uniform:LO,HI or lognormal:MEDIAN,SIGMA)")
+        self.kind = kind
+        self.values = values
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.values[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.values)
+        median, sigma = self.values
+        return rng.lognormvariate(math.log(median), sigma)
+
+
+def parse_latency_args(specs: List[str]) -> Dict[str, LatencyModel]:
+    """
+    ["uniform:100,200", "gpt-4o=fixed:900"] -> {model: LatencyModel}.
+    A bare spec replaces every model's distribution; MODEL=spec overrides one.
+    """
+    latency = {model: LatencyModel(spec) for model, spec in DEFAULT_LATENCY.items()}
+    for spec in specs or []:
+        model, _, value = spec.rpartition("=")
+        if model:
+            latency[model] = LatencyModel(value)
+        else:
+            latency = {name: LatencyModel(value) for name in latency}
+    return latency
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# CANNED RESPONSES
+# ═══════════════════════════════════════════════════════════════════════
+
+_SKILLS = [
+    ("sneak|hide|stealth|creep|shadow", "DEX", "Stealth", "stealth"),
+    ("persuade|convince|bargain|negotiate|haggle", "CHA", "Persuasion", "social"),
+    ("lie|bluff|deceive", "CHA", "Deception", "social"),
+    ("threaten|intimidate", "CHA", "Intimidation", "social"),
+    ("search|examine|inspect|investigate|study", "INT", "Investigation", "investigation"),
+    ("listen|watch|look|scan|notice", "WIS", "Perception", "exploration"),
+    ("climb|jump|swim|force|push", "STR", "Athletics", "movement"),
+    ("pick|steal|pocket|lockpick", "DEX", "Sleight of Hand", "stealth"),
+    ("read|sense|motive|trust", "WIS", "Insight", "social"),
+]
+
+_SENTENCES = [
+    "Lantern light pools across the wet cobbles of {location}, and the air smells of smoke and rain.",
+    "A cart rattles past, its driver hunched against the wind, never meeting your eyes.",
+    "Somewhere nearby a door bangs shut and muffled voices fall silent.",
+    "The crowd parts around you, curious glances lingering a heartbeat too long.",
+    "Old banners hang limp from the eaves, their colors faded to the grey of the sky.",
+    "A dog barks twice in the distance, then thinks better of it.",
+    "You catch the scrape of boots on stone from the alley to your left.",
+    "Water drips steadily from a broken gutter, counting out the seconds.",
+]
+
+
+def _player_action(text: str) -> str:
+    match = re.search(r'Player action: "(.*?)"', text, re.S)
+    return match.group(1) if match else ""
+
+
+def _field(text: str, label: str, default: str) -> str:
+    match = re.search(rf"^\s*{label}:\s*(.+)$", text, re.M)
+    return match.group(1).strip() if match else default
+
+
+def _intent(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    action = _player_action(prompt).lower()
+    for pattern, ability, skill, action_type in _SKILLS:
+        if re.search(pattern, action):
+            return {"needs_check": True, "ability": ability, "skill": skill,
+                    "action_type": action_type, "risk_level": rng.randint(1, 2)}
+    return {"needs_check": False, "ability": None, "skill": None,
+            "action_type": "exploration", "risk_level": rng.randint(0, 1)}
+
+
+def _dungeon_forge(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    # Per-turn context follows the static rules; only read labels from there
+    context = prompt.split("INJECTED CONTEXT FOR THIS REQUEST", 1)[-1]
+    location = _field(context, "Location", "the town")
+    mode_match = re.search(r"Current Scene Mode\n```\n(\w+)", context)
+    mode = mode_match.group(1) if mode_match else "exploration"
+    sentences = rng.sample(_SENTENCES, k=rng.randint(5, 7))
+    narration = " ".join(s.format(location=location) for s in sentences) + " What do you do?"
+    requested_check = None
+    intent = _intent(rng, prompt)
+    if intent["needs_check"] and "No check result yet" in context and rng.random() < 0.5:
+        requested_check = {"ability": intent["ability"], "skill": intent["skill"],
+                           "reason": f"Attempting to {_player_action(prompt)[:60]}"}
+    return {
+        "narration": narration,
+        "requested_check": requested_check,
+        "entities": [],
+        "scene_mode": mode if mode in ("exploration", "social", "travel", "rest") else "exploration",
+        "world_state_update": {},
+        "player_updates": {},
+    }
+
+
+def _consistency(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    return {
+        "decision": "approve",
+        "issues": [],
+        "corrected_narration": None,
+        "narration_changes_summary": [],
+        "world_state_delta": {"npc_updates": [], "quest_updates": [], "story_thread_updates": [],
+                              "flags": {"global_threat_progress": "none"}},
+        "story_state_delta": {"new_hooks": [], "closed_hooks": []},
+    }
+
+
+def _campaign_log(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    location = _field(prompt, "CURRENT LOCATION", "Unknown")
+    if location == "Unknown":
+        return {"locations": [], "npcs": [], "quests": []}
+    location_id = re.sub(r"[^a-z0-9]+", "_", location.lower()).strip("_")
+    return {"locations": [{"id": location_id, "name": location}], "npcs": [], "quests": []}
+
+
+# (name, matcher over system+user text, response builder); first match wins
+Route = Tuple[str, Callable[[str], bool], Callable[[random.Random, str], Any]]
+ROUTES: List[Route] = [
+    ("intent_tagger", lambda text: "INTENT TAGGER" in text, _intent),
+    ("consistency_agent", lambda text: "STORY CONSISTENCY LAYER AGENT" in text, _consistency),
+    ("campaign_log", lambda text: "Campaign Log Extractor" in text, _campaign_log),
+    ("dungeon_forge", lambda text: "DUNGEON MASTER AGENT" in text, _dungeon_forge),
+]
+
+
+def canned_response(rng: random.Random, messages: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """Returns (route name, completion text)"""
+    text = "\n".join(str(m.get("content", "")) for m in messages)
+    for name, matcher, build in ROUTES:
+        if matcher(text):
+            return name, json.dumps(build(rng, text))
+    if "json" in text.lower():
+        return "default_json", "{}"
+    return "default_text", "The road bends ahead, quiet under a pale sky. What do you do?"
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# SERVER
+# ═══════════════════════════════════════════════════════════════════════
+
+def _usage(messages: List[Dict[str, Any]], completion: str) -> Dict[str, Any]:
+    # ~4 chars per token; the system prompt counts as a warm prefix-cache hit
+    prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+    system_tokens = sum(len(str(m.get("content", ""))) for m in messages if m.get("role") == "system") // 4
+    cached = (system_tokens // 128) * 128 if system_tokens >= 1024 else 0
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(completion) // 4,
+        "total_tokens": prompt_tokens + len(completion) // 4,
+        "prompt_tokens_details": {"cached_tokens": cached},
+    }
+
+
+def create_app(latency: Optional[Dict[str, LatencyModel]] = None, seed: int = 0) -> FastAPI:
+    """Build the fake server; GET /stats reports calls per route and model"""
+    latency = latency or parse_latency_args([])
+    app = FastAPI(title="Fake LLM")
+    occurrences: Counter = Counter()
+    stats = {"calls": Counter(), "models": Counter(), "streams": 0, "latency_ms_total": 0.0}
+
+    def _rng(model: str, messages: List[Dict[str, Any]]) -> random.Random:
+        digest = hashlib.sha1(json.dumps([model, messages], sort_keys=True).encode()).hexdigest()
+        occurrences[digest] += 1
+        return random.Random(f"{seed}:{digest}:{occurrences[digest]}")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "gpt-4o")
+        messages = body.get("messages", [])
+        rng = _rng(model, messages)
+        delay_ms = (latency.get(model) or latency["*"]).sample(rng)
+        route, content = canned_response(rng, messages)
+
+        stats["calls"][route] += 1
+        stats["models"][model] += 1
+        stats["latency_ms_total"] += delay_ms
+        completion_id = f"chatcmpl-{uuid.UUID(int=rng.getrandbits(128)).hex}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay_ms / 1000)
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": _usage(messages, content),
+            })
+
+        stats["streams"] += 1
+        chunks = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)] or [""]
+        per_chunk = delay_ms * (1 - STREAM_TTFT_FRACTION) / 1000 / len(chunks)
+
+        def _event(delta: Dict[str, Any], finish_reason=None, usage=None) -> str:
+            payload = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if usage:
+                payload["usage"] = usage
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def _events():
+            await asyncio.sleep(delay_ms * STREAM_TTFT_FRACTION / 1000)
+            yield _event({"role": "assistant", "content": ""})
+            for chunk in chunks:
+                yield _event({"content": chunk})
+                await asyncio.sleep(per_chunk)
+            yield _event({}, finish_reason="stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield _event({}, usage=_usage(messages, content))
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(_events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def get_stats():
+        calls = sum(stats["calls"].values())
+        return {
+            "calls": dict(stats["calls"]),
+            "models": dict(stats["models"]),
+            "streams": stats["streams"],
+            "avg_latency_ms": round(stats["latency_ms_total"] / calls, 1) if calls else 0.0,
+            "latency": {model: spec.spec for model, spec in latency.items()},
+        }
+
+    app.state.stats = stats
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Deterministic fake OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", action="append", default=[],
+                        help="[MODEL=]fixed:MS | uniform:LO,HI | lognormal:MEDIAN,SIGMA (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app(parse_latency_args(args.latency), seed=args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
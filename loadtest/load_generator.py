@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Offline load test for POST /api/rpg_dm/action.
+
+Boots the real FastAPI app in-process against the in-memory Mongo stand-in
+and the fake LLM server (on a background thread), seeds one campaign per
+player from the recorded sessions, then replays the sessions with N
+concurrent players. Nothing leaves the machine.
+
+Reports p50/p95/p99 action latency, throughput, error counts, event-loop
+lag (a ticker measures how late its sleeps wake up) and a per-stage
+breakdown from the request traces.
+
+Sessions are JSON files ({"character": {...}, "turns": [...]}) or JSONL
+files with one recorded /api/rpg_dm/action body per line; see sessions/.
+
+Usage:
+    python -m loadtest.load_generator --players 20 --think-scale 0.1
+    python -m loadtest.load_generator --players 50 --turns 5 \
+        --llm-latency gpt-4o=fixed:1500 --json results.json
+"""
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import math
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).parent.parent
+SESSIONS_DIR = Path(__file__).parent / "sessions"
+sys.path.insert(0, str(ROOT / "backend"))
+sys.path.insert(0, str(ROOT))
+
+from loadtest.fake_llm import create_app as create_fake_llm, parse_latency_args
+from loadtest.memory_mongo import InMemoryDatabase
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# SESSIONS
+# ═══════════════════════════════════════════════════════════════════════
+
+DEFAULT_CHARACTER = {
+    "name": "Load Tester",
+    "race": "Human",
+    "class": "Fighter",
+    "background": "Soldier",
+    "goal": "Survive the benchmark",
+    "proficiencies": ["Athletics", "Perception"],
+}
+
+
+def load_session(path: Path) -> Dict[str, Any]:
+    """
+    Read a session script. JSONL files are raw recorded action bodies
+    ({"player_action", "check_result"?, "think_ms"?} per line).
+    """
+    if path.suffix == ".jsonl":
+        turns = [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+        return {"name": path.stem, "world": "valdrath", "character": DEFAULT_CHARACTER, "turns": turns}
+
+    session = json.loads(path.read_text())
+    session.setdefault("name", path.stem)
+    session.setdefault("world", "valdrath")
+    session.setdefault("character", DEFAULT_CHARACTER)
+    return session
+
+
+def load_sessions(patterns: List[str]) -> List[Dict[str, Any]]:
+    paths = sorted({Path(p) for pattern in patterns for p in glob.glob(pattern)})
+    if not paths:
+        raise SystemExit(f"No session files match {patterns}")
+    return [load_session(path) for path in paths]
+
+
+def _world_blueprint(world: str) -> Dict[str, Any]:
+    from data import example_worlds
+
+    blueprint = getattr(example_worlds, f"{world.upper()}_BLUEPRINT", None)
+    if blueprint is None:
+        raise SystemExit(f"Unknown session world '{world}' (expected data.example_worlds.{world.upper()}_BLUEPRINT)")
+    return blueprint
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# ENVIRONMENT
+# ═══════════════════════════════════════════════════════════════════════
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_llm(latency_specs: List[str], seed: int):
+    """Run the fake LLM server on its own thread and event loop"""
+    import uvicorn
+
+    port = _free_port()
+    app = create_fake_llm(parse_latency_args(latency_specs), seed=seed)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, name="fake-llm", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, app, f"http://127.0.0.1:{port}/v1"
+
+
+def import_server(llm_base_url: str, db: InMemoryDatabase):
+    """
+    Import the backend app with the fake LLM and in-memory database wired in.
+    Environment is set first: server.py reads it at import time.
+    """
+    os.environ["OPENAI_API_KEY"] = "sk-loadtest"
+    os.environ["OPENAI_BASE_URL"] = llm_base_url
+    os.environ.pop("EMERGENT_LLM_KEY", None)
+    os.environ.pop("MONGO_URL", None)
+
+    import server
+    from services.tracing import traced_database
+
+    traced = traced_database(db)
+    server.db = traced
+    for module in (server.dungeon_forge, server.quests_router, server.debug_router,
+                   server.knowledge_router, server.campaign_log_router, server.scene_refresh_router):
+        module.set_database(traced)
+    server.set_character_v2_database(traced)
+    return server
+
+
+async def seed_player(session: Dict[str, Any], player_index: int) -> Dict[str, str]:
+    """One campaign + world state + character per player, as after onboarding"""
+    from routers.dungeon_forge import create_campaign, create_character_doc, create_world_state
+
+    blueprint = _world_blueprint(session["world"])
+    campaign_id = f"loadtest-{player_index}-{uuid.uuid4().hex[:8]}"
+    character_id = f"char-{player_index}"
+    await create_campaign(campaign_id, blueprint["world_core"]["name"], blueprint)
+    town = blueprint.get("starting_town", {}).get("name", "Unknown")
+    await create_world_state(campaign_id, {
+        "location": town,
+        "current_location": town,
+        "time_of_day": "midday",
+        "weather": "clear",
+        "active_npcs": [],
+        "faction_states": {},
+        "quest_flags": {},
+    })
+    await create_character_doc(campaign_id, character_id, dict(session["character"]))
+    return {"campaign_id": campaign_id, "character_id": character_id}
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# MEASUREMENT
+# ═══════════════════════════════════════════════════════════════════════
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LoopLagMonitor:
+    """Sleeps interval_ms in a loop and records how late each wake-up is"""
+
+    def __init__(self, interval_ms: float = 10.0):
+        self.interval = interval_ms / 1000
+        self.lags_ms: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags_ms.append(max(0.0, (loop.time() - expected) * 1000))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="loadtest.loop_lag")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+async def run_player(client, player: Dict[str, str], session: Dict[str, Any], args, results: List[Dict[str, Any]]) -> None:
+    await asyncio.sleep(player["start_delay"])
+    turns = session["turns"][:args.turns] if args.turns else session["turns"]
+    for turn in turns:
+        body = {
+            "campaign_id": player["campaign_id"],
+            "character_id": player["character_id"],
+            "player_action": turn["player_action"],
+        }
+        if turn.get("check_result") is not None:
+            body["check_result"] = turn["check_result"]
+
+        started = time.perf_counter()
+        error = None
+        try:
+            response = await client.post("/api/rpg_dm/action", json=body)
+            status = response.status_code
+            payload = response.json()
+            # Combat turns return the bare payload without the success envelope
+            if status >= 400 or payload.get("success") is False:
+                error = (payload.get("error") or {}).get("message") or f"HTTP {status}"
+        except Exception as e:
+            status = 0
+            error = f"{type(e).__name__}: {e}"
+        results.append({
+            "session": session["name"],
+            "player": player["campaign_id"],
+            "status": status,
+            "error": error,
+            "latency_ms": (time.perf_counter() - started) * 1000,
+        })
+        await asyncio.sleep(turn.get("think_ms", 0) / 1000 * args.think_scale)
+
+
+def stage_breakdown(limit: int) -> Dict[str, Dict[str, float]]:
+    """Mean ms per stage over the buffered action traces"""
+    from services.tracing import get_recent_traces
+
+    traces = get_recent_traces(limit=limit, name="POST /api/rpg_dm/action")
+    totals: Dict[str, List[float]] = {}
+    for trace in traces:
+        for name, stage in trace["stages"].items():
+            totals.setdefault(name, []).append(stage["ms"])
+        totals.setdefault("llm (all calls)", []).append(trace["llm"]["ms"])
+        totals.setdefault("mongo (all ops)", []).append(trace["mongo"]["ms"])
+    return {
+        name: {"mean_ms": round(sum(values) / len(values), 1), "p95_ms": round(percentile(values, 95), 1), "traces": len(values)}
+        for name, values in sorted(totals.items(), key=lambda item: -sum(item[1]) / len(item[1]))
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# MAIN
+# ═══════════════════════════════════════════════════════════════════════
+
+async def run(args) -> Dict[str, Any]:
+    import httpx
+
+    sessions = load_sessions(args.sessions)
+    db = InMemoryDatabase("loadtest", latency_ms=args.mongo_latency_ms)
+    llm_server, llm_thread, llm_app, llm_base_url = start_fake_llm(args.llm_latency, args.seed)
+    server = import_server(llm_base_url, db)
+
+    await server.app.router.startup()
+    try:
+        players = []
+        for i in range(args.players):
+            session = sessions[i % len(sessions)]
+            player = await seed_player(session, i)
+            player["start_delay"] = args.ramp_seconds * i / max(1, args.players)
+            players.append((player, session))
+
+        results: List[Dict[str, Any]] = []
+        monitor = LoopLagMonitor(args.lag_interval_ms)
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+            monitor.start()
+            started = time.perf_counter()
+            await asyncio.gather(*(run_player(client, player, session, args, results) for player, session in players))
+            elapsed = time.perf_counter() - started
+            await monitor.stop()
+    finally:
+        await server.app.router.shutdown()
+        llm_server.should_exit = True
+        llm_thread.join(timeout=5)
+
+    latencies = [r["latency_ms"] for r in results]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r["error"]:
+            errors[r["error"][:120]] = errors.get(r["error"][:120], 0) + 1
+
+    return {
+        "config": {
+            "players": args.players,
+            "sessions": [s["name"] for s in sessions],
+            "turns_per_player": args.turns or "all",
+            "think_scale": args.think_scale,
+            "ramp_seconds": args.ramp_seconds,
+            "llm_latency": args.llm_latency,
+            "mongo_latency_ms": args.mongo_latency_ms,
+            "seed": args.seed,
+        },
+        "requests": len(results),
+        "errors": sum(errors.values()),
+        "error_messages": errors,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies, default=0.0), 1),
+            "mean": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        },
+        "loop_lag_ms": {
+            "p50": round(percentile(monitor.lags_ms, 50), 2),
+            "p99": round(percentile(monitor.lags_ms, 99), 2),
+            "max": round(max(monitor.lags_ms, default=0.0), 2),
+            "samples": len(monitor.lags_ms),
+        },
+        "stages": stage_breakdown(len(results)),
+        "llm": _llm_stats(llm_app),
+        "mongo": db.stats(),
+    }
+
+
+def _llm_stats(llm_app) -> Dict[str, Any]:
+    stats = llm_app.state.stats
+    return {"calls": dict(stats["calls"]), "models": dict(stats["models"]), "streams": stats["streams"]}
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    config = report["config"]
+    print("=" * 72)
+    print(f"ACTION LOAD TEST: {config['players']} players, sessions={', '.join(config['sessions'])}")
+    print(f"think_scale={config['think_scale']}  ramp={config['ramp_seconds']}s  "
+          f"mongo_latency={config['mongo_latency_ms']}ms  llm_latency={config['llm_latency'] or 'defaults'}")
+    print("=" * 72)
+    latency = report["latency_ms"]
+    lag = report["loop_lag_ms"]
+    print(f"{'requests':<28}{report['requests']:>10}    errors {report['errors']}")
+    print(f"{'elapsed':<28}{report['elapsed_s']:>9.2f}s    throughput {report['throughput_rps']:.2f} req/s")
+    print(f"{'latency p50 / p95 / p99':<28}{latency['p50']:>9.0f}ms / {latency['p95']:.0f}ms / {latency['p99']:.0f}ms  (max {latency['max']:.0f}ms)")
+    print(f"{'event-loop lag p50 / p99':<28}{lag['p50']:>9.2f}ms / {lag['p99']:.2f}ms  (max {lag['max']:.2f}ms, {lag['samples']} samples)")
+    print("-" * 72)
+    print(f"{'stage':<40}{'mean ms':>10}{'p95 ms':>10}{'traces':>10}")
+    for name, stage in report["stages"].items():
+        print(f"{name:<40}{stage['mean_ms']:>10.1f}{stage['p95_ms']:>10.1f}{stage['traces']:>10}")
+    print("-" * 72)
+    print(f"LLM calls: {report['llm']['calls']}  (streams: {report['llm']['streams']})")
+    print(f"Mongo ops: {report['mongo']['ops']}")
+    for message, count in report["error_messages"].items():
+        print(f"  ✗ {count}x {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for /api/rpg_dm/action")
+    parser.add_argument("--players", type=int, default=10, help="Concurrent players (one campaign each)")
+    parser.add_argument("--sessions", nargs="+", default=[str(SESSIONS_DIR / "*.json"), str(SESSIONS_DIR / "*.jsonl")],
+                        help="Session files or globs; players are assigned round-robin")
+    parser.add_argument("--turns", type=int, default=0, help="Max turns per player (0 = whole session)")
+    parser.add_argument("--think-scale", type=float, default=1.0, help="Multiplier on recorded think times (0 = closed loop)")
+    parser.add_argument("--ramp-seconds", type=float, default=0.0, help="Spread player start times over this window")
+    parser.add_argument("--llm-latency", action="append", default=[],
+                        help="[MODEL=]fixed:MS | uniform:LO,HI | lognormal:MEDIAN,SIGMA (repeatable)")
+    parser.add_argument("--mongo-latency-ms", type=float, default=1.0, help="Simulated round trip per Mongo op")
+    parser.add_argument("--lag-interval-ms", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Keep backend logging enabled")
+    args = parser.parse_args()
+
+    os.environ.setdefault("TRACE_BUFFER_SIZE", str(max(200, args.players * 50)))
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
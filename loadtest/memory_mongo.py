@@ -0,0 +1,613 @@
+"""
+In-memory MongoDB stand-in for load tests.
+
+Implements the subset of the Motor API the backend actually uses:
+find_one / find (sort, skip, limit, to_list, async iteration), insert_one /
+insert_many, update_one / update_many ($set, $unset, $inc, $currentDate, $push with $each,
+$setOnInsert, upsert), find_one_and_update / find_one_and_delete, delete_one /
+delete_many, count_documents, bulk_write(UpdateOne/InsertOne, BulkWriteError
+on duplicate keys), create_index(es) with unique and partial unique
+constraints, index_information and aggregate ($match, $sort, $group, $limit).
+
+Documents are deep-copied in and out like a real driver would, and every
+operation can be given a simulated network round trip (latency_ms) so the
+event loop sees the same await points it would against a real server.
+
+Usage:
+    db = InMemoryDatabase("rpg_loadtest", latency_ms=1.0)
+    dungeon_forge.set_database(traced_database(db))
+"""
+import asyncio
+import copy
+import re
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+_MISSING = object()
+DUPLICATE_KEY = 11000
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# DOCUMENT PATHS
+# ═══════════════════════════════════════════════════════════════════════
+
+def _get_path(doc: Any, path: str) -> Any:
+    for part in path.split("."):
+        if isinstance(doc, dict):
+            doc = doc.get(part, _MISSING)
+        elif isinstance(doc, list) and part.isdigit() and int(part) < len(doc):
+            doc = doc[int(part)]
+        else:
+            return _MISSING
+        if doc is _MISSING:
+            return _MISSING
+    return doc
+
+
+def _set_path(doc: Dict[str, Any], path: str, value: Any) -> None:
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[leaf] = value
+
+
+def _unset_path(doc: Dict[str, Any], path: str) -> None:
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(leaf, None)
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    """Order mixed types roughly the way BSON comparison does"""
+    if value is _MISSING or value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (4, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, ObjectId):
+        return (3, str(value))
+    if isinstance(value, datetime):
+        return (5, value.timestamp())
+    return (6, str(value))
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# QUERY MATCHING
+# ═══════════════════════════════════════════════════════════════════════
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        return value <= operand
+    except TypeError:
+        return False
+
+
+def _match_value(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+        return all(_match_operator(value, op, operand) for op, operand in condition.items())
+    if isinstance(value, list) and not isinstance(condition, list):
+        return condition in value
+    if value is _MISSING:
+        return condition is None
+    return value == condition
+
+
+def _match_operator(value: Any, op: str, operand: Any) -> bool:
+    values = value if isinstance(value, list) else [value]
+    if op == "$eq":
+        return _match_value(value, operand)
+    if op == "$ne":
+        return not _match_value(value, operand)
+    if op == "$in":
+        return any(v in operand for v in values) or (value is _MISSING and None in operand)
+    if op == "$nin":
+        return not any(v in operand for v in values)
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if op in ("$gt", "$gte", "$lt", "$lte"):
+        return any(_compare(v, op, operand) for v in values)
+    if op == "$regex":
+        return isinstance(value, str) and re.search(operand, value) is not None
+    if op == "$options":
+        return True
+    raise NotImplementedError(f"Query operator {op} is not supported by the in-memory stand-in")
+
+
+def matches(doc: Dict[str, Any], query: Optional[Dict[str, Any]]) -> bool:
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif not _match_value(_get_path(doc, key), condition):
+            return False
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# UPDATES AND PROJECTIONS
+# ═══════════════════════════════════════════════════════════════════════
+
+def _apply_update(doc: Dict[str, Any], update: Dict[str, Any], inserting: bool = False) -> None:
+    if not any(key.startswith("$") for key in update):
+        # Replacement document
+        keep_id = doc.get("_id")
+        doc.clear()
+        doc.update(copy.deepcopy(update))
+        if keep_id is not None:
+            doc["_id"] = keep_id
+        return
+
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, value in fields.items():
+            if op in ("$set", "$setOnInsert"):
+                _set_path(doc, path, copy.deepcopy(value))
+            elif op == "$unset":
+                _unset_path(doc, path)
+            elif op == "$inc":
+                current = _get_path(doc, path)
+                _set_path(doc, path, (0 if current is _MISSING else current) + value)
+            elif op == "$currentDate":
+                _set_path(doc, path, datetime.now(timezone.utc))
+            elif op == "$push":
+                current = _get_path(doc, path)
+                items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                _set_path(doc, path, ([] if current is _MISSING else list(current)) + copy.deepcopy(items))
+            else:
+                raise NotImplementedError(f"Update operator {op} is not supported by the in-memory stand-in")
+
+
+def _upsert_seed(query: Dict[str, Any]) -> Dict[str, Any]:
+    """Equality fields of a query become the fields of an upserted document"""
+    seed: Dict[str, Any] = {}
+    for key, condition in query.items():
+        if key.startswith("$"):
+            continue
+        if isinstance(condition, dict) and any(k.startswith("$") for k in condition):
+            if "$eq" in condition:
+                _set_path(seed, key, copy.deepcopy(condition["$eq"]))
+            continue
+        _set_path(seed, key, copy.deepcopy(condition))
+    return seed
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(doc)
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if not include:
+        result = copy.deepcopy(doc)
+        for key, value in projection.items():
+            if not value:
+                _unset_path(result, key)
+        return result
+
+    result: Dict[str, Any] = {}
+    if projection.get("_id", 1) and "_id" in doc:
+        result["_id"] = doc["_id"]
+    for path in include:
+        value = _get_path(doc, path)
+        if value is not _MISSING:
+            _set_path(result, path, copy.deepcopy(value))
+    return result
+
+
+def _normalize_sort(sort: Any, direction: Optional[int] = None) -> List[Tuple[str, int]]:
+    if sort is None:
+        return []
+    if isinstance(sort, str):
+        return [(sort, direction if direction is not None else 1)]
+    if isinstance(sort, dict):
+        return list(sort.items())
+    return list(sort)
+
+
+def _sorted(docs: List[Dict[str, Any]], sort: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
+    for field, direction in reversed(sort):
+        docs = sorted(docs, key=lambda doc: _sort_key(_get_path(doc, field)), reverse=direction < 0)
+    return docs
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# CURSOR
+# ═══════════════════════════════════════════════════════════════════════
+
+class InMemoryCursor:
+    """Lazy cursor: sort/skip/limit are applied when the cursor is read"""
+
+    def __init__(self, collection: "InMemoryCollection", query, projection, sort=None):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort = _normalize_sort(sort)
+        self._skip = 0
+        self._limit = 0
+        self._results: Optional[List[Dict[str, Any]]] = None
+
+    def sort(self, key, direction=None) -> "InMemoryCursor":
+        self._sort = _normalize_sort(key, direction)
+        return self
+
+    def skip(self, count: int) -> "InMemoryCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "InMemoryCursor":
+        self._limit = count
+        return self
+
+    def _materialize(self) -> List[Dict[str, Any]]:
+        docs = [doc for doc in self._collection._docs if matches(doc, self._query)]
+        docs = _sorted(docs, self._sort)[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(doc, self._projection) for doc in docs]
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        await self._collection._roundtrip()
+        docs = self._materialize()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        if self._results is None:
+            await self._collection._roundtrip()
+            self._results = self._materialize()
+        if not self._results:
+            raise StopAsyncIteration
+        return self._results.pop(0)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# COLLECTION
+# ═══════════════════════════════════════════════════════════════════════
+
+def _result(**fields) -> SimpleNamespace:
+    return SimpleNamespace(acknowledged=True, **fields)
+
+
+class InMemoryCollection:
+    def __init__(self, database: "InMemoryDatabase", name: str):
+        self.database = database
+        self.name = name
+        self._docs: List[Dict[str, Any]] = []
+        self._indexes: Dict[str, Dict[str, Any]] = {"_id_": {"key": [("_id", 1)], "unique": True}}
+
+    async def _roundtrip(self) -> None:
+        self.database.ops += 1
+        if self.database.latency_ms:
+            await asyncio.sleep(self.database.latency_ms / 1000)
+        else:
+            await asyncio.sleep(0)
+
+    # ───────────────────────────────────────────────────────────────────
+    # Indexes
+    # ───────────────────────────────────────────────────────────────────
+
+    async def create_index(self, keys, unique: bool = False, name: Optional[str] = None, **kwargs) -> str:
+        keys = _normalize_sort(keys, 1)
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        self._indexes[name] = {"key": keys, "unique": unique}
+        for option in ("expireAfterSeconds", "partialFilterExpression"):
+            if option in kwargs:
+                self._indexes[name][option] = kwargs[option]
+        return name
+
+    async def create_indexes(self, models) -> List[str]:
+        names = []
+        for model in models:
+            spec = dict(model.document)
+            key = spec.pop("key")
+            names.append(await self.create_index(list(key.items()), **spec))
+        return names
+
+    async def index_information(self) -> Dict[str, Any]:
+        return copy.deepcopy(self._indexes)
+
+    def _check_unique(self, doc: Dict[str, Any], ignore: Optional[Dict[str, Any]] = None) -> None:
+        for name, index in self._indexes.items():
+            if not index["unique"]:
+                continue
+            # Partial indexes only cover documents matching their filter
+            partial = index.get("partialFilterExpression")
+            if partial and not matches(doc, partial):
+                continue
+            key = tuple(_sort_key(_get_path(doc, field)) for field, _ in index["key"])
+            for other in self._docs:
+                if other is ignore or other is doc or (partial and not matches(other, partial)):
+                    continue
+                if tuple(_sort_key(_get_path(other, field)) for field, _ in index["key"]) == key:
+                    raise DuplicateKeyError(
+                        f"E11000 duplicate key error collection: {self.name} index: {name}", code=DUPLICATE_KEY
+                    )
+
+    # ───────────────────────────────────────────────────────────────────
+    # Reads
+    # ───────────────────────────────────────────────────────────────────
+
+    def _first(self, query, sort=None) -> Optional[Dict[str, Any]]:
+        docs = [doc for doc in self._docs if matches(doc, query)]
+        if not docs:
+            return None
+        return _sorted(docs, _normalize_sort(sort))[0] if sort else docs[0]
+
+    async def find_one(self, filter=None, projection=None, sort=None, **kwargs) -> Optional[Dict[str, Any]]:
+        await self._roundtrip()
+        doc = self._first(filter, sort)
+        return None if doc is None else _project(doc, projection)
+
+    def find(self, filter=None, projection=None, sort=None, **kwargs) -> InMemoryCursor:
+        return InMemoryCursor(self, filter, projection, sort)
+
+    async def count_documents(self, filter=None, **kwargs) -> int:
+        await self._roundtrip()
+        return sum(1 for doc in self._docs if matches(doc, filter))
+
+    async def estimated_document_count(self, **kwargs) -> int:
+        await self._roundtrip()
+        return len(self._docs)
+
+    async def distinct(self, key: str, filter=None, **kwargs) -> List[Any]:
+        await self._roundtrip()
+        values = []
+        for doc in self._docs:
+            value = _get_path(doc, key)
+            if value is not _MISSING and matches(doc, filter) and value not in values:
+                values.append(value)
+        return values
+
+    # ───────────────────────────────────────────────────────────────────
+    # Writes
+    # ───────────────────────────────────────────────────────────────────
+
+    def _insert(self, doc: Dict[str, Any]) -> Any:
+        # Like the real driver, the caller's document gets its _id
+        doc.setdefault("_id", ObjectId())
+        stored = copy.deepcopy(doc)
+        self._check_unique(stored)
+        self._docs.append(stored)
+        return doc["_id"]
+
+    async def insert_one(self, document: Dict[str, Any], **kwargs):
+        await self._roundtrip()
+        return _result(inserted_id=self._insert(document))
+
+    async def insert_many(self, documents: Iterable[Dict[str, Any]], **kwargs):
+        await self._roundtrip()
+        return _result(inserted_ids=[self._insert(doc) for doc in documents])
+
+    def _update(self, filter, update, upsert: bool, many: bool) -> Tuple[int, int, Any]:
+        targets = [doc for doc in self._docs if matches(doc, filter)]
+        if not many:
+            targets = targets[:1]
+        for doc in targets:
+            before = copy.deepcopy(doc)
+            _apply_update(doc, update)
+            try:
+                self._check_unique(doc)
+            except DuplicateKeyError:
+                doc.clear()
+                doc.update(before)
+                raise
+        if targets or not upsert:
+            return len(targets), len(targets), None
+
+        doc = _upsert_seed(filter or {})
+        _apply_update(doc, update, inserting=True)
+        return 0, 0, self._insert(doc)
+
+    async def update_one(self, filter, update, upsert: bool = False, **kwargs):
+        await self._roundtrip()
+        matched, modified, upserted_id = self._update(filter, update, upsert, many=False)
+        return _result(matched_count=matched, modified_count=modified, upserted_id=upserted_id)
+
+    async def update_many(self, filter, update, upsert: bool = False, **kwargs):
+        await self._roundtrip()
+        matched, modified, upserted_id = self._update(filter, update, upsert, many=True)
+        return _result(matched_count=matched, modified_count=modified, upserted_id=upserted_id)
+
+    async def replace_one(self, filter, replacement, upsert: bool = False, **kwargs):
+        return await self.update_one(filter, replacement, upsert=upsert)
+
+    async def find_one_and_update(
+        self, filter, update, projection=None, sort=None, upsert: bool = False,
+        return_document=ReturnDocument.BEFORE, **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        await self._roundtrip()
+        doc = self._first(filter, sort)
+        if doc is None:
+            if not upsert:
+                return None
+            doc = _upsert_seed(filter or {})
+            _apply_update(doc, update, inserting=True)
+            self._insert(doc)
+            doc = self._docs[-1]
+            return _project(doc, projection) if return_document == ReturnDocument.AFTER else None
+
+        before = _project(doc, projection)
+        _apply_update(doc, update)
+        return _project(doc, projection) if return_document == ReturnDocument.AFTER else before
+
+    async def find_one_and_delete(self, filter, projection=None, sort=None, **kwargs) -> Optional[Dict[str, Any]]:
+        await self._roundtrip()
+        doc = self._first(filter, sort)
+        if doc is not None:
+            self._docs.remove(doc)
+        return None if doc is None else _project(doc, projection)
+
+    async def delete_one(self, filter, **kwargs):
+        await self._roundtrip()
+        doc = self._first(filter)
+        if doc is not None:
+            self._docs.remove(doc)
+        return _result(deleted_count=0 if doc is None else 1)
+
+    async def delete_many(self, filter, **kwargs):
+        await self._roundtrip()
+        before = len(self._docs)
+        self._docs = [doc for doc in self._docs if not matches(doc, filter)]
+        return _result(deleted_count=before - len(self._docs))
+
+    async def bulk_write(self, requests, ordered: bool = True, **kwargs):
+        await self._roundtrip()
+        counts = {"inserted_count": 0, "matched_count": 0, "modified_count": 0, "upserted_count": 0, "deleted_count": 0}
+        upserted_ids: Dict[int, Any] = {}
+        write_errors: List[Dict[str, Any]] = []
+        for i, request in enumerate(requests):
+            kind = type(request).__name__
+            document = getattr(request, "_doc", None)
+            try:
+                if kind == "InsertOne":
+                    self._insert(document)
+                    counts["inserted_count"] += 1
+                elif kind in ("UpdateOne", "UpdateMany", "ReplaceOne"):
+                    matched, modified, upserted_id = self._update(
+                        request._filter, document, bool(request._upsert), many=kind == "UpdateMany"
+                    )
+                    counts["matched_count"] += matched
+                    counts["modified_count"] += modified
+                    if upserted_id is not None:
+                        counts["upserted_count"] += 1
+                        upserted_ids[i] = upserted_id
+                elif kind in ("DeleteOne", "DeleteMany"):
+                    before = len(self._docs)
+                    self._docs = [doc for doc in self._docs if not matches(doc, request._filter)]
+                    counts["deleted_count"] += before - len(self._docs)
+                else:
+                    raise NotImplementedError(f"bulk_write request {kind} is not supported by the in-memory stand-in")
+            except DuplicateKeyError as e:
+                # Like the server: an ordered batch stops at the first error,
+                # an unordered one carries on and reports every failure
+                write_errors.append({"index": i, "code": DUPLICATE_KEY, "errmsg": str(e), "op": document})
+                if ordered:
+                    break
+        if write_errors:
+            raise BulkWriteError({
+                "writeErrors": write_errors,
+                "writeConcernErrors": [],
+                "nInserted": counts["inserted_count"],
+                "nUpserted": counts["upserted_count"],
+                "nMatched": counts["matched_count"],
+                "nModified": counts["modified_count"],
+                "nRemoved": counts["deleted_count"],
+                "upserted": [{"index": i, "_id": _id} for i, _id in upserted_ids.items()],
+            })
+        return _result(upserted_ids=upserted_ids, **counts)
+
+    # ───────────────────────────────────────────────────────────────────
+    # Aggregation
+    # ───────────────────────────────────────────────────────────────────
+
+    def aggregate(self, pipeline: List[Dict[str, Any]], **kwargs) -> InMemoryCursor:
+        collection = self
+
+        class _AggregateCursor(InMemoryCursor):
+            def _materialize(self) -> List[Dict[str, Any]]:
+                return _run_pipeline(copy.deepcopy(collection._docs), pipeline)
+
+        return _AggregateCursor(self, None, None)
+
+
+def _group_key(doc: Dict[str, Any], spec: Any) -> Any:
+    if isinstance(spec, str) and spec.startswith("$"):
+        value = _get_path(doc, spec[1:])
+        return None if value is _MISSING else value
+    if isinstance(spec, dict):
+        return {key: _group_key(doc, value) for key, value in spec.items()}
+    return spec
+
+
+def _run_pipeline(docs: List[Dict[str, Any]], pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for stage in pipeline:
+        (op, spec), = stage.items()
+        if op == "$match":
+            docs = [doc for doc in docs if matches(doc, spec)]
+        elif op == "$sort":
+            docs = _sorted(docs, _normalize_sort(spec))
+        elif op == "$limit":
+            docs = docs[:spec]
+        elif op == "$group":
+            groups: Dict[str, Dict[str, Any]] = {}
+            for doc in docs:
+                key = _group_key(doc, spec["_id"])
+                group = groups.setdefault(repr(key), {"_id": key})
+                for field, accumulator in spec.items():
+                    if field == "_id":
+                        continue
+                    (acc, expr), = accumulator.items()
+                    value = _group_key(doc, expr)
+                    if acc == "$sum":
+                        group[field] = group.get(field, 0) + (value if isinstance(value, (int, float)) else 0)
+                    elif acc == "$push":
+                        group.setdefault(field, []).append(value)
+                    elif acc == "$first":
+                        group.setdefault(field, value)
+                    elif acc == "$last":
+                        group[field] = value
+                    else:
+                        raise NotImplementedError(f"Accumulator {acc} is not supported by the in-memory stand-in")
+            docs = list(groups.values())
+        else:
+            raise NotImplementedError(f"Pipeline stage {op} is not supported by the in-memory stand-in")
+    return docs
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# DATABASE
+# ═══════════════════════════════════════════════════════════════════════
+
+class InMemoryDatabase:
+    """
+    Motor-like database: collections are created on first access, by
+    attribute (db.campaigns) or item (db["campaigns"]).
+    """
+
+    def __init__(self, name: str = "loadtest", latency_ms: float = 0.0):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.ops = 0
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(self, name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def list_collection_names(self) -> List[str]:
+        return list(self._collections)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ops": self.ops,
+            "collections": {name: len(c._docs) for name, c in self._collections.items()},
+        }
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compiled NarrationFilter vs the original per-phrase implementation.
+
+Corpus: narrations recorded in the repo's reports and playtest notes
+("narration" JSON strings and quoted blocks in *.md / *.txt), or a file given
+with --corpus (JSONL with a "narration" field per line, or plain text with
+one narration per blank-line-separated block). Each narration is also run
+as an "action" (DM narration + generated scene + combined text) to mirror the
+three filter passes per action.
+
+The original implementation is reproduced here verbatim as the baseline and
+outputs are compared for every narration.
+
+Usage: python narration_filter_benchmark.py [--runs N] [--corpus FILE]
+"""
+import re
+import sys
+import json
+import logging
+import argparse
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from services.narration_filter import NarrationFilter, DEFAULT_FILTER
+
+logging.disable(logging.CRITICAL)
+
+
+class LegacyNarrationFilter:
+    BANNED_PHRASES = NarrationFilter.BANNED_PHRASES
+    SENTENCE_LIMITS = NarrationFilter.SENTENCE_LIMITS
+
+    @staticmethod
+    def count_sentences(text):
+        sentences = re.split(r'[.!?]+', text)
+        sentences = [s.strip() for s in sentences if s.strip()]
+        return len(sentences)
+
+    @staticmethod
+    def enforce_sentence_limit(text, max_sentences=4):
+        sentences = re.split(r'([.!?]+)', text)
+        full_sentences = []
+        for i in range(0, len(sentences) - 1, 2):
+            if sentences[i].strip():
+                full_sentences.append(sentences[i].strip() + sentences[i+1])
+        if len(sentences) % 2 == 1 and sentences[-1].strip():
+            full_sentences.append(sentences[-1].strip() + '.')
+        if len(full_sentences) <= max_sentences:
+            return text
+        return ' '.join(full_sentences[:max_sentences])
+
+    @staticmethod
+    def remove_banned_phrases(text):
+        result = text
+        for phrase in LegacyNarrationFilter.BANNED_PHRASES:
+            if phrase.lower() in result.lower():
+                pattern = re.compile(re.escape(phrase), re.IGNORECASE)
+                result = pattern.sub('', result)
+        result = re.sub(r'\s+', ' ', result)
+        result = re.sub(r'\s+([.,;:!?])', r'\1', result)
+        return result.strip()
+
+    @staticmethod
+    def detect_novel_style(text):
+        for sentence in re.split(r'[.!?]+', text):
+            if len(sentence.split()) > 50:
+                return True
+        sensory_words = ['scent', 'smell', 'sight', 'sound', 'taste', 'feel', 'touch']
+        return sum(1 for word in sensory_words if word in text.lower()) > 2
+
+    @staticmethod
+    def apply_filter(narration, max_sentences=None, context="unknown"):
+        if not narration or not narration.strip():
+            return narration
+        LegacyNarrationFilter.count_sentences(narration)
+        narration = LegacyNarrationFilter.remove_banned_phrases(narration)
+        if max_sentences is None:
+            max_sentences = LegacyNarrationFilter.SENTENCE_LIMITS.get(context.lower(), 10)
+        narration = LegacyNarrationFilter.enforce_sentence_limit(narration, max_sentences=max_sentences)
+        LegacyNarrationFilter.detect_novel_style(narration)
+        LegacyNarrationFilter.count_sentences(narration)
+        return narration
+
+
+def load_corpus(path=None):
+    if path:
+        text = Path(path).read_text(encoding="utf-8")
+        if path.endswith(".jsonl"):
+            return [json.loads(line)["narration"] for line in text.splitlines() if line.strip()]
+        return [block.strip() for block in text.split("\n\n") if block.strip()]
+
+    corpus = []
+    json_string = re.compile(r'"narration":\s*"((?:[^"\\]|\\.){40,})"')
+    for doc in sorted(list(ROOT.glob("*.md")) + list(ROOT.glob("*.txt"))):
+        content = doc.read_text(encoding="utf-8", errors="ignore")
+        for match in json_string.finditer(content):
+            try:
+                corpus.append(json.loads(f'"{match.group(1)}"'))
+            except json.JSONDecodeError:
+                continue
+        quote = []
+        for line in content.splitlines() + [""]:
+            if line.startswith("> "):
+                quote.append(line[2:])
+            elif quote:
+                block = " ".join(quote).strip()
+                if len(block) >= 80:
+                    corpus.append(block)
+                quote = []
+    return corpus
+
+
+def run_action(filter_cls, narration):
+    # DM narration, generated scene, then the combined text (dungeon_forge)
+    dm = filter_cls.apply_filter(narration, context="exploration")
+    scene = filter_cls.apply_filter(narration, max_sentences=8, context="scene_description_exploration")
+    filter_cls.apply_filter(f"{scene}\n\n{dm}", max_sentences=10, context="final_combined_exploration")
+    filter_cls.count_sentences(dm)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--corpus")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print("No narrations found")
+        return
+    long_form = [" ".join(corpus[i:i + 6]) for i in range(0, len(corpus), 6)]
+
+    print("=" * 72)
+    print(f"NarrationFilter benchmark: {len(corpus)} recorded narrations, {args.runs} runs")
+    print("=" * 72)
+
+    mismatches = 0
+    for narration in corpus + long_form:
+        for limit in (3, 8, 16):
+            if LegacyNarrationFilter.apply_filter(narration, max_sentences=limit) != NarrationFilter.apply_filter(narration, max_sentences=limit):
+                mismatches += 1
+        if LegacyNarrationFilter.count_sentences(narration) != NarrationFilter.count_sentences(narration):
+            mismatches += 1
+    print(f"Output mismatches vs legacy: {mismatches}")
+    print("-" * 72)
+    print(f"{'workload':<28} | {'legacy ms':>10} | {'compiled ms':>11} | {'speedup':>7}")
+    print("-" * 72)
+
+    workloads = [
+        ("apply_filter (per text)", lambda f, n: f.apply_filter(n, context="exploration"), corpus),
+        ("apply_filter (long texts)", lambda f, n: f.apply_filter(n, context="intro"), long_form),
+        ("remove_banned_phrases", lambda f, n: f.remove_banned_phrases(n), corpus),
+        ("count_sentences", lambda f, n: f.count_sentences(n), corpus),
+        ("full action (3 passes)", run_action, corpus),
+    ]
+    for name, fn, texts in workloads:
+        def legacy():
+            for text in texts:
+                fn(LegacyNarrationFilter, text)
+
+        def compiled():
+            for text in texts:
+                fn(NarrationFilter, text)
+
+        legacy_ms = timeit.timeit(legacy, number=args.runs) / args.runs / len(texts) * 1000
+        compiled_ms = timeit.timeit(compiled, number=args.runs) / args.runs / len(texts) * 1000
+        print(f"{name:<28} | {legacy_ms:>10.4f} | {compiled_ms:>11.4f} | {legacy_ms / compiled_ms:>6.1f}x")
+
+    print("-" * 72)
+    print(f"Times are per narration. Banned phrases compiled: {len(DEFAULT_FILTER.banned_phrases)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+import pytest
+
+from services.action_pipeline import Stage, StageGraph
+
+
+def test_independent_stages_run_concurrently():
+    async def slow(key):
+        await asyncio.sleep(0.1)
+        return {key: True}
+
+    graph = StageGraph("test", [
+        Stage("draft", lambda ctx: {"draft": "text"}, outputs=("draft",)),
+        Stage("a", lambda ctx: slow("a"), inputs=("draft",), outputs=("a",)),
+        Stage("b", lambda ctx: slow("b"), inputs=("draft",), outputs=("b",)),
+        Stage("join", lambda ctx: {"done": ctx["a"] and ctx["b"]}, inputs=("a", "b"), outputs=("done",)),
+    ])
+
+    start = time.perf_counter()
+    run = asyncio.run(graph.run({}))
+    elapsed = time.perf_counter() - start
+
+    assert run.context["done"] is True
+    assert elapsed < 0.18
+    assert set(run.timings_ms) == {"draft", "a", "b", "join"}
+
+
+def test_unsatisfiable_input_fails_fast():
+    graph = StageGraph("test", [Stage("a", lambda ctx: {}, inputs=("missing",))])
+    with pytest.raises(ValueError):
+        asyncio.run(graph.run({}))
+
+
+def test_duplicate_output_rejected():
+    graph = StageGraph("test", [Stage("a", lambda ctx: {"x": 1}, outputs=("x",))])
+    with pytest.raises(ValueError):
+        graph.add(Stage("b", lambda ctx: {"x": 2}, outputs=("x",)))
@@ -0,0 +1,97 @@
+import copy
+
+import routers.dungeon_forge as dungeon_forge
+from data.example_worlds import VALDRATH_BLUEPRINT
+from services.blueprint_index import get_blueprint_index, get_blueprint_index_stats
+from services.lore_checker_service import build_blueprint_lookup
+from services.npc_activation_service import get_active_npcs_list, populate_active_npcs_for_location
+from services.target_resolver import find_npc_by_id
+
+BLUEPRINT = {
+    "starting_town": {"name": "Raven's Hollow"},
+    "starting_region": {"name": "Greyfen"},
+    "points_of_interest": [
+        {"id": "poi_lantern", "name": "Drowned Lantern"},
+        {"id": "poi_mill", "name": "Old Mill"},
+    ],
+    "key_npcs": [
+        {"name": "Magda Crowell", "role": "mayor"},
+        {"name": "Tobin Reed", "role": "innkeeper", "location_poi_id": "poi_lantern", "aliases": ["the Innkeep"]},
+        {"id": "miller", "name": "Orla Finch", "role": "miller", "location_poi_id": "poi_mill"},
+    ],
+    "factions": [{"name": "Lantern Guild"}],
+}
+
+
+def test_identical_blueprints_share_one_index():
+    first = get_blueprint_index(BLUEPRINT)
+    builds = get_blueprint_index_stats()["builds"]
+
+    assert get_blueprint_index(copy.deepcopy(BLUEPRINT)) is first
+    assert get_blueprint_index(BLUEPRINT) is first
+    assert get_blueprint_index_stats()["builds"] == builds
+
+
+def test_lookups_by_id_name_alias_and_location():
+    index = get_blueprint_index(copy.deepcopy(BLUEPRINT))
+
+    assert index.find_npc("tobin_reed")["name"] == "Tobin Reed"
+    assert index.find_npc("miller")["name"] == "Orla Finch"
+    assert index.find_npc("orla_finch")["name"] == "Orla Finch"
+    assert index.find_npc("the innkeep")["name"] == "Tobin Reed"
+    assert index.find_npc("Magda")["name"] == "Magda Crowell"
+    assert index.npcs_by_location["poi_lantern"] == (1,)
+    assert index.starting_town_npcs == (0,)
+    assert index.find_place("old mill")["id"] == "poi_mill"
+
+
+def test_consumers_match_the_original_scans():
+    blueprint = copy.deepcopy(BLUEPRINT)
+    world_state = {}
+
+    lookup = build_blueprint_lookup(blueprint)
+    assert set(lookup["places"]) == {"Raven's Hollow", "Drowned Lantern", "Old Mill", "Greyfen"}
+    assert set(lookup["factions"]) == {"Lantern Guild"}
+
+    npc = find_npc_by_id("tobin_reed", blueprint)
+    assert npc is blueprint["key_npcs"][1] and npc["id"] == "tobin_reed"
+    assert find_npc_by_id("nobody", blueprint) is None
+
+    active = populate_active_npcs_for_location("Drowned Lantern", blueprint, world_state)
+    assert active == ["tobin_reed"]
+    assert "tobin_reed" in world_state["npc_personalities"]
+    assert [npc["name"] for npc in get_active_npcs_list({"active_npcs": ["miller", "ghost"]}, blueprint)] == ["Orla Finch"]
+
+
+def test_example_world_indexes():
+    index = get_blueprint_index(VALDRATH_BLUEPRINT)
+
+    assert len(index.npcs_by_id) >= len(VALDRATH_BLUEPRINT["key_npcs"])
+    assert index.lore_lookup["npcs"].keys() == {npc["name"] for npc in VALDRATH_BLUEPRINT["key_npcs"]}
+
+
+def test_static_dm_prompt_hashes_each_blueprint_object_once():
+    blueprint = copy.deepcopy(VALDRATH_BLUEPRINT)
+    first = dungeon_forge.get_static_dm_prompt(blueprint)
+    hashes = get_blueprint_index_stats()["hashes"]
+
+    for _ in range(3):
+        assert dungeon_forge.get_static_dm_prompt(blueprint) is first
+        get_blueprint_index(blueprint)
+    assert get_blueprint_index_stats()["hashes"] == hashes
+
+
+def test_per_turn_guidance_goes_in_the_dynamic_suffix():
+    prompt = dungeon_forge.build_a_version_dm_prompt(
+        {"name": "Bram"}, {"current_location": "Raven's Hollow"}, VALDRATH_BLUEPRINT, {}, "I follow him", None,
+        {"tension_score": 40, "phase": "building", "dm_guidance": "Let dread build", "narration_style": "ominous"},
+        [], [], "", "", "",
+        improvisation_result={"classification": "creative", "approach": "misdirection", "dm_hint": "Reward it"},
+        active_tailing_quest={"title": "Shadow Vex", "description": "Follow Vex",
+                              "objectives": [{"description": "Stay hidden", "completed": False}]}
+    )
+    static = dungeon_forge.get_static_dm_prompt(VALDRATH_BLUEPRINT)
+    assert prompt.startswith(static)
+    suffix = prompt[len(static):]
+    for expected in ("Tension: 40/100 - building", "Let dread build", "misdirection", "Shadow Vex: Follow Vex"):
+        assert expected in suffix
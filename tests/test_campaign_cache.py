@@ -0,0 +1,103 @@
+import asyncio
+
+from loadtest.memory_mongo import InMemoryDatabase
+from services.campaign_cache import CampaignStateCache, CampaignSession
+
+
+async def make_db(world_state=None, **fields):
+    db = InMemoryDatabase()
+    doc = {"campaign_id": "c1", "world_state": world_state or {"time": "dawn"}, "turn": 0, **fields}
+    await db.world_states.insert_one(doc)
+    return db
+
+
+async def stored(db):
+    return await db.world_states.find_one({"campaign_id": "c1"})
+
+
+def test_session_coalesces_writes_into_one_versioned_flush():
+    async def scenario():
+        db, cache = await make_db(), CampaignStateCache()
+        session = CampaignSession(db, cache)
+        key = {"campaign_id": "c1"}
+        ops = db.ops
+
+        doc = await session.get("world_states", key)
+        await session.update("world_states", key, {"world_state": {"time": "noon"}})
+        await session.update("world_states", key, {"world_state": {"time": "dusk"}}, {"turn": 1})
+        assert (await session.get("world_states", key)) is doc
+        await session.flush()
+        # One read, one write
+        assert db.ops - ops == 2
+
+        doc = await stored(db)
+        assert doc["world_state"] == {"time": "dusk"}
+        assert doc["turn"] == 1 and doc["version"] == 1
+
+        # Served from cache on the next request, no round trip
+        ops = db.ops
+        cached = await cache.get(db, "world_states", key)
+        assert cached["version"] == 1 and db.ops == ops
+
+    asyncio.run(scenario())
+
+
+def test_stale_cache_entry_is_reloaded_on_version_conflict():
+    async def scenario():
+        db, cache = await make_db(), CampaignStateCache()
+        key = {"campaign_id": "c1"}
+        await cache.get(db, "world_states", key)
+
+        # Another worker writes behind the cache's back
+        await db.world_states.update_one(key, {"$set": {"version": 4, "turn": 7}})
+
+        written = await cache.write(db, "world_states", key, {"world_state": {"time": "night"}}, {"turn": 1})
+        assert written["version"] == 5 and written["turn"] == 8
+        assert cache.counters["conflicts"] == 1
+        assert (await stored(db))["turn"] == 8
+
+    asyncio.run(scenario())
+
+
+def test_interleaved_sessions_merge_instead_of_overwriting():
+    async def scenario():
+        db = await make_db({"time": "dawn", "weather": "clear", "recent_scenes": ["gate"]}, version=0)
+        key = {"campaign_id": "c1"}
+        # Two workers with their own caches, plus a second request on the first worker
+        worker_a, worker_b = CampaignStateCache(), CampaignStateCache()
+        first, second = CampaignSession(db, worker_a), CampaignSession(db, worker_a)
+        other = CampaignSession(db, worker_b)
+
+        for session in (first, second, other):
+            await session.get("world_states", key)
+
+        ws = (await first.get("world_states", key))["world_state"]
+        await first.update("world_states", key, {"world_state": {**ws, "time": "noon"}})
+        ws = (await other.get("world_states", key))["world_state"]
+        await other.update("world_states", key, {"world_state": {**ws, "recent_scenes": ["gate", "docks"]}})
+        ws = (await second.get("world_states", key))["world_state"]
+        await second.update("world_states", key, {"world_state": {**ws, "weather": "rain"}}, {"turn": 1})
+
+        await first.flush()
+        await other.flush()   # version conflict on worker b: reloads and merges
+        await second.flush()  # worker a's cache is stale: conflict, reload, merge
+
+        doc = await stored(db)
+        assert doc["world_state"] == {"time": "noon", "weather": "rain", "recent_scenes": ["gate", "docks"]}
+        assert doc["turn"] == 1 and doc["version"] == 3
+        assert worker_b.counters["conflicts"] == 1 and worker_a.counters["conflicts"] == 1
+        assert worker_a.counters["merge_conflicts"] == worker_b.counters["merge_conflicts"] == 0
+        assert (await worker_a.get(db, "world_states", key))["world_state"] == doc["world_state"]
+
+        # Both changing the same field: the later flush wins and the overlap is counted
+        late = CampaignSession(db, worker_b)
+        early = CampaignSession(db, worker_a)
+        for session, time_of_day in ((late, "dusk"), (early, "night")):
+            ws = (await session.get("world_states", key))["world_state"]
+            await session.update("world_states", key, {"world_state": {**ws, "time": time_of_day}})
+        await early.flush()
+        await late.flush()
+        assert (await stored(db))["world_state"]["time"] == "dusk"
+        assert worker_b.counters["merge_conflicts"] == 1
+
+    asyncio.run(scenario())
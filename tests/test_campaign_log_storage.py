@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from loadtest.memory_mongo import InMemoryDatabase
+from models.log_models import CampaignLogDelta, LeadDelta, NpcDelta
+from services.campaign_log_service import CampaignLogService, migrate_campaign_logs
+
+
+def test_delta_writes_one_document_per_entity_and_counts():
+    async def scenario():
+        db = InMemoryDatabase()
+        service = CampaignLogService(db)
+        delta = CampaignLogDelta(
+            npcs=[NpcDelta(id="npc_mira", name="Mira", role="smith")],
+            leads=[LeadDelta(id="lead_1", short_text="Noises at the barracks")]
+        )
+        assert await service.apply_delta("c1", delta, "ch1") == {"created": 2, "updated": 0}
+        assert await db.campaign_log_entries.count_documents({}) == 2
+
+        update = CampaignLogDelta(npcs=[NpcDelta(id="npc_mira", wants="revenge")])
+        assert await service.apply_delta("c1", update, "ch1") == {"created": 0, "updated": 1}
+
+        summary = await service.get_log_summary("c1", "ch1")
+        assert summary["counts"]["npcs"] == 1 and summary["counts"]["leads"] == 1
+        assert (await service.get_entity("c1", "npc", "npc_mira", "ch1"))["wants"] == "revenge"
+
+        await service.update_lead_status("c1", "lead_1", "resolved", "ch1")
+        assert await service.list_open_leads("c1", "ch1") == []
+        assert len((await service.get_log("c1", "ch1")).npcs) == 1
+
+    asyncio.run(scenario())
+
+
+def test_legacy_single_document_log_is_migrated():
+    async def scenario():
+        db = InMemoryDatabase()
+        await db.campaign_logs.insert_one({
+            "_id": 99, "campaign_id": "c1", "character_id": None,
+            "npcs": {"npc_a": {"id": "npc_a", "name": "Aldo"}},
+            "locations": {"loc_b": {"id": "loc_b", "name": "Bramble"}},
+        })
+        assert await migrate_campaign_logs(db) == 1
+        assert await migrate_campaign_logs(db) == 0
+
+        header = await db.campaign_logs.find_one({"campaign_id": "c1"})
+        assert "npcs" not in header and header["counts"]["locations"] == 1
+        service = CampaignLogService(db)
+        assert [npc.name for npc in await service.list_entities("c1", "npc")] == ["Aldo"]
+
+    asyncio.run(scenario())
+
+
+def test_category_pages_with_cursor_projection_and_incremental_sync():
+    async def scenario():
+        db = InMemoryDatabase()
+        service = CampaignLogService(db)
+        npcs = [NpcDelta(id=f"npc_{i}", name=f"Npc {i}", role="guard") for i in range(5)]
+        await service.apply_delta("c1", CampaignLogDelta(npcs=npcs), "ch1")
+        etag = await service.get_log_etag("c1", "ch1", "npc")
+
+        first = await service.list_entities_page("c1", "npc", "ch1", fields=["name"], limit=3)
+        assert first["items"] == [{"id": f"npc_{i}", "name": f"Npc {i}"} for i in range(3)]
+        second = await service.list_entities_page("c1", "npc", "ch1", cursor=first["next_cursor"], limit=3)
+        assert [npc.id for npc in second["items"]] == ["npc_3", "npc_4"]
+        assert second["next_cursor"] is None
+
+        await service.apply_delta("c1", CampaignLogDelta(npcs=[NpcDelta(id="npc_1", wants="gold")]), "ch1")
+        changed = await service.list_entities_page("c1", "npc", "ch1", updated_since=second["last_updated"])
+        # The boundary entry is sent again so same-millisecond writes are never skipped
+        assert [npc.id for npc in changed["items"]] == ["npc_4", "npc_1"]
+        assert await service.get_log_etag("c1", "ch1", "npc") != etag
+        # One header revision per write: the ETag can't collide like timestamps could
+        assert (await db.campaign_logs.find_one({"campaign_id": "c1"}))["revision"] == 2
+
+        with pytest.raises(ValueError):
+            await service.list_entities_page("c1", "npc", "ch1", fields=["nope"])
+
+    asyncio.run(scenario())
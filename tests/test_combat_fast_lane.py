@@ -0,0 +1,81 @@
+import asyncio
+import random
+
+import routers.dungeon_forge as dungeon_forge
+import services.llm_client as llm_client
+from loadtest.memory_mongo import InMemoryDatabase
+from services.campaign_cache import get_campaign_cache
+
+CHARACTER = {
+    "name": "Bram", "race": "Human", "class": "Fighter", "background": "Soldier", "goal": "Win",
+    "hp": 30, "max_hp": 30, "ac": 12, "abilities": {"str": 16, "dex": 12},
+}
+
+
+def _seed(db, enemies):
+    async def seed():
+        await db.characters.insert_one({"campaign_id": "c1", "character_id": "p1", "character_state": dict(CHARACTER)})
+        await db.combats.insert_one({"campaign_id": "c1", "character_id": "p1", "combat_state": {
+            "combat_id": "k1", "active": True, "round": 1, "combat_over": False, "enemies": enemies,
+        }})
+    return seed()
+
+
+def _setup(monkeypatch):
+    db = InMemoryDatabase()
+    monkeypatch.setattr(dungeon_forge, "_db", db)
+    get_campaign_cache().clear()
+
+    async def no_llm(*args, **kwargs):
+        raise AssertionError("combat turns must not call the LLM")
+
+    monkeypatch.setattr(llm_client, "chat_completion", no_llm)
+    return db
+
+
+def test_combat_turn_needs_only_character_and_combat_docs(monkeypatch):
+    db = _setup(monkeypatch)
+    random.seed(7)
+    ogre = {"id": "ogre_1", "name": "Ogre", "hp": 500, "max_hp": 500, "ac": 11, "attack_bonus": 6, "damage_die": "2d8",
+            "abilities": {"str": 18, "dex": 8}}
+
+    async def scenario():
+        await _seed(db, [ogre])
+        response = await dungeon_forge.process_action(
+            {"campaign_id": "c1", "character_id": "p1", "player_action": "I attack the ogre"}
+        )
+        combat = await db.combats.find_one({"campaign_id": "c1"})
+        character = await db.characters.find_one({"character_id": "p1"})
+        return response, combat, character
+
+    response, combat, character = asyncio.run(scenario())
+    assert response["combat_active"] is True and "Ogre" in response["narration"]
+    # Campaign and world state were never read
+    assert set(db._collections) == {"characters", "combats"}
+    assert combat["combat_state"]["enemies"][0]["hp"] <= 500
+    # Damage is persisted and the narration shows the post-damage HP
+    hp = character["character_state"]["hp"]
+    assert hp < 30 and f"HP: {hp}/30" in response["narration"]
+
+
+def test_combat_victory_awards_xp_in_one_character_write(monkeypatch):
+    db = _setup(monkeypatch)
+    random.seed(1)
+    rat = {"id": "rat_1", "name": "Rat", "hp": 1, "max_hp": 1, "ac": 1, "challenge_rating": 0.25}
+
+    async def scenario():
+        await _seed(db, [rat])
+        await db.world_states.insert_one({"campaign_id": "c1", "world_state": {"active_npcs": ["Rat", "Magda"]}})
+        response = await dungeon_forge.process_action(
+            {"campaign_id": "c1", "character_id": "p1", "player_action": "I attack the rat"}
+        )
+        combat = await db.combats.find_one({"campaign_id": "c1"})
+        character = await db.characters.find_one({"character_id": "p1"})
+        return response, combat, character
+
+    response, combat, character = asyncio.run(scenario())
+    assert response["combat_over"] is True and response["outcome"] == "victory"
+    assert response["world_state_update"] == {"active_npcs": ["Magda"]}
+    assert combat["combat_state"]["combat_over"] is True
+    assert character["character_state"]["current_xp"] == response["player_updates"]["xp_gained"] > 0
+    assert character["version"] == 1
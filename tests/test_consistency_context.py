@@ -0,0 +1,58 @@
+import asyncio
+import sys
+import types
+
+import services.consistency_context as consistency_context
+from services.consistency_context import assemble_consistency_context, count_tokens
+
+BLUEPRINT = {
+    "world_core": {"name": "Valdrath", "tone": "grim", "magic_level": "rare"},
+    "starting_town": {"name": "Raven's Hollow", "summary": "A fog-bound trade town. " * 20},
+    "points_of_interest": [
+        {"id": f"poi_{i}", "name": f"Place {i}", "description": "Old stones and rumors. " * 30}
+        for i in range(10)
+    ],
+    "key_npcs": [
+        {"name": f"Npc {i}", "role": "guard", "location_poi_id": f"poi_{i}", "secret": "Owes the guild. " * 30}
+        for i in range(10)
+    ],
+    "factions": [{"name": "Ashen Guild", "public_goal": "Trade. " * 40}],
+}
+
+
+def test_mentioned_and_local_entities_survive_a_tight_budget():
+    draft = {"narration": "Npc 7 nods at you from across the street."}
+    result = assemble_consistency_context(
+        draft, BLUEPRINT, {"current_location": "Place 3"}, token_budget=800
+    )
+
+    assert result["tokens"] <= 800
+    assert result["tokens"] == count_tokens(result["text"])
+    assert '"Npc 7"' in result["text"] and "poi_3" in result["text"]
+    assert '"Npc 5"' not in result["text"]
+    assert result["dropped"] and result["tokens_saved"] > 0
+
+
+def test_draft_is_kept_even_when_it_alone_exceeds_the_budget():
+    draft = {"narration": "You walk. " * 200}
+    result = assemble_consistency_context(draft, BLUEPRINT, {}, token_budget=50)
+
+    assert "You walk." in result["text"]
+    assert result["included"] == {"dm_draft": 1}
+
+
+def test_encoding_preloads_off_the_loop_and_falls_back_to_estimates(monkeypatch):
+    def unavailable(name):
+        raise OSError("offline")
+
+    monkeypatch.setitem(sys.modules, "tiktoken", types.SimpleNamespace(get_encoding=unavailable))
+    monkeypatch.setattr(consistency_context, "_encoding", None)
+    monkeypatch.setattr(consistency_context, "_encoding_loaded", False)
+
+    # Nothing is loaded on the request path
+    assert count_tokens("x" * 40) == 10 and not consistency_context._encoding_loaded
+
+    asyncio.run(consistency_context.preload_encoding())
+    assert consistency_context._encoding_loaded and consistency_context._encoding is None
+    assert count_tokens("x" * 40) == 10
+    assert consistency_context.get_consistency_context_stats()["token_counter"] == "estimate:chars/4"
@@ -0,0 +1,59 @@
+from services.consistency_triage import get_triage_stats, record_llm_validation, triage_dm_output
+
+BLUEPRINT = {
+    "starting_town": {"name": "Raven's Hollow"},
+    "points_of_interest": [{"id": "poi_lantern", "name": "Drowned Lantern"}],
+    "key_npcs": [{"name": "Magda Crowell", "role": "mayor"}],
+    "factions": [],
+}
+WORLD_STATE = {"current_location": "Raven's Hollow", "active_npcs": []}
+
+
+def test_plain_draft_about_known_canon_skips_the_llm():
+    draft = {"narration": "you find Magda Crowell counting coins near the Drowned Lantern."}
+    triage = triage_dm_output(draft, BLUEPRINT, WORLD_STATE, sample_rate=0)
+
+    assert triage == {"risk_score": 0.0, "signals": {}, "escalate": False, "reason": "low_risk"}
+
+
+def test_new_npc_and_location_drift_escalate():
+    draft = {
+        "narration": "a tall woman named Selka Varn waves you toward the docks.",
+        "world_state_update": {"current_location": "Black Docks"},
+    }
+    triage = triage_dm_output(draft, BLUEPRINT, WORLD_STATE, sample_rate=0)
+
+    assert triage["escalate"] and triage["reason"] == "risk"
+    assert triage["signals"]["new_npcs"] == ["Selka Varn"]
+    assert triage["signals"]["location_drift"] == ["Raven's Hollow → Black Docks"]
+    assert "unknown_names" not in triage["signals"]
+
+
+def test_audit_samples_escalate_low_risk_drafts_and_count_misses():
+    before = get_triage_stats()
+    draft = {"narration": "rain drums on the roofs."}
+    triage = triage_dm_output(draft, BLUEPRINT, WORLD_STATE, sample_rate=1.0)
+    assert triage["escalate"] and triage["reason"] == "audit_sample"
+
+    record_llm_validation(triage, {"decision": "revise_required"}, 1200.0)
+    stats = get_triage_stats()
+    assert stats["audit_samples"] == before["audit_samples"] + 1
+    assert stats["llm_calls"] == before["llm_calls"] + 1
+    assert stats["audit_miss_rate"] > 0
+
+
+def test_capitalized_narration_about_known_canon_skips_the_llm():
+    draft = {"narration": (
+        "Rain drums on the roofs of Raven's Hollow. Outside, nothing stirs. Behind the Drowned "
+        "Lantern, Magda Crowell counts coins. Dust hangs in the air. \"Nothing moves,\" she says."
+    )}
+    triage = triage_dm_output(draft, BLUEPRINT, WORLD_STATE, sample_rate=0)
+
+    assert triage == {"risk_score": 0.0, "signals": {}, "escalate": False, "reason": "low_risk"}
+
+
+def test_unknown_name_mid_sentence_is_still_a_signal():
+    draft = {"narration": "Rain falls. Behind the Drowned Lantern you notice Selka watching."}
+    triage = triage_dm_output(draft, BLUEPRINT, WORLD_STATE, sample_rate=0)
+
+    assert triage["signals"]["unknown_names"] == ["Selka"]
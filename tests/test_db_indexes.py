@@ -0,0 +1,32 @@
+from services.db_indexes import INDEX_SPECS, QUERY_SHAPES, summarize_explain
+
+
+def test_summarize_explain_flags_collection_scan_and_sort():
+    explain = {
+        "queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}},
+        "executionStats": {"totalDocsExamined": 500, "nReturned": 1, "executionTimeMillis": 3},
+    }
+    summary = summarize_explain(explain)
+    assert summary["stages"] == ["SORT", "COLLSCAN"]
+    assert summary["collection_scan"] and summary["in_memory_sort"]
+    assert summary["docs_examined"] == 500
+
+
+def test_summarize_explain_reports_index_from_nested_plan():
+    explain = {"queryPlanner": {"winningPlan": {"queryPlan": {
+        "stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "campaign_id_unique"}
+    }}}}
+    summary = summarize_explain(explain)
+    assert summary["indexes"] == ["campaign_id_unique"]
+    assert not summary["collection_scan"]
+
+
+def test_every_query_shape_has_a_declared_index_prefix():
+    for shape in QUERY_SHAPES:
+        fields = set(shape["filter"])
+        if not fields:
+            continue
+        prefixes = [
+            model.document["key"].keys() for model in INDEX_SPECS[shape["collection"]]
+        ]
+        assert any(next(iter(keys)) in fields for keys in prefixes), shape
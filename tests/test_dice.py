@@ -0,0 +1,86 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+from services import dnd_rules
+from services.dice import compile_formula, get_dice_session_info, roll_batch
+
+
+def test_formula_features():
+    rng = random.Random(5)
+    advantage = compile_formula("2d20kh1+7").roll(rng)
+    assert len(advantage["rolls"]) == 2 and advantage["kept"] == [max(advantage["rolls"])]
+    assert advantage["total"] == max(advantage["rolls"]) + 7 and advantage["modifier"] == 7
+
+    stats = compile_formula("4d6dl1").roll(rng)
+    assert stats["kept"] == sorted(stats["rolls"], reverse=True)[:3]
+
+    mixed = compile_formula("1d8 + 1d6 - 2").roll(rng)
+    assert [term["notation"] for term in mixed["terms"]] == ["1d8", "1d6"]
+    assert mixed["total"] == sum(mixed["rolls"]) - 2
+
+    assert all(value > 1 for value in compile_formula("20d6r1").roll(rng)["rolls"])
+    assert compile_formula("d%").terms[0].sides == 100
+    # Parsed once, then shared
+    assert compile_formula("2d20kh1+7") is compile_formula("2d20kh1+7")
+
+    for bad in ["", "1d20 5", "0d6", "1d6kk1", "1d6+", "1d1!", "1d6r<7", "1d6!!"]:
+        with pytest.raises(ValueError):
+            compile_formula(bad)
+
+
+def test_vectorized_sampling_matches_expectations():
+    assert abs(compile_formula("2d6+3").sample(50000, seed=1).mean() - 10) < 0.1
+    # Exploding d6 averages 3.5 * 6/5
+    assert abs(compile_formula("1d6!").sample(50000, seed=2).mean() - 4.2) < 0.1
+    advantage = compile_formula("2d20kh1").sample(50000, seed=3)
+    assert abs(advantage.mean() - 13.825) < 0.15 and advantage.min() >= 1 and advantage.max() <= 20
+    assert compile_formula("2d6ro<3").sample(10000, seed=4).min() >= 2
+
+
+def test_sessions_replay_and_batch_endpoint():
+    first = roll_batch(["1d20", "4d6dl1", "1d6!"], session_id="replay-a", seed=42)
+    replay = roll_batch(["1d20", "4d6dl1", "1d6!"], session_id="replay-b", seed=42)
+    assert [r["total"] for r in first["results"]] == [r["total"] for r in replay["results"]]
+
+    # Server-picked seeds are never exposed; client-chosen ones can be looked up
+    unseeded = roll_batch(["1d20"], session_id="replay-c")
+    second = roll_batch(["1d20"], session_id="replay-c")
+    assert unseeded["seed"] is None and (unseeded["sequence"], second["sequence"]) == (0, 1)
+    assert get_dice_session_info("replay-c") == {"session_id": "replay-c", "seed": None, "sequence": 2}
+    assert get_dice_session_info("replay-a")["seed"] == 42
+
+    # An invalid formula fails the whole batch before the session RNG is used
+    with pytest.raises(ValueError):
+        roll_batch(["1d20", "nope"], session_id="replay-a")
+
+    server = pytest.importorskip("server")
+    response = asyncio.run(server.roll_dice_batch_endpoint(
+        server.DiceBatchRequest(formulas=["1d20+5", "2d20kl1"], session_id="api", seed=7)
+    ))
+    body = json.loads(response.body)
+    assert [r["formula"] for r in body["data"]["results"]] == ["1d20+5", "2d20kl1"]
+
+
+def test_dice_budgets():
+    # Worst case was 1100 dice x 100 formulas, each die rerolling and exploding
+    with pytest.raises(ValueError):
+        compile_formula("+".join(["100d1000r<999!>1"] * 11))
+    with pytest.raises(ValueError):
+        roll_batch(["100d1000r<999!>1"] * 100)
+    with pytest.raises(ValueError):
+        roll_batch(["100d6"] * 11)
+    assert len(roll_batch(["100d6"] * 10)["results"]) == 10
+
+    server = pytest.importorskip("server")
+    response = asyncio.run(server.roll_dice_batch_endpoint(server.DiceBatchRequest(formulas=["100d1000r<999"] * 10)))
+    assert response.status_code == 400
+
+
+def test_rules_engine_rolls_through_dice_module():
+    random.seed(9)
+    expected = compile_formula("2d8").total(random.Random(9))
+    assert dnd_rules.roll_dice("2d8") == expected
+    assert dnd_rules.roll_dice("5") == 5
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+
+import routers.dungeon_forge as dungeon_forge
+import services.encounter_simulator as encounter_simulator
+import services.llm_client as llm_client
+from data.example_worlds import VALDRATH_BLUEPRINT
+from loadtest.fake_llm import canned_response
+from loadtest.memory_mongo import InMemoryDatabase
+from services.campaign_cache import get_campaign_cache
+from services.combat_engine_service import process_enemy_turns, process_player_attack
+from services.encounter_simulator import select_encounter_for_band, simulate_encounter
+from services.enemy_sourcing_service import label_enemies, select_enemies_for_location
+
+PLAYER = {"name": "Bram", "hp": 12, "max_hp": 12, "ac": 14, "abilities": {"str": 16, "dex": 12}}
+BANDIT = {"id": "bandit_1", "name": "Bandit", "hp": 15, "max_hp": 15, "ac": 13, "attack_bonus": 3,
+          "damage_die": "1d6+1", "abilities": {"str": 12, "dex": 12}}
+RAT = {"id": "rat_1", "name": "Rat", "hp": 3, "max_hp": 3, "ac": 8, "damage_die": "1d2", "abilities": {}}
+
+
+def _engine_win_rate(fights):
+    """Play fights through the real combat engine, one attack exchange per round"""
+    random.seed(11)
+    wins = 0
+    for _ in range(fights):
+        character = dict(PLAYER)
+        combat = {"enemies": [dict(BANDIT)]}
+        while True:
+            result = process_player_attack("bandit_1", character, combat)
+            if result["combat_over"]:
+                wins += 1
+                break
+            enemy_turn = process_enemy_turns(character, combat)
+            character["hp"] = enemy_turn["character_state_update"]["hp"]
+            if enemy_turn["combat_over"]:
+                break
+    return wins / fights
+
+
+def test_simulator_matches_combat_engine():
+    simulation = simulate_encounter(PLAYER, [BANDIT], trials=20000, seed=3)
+    assert abs(simulation["win_probability"] - _engine_win_rate(1000)) < 0.06
+    assert abs(simulation["win_probability"] + simulation["loss_probability"] + simulation["timeout_probability"] - 1) < 1e-3
+    assert simulation["expected_rounds"] > 1
+    # Same seed, same numbers
+    assert simulate_encounter(PLAYER, [BANDIT], trials=500, seed=9)["win_probability"] == \
+        simulate_encounter(PLAYER, [BANDIT], trials=500, seed=9)["win_probability"]
+
+
+def test_band_selection_and_sourcing():
+    trivial = simulate_encounter(PLAYER, [RAT], trials=2000, seed=1)
+    assert trivial["difficulty"] == "trivial" and trivial["player_hp_remaining"] > 11
+
+    selection = select_encounter_for_band(PLAYER, [RAT, BANDIT], target_difficulty="trivial", seed=1)
+    assert selection["matched"] and [e["name"] for e in selection["enemies"]] == ["Rat"]
+    deadly = select_encounter_for_band(PLAYER, [RAT, BANDIT], target_difficulty="deadly", seed=1)
+    assert "Bandit" in [e["name"] for e in deadly["enemies"]]
+
+    # Without a character the default pair is kept; with one the group is tuned
+    assert [e["name"] for e in select_enemies_for_location({}, {}, 1)] == ["Bandit", "Thug"]
+    tuned = select_enemies_for_location({}, {}, 1, character_state=PLAYER, target_difficulty="easy")
+    assert [e["name"] for e in tuned] == ["Thug"]
+
+    # Repeated templates become separate combatants
+    wolves = label_enemies([{"name": "Wolf"}, {"name": "Wolf"}, {"name": "Bear"}])
+    assert [(e["id"], e["name"]) for e in wolves] == [
+        ("enemy-wolf-1", "Wolf 1"), ("enemy-wolf-2", "Wolf 2"), ("enemy-bear-3", "Bear")
+    ]
+
+
+class CombatStartingLLM:
+    """Canned agent replies, with the DM starting a fight"""
+
+    async def chat_completion(self, model, messages, **kwargs):
+        route, content = canned_response(random.Random(0), messages)
+        if route == "dungeon_forge":
+            content = json.dumps({**json.loads(content), "starts_combat": True})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+def test_combat_start_route_uses_difficulty_targeting(monkeypatch):
+    db = InMemoryDatabase()
+    monkeypatch.setattr(dungeon_forge, "_db", db)
+    monkeypatch.setattr(llm_client, "_client", CombatStartingLLM())
+    get_campaign_cache().clear()
+    searches = []
+    real_select = encounter_simulator.select_encounter_for_band
+    monkeypatch.setattr(encounter_simulator, "select_encounter_for_band",
+                        lambda *args, **kwargs: searches.append(kwargs) or real_select(*args, **kwargs))
+
+    async def scenario():
+        town = VALDRATH_BLUEPRINT["starting_town"]["name"]
+        await dungeon_forge.create_campaign("c1", VALDRATH_BLUEPRINT["world_core"]["name"], VALDRATH_BLUEPRINT)
+        await dungeon_forge.create_world_state("c1", {"current_location": town, "active_npcs": []})
+        await dungeon_forge.create_character_doc("c1", "p1", {
+            "name": "Bram", "race": "Human", "class": "Fighter", "background": "Soldier", "goal": "Win", **PLAYER
+        })
+        response = await dungeon_forge.process_action(
+            {"campaign_id": "c1", "character_id": "p1", "player_action": "I draw my sword and wait"}
+        )
+        return json.loads(response.body)["data"], await db.combats.find_one({"campaign_id": "c1"})
+
+    response, combat = asyncio.run(scenario())
+    assert response["combat_started"] is True
+    assert searches and searches[0]["target_difficulty"] == "medium"
+    enemies = combat["combat_state"]["enemies"]
+    assert enemies and len({e["id"] for e in enemies}) == len(enemies)
+    assert combat["combat_state"]["turn_order"] == ["player"] + [e["id"] for e in enemies]
+
+
+def test_simulate_endpoint():
+    async def scenario():
+        ok = await dungeon_forge.simulate_encounter_endpoint(
+            {"character": PLAYER, "enemies": [RAT], "trials": 1000, "seed": 4}
+        )
+        bad = await dungeon_forge.simulate_encounter_endpoint({"character": PLAYER, "enemies": [RAT],
+                                                               "target_difficulty": "impossible"})
+        return ok, bad
+
+    ok, bad = asyncio.run(scenario())
+    body = json.loads(ok.body)
+    assert ok.status_code == 200 and body["data"]["trials"] == 1000 and body["data"]["difficulty"] == "trivial"
+    assert bad.status_code == 422
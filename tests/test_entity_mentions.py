@@ -0,0 +1,33 @@
+from utils.entity_mentions import extract_entity_mentions, get_entity_matcher
+
+BLUEPRINT = {
+    "npcs": [{"name": "Haven", "id": "npc_haven"}],
+    "regions": [{"name": "Thieves Haven", "locations": ["Old Port", "Port"]}],
+    "factions": [{"name": "Ash"}],
+}
+
+
+def spans(mentions):
+    return [(m["entity_id"], m["display_text"]) for m in mentions]
+
+
+def test_reports_every_word_bounded_occurrence_longest_first():
+    narration = "Thieves Haven sleeps. Haven waits by the Old Port; the port is quiet. Ashes drift. Ash rises."
+    mentions = extract_entity_mentions(narration, get_entity_matcher(BLUEPRINT))
+    assert spans(mentions) == [
+        ("loc_thieves_haven", "Thieves Haven"),
+        ("npc_haven", "Haven"),
+        ("loc_old_port", "Old Port"),
+        ("loc_port", "port"),
+        ("faction_ash", "Ash"),
+    ]
+    assert narration[mentions[1]["start"]:mentions[1]["end"]] == "Haven"
+
+
+def test_matcher_is_reused_and_items_refresh():
+    matcher = get_entity_matcher(BLUEPRINT, {"inventory": [{"name": "Rope"}]})
+    assert spans(extract_entity_mentions("You coil the rope.", matcher)) == [("item_rope", "rope")]
+
+    again = get_entity_matcher(BLUEPRINT, {"inventory": [{"name": "Lantern"}]})
+    assert again is matcher
+    assert spans(extract_entity_mentions("The rope and the lantern.", again)) == [("item_lantern", "lantern")]
@@ -0,0 +1,39 @@
+from services.intent_cache import IntentCache, normalize_action
+
+STEALTH = {"needs_check": True, "ability": "DEX", "skill": "Stealth", "action_type": "stealth", "risk_level": 2}
+
+
+def test_exact_hit_ignores_case_punctuation_and_filler():
+    cache = IntentCache()
+    cache.put("I sneak past the guards.", ["Stealth"], STEALTH, campaign_id="c1")
+
+    assert normalize_action("I'll sneak past the guards!") == "sneak past the guards"
+    assert cache.get("sneak past the GUARDS", ["Stealth"], campaign_id="c1") == STEALTH
+    assert cache.counters["exact_hits"] == 1
+
+
+def test_similar_hit_respects_threshold_proficiencies_and_negation():
+    cache = IntentCache(similarity_threshold=0.6)
+    cache.put("sneak past the guards", ["Stealth"], STEALTH)
+
+    assert cache.get("sneak past the guard", ["Stealth"]) == STEALTH
+    assert cache.get("sneak past the guard", ["Athletics"]) is None
+    assert cache.get("don't sneak past the guards", ["Stealth"]) is None
+    assert cache.counters["similar_hits"] == 1
+
+
+def test_global_scope_serves_other_campaigns_and_lru_evicts():
+    cache = IntentCache(max_entries=2)
+    cache.put("search the room", [], STEALTH, campaign_id="c1")
+
+    assert cache.get("search the room", [], campaign_id="c2") == STEALTH
+    cache.put("look around", [], STEALTH)
+    assert cache.counters["evictions"] == 1
+
+
+def test_expired_entries_miss():
+    cache = IntentCache(ttl_seconds=-1)
+    cache.put("look around", [], STEALTH)
+
+    assert cache.get("look around", []) is None
+    assert cache.stats()["hit_rate"] == 0.0
@@ -0,0 +1,44 @@
+from services.dc_rules import DCHelper
+from services.intent_classifier import classify_intent, record_agreement, get_agreement_stats
+
+
+def test_confident_single_category_matches():
+    result = classify_intent("I sneak past the guards")
+    assert result["intent"]["skill"] == "Stealth"
+    assert result["confidence"] >= 0.85
+
+    assert classify_intent("go to the tavern")["intent"]["action_type"] == "movement"
+    assert classify_intent("I attack the goblin")["intent"]["action_type"] == "combat"
+
+
+def test_ambiguous_actions_fall_below_threshold():
+    assert classify_intent("I try to persuade the guard and then climb the wall")["confidence"] < 0.85
+    assert classify_intent("I do not attack")["confidence"] < 0.85
+    assert classify_intent("whitewash the fence")["intent"] is None
+
+
+def test_keywords_match_whole_words_and_ambiguous_ones_defer_to_the_llm():
+    # Not the start of a longer word
+    assert classify_intent("I talk to the tailor")["matched"] == []
+    assert classify_intent("I thank the singer")["intent"] is None
+
+    for action in ["I lie down to rest", "I go to sleep", "I hunt for clues"]:
+        assert classify_intent(action)["confidence"] < 0.85, action
+
+    assert classify_intent("I lie to the guard")["confidence"] >= 0.85
+    assert classify_intent("I go to the tavern")["confidence"] >= 0.85
+
+
+def test_dc_action_type_table_keeps_priority_order():
+    assert DCHelper.get_action_type_from_intent("I climb and search", {}) == "climb"
+    assert DCHelper.get_action_type_from_intent("hum a tune", {}) == "investigate"
+
+
+def test_agreement_is_bucketed_by_confidence():
+    local = classify_intent("search the room")
+    record_agreement(local, {"action_type": "investigation", "needs_check": True})
+    record_agreement(local, {"action_type": "exploration", "needs_check": False})
+
+    bucket = get_agreement_stats()["buckets"]["0.9"]
+    assert bucket["compared"] >= 2
+    assert bucket["agreed"] >= 1
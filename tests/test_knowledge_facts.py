@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from loadtest.memory_mongo import InMemoryDatabase
+from models.knowledge_models import KnowledgeFact
+from routers import knowledge
+from services.db_indexes import ensure_indexes
+from services.knowledge_facts import upsert_introduction_facts
+
+
+def make_db():
+    db = InMemoryDatabase()
+    asyncio.run(ensure_indexes(db))
+    return db
+
+
+def test_one_bulk_upsert_per_distinct_entity():
+    db = make_db()
+    mentions = [
+        {"entity_type": "npc", "entity_id": "npc_1", "display_text": "Mira"},
+        {"entity_type": "location", "entity_id": "loc_port", "display_text": "Port"},
+        {"entity_type": "npc", "entity_id": "npc_1", "display_text": "mira"},
+    ]
+
+    async def scenario():
+        ops = db.ops
+        created = await upsert_introduction_facts(db, "c1", "ch1", mentions, fact_text=lambda m: f"Met {m['display_text']}")
+        assert db.ops - ops == 1
+        # Existing introductions are left untouched
+        again = await upsert_introduction_facts(db, "c1", "ch1", mentions, fact_text=lambda m: "changed")
+        fact = await db.knowledge_facts.find_one({"entity_id": "npc_1"})
+        return created, again, fact, await db.knowledge_facts.count_documents({})
+
+    created, again, fact, count = asyncio.run(scenario())
+    assert (created, again, count) == (2, 0, 2)
+    assert fact["fact_type"] == "introduction" and fact["fact_text"] == "Met Mira"
+
+
+def test_no_mentions_no_write():
+    db = make_db()
+    ops = db.ops
+    assert asyncio.run(upsert_introduction_facts(db, "c1", None, [], fact_text=str)) == 0
+    assert db.ops == ops
+
+
+def test_posting_the_same_introduction_twice(monkeypatch):
+    db = make_db()
+    monkeypatch.setattr(knowledge, "_db", db)
+    fact = KnowledgeFact(
+        campaign_id="c1", entity_type="npc", entity_id="npc_1", entity_name="Mira",
+        fact_type="introduction", fact_text="Met Mira at the docks"
+    )
+    rumor = fact.model_copy(update={"fact_type": "rumor", "fact_text": "Mira smuggles"})
+
+    async def scenario():
+        first = await knowledge.create_knowledge_fact(fact)
+        second = await knowledge.create_knowledge_fact(fact)
+        # The unique index is partial: other fact types can repeat
+        await knowledge.create_knowledge_fact(rumor)
+        await knowledge.create_knowledge_fact(rumor)
+        with pytest.raises(DuplicateKeyError):
+            await db.knowledge_facts.insert_one(fact.model_dump())
+        return first, second, await db.knowledge_facts.find({"campaign_id": "c1"}).to_list(None)
+
+    first, second, facts = asyncio.run(scenario())
+    assert first["created"] and not second["created"]
+    assert sorted(f["fact_type"] for f in facts) == ["introduction", "rumor", "rumor"]
@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import llm_client
+
+
+class FlakyBackend:
+    def __init__(self, failures, error):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    async def create(self, model, messages, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return llm_client._Response("ok")
+
+
+def build_client(backend):
+    client = llm_client.AsyncLLMClient("sk-test", max_retries=2, retry_base_delay=0)
+    client._backend = backend
+    return client
+
+
+def test_chat_completion_retries_transient_errors():
+    backend = FlakyBackend(failures=2, error=httpx.ConnectError("reset"))
+    client = build_client(backend)
+
+    completion = asyncio.run(client.chat_completion("gpt-4o-mini", [{"role": "user", "content": "hi"}]))
+
+    assert completion.choices[0].message.content == "ok"
+    assert backend.calls == 3
+
+
+def test_chat_completion_does_not_retry_permanent_errors():
+    backend = FlakyBackend(failures=5, error=ValueError("bad request"))
+    client = build_client(backend)
+
+    with pytest.raises(ValueError):
+        asyncio.run(client.chat_completion("gpt-4o", [{"role": "user", "content": "hi"}]))
+    assert backend.calls == 1
+
+
+class Usage:
+    def __init__(self, prompt_tokens, cached_tokens):
+        self.prompt_tokens = prompt_tokens
+        self.prompt_tokens_details = type("Details", (), {"cached_tokens": cached_tokens})()
+
+
+def test_prompt_token_stats_split_cached_and_uncached():
+    llm_client._prompt_token_stats.clear()
+    llm_client._record_usage("gpt-test", Usage(2000, 1536))
+    llm_client._record_usage("gpt-test", Usage(1000, 0))
+
+    stats = llm_client.get_prompt_token_stats()["gpt-test"]
+    assert stats["calls"] == 2
+    assert stats["cached_tokens"] == 1536
+    assert stats["uncached_tokens"] == 1464
+    assert stats["cache_hit_ratio"] == 0.512
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import random
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from loadtest.fake_llm import LatencyModel, canned_response, parse_latency_args
+from loadtest.load_generator import percentile
+from loadtest.memory_mongo import InMemoryDatabase
+
+
+def test_memory_mongo_covers_the_backend_query_shapes():
+    async def scenario():
+        db = InMemoryDatabase()
+        await db.work_jobs.create_index("idempotency_key", unique=True)
+        doc = {"idempotency_key": "k1", "status": "pending", "attempts": 0, "state": {"turn": 1}}
+        await db.work_jobs.insert_one(doc)
+        assert "_id" in doc
+        try:
+            await db.work_jobs.insert_one({"idempotency_key": "k1"})
+            raise AssertionError("unique index not enforced")
+        except DuplicateKeyError:
+            pass
+
+        claimed = await db.work_jobs.find_one_and_update(
+            {"status": "pending", "attempts": {"$lte": 0}},
+            {"$set": {"status": "running", "state.location": "Docks"}, "$inc": {"attempts": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+        # A missing field matches None, like the campaign cache's version check
+        versioned = await db.work_jobs.update_one({"idempotency_key": "k1", "version": None}, {"$inc": {"version": 1}})
+        await db.work_jobs.bulk_write([
+            UpdateOne({"idempotency_key": "k2"}, {"$setOnInsert": {"status": "pending"}}, upsert=True),
+            UpdateOne({"idempotency_key": "k1"}, {"$push": {"log": {"$each": ["a", "b"]}}}),
+        ], ordered=False)
+        rows = [row async for row in db.work_jobs.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])]
+        newest = await db.work_jobs.find({}, {"idempotency_key": 1, "_id": 0}).sort("idempotency_key", -1).limit(1).to_list(None)
+        return claimed, versioned, rows, newest, await db.work_jobs.find_one({"idempotency_key": "k1"}, {"_id": 0})
+
+    claimed, versioned, rows, newest, stored = asyncio.run(scenario())
+    assert claimed["status"] == "running" and claimed["attempts"] == 1
+    assert claimed["state"] == {"turn": 1, "location": "Docks"}
+    assert versioned.matched_count == 1
+    assert sorted((r["_id"], r["count"]) for r in rows) == [("pending", 1), ("running", 1)]
+    assert newest == [{"idempotency_key": "k2"}]
+    assert stored["log"] == ["a", "b"] and stored["version"] == 1
+
+
+def test_fake_llm_routes_prompts_to_canned_agent_json():
+    rng = random.Random(0)
+    route, content = canned_response(rng, [
+        {"role": "system", "content": "You are a precise JSON classifier."},
+        {"role": "user", "content": 'You are an INTENT TAGGER for a D&D 5e RPG.\nPlayer action: "I sneak past the guard"'},
+    ])
+    assert route == "intent_tagger" and json.loads(content)["skill"] == "Stealth"
+
+    route, content = canned_response(rng, [
+        {"role": "system", "content": "DUNGEON MASTER AGENT\n...\nINJECTED CONTEXT FOR THIS REQUEST\nLocation: Mistward Market\n"},
+        {"role": "user", "content": 'Player action: "I look around"'},
+    ])
+    dm_response = json.loads(content)
+    assert route == "dungeon_forge" and "Mistward Market" in dm_response["narration"]
+    assert dm_response["narration"].endswith("What do you do?")
+
+    route, content = canned_response(rng, [{"role": "system", "content": "STORY CONSISTENCY LAYER AGENT v6.0"}])
+    assert route == "consistency_agent" and json.loads(content)["decision"] == "approve"
+
+
+def test_latency_specs_and_percentiles():
+    latency = parse_latency_args(["uniform:100,200", "gpt-4o=fixed:900"])
+    assert latency["gpt-4o"].sample(random.Random(1)) == 900
+    assert 100 <= latency["gpt-4o-mini"].sample(random.Random(1)) <= 200
+    try:
+        LatencyModel("gaussian:1")
+        raise AssertionError("bad spec accepted")
+    except ValueError:
+        pass
+
+    values = list(range(1, 101))
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50, 95, 99)
+    assert percentile([], 99) == 0.0
@@ -0,0 +1,19 @@
+from services.narration_filter import CompiledNarrationFilter, NarrationFilter
+
+
+def test_single_pass_removes_phrases_and_reports_sentence_spans():
+    compiled = CompiledNarrationFilter(["you see", "you see the", "suddenly"])
+    result = compiled.process("SUDDENLY you see the gate.  It creaks!  Rain falls. Mud", max_sentences=3)
+
+    assert result.text == "gate. It creaks! Rain falls."
+    assert result.sentences == ["gate.", "It creaks!", "Rain falls."]
+    assert result.removed_phrases == ["suddenly", "you see the"]
+    assert result.original_sentence_count == 4 and result.truncated
+
+
+def test_static_api_keeps_legacy_behaviour():
+    text = "You walk in... The fire crackles!? A trailing thought"
+    assert NarrationFilter.count_sentences(text) == 3
+    assert NarrationFilter.enforce_sentence_limit(text, max_sentences=3) == text
+    assert NarrationFilter.enforce_sentence_limit(text, max_sentences=2) == "You walk in... The fire crackles!?"
+    assert NarrationFilter.remove_banned_phrases("Somehow , it appears that the door opens .") == ", the door opens."
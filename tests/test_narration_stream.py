@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import routers.dungeon_forge as dungeon_forge
+from services.narration_filter import IncrementalNarrationFilter, NarrationFilter
+from services.narration_stream import NarrationJSONExtractor
+
+
+def feed_in_chunks(extractor, text, size):
+    return "".join(extractor.feed(text[i:i + size]) for i in range(0, len(text), size))
+
+
+def test_extractor_decodes_narration_across_chunk_boundaries():
+    raw = '{"scene_mode": "social", "narration": "He says \\"hi\\".\\nCaf\\u00e9 doors creak.", "check_request": null}'
+    for size in (1, 3, 7):
+        extractor = NarrationJSONExtractor()
+        assert feed_in_chunks(extractor, raw, size) == 'He says "hi".\nCafé doors creak.'
+        assert extractor.done
+
+
+def test_incremental_filter_matches_batch_filter():
+    narration = "Suddenly the gate opens. A guard waves you in! Rain hammers the cobbles. The captain frowns. Torches gutter"
+    stream_filter = IncrementalNarrationFilter(max_sentences=3)
+    sentences = []
+    for i in range(0, len(narration), 4):
+        sentences += stream_filter.feed(narration[i:i + 4])
+    sentences += stream_filter.finish()
+
+    assert " ".join(sentences) == NarrationFilter.apply_filter(narration, max_sentences=3)
+    assert stream_filter.dropped == 2
+
+
+def _action_task(campaign_id):
+    [task] = [t for t in asyncio.all_tasks() if t.get_name() == f"background.action_stream:{campaign_id}"]
+    return task
+
+
+def test_stream_ends_on_cancellation_and_disconnect_cancels_the_action(monkeypatch):
+    async def never_finishes(request):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(dungeon_forge, "process_action", never_finishes)
+
+    async def scenario():
+        # The action is cancelled: the stream still gets its terminal event
+        response = await dungeon_forge.process_action_stream({"campaign_id": "c1"})
+        first = asyncio.ensure_future(response.body_iterator.__anext__())
+        await asyncio.sleep(0)
+        _action_task("c1").cancel()
+        done = json.loads(await asyncio.wait_for(first, 1))
+
+        # The client goes away mid-turn: the action is cancelled with it
+        response = await dungeon_forge.process_action_stream({"campaign_id": "c2"})
+        action = _action_task("c2")
+        reader = asyncio.ensure_future(response.body_iterator.__anext__())
+        await asyncio.sleep(0)
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+        await asyncio.gather(action, return_exceptions=True)
+        return done, action
+
+    done, action = asyncio.run(scenario())
+    assert done["type"] == "done" and done["success"] is False and done["error"]["type"] == "cancelled"
+    assert action.cancelled()
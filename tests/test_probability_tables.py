@@ -0,0 +1,75 @@
+import asyncio
+import itertools
+import json
+
+import pytest
+
+import routers.dungeon_forge as dungeon_forge
+from services.probability_tables import (
+    CHECK_TABLE, HIT_TABLE, MODIFIERS, TARGETS, attack_crit_chance, attack_hit_chance,
+    check_success_chance, expected_attack_damage, expected_damage, format_success_chance,
+)
+
+FACES = range(1, 21)
+
+
+def _d20(mode):
+    """Every equally likely d20 result for a mode"""
+    if mode == "normal":
+        return list(FACES)
+    pick = max if mode == "advantage" else min
+    return [pick(a, b) for a, b in itertools.product(FACES, FACES)]
+
+
+@pytest.mark.parametrize("mode_index,mode", list(enumerate(["normal", "advantage", "disadvantage"])))
+def test_tables_match_enumeration(mode_index, mode):
+    rolls = _d20(mode)
+    for modifier, target in [(0, 10), (3, 15), (-2, 5), (7, 25), (-5, 30), (15, 1)]:
+        check = sum(r + modifier >= target for r in rolls) / len(rolls)
+        hit = sum(r == 20 or (r != 1 and r + modifier >= target) for r in rolls) / len(rolls)
+        row, col = list(MODIFIERS).index(modifier), list(TARGETS).index(target)
+        assert CHECK_TABLE[mode_index, row, col] == pytest.approx(check, abs=1e-6)
+        assert HIT_TABLE[mode_index, row, col] == pytest.approx(hit, abs=1e-6)
+        assert check_success_chance(modifier, target, mode) == pytest.approx(check)
+        assert attack_hit_chance(modifier, target, mode) == pytest.approx(hit)
+    assert attack_crit_chance(mode) == pytest.approx(sum(r == 20 for r in rolls) / len(rolls))
+
+    # Out of the tabulated range still exact: nat 1 / nat 20 bounds for attacks
+    assert check_success_chance(40, 10, mode) == 1.0
+    assert attack_hit_chance(40, 10, mode) == pytest.approx(1 - sum(r == 1 for r in rolls) / len(rolls))
+
+
+def test_damage_expectations():
+    assert expected_damage("1d6") == pytest.approx(3.5)
+    assert expected_damage("1d6", crit=True) == pytest.approx(7.0)
+    # resolve_attack deals at least 1 damage
+    assert expected_damage("1d4", -3) == pytest.approx(1.0)
+    assert expected_damage("3d4", 1) == pytest.approx(8.5)
+    per_attack = 0.6 * expected_damage("1d8", 3) + 0.05 * expected_damage("1d8", 3, crit=True)
+    assert expected_attack_damage(5, 13, "1d8", 3) == pytest.approx(per_attack, rel=1e-6)
+    with pytest.raises(ValueError):
+        expected_damage("1d6!")
+
+    # Closed form when the min-1 clamp can't apply, bounded by the dice engine limits
+    assert expected_damage("100d1000", 5, crit=True) == pytest.approx(200 * 500.5 + 5)
+    assert expected_damage("3d4", -10) == pytest.approx(65 / 64)
+    for too_big in ["1000d1000", "1d100000", "0d6"]:
+        with pytest.raises(ValueError):
+            expected_damage(too_big)
+
+
+def test_dc_stage_injects_check_odds():
+    ctx = {
+        "intent_flags": {"needs_check": True},
+        "player_action": "I sneak past the guards",
+        "world_state": {},
+        "character_state": {"level": 1, "abilities": {"dex": 16}, "proficiencies": ["Stealth"],
+                            "proficiency_bonus": 2},
+    }
+    flags = dungeon_forge._stage_dc_calculation(ctx)["dc_intent_flags"]
+    odds = flags["check_odds"]
+    assert odds["success_chance"] == pytest.approx(check_success_chance(odds["modifier"], flags["suggested_dc"]))
+    assert format_success_chance(odds).startswith(f"success chance: {odds['success_chance']:.0%}")
+
+    response = asyncio.run(dungeon_forge.get_odds_endpoint(dc=15, modifier=3, advantage="advantage"))
+    assert json.loads(response.body)["data"]["success_chance"] == 0.6975
@@ -0,0 +1,25 @@
+from services.state_diff import diff_update
+
+
+def test_diff_emits_field_level_operators():
+    old = {"world_state": {
+        "current_location": "harbor", "time_of_day": "dawn", "weather": "rain",
+        "recent_scenes": ["a", "b"], "npc_personalities": {"npc_1": {"mood": "calm", "trust": 1}}
+    }}
+    new = {"world_state": {
+        "current_location": "market", "time_of_day": "dawn",
+        "recent_scenes": ["a", "b", "c"], "npc_personalities": {"npc_1": {"mood": "angry", "trust": 1}}
+    }}
+    assert diff_update(old, new) == {
+        "$set": {"world_state.current_location": "market", "world_state.npc_personalities.npc_1.mood": "angry"},
+        "$unset": {"world_state.weather": ""},
+        "$push": {"world_state.recent_scenes": {"$each": ["c"]}},
+    }
+
+
+def test_diff_falls_back_to_parent_set():
+    # Rewritten list and a key that can't be used in a dotted path
+    old = {"inventory": ["rope", "torch"], "flags": {"a.b": 1}}
+    new = {"inventory": ["torch"], "flags": {"a.b": 2}}
+    assert diff_update(old, new) == {"$set": {"inventory": ["torch"], "flags": {"a.b": 2}}}
+    assert diff_update(new, new) == {}
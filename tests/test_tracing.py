@@ -0,0 +1,102 @@
+import asyncio
+
+import services.tracing as tracing
+from services.action_pipeline import Stage, StageGraph
+from services.tracing import (
+    get_recent_traces, get_trace, leaf_span, span, traced_database, traced_endpoint
+)
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+
+class FakeCollection:
+    def __init__(self, name):
+        self.name = name
+
+    async def find_one(self, query):
+        return {"campaign_id": query.get("campaign_id")}
+
+    async def insert_one(self, doc):
+        return doc
+
+    def find(self, query):
+        return FakeCursor([{"n": 1}, {"n": 2}])
+
+
+class FakeDB:
+    name = "test"
+
+    def __getitem__(self, name):
+        return FakeCollection(name)
+
+    def __getattr__(self, name):
+        return FakeCollection(name)
+
+
+def test_endpoint_trace_breaks_down_stages_llm_and_mongo(monkeypatch):
+    monkeypatch.setattr(tracing, "_traces", type(tracing._traces)(maxlen=10))
+    db = traced_database(FakeDB())
+
+    async def forge(ctx):
+        with leaf_span("llm.chat_completion", **{"llm.model": "gpt-4o"}) as s:
+            s.set_attributes({"llm.prompt_tokens": 900, "llm.completion_tokens": 120, "llm.cached_tokens": 512})
+        return {"draft": "ok"}
+
+    graph = StageGraph("test", [
+        Stage("load", lambda ctx: {"loaded": True}, inputs=["campaign_id"], outputs=["loaded"]),
+        Stage("forge", forge, inputs=["loaded"], outputs=["draft"]),
+    ])
+
+    @traced_endpoint("POST /api/test")
+    async def endpoint(campaign_id):
+        with span("action.load_state"):
+            await db.campaigns.find_one({"campaign_id": campaign_id})
+            await db["characters"].find({}).sort("x", 1).to_list(None)
+        run = await graph.run({"campaign_id": campaign_id})
+        return run.context["draft"]
+
+    assert asyncio.run(endpoint("c1")) == "ok"
+
+    [summary] = get_recent_traces()
+    assert summary["name"] == "POST /api/test" and summary["status"] == "ok"
+    assert set(summary["stages"]) == {"action.load_state", "pipeline.test", "stage.load", "stage.forge"}
+    assert summary["llm"]["calls"] == 1 and summary["llm"]["cached_tokens"] == 512
+    assert summary["mongo"]["ops"] == 2
+
+    otlp = get_trace(summary["trace_id"])
+    spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    by_name = {s["name"]: s for s in spans}
+    # Stage spans run in their own tasks but still hang off the pipeline span
+    assert by_name["stage.forge"]["parentSpanId"] == by_name["pipeline.test"]["spanId"]
+    assert by_name["llm.chat_completion"]["parentSpanId"] == by_name["stage.forge"]["spanId"]
+    assert "parentSpanId" not in by_name["POST /api/test"]
+    assert {"key": "llm.prompt_tokens", "value": {"intValue": "900"}} in by_name["llm.chat_completion"]["attributes"]
+    assert by_name["mongo.find"]["attributes"][-1] == {"key": "db.returned", "value": {"intValue": "2"}}
+
+
+def test_errors_mark_the_root_and_leaf_spans_need_a_trace(monkeypatch):
+    monkeypatch.setattr(tracing, "_traces", type(tracing._traces)(maxlen=10))
+
+    with leaf_span("mongo.find_one") as orphan:
+        orphan.set_attribute("ignored", True)
+    assert get_recent_traces() == []
+
+    @traced_endpoint("POST /api/fails")
+    async def endpoint():
+        raise ValueError("boom")
+
+    try:
+        asyncio.run(endpoint())
+    except ValueError:
+        pass
+    [summary] = get_recent_traces()
+    assert summary["status"] == "error" and summary["error"] == "ValueError: boom"
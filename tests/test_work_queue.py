@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from loadtest.memory_mongo import InMemoryDatabase
+from services.work_queue import WORK_QUEUE_COLLECTION, WorkQueue, register_handler
+
+calls = []
+
+
+async def _record(payload):
+    calls.append(payload["n"])
+
+
+async def _explode(payload):
+    raise RuntimeError("boom")
+
+
+register_handler("test_record", _record)
+register_handler("test_explode", _explode)
+
+
+def make_queue(**kwargs):
+    db = InMemoryDatabase()
+    return WorkQueue(db, workers=1, buffer_size=10, retry_base_seconds=60, **kwargs), db[WORK_QUEUE_COLLECTION]
+
+
+def test_enqueue_is_idempotent_and_a_job_is_claimed_once():
+    async def scenario():
+        queue, jobs = make_queue()
+        await queue.collection.create_index("idempotency_key", unique=True)
+        assert await queue.enqueue("test_record", {"n": 1}, idempotency_key="k1")
+        assert not await queue.enqueue("test_record", {"n": 2}, idempotency_key="k1")
+        assert await jobs.count_documents({}) == 1
+
+        job = await jobs.find_one({})
+        calls.clear()
+        # Two workers racing for the same job: only the lease holder runs it
+        await asyncio.gather(queue._process(job["job_id"]), queue._process(job["job_id"]))
+        assert calls == [1]
+
+        done = await jobs.find_one({"job_id": job["job_id"]})
+        assert done["status"] == "done" and done["attempts"] == 1 and done["finished_at"] is not None
+
+    asyncio.run(scenario())
+
+
+def test_failures_retry_with_backoff_then_fail_permanently():
+    async def scenario():
+        queue, jobs = make_queue(max_attempts=2)
+        await queue.enqueue("test_explode", {}, idempotency_key="k2")
+        job = await jobs.find_one({})
+
+        await queue._process(job["job_id"])
+        retry = await jobs.find_one({})
+        assert retry["status"] == "pending" and retry["attempts"] == 1 and retry["last_error"] == "boom"
+        assert retry["run_after"] >= datetime.now(timezone.utc) + timedelta(seconds=59)
+        assert "finished_at" not in retry
+
+        # Not due yet: a worker leaves it alone
+        await queue._process(job["job_id"])
+        assert (await jobs.find_one({}))["attempts"] == 1
+
+        await jobs.update_one({}, {"$set": {"run_after": datetime.now(timezone.utc)}})
+        await queue._process(job["job_id"])
+        failed = await jobs.find_one({})
+        assert failed["status"] == "failed" and failed["attempts"] == 2 and failed["finished_at"] is not None
+
+    asyncio.run(scenario())
+
+
+def test_expired_lease_is_reclaimed_by_the_poller():
+    async def scenario():
+        queue, jobs = make_queue()
+        await queue.enqueue("test_record", {"n": 3}, idempotency_key="k3")
+        job = await jobs.find_one({})
+        # A worker died mid-job: its lease ran out
+        await jobs.update_one({}, {"$set": {
+            "status": "running", "attempts": 1,
+            "locked_until": datetime.now(timezone.utc) - timedelta(seconds=1),
+        }})
+
+        await queue._poll_once()
+        assert (await jobs.find_one({}))["status"] == "pending"
+        assert job["job_id"] in queue._buffered
+
+        calls.clear()
+        await queue._process(job["job_id"])
+        reclaimed = await jobs.find_one({})
+        assert calls == [3] and reclaimed["status"] == "done" and reclaimed["attempts"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_finished_jobs_expire_through_a_ttl_index():
+    async def scenario():
+        queue, jobs = make_queue(retention_seconds=3600)
+        await queue.start()
+        await queue.stop()
+        ttl = [index for index in (await jobs.index_information()).values() if index["key"] == [("finished_at", 1)]]
+        assert ttl and ttl[0]["expireAfterSeconds"] == 3600
+
+    asyncio.run(scenario())
+
+
+def test_a_retried_action_queues_its_jobs_once(monkeypatch):
+    import routers.dungeon_forge as dungeon_forge
+    import services.work_queue as work_queue
+
+    async def scenario():
+        queue, jobs = make_queue()
+        await jobs.create_index("idempotency_key", unique=True)
+        monkeypatch.setattr(work_queue, "_queue", queue)
+        monkeypatch.setattr(dungeon_forge, "_db", jobs.database)
+
+        payload = {"campaign_id": "c1", "character_id": "ch1", "narration_text": "", "entity_mentions": []}
+        # Client-chosen id resent on retry
+        await dungeon_forge.enqueue_narration_jobs("c1", "action-1", payload)
+        await dungeon_forge.enqueue_narration_jobs("c1", "action-1", payload)
+        assert await jobs.count_documents({}) == 2
+
+        # Without one, the id is derived from the request at that turn
+        derived = dungeon_forge.derive_action_id("c1", "ch1", 4, "I open the door", None)
+        assert derived == dungeon_forge.derive_action_id("c1", "ch1", 4, "I open the door", None)
+        assert derived != dungeon_forge.derive_action_id("c1", "ch1", 5, "I open the door", None)
+        assert derived != dungeon_forge.derive_action_id("c1", "ch1", 4, "I open the door", 12)
+
+    asyncio.run(scenario())
@@ -0,0 +1,104 @@
+import asyncio
+
+from loadtest.memory_mongo import InMemoryDatabase
+import services.world_pool as world_pool
+from services.world_pool import WorldPool, claim_pooled_world, personalize_pooled_intro, rename_world
+
+
+def _pool(**kwargs):
+    return WorldPool(
+        InMemoryDatabase(), depth=2, workers=2, max_refills_per_cycle=10,
+        tones=["Dark fantasy with rare magic"], archetypes=["Human/Fighter/Soldier", "Elf/Wizard/Sage"], **kwargs
+    )
+
+
+def _fake_generation(monkeypatch, calls):
+    import services.world_forge_service as world_forge_service
+    import services.intro_service as intro_service
+
+    async def generate_world_blueprint(world_name, tone, starting_region_hint):
+        calls.append(starting_region_hint)
+        return {"world_core": {"name": world_name}, "starting_town": {"name": "Raven's Hollow"}}
+
+    async def generate_intro_markdown(character, region, world_blueprint):
+        return f"{character['name']} arrives in {region['name']} on {world_blueprint['world_core']['name']}. What do you do?"
+
+    monkeypatch.setattr(world_forge_service, "generate_world_blueprint", generate_world_blueprint)
+    monkeypatch.setattr(intro_service, "generate_intro_markdown", generate_intro_markdown)
+
+
+def test_refill_tops_every_bucket_up_to_depth(monkeypatch):
+    calls = []
+    _fake_generation(monkeypatch, calls)
+
+    async def scenario():
+        pool = _pool()
+        assert await pool.refill_once() == 4
+        await asyncio.gather(*pool._generations)
+        # Full buckets schedule nothing
+        assert await pool.refill_once() == 0
+        return await pool.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["ready"] == 4 and stats["in_flight"] == 0
+    assert set(stats["depth"].values()) == {2}
+    assert "A Sage from Elf heritage begins their journey" in calls
+
+
+def test_claim_prefers_archetype_then_tone_and_renames(monkeypatch):
+    _fake_generation(monkeypatch, [])
+
+    async def scenario():
+        pool = _pool()
+        await pool.refill_once()
+        await asyncio.gather(*pool._generations)
+        monkeypatch.setattr(world_pool, "_pool", pool)
+
+        wizard = {"race": "Elf", "class": "Wizard", "background": "Sage"}
+        hint = "A Sage from Elf heritage begins their journey"
+        first = await claim_pooled_world("Thornmere", "dark fantasy with rare magic", wizard, "c1", hint)
+        second = await claim_pooled_world("Thornmere", "Dark fantasy with rare magic", wizard, "c2", hint)
+        # Wizard bucket is empty now: a world for another starting region is not a match
+        other_region = await claim_pooled_world("Thornmere", "Dark fantasy with rare magic", wizard, "c3", hint)
+        # Without a hint any world of the tone still beats generating
+        third = await claim_pooled_world("Thornmere", "Dark fantasy with rare magic", wizard, "c3")
+        miss = await claim_pooled_world("Thornmere", "Whimsical", wizard, "c4")
+        assert other_region is None
+        # Claimed worlds leave the pool
+        assert await pool.collection.count_documents({}) == 1
+        return pool, first, second, third, miss
+
+    pool, first, second, third, miss = asyncio.run(scenario())
+    assert first["world_blueprint"]["world_core"]["name"] == "Thornmere"
+    assert first["pooled_intro"] == {
+        "archetype": "elf|wizard|sage",
+        "intro": "Arin Vale arrives in Raven's Hollow on Thornmere. What do you do?",
+    }
+    assert second["pooled_intro"]["archetype"] == "elf|wizard|sage"
+    assert third["pooled_intro"]["archetype"] == "human|fighter|soldier"
+    assert miss is None
+    assert pool._stats["hits"] == 3 and pool._stats["archetype_hits"] == 2 and pool._stats["misses"] == 2
+
+
+def test_pooled_intro_is_personalized_only_for_its_archetype(monkeypatch):
+    import services.llm_client as llm_client
+
+    async def failing_completion(model, messages, **kwargs):
+        raise RuntimeError("LLM down")
+
+    monkeypatch.setattr(llm_client, "chat_completion", failing_completion)
+    monkeypatch.setattr(world_pool, "_pool", None)
+    pooled_intro = {"archetype": "elf|wizard|sage", "intro": "Arin Vale arrives. What do you do?"}
+
+    mage = {"name": "Ilsa", "race": "Elf", "class_": "Wizard", "background": "Sage", "goal": "Learn"}
+    fighter = {"name": "Bram", "race": "Human", "class": "Fighter", "background": "Soldier"}
+    assert asyncio.run(personalize_pooled_intro(pooled_intro, mage)) == "Ilsa arrives. What do you do?"
+    assert asyncio.run(personalize_pooled_intro(pooled_intro, fighter)) is None
+    assert asyncio.run(personalize_pooled_intro(None, mage)) is None
+
+
+def test_rename_world_escapes_names():
+    blueprint = {"world_core": {"name": "Aerendal"}, "lore": ["Aerendal's fall"]}
+    renamed = rename_world(blueprint, "Aerendal", 'The "Quiet" Realm')
+    assert renamed == {"world_core": {"name": 'The "Quiet" Realm'}, "lore": ['The "Quiet" Realm\'s fall']}
+    assert blueprint["world_core"]["name"] == "Aerendal"